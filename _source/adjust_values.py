@@ -0,0 +1,155 @@
+import numpy as np
+import scipy.sparse as sp
+from _source.extraction import HourlyValues, hourly_matrix
+
+def incidence(bus, elements, at_bus, status=None):
+    '''
+        Está función crea la matriz dispersa (barras x elementos) con las mismas condiciones de las sumas
+        por barra: atBus.get((elemento, barra)) and status.get((elemento, barra))
+        input
+            bus: lista de barras
+            elements: lista de elementos (gen, slack, ...)
+            at_bus: diccionario {(elemento, barra): True}
+            status: diccionario {(elemento, barra): True} opcional
+        return
+            matriz dispersa (barras x elementos)
+    '''
+    bus_pos = dict((label, k) for k, label in enumerate(bus))
+    element_bus = {}
+    for (element, label), value in at_bus.items():
+        if value and label in bus_pos and (status is None or status.get((element, label))):
+            element_bus.setdefault(element, []).append(bus_pos[label])
+    rows, cols = [], []
+    for c, element in enumerate(elements):
+        for r in element_bus.get(element, []):
+            rows.append(r)
+            cols.append(c)
+    return sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(bus), len(elements)))
+
+def branch_incidence(bus, branch, branch_bus):
+    '''
+        Está función crea la matriz dispersa (barras x ramas) desde las listas branchij_bus o branchji_bus
+        input
+            bus: lista de barras
+            branch: lista de ramas ij o ji
+            branch_bus: diccionario barra -> lista de ramas
+        return
+            matriz dispersa (barras x ramas)
+    '''
+    # las líneas paralelas repiten la etiqueta, cada aparición en branch_bus toma la siguiente posición
+    branch_pos, used = {}, {}
+    for k, label in enumerate(branch):
+        branch_pos.setdefault(label, []).append(k)
+    rows, cols = [], []
+    for r, label in enumerate(bus):
+        for ij in branch_bus.get(label, []):
+            rows.append(r)
+            cols.append(branch_pos[ij][used.get(ij, 0)])
+            used[ij] = used.get(ij, 0) + 1
+    return sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(bus), len(branch)))
+
+def bus_adjacency(bus, gen, slack, demandbid, at_bus, at_bus_slack, load_at_bus, ij, ji, branchij_bus, branchji_bus):
+    '''
+        Está función crea el índice de adyacencia tipo CSR de cada barra, en la fila k de cada matriz
+        indices[indptr[k]:indptr[k+1]] son las posiciones de los elementos conectados a la barra k
+        input
+            bus: lista de barras
+            gen, slack, demandbid: listas de generadores, slacks y cargas
+            at_bus, at_bus_slack, load_at_bus: diccionarios {(elemento, barra): True}
+            ij, ji: listas de ramas
+            branchij_bus, branchji_bus: diccionarios barra -> ramas que salen (ij) y que llegan (ji)
+        return
+            dict: matrices dispersas csr (barras x elementos) de gen, slack, demandbid, ij y ji
+    '''
+    return {
+        'gen': incidence(bus, gen, at_bus),
+        'slack': incidence(bus, slack, at_bus_slack),
+        'demandbid': incidence(bus, demandbid, load_at_bus),
+        'ij': branch_incidence(bus, ij, branchij_bus),
+        'ji': branch_incidence(bus, ji, branchji_bus),
+    }
+
+def get_adjust_values(system_param, system_values, genstatus, g, b, ratio_line, hours=range(1,25)):
+    '''
+        Está función calcula las variables de ajuste del modelo con operaciones de matrices
+        (ramas x horas) y (barras x horas)
+        input
+            system_param: parámetros del sistema
+            system_values: valores del sistema (HourlyValues o diccionario)
+            genstatus: estado de los generadores
+            g, b: conductance y susceptance de las ramas
+            ratio_line: capacidad máxima de las líneas
+            hours: lista de horas
+        return
+            HourlyValues: ajustes de las ecuaciones de igualdad
+    '''
+    hours = list(hours)
+    ij, ji, bus = system_param.get('ij'), system_param.get('ji'), system_param.get('bus')
+    def matrix(name, labels):
+        return hourly_matrix(system_values, name, labels, hours)
+    ## índices de los extremos de cada rama
+    ij_i, ij_j = [k.split('-')[0] for k in ij], [k.split('-')[1] for k in ij]
+    ji_j, ji_i = [k.split('-')[0] for k in ji], [k.split('-')[1] for k in ji]
+    g_ij, b_ij = np.array([g[k] for k in ij]), np.array([b[k] for k in ij])
+    g_ji, b_ji = np.array([g[k] for k in ji]), np.array([b[k] for k in ji])
+    v_bus, theta_bus = matrix('init_bus_v', bus), matrix('init_bus_theta', bus)
+    bus_pos = dict((label, k) for k, label in enumerate(bus))
+    def at(values, labels):
+        return values[:, [bus_pos[label] for label in labels]]
+    pij, qij = matrix('init_line_pij', ij), matrix('init_line_qij', ij)
+    pji, qji = matrix('init_line_pji', ji), matrix('init_line_qji', ji)
+    ## ajuste de la potencia aparente
+    s_v1 = np.array([ratio_line[k] for k in ij])**2
+    s_v2 = pij**2 + qij**2
+    signo_sij = np.where((s_v1>0) & (s_v2<0) | (s_v1<0) & (s_v2>0), -1, 1)
+    adj_slimit_sij = np.abs(s_v2/s_v1)*signo_sij
+    ## ajuste de los flujos de potencia
+    v_i, v_j = at(v_bus, ij_i), at(v_bus, ij_j)
+    theta_ij = at(theta_bus, ij_i) - at(theta_bus, ij_j)
+    adj_line_pij = (
+        g_ij*v_i**2 - v_i*v_j*(g_ij*np.cos(theta_ij) + b_ij*np.sin(theta_ij))
+        - pij
+    )
+    adj_line_qij = (
+        -v_i**2*b_ij - v_i*v_j*(g_ij*np.sin(theta_ij) - b_ij*np.cos(theta_ij))
+        - qij
+    )
+    v_j, v_i = at(v_bus, ji_j), at(v_bus, ji_i)
+    theta_ji = at(theta_bus, ji_j) - at(theta_bus, ji_i)
+    adj_line_pji = (
+        g_ji*v_j**2 - v_j*v_i*(g_ji*np.cos(theta_ji) + b_ji*np.sin(theta_ji))
+        - pji
+    )
+    adj_line_qji = (
+        -v_i**2*b_ji - v_j*v_i*(g_ji*np.sin(-theta_ji) - b_ji*np.cos(-theta_ji))
+        - qji
+    )
+    ## balance de potencia
+    gen, slack = system_param.get('gen'), system_param.get('slack')
+    C_gen = incidence(bus, gen, system_param.get('atBus'), genstatus)
+    C_slack = incidence(bus, slack, system_param.get('atBusSlack'))
+    C_ij = branch_incidence(bus, ij, system_param.get('branchij_bus'))
+    C_ji = branch_incidence(bus, ji, system_param.get('branchji_bus'))
+    def at_bus(C, values):
+        return np.asarray((C*values.T).T)
+    def demand(name):
+        # las barras sin carga no están en Pd y Qd, su demanda es cero
+        return hourly_matrix(system_values, name, bus, hours, fill=0)
+    flows = at_bus(C_ij, pij) + at_bus(C_ji, pji) + v_bus**2
+    adj_p_balance = (
+        at_bus(C_gen, matrix('init_gen_p', gen)) + at_bus(C_slack, matrix('init_slack_p', slack)) - demand('Pd')
+        - flows
+    )
+    adj_q_balance = (
+        at_bus(C_gen, matrix('init_gen_q', gen)) + at_bus(C_slack, matrix('init_slack_q', slack)) - demand('Qd')
+        - flows
+    )
+    return HourlyValues(hours, {
+        'adj_line_pij': (ij, adj_line_pij),
+        'adj_line_pji': (ji, adj_line_pji),
+        'adj_line_qij': (ij, adj_line_qij),
+        'adj_line_qji': (ji, adj_line_qji),
+        'adj_slimit_sij': (ij, adj_slimit_sij),
+        'adj_p_balance': (bus, adj_p_balance),
+        'adj_q_balance': (bus, adj_q_balance),
+    })
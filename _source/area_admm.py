@@ -0,0 +1,327 @@
+import os
+import time
+import numpy as np
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from _source.area_model import build_area_model, BORDER_TERMS
+from _source.area_system import GetVariablesSystem
+from _source.boundary_store import BoundaryStore
+from _source.solver_session import SolverSession
+from _source.solver_backends import SolverBackend, PYTHON_SOLVERS, OWNER_SOLVERS
+
+# modelos, sesiones y valores del sistema por área de cada proceso, cada proceso tiene sus áreas fijas
+_area_models = {}
+_area_sessions = {}
+_area_values = {}
+_area_config = None
+# estado de frontera compartido (capas x, z, u), los procesos leen y escriben sus áreas en el lugar
+_area_store = None
+
+def _init_area_admm_worker(system_name, areas, backend, profile, work_dir, model_kwargs, spec):
+    '''
+        Está función crea en el proceso los modelos de sus áreas inicializados con el equivalente ward, se conecta al
+        BoundaryStore y escribe en la capa x los valores de frontera del punto inicial
+        input
+            system_name: nombre del sistema, ej: ieee9
+            areas: áreas que resuelve el proceso
+            backend: nombre del backend del registro
+            profile: perfil de opciones del backend
+            work_dir: carpeta base de los archivos .nl y .sol
+            model_kwargs: argumentos de CreateModel
+            spec: BoundaryStore.spec del estado de frontera
+        return
+            None
+    '''
+    global _area_config, _area_store
+    _area_config = {'system_name': system_name, 'backend': backend, 'profile': profile, 'work_dir': work_dir}
+    _area_store = BoundaryStore.attach(spec)
+    for area in areas:
+        model, system = build_area_model(system_name, area, **model_kwargs)
+        system_values = system._get_values_from_system(area)
+        model._set_variables_model(system_values)
+        model._set_adjust_values(system._get_adjust_values())
+        model.border = model._border_terms()
+        model.solver_info = None
+        model.write_boundary(_area_store, area, 'x')
+        _area_models[area], _area_values[area] = model, system_values
+
+def _close_area_store():
+    '''
+        Está función cierra la conexión del proceso al BoundaryStore, el bloque lo borra el proceso que lo creó
+        input
+            None
+        return
+            None
+    '''
+    global _area_store
+    if _area_store is not None: _area_store.close()
+    _area_store = None
+
+def _get_area_borders():
+    '''
+        Está función entrega las barras de frontera y las ramas de las áreas del proceso
+        input
+            None
+        return
+            dict: área -> (barras de frontera, ramas (i, j))
+    '''
+    return dict((area, (list(model.model.border_node), set(frozenset(ij.split('-')) for ij in model.model.ij)))
+                for area, model in _area_models.items())
+
+def _solve_area_borders(rho, areas):
+    '''
+        Está función resuelve las áreas del proceso con los objetivos y duales de frontera del BoundaryStore, cada
+        área parte de su solución anterior, conserva su SolverSession y deja sus valores de frontera en la capa x
+        input
+            rho: penalización de la coordinación
+            areas: áreas del proceso a resolver
+        return
+            list: diccionarios con el área, estado, objetivo sin penalización y tiempo
+    '''
+    system_name, work_dir = _area_config['system_name'], _area_config['work_dir']
+    results = []
+    for area in areas:
+        model = _area_models[area]
+        m = model.model
+        m.Rho = rho
+        model.read_boundary(_area_store, area, ('z', 'u'))
+        solver = SolverBackend(_area_config['backend'], _area_config['profile'], system_name=system_name)
+        session = None
+        if solver.solver not in PYTHON_SOLVERS:
+            area_dir = os.path.join(work_dir, system_name, f'area_{area}')
+            if area not in _area_sessions:
+                os.makedirs(area_dir, exist_ok=True)
+                _area_sessions[area] = SolverSession(m, solver.solver, work_dir=area_dir, name=f'{system_name}_area_{area}', tee=False)
+            session = _area_sessions[area]
+        is_solve, info = solver.solve(m, session)
+        model.solver_info = info
+        m.Rho = 0
+        objective = pyomo.value(m.obj, exception=False)
+        m.Rho = rho
+        model.write_boundary(_area_store, area, 'x')
+        results.append({
+            'area': area,
+            'solved': is_solve,
+            'objective': objective,
+            'time': info['total'],
+        })
+    return results
+
+def _save_area_models():
+    '''
+        Está función guarda las variables de las áreas del proceso que se resolvieron en ResultadosAreas/{system}
+        input
+            None
+        return
+            None
+    '''
+    for area, model in _area_models.items():
+        if model.solver_info and model.solver_info['status']: model.save_model_variables(area, _area_values[area])
+
+class AreaADMM(object):
+    '''
+        Class encargada de coordinar los modelos de las áreas con ADMM, cada área se resuelve en su proceso con la
+        penalización rho/2*(x - Z + U)**2 sobre sus cantidades de frontera (Params de _add_param_model) y los objetivos
+        se calculan en forma cerrada: las áreas que comparten una barra de frontera deben tener el mismo voltaje y el
+        ward de un área debe ser el flujo que la otra área saca de la barra más el resto del sistema que no está en
+        ninguna de las dos (fijo en el valor del equivalente ward), se itera hasta que los residuos primal y dual sean
+        menores a tol, los valores, objetivos y duales de frontera viven en un BoundaryStore compartido con los procesos
+    '''
+    def __init__(self, system_name, areas=None, backend='bonmin_oa', profile='fast_screening', rho=1.0, max_iter=50,
+                 tol=1e-3, adaptive=True, processes=None, work_dir='area_admm', model_kwargs=None, print_sec=False):
+        '''
+            Está función instancia la clase AreaADMM
+            input
+                system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+                areas: áreas a coordinar, por defecto todas las de sep_areas
+                backend: backend de solver_backends de las áreas
+                profile: perfil de opciones del backend
+                rho: penalización inicial del ADMM
+                max_iter: número máximo de iteraciones
+                tol: tolerancia de los residuos primal y dual
+                adaptive: si es True rho se ajusta para balancear los residuos primal y dual
+                processes: número de procesos, por defecto os.cpu_count() (máximo uno por área)
+                work_dir: carpeta de los archivos .nl, .sol y registros de las áreas
+                model_kwargs: argumentos de CreateModel, ej: {'formulation': 'square'}
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo AreaADMM
+        '''
+        if SolverBackend(backend, profile, system_name=system_name).solver in OWNER_SOLVERS:
+            raise ValueError(f'El backend {backend} necesita el modelo completo de CreateModel (model.py) y no sirve para '
+                             f'las áreas, use un backend AMPL (bonmin_oa, ipopt, ...) o scipy')
+        self.system_name = system_name
+        self.areas = list(areas or GetVariablesSystem(system_name).sep_areas)
+        self.backend = backend
+        self.profile = profile
+        self.rho = rho
+        self.max_iter = max_iter
+        self.tol = tol
+        self.adaptive = adaptive
+        self.processes = max(1, min(processes or os.cpu_count() or 1, len(self.areas)))
+        self.work_dir = work_dir
+        self.model_kwargs = dict(model_kwargs or {})
+        self.print_sec = print_sec
+        self.folder = f'ResultadosAreas/{system_name}'
+        self.history = []
+        self.store = None
+    def _set_links(self, borders, lines):
+        '''
+            Está función arma los enlaces entre áreas, una barra de frontera que está en dos áreas las acopla, el
+            resto del sistema en cada barra es cero si las dos áreas tienen todas las líneas de la barra, de lo
+            contrario se fija con los valores iniciales de la capa x (ward - flujo de la otra área)
+            input
+                borders: diccionario área -> (barras de frontera, ramas)
+                lines: ramas (i, j) del sistema completo
+            return
+                None
+        '''
+        at_bus = {}
+        for area in self.areas:
+            for bus in borders[area][0]:
+                at_bus.setdefault(bus, []).append(area)
+        x, fields = self.store.layer('x'), self.store.field_pos
+        self.rest = np.zeros(x.shape[:3] + (2,))
+        rows, a, b = [], [], []
+        for bus, shared in at_bus.items():
+            if len(shared) > 2:
+                raise ValueError(f'La barra de frontera {bus} está en más de dos áreas: {shared}')
+            if len(shared) < 2: continue
+            row = self.store.bus_pos[self.bus_index[bus]]
+            area, other = self.store.area_pos[shared[0]], self.store.area_pos[shared[1]]
+            rows.append(row), a.append(area), b.append(other)
+            if all(line in borders[shared[0]][1] | borders[shared[1]][1] for line in lines if bus in line): continue
+            for k, (ward, flow) in enumerate([('pward', 'pflow'), ('qward', 'qflow')]):
+                self.rest[area, row, :, k] = x[area, row, :, fields[ward]] - x[other, row, :, fields[flow]]
+                self.rest[other, row, :, k] = x[other, row, :, fields[ward]] - x[area, row, :, fields[flow]]
+        # enlaces (barra, área, otra área) y en las dos direcciones (ward del área, flujo de la otra área)
+        self.links = tuple(np.array(index, dtype=int) for index in (rows, a, b))
+        self.pairs = (np.concatenate([self.links[0], self.links[0]]), np.concatenate([self.links[1], self.links[2]]),
+                      np.concatenate([self.links[2], self.links[1]]))
+    def _z_update(self):
+        '''
+            Está función calcula en el lugar la capa z del BoundaryStore, proyección de x + u sobre las restricciones
+            de acople, el voltaje de las dos áreas es el promedio y el par (ward del área, flujo de la otra área) se
+            corrige por partes iguales para que ward - flujo sea el resto del sistema
+            input
+                None
+            return
+                None
+        '''
+        z, fields = self.store.layer('z'), self.store.field_pos
+        np.add(self.store.layer('x'), self.store.layer('u'), out=z)
+        rows, a, b = self.links
+        mean = (z[a, rows, :, fields['vbus']] + z[b, rows, :, fields['vbus']])/2
+        z[a, rows, :, fields['vbus']], z[b, rows, :, fields['vbus']] = mean, mean
+        rows, a, b = self.pairs
+        for k, (ward, flow) in enumerate([('pward', 'pflow'), ('qward', 'qflow')]):
+            r = (z[a, rows, :, fields[ward]] - z[b, rows, :, fields[flow]] - self.rest[a, rows, :, k])/2
+            z[a, rows, :, fields[ward]] -= r
+            z[b, rows, :, fields[flow]] += r
+    def _dual_update(self, z_prev):
+        '''
+            Está función actualiza en el lugar la capa u del BoundaryStore y calcula los residuos del ADMM
+            input
+                z_prev: copia de la capa z de la iteración anterior
+            return
+                float, float: residuo primal y dual
+        '''
+        x, z, u = self.store.layer('x'), self.store.layer('z'), self.store.layer('u')
+        u += x - z
+        return np.sqrt(np.sum((x - z)**2)), self.rho*np.sqrt(np.sum((z - z_prev)**2))
+    def _mismatch(self):
+        '''
+            Está función calcula el máximo desacople de frontera de la capa x, diferencia de voltaje entre áreas y
+            error del ward respecto al flujo de la otra área más el resto del sistema
+            input
+                None
+            return
+                float, float: desacople de voltaje y de potencia
+        '''
+        x, fields = self.store.layer('x'), self.store.field_pos
+        rows, a, b = self.links
+        voltage = np.abs(x[a, rows, :, fields['vbus']] - x[b, rows, :, fields['vbus']]).max(initial=0.0)
+        rows, a, b = self.pairs
+        power = max(np.abs(x[a, rows, :, fields[ward]] - x[b, rows, :, fields[flow]] - self.rest[a, rows, :, k]).max(initial=0.0)
+                    for k, (ward, flow) in enumerate([('pward', 'pflow'), ('qward', 'qflow')]))
+        return voltage, power
+    def run(self):
+        '''
+            Está función itera el ADMM, guarda las variables de las áreas en ResultadosAreas/{system} y la historia
+            de las iteraciones en AreaAdmm__res.csv, en cada iteración a los procesos solo viaja rho y sus áreas
+            input
+                None
+            return
+                bool: True si el ADMM convergió y todas las áreas se resolvieron en la última iteración
+        '''
+        t0 = time.perf_counter()
+        os.makedirs(self.folder, exist_ok=True)
+        system = GetVariablesSystem(self.system_name)
+        self.bus_index = system.bus_index
+        buses = sorted(set(self.bus_index[str(bus)] for area in self.areas for bus in system.sep_areas[area]['border_node']))
+        self.store = BoundaryStore(self.areas, buses, range(1,len(system.hours)+1), BORDER_TERMS, ('x', 'z', 'u'))
+        chunks = [self.areas[i::self.processes] for i in range(self.processes)]
+        if self.print_sec: print(f'\n--> ADMM de {len(self.areas)} áreas de {self.system_name} en {self.processes} procesos <--\n')
+        executors = [ProcessPoolExecutor(max_workers=1, initializer=_init_area_admm_worker,
+                                         initargs=(self.system_name, chunk, self.backend, self.profile, self.work_dir,
+                                                   self.model_kwargs, self.store.spec))
+                     for chunk in chunks]
+        self.converged, solved = False, False
+        try:
+            borders = {}
+            for future in [executor.submit(_get_area_borders) for executor in executors]:
+                borders.update(future.result())
+            line = system.system.line
+            self._set_links(borders, [frozenset((str(i), str(j))) for i, j in zip(line['from_bus'], line['to_bus'])])
+            self._z_update()
+            for k in range(self.max_iter):
+                t1 = time.perf_counter()
+                futures = [executor.submit(_solve_area_borders, self.rho, chunk) for executor, chunk in zip(executors, chunks)]
+                results = [result for future in futures for result in future.result()]
+                t2 = time.perf_counter()
+                solved = all(result['solved'] for result in results)
+                z_prev = self.store.layer('z').copy()
+                self._z_update()
+                primal, dual = self._dual_update(z_prev)
+                voltage, power = self._mismatch()
+                self.history.append({'iteration': k, 'rho': self.rho, 'primal': primal, 'dual': dual,
+                                     'mismatch_v': voltage, 'mismatch_s': power,
+                                     'objective': sum(result['objective'] or 0 for result in results), 'solved': solved,
+                                     'solve': max(result['time'] for result in results), 'update': time.perf_counter() - t2,
+                                     'time': time.perf_counter() - t1})
+                if self.print_sec: print('ADMM áreas {iteration}: obj {objective:.6g} - primal {primal:.3g} - dual {dual:.3g} - desacople V {mismatch_v:.3g} S {mismatch_s:.3g} - {time:.3f}s'.format(**self.history[-1]))
+                if primal <= self.tol and dual <= self.tol:
+                    self.converged = True
+                    break
+                if self.adaptive and primal > 10*dual:
+                    self.rho = 2*self.rho
+                    self.store.layer('u')[:] /= 2
+                elif self.adaptive and dual > 10*primal:
+                    self.rho = self.rho/2
+                    self.store.layer('u')[:] *= 2
+            for future in [executor.submit(_save_area_models) for executor in executors]:
+                future.result()
+        finally:
+            for executor in executors:
+                # cada proceso cierra su conexión al store antes de apagarse, shutdown espera a que termine
+                try: executor.submit(_close_area_store)
+                except BrokenProcessPool: pass
+                executor.shutdown()
+            self.store.close()
+        DataFrame(self.history).to_csv(f'{self.folder}/AreaAdmm__res.csv', index=False)
+        self.solver_info = {
+            'backend': self.backend,
+            'profile': self.profile,
+            'decomposition': 'area_admm',
+            'iterations': len(self.history),
+            'converged': self.converged,
+            'status': solved,
+            'primal': self.history[-1]['primal'] if self.history else None,
+            'dual': self.history[-1]['dual'] if self.history else None,
+            'rho': self.rho,
+            'total': time.perf_counter() - t0,
+        }
+        if self.print_sec: print(f'ADMM áreas: convergió {self.converged} - {self.solver_info["total"]:.3f}s')
+        return self.converged and solved
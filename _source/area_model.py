@@ -1,21 +1,41 @@
+import numpy as np
 import pyomo.environ as pyomo
 from pandas import DataFrame
-class CreateModel(object):
+from _source.solver_session import SolverSession
+from _source.solver_backends import SolverBackend, PYTHON_SOLVERS
+from _source.warm_start import add_warm_start_suffixes, save_warm_start, load_warm_start, warm_start_options
+from _source.area_system import GetVariablesSystem
+from _source.extraction import HourlyValues
+from _source.model_base import ModelBase, FORMULATIONS
+
+# cantidades de frontera que se intercambian entre áreas, voltaje, wards y flujo que sale de la barra por las ramas del área
+BORDER_TERMS = ['vbus', 'pward', 'qward', 'pflow', 'qflow']
+class CreateModel(ModelBase):
     '''
         Class encargada de crar el modelo de optimización
     '''
-    def __init__(self, system_param, print_sec=False):
+    def __init__(self, system_param, int_index=False, sparse_index=False, formulation='abs', print_sec=False):
         '''
             Está función instancia la clase CreateModel 
             input
                system_param: valores i, j del sistema 
                system_values: valores del sistema
                adjust_values: valores de ajuste para ecuaciones de igualdad
+               int_index: si es True las restricciones se indexan con Sets enteros de ramas y barras
+               sparse_index: si es True las variables se crean solo sobre las tuplas válidas (demandbidmap,
+                             trafos de las ramas y shunts de las barras del modelo)
+               formulation: forma de las restricciones |A| - |B| <= error (balances y potencia reactiva de ieee39/ieee118),
+                            'abs' o 'square' (A**2 - B**2 <= error**2)
                print_sec: para imprimir secuencia de ejecuciones
             return
                 Objeto de tipo model
         '''
+        if formulation not in FORMULATIONS:
+            raise ValueError(f'La formulación {formulation} no existe, formulaciones: {FORMULATIONS}')
         self.print_sec = print_sec
+        self.int_index = int_index
+        self.sparse_index = sparse_index
+        self.formulation = formulation
         self.system_param = system_param
     def init_model(self):
         '''
@@ -27,12 +47,18 @@ class CreateModel(object):
         '''
         if self.print_sec: print('Se crea el objeto del modelo de optimización y los Sets')
         self.model = pyomo.ConcreteModel()
+        self.session = None
+        self.solver_info = None
+        self.warm_start_info = None
+        self.boundary_index = None
+        self.bulk_index = {}
         self.error = 1e-8
         self.min_trafo = 1
         self.m_trafo = 3
         self.max_trafo = 5
         self.max_shunt = 5
         self.model.name = self.system_param.get('model_name')
+        add_warm_start_suffixes(self.model)
         self.model.i = pyomo.Set(initialize=[i for i in self.system_param.get('i')], doc='Terminal i')
         self.model.trafo = pyomo.Set(initialize=[bus for bus in self.system_param.get('bus_trafo')], doc='Bus trafo')
         self.model.ij = pyomo.Set(initialize=[ij for ij in self.system_param.get('ij')], doc='Terminal ij')
@@ -44,7 +70,8 @@ class CreateModel(object):
         self.model.bus_load = pyomo.Set(initialize=[bus for bus in self.system_param.get('bus_load')], doc='Buses Load')
         self.model.bus_shunt = pyomo.Set(initialize=[sht for sht in self.system_param.get('bus_shunt')], doc='Shunt')
         self.model.border_node = pyomo.Set(initialize=[bus for bus in self.system_param.get('ward_bus')], doc='Ward Bus')
-        self.model.t = pyomo.Set(initialize=[t for t in range(1,25)], doc='Time')
+        self.model.t = pyomo.Set(initialize=[t for t in self.system_param.get('hours')], doc='Time')
+        self._set_index_tables()
         # init variables  
         self.dict_keys = {
             'init_bus_theta':'Var_V_Theta','init_bus_v':'Var_V_Vbus',
@@ -177,8 +204,10 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la variable V_Shunt')
+        if self.sparse_index:
+            self.model.shunt = pyomo.Set(initialize=[bus for bus in self.model.bus_shunt if bus in self.bus_pos], doc='Shunt bus')
         self.model.V_Shunt = pyomo.Var(
-                self.model.bus_shunt,
+                self.model.shunt if self.sparse_index else self.model.bus_shunt,
                 self.model.t, 
                 within=pyomo.Integers,
                 bounds=(-self.max_shunt,self.max_shunt),
@@ -220,35 +249,60 @@ class CreateModel(object):
                 bounds=(0,1),
                 within=pyomo.Reals,
             )
+        if self.sparse_index:
+            # solo los trafos que están en el extremo de envío de alguna rama aparecen en las restricciones
+            sending = (set(i for i, trafo in zip(self.ij_from, self.ij_trafo) if trafo) 
+                       | set(i for i, trafo in zip(self.ji_to, self.ji_trafo) if trafo))
+            self.model.trafo_branch = pyomo.Set(initialize=[bus for bus in self.model.trafo if self.bus_pos.get(bus) in sending], 
+                                                doc='Bus trafo branch')
         self.model.V_Rtrafo= pyomo.Var(
-                self.model.trafo,
+                self.model.trafo_branch if self.sparse_index else self.model.trafo,
                 self.model.t,
                 bounds=(self.min_trafo,self.max_trafo),
                 initialize = self.m_trafo,
                 within=pyomo.Integers,
             )
-    def _add_var_pd_elastic(self):
+    def _add_var_pd_elastic(self, demandbidmap=None):
         '''
             Está función crea la variable de demanda elastica V_Pd_elastic(demandbid,t)
             input    
-                None
+                demandbidmap: id de la demanda y bus en el que se conecta, en modo sparse_index las
+                              variables se crean solo para sus tuplas
             return
                 None
         '''
         if self.print_sec: print('Se agrega la variable V_Pd_elastic')
-        self.model.V_Pd_elastic = pyomo.Var(
-                self.model.demandbid,
-                self.model.bus, 
-                within=pyomo.Reals,
-                doc='potencia in gen g at time t'
-            )
-        self.model.V_Qd_elastic = pyomo.Var(
-                self.model.demandbid,
-                self.model.bus, 
-                self.model.t,
-                within=pyomo.Reals,
-                doc='potencia in gen g at time t'
-            )
+        if self.sparse_index:
+            self.model.demandbid_bus = pyomo.Set(
+                    initialize=[key for key, value in (demandbidmap or {}).items() if value], 
+                    dimen=2, 
+                    doc='Demandbid bus'
+                )
+            self.model.V_Pd_elastic = pyomo.Var(
+                    self.model.demandbid_bus,
+                    within=pyomo.Reals,
+                    doc='potencia in gen g at time t'
+                )
+            self.model.V_Qd_elastic = pyomo.Var(
+                    self.model.demandbid_bus,
+                    self.model.t,
+                    within=pyomo.Reals,
+                    doc='potencia in gen g at time t'
+                )
+        else:
+            self.model.V_Pd_elastic = pyomo.Var(
+                    self.model.demandbid,
+                    self.model.bus, 
+                    within=pyomo.Reals,
+                    doc='potencia in gen g at time t'
+                )
+            self.model.V_Qd_elastic = pyomo.Var(
+                    self.model.demandbid,
+                    self.model.bus, 
+                    self.model.t,
+                    within=pyomo.Reals,
+                    doc='potencia in gen g at time t'
+                )
     def _add_param_model(self):
         '''
             Está función crea los parámetros del modelo de optimization
@@ -309,6 +363,13 @@ class CreateModel(object):
             self.model.t,
             mutable=True
         )         
+        # parámetros de la coordinación de áreas (AreaADMM), con Rho en cero el objetivo no cambia
+        self.model.Rho = pyomo.Param(initialize=0, mutable=True, doc='Penalización de la coordinación de áreas')
+        for name in BORDER_TERMS:
+            self.model.add_component(f'Z_{name}', pyomo.Param(self.model.border_node, self.model.t, initialize=0,
+                                                              mutable=True, doc=f'Objetivo de frontera de {name}'))
+            self.model.add_component(f'U_{name}', pyomo.Param(self.model.border_node, self.model.t, initialize=0,
+                                                              mutable=True, doc=f'Dual escalado de frontera de {name}'))
     def _add_power_s_constraint(self, ratio_line):
         '''
             Está función crea la restricción de potencia aparente para las líneas (i,j,c)
@@ -318,16 +379,18 @@ class CreateModel(object):
             return
                 None
         '''
-        def c_SLimit(model, ij, t):
+        ratio_ij = [ratio_line[ij] for ij in self.ij_list]
+        pij, qij = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LineQij, self.ij_list)
+        def c_SLimit(model, k, t):
                 return (
-                        (model.V_LinePij[ij, t])**2
-                        + (model.V_LineQij[ij, t])**2
-                        <= (ratio_line[ij])**2 * model.Adj_slimit_sij[ij,t]
+                        (pij[k][t])**2
+                        + (qij[k][t])**2
+                        <= (ratio_ij[k])**2 * model.Adj_slimit_sij[self.ij_list[k],t]
                     )
         if self.print_sec: print('Se agrega la restricción de potencia aparente')
-        self.model.line_s_limit = pyomo.Constraint(self.model.ij,
+        self.model.line_s_limit = pyomo.Constraint(self._index_set('ij'),
                                                     self.model.t, 
-                                                    rule=c_SLimit,
+                                                    rule=self._index_rule(c_SLimit, self.ij_pos),
                                                     doc='Apparent power limit on line ijc')
     def _add_power_p_constraint(self, g , b):
         '''
@@ -341,37 +404,44 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de potencia activa')
-        def line_constraint_ij(model, ij, t):
+        g_ij, b_ij = [g[ij] for ij in self.ij_list], [b[ij] for ij in self.ij_list]
+        g_ji, b_ji = [g[ji] for ji in self.ji_list], [b[ji] for ji in self.ji_list]
+        terms_ij, terms_ji = self._branch_terms('ij'), self._branch_terms('ji')
+        rtrafo = self._var_table(self.model.V_Rtrafo, self.trafo_list)
+        pij, pji = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LinePji, self.ji_list)
+        def line_constraint_ij(model, k, t):
+            i, (v2, vv, cos, sin) = self.ij_from[k], terms_ij[k][t]
             return (
-                    (g[ij] * (model.V_Vbus[ij.split('-')[0],t]**2)
-                    / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1))
-                    - (model.V_Vbus[ij.split('-')[0],t] * model.V_Vbus[ij.split('-')[1],t]
-                    / (model.V_Rtrafo[ij.split('-')[0],t] if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1))
-                    * (g[ij] * pyomo.cos(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t]) 
-                    + b[ij] * pyomo.sin(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t]))
+                    (g_ij[k] * (v2)
+                    / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1))
+                    - (vv
+                    / (rtrafo[i][t] if self.ij_trafo[k] else 1))
+                    * (g_ij[k] * cos 
+                    + b_ij[k] * sin)
                     ==
-                    model.V_LinePij[ij,t] + model.Adj_line_pij[ij,t]
+                    pij[k][t] + model.Adj_line_pij[self.ij_list[k],t]
                 )
         self.model.line_p_limit_ij = pyomo.Constraint(
-                                        self.model.ij,
+                                        self._index_set('ij'),
                                         self.model.t, 
-                                        rule=line_constraint_ij,
+                                        rule=self._index_rule(line_constraint_ij, self.ij_pos),
                                         doc='Active power limit on line ijc'
                                     )
-        def line_constraint_ji(model, ji, t):
+        def line_constraint_ji(model, k, t):
+            i, (v2, vv, cos, sin) = self.ji_to[k], terms_ji[k][t]
             return (
-                    g[ji] * model.V_Vbus[ji.split('-')[1],t]**2
-                    - (model.V_Vbus[ji.split('-')[0],t] * model.V_Vbus[ji.split('-')[1],t]
-                    / (model.V_Rtrafo[ji.split('-')[1],t]**2 if self.system_param.get('bus_trafo').get(ji.split('-')[1]) else 1))
-                    * (g[ji] * pyomo.cos(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t]) 
-                    + b[ji] * pyomo.sin(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t]))
+                    g_ji[k] * v2
+                    - (vv
+                    / (rtrafo[i][t]**2 if self.ji_trafo[k] else 1))
+                    * (g_ji[k] * cos 
+                    + b_ji[k] * sin)
                     ==
-                    model.V_LinePji[ji,t] + model.Adj_line_pji[ji,t]
+                    pji[k][t] + model.Adj_line_pji[self.ji_list[k],t]
                 )
         self.model.line_p_limit_ji = pyomo.Constraint(
-                                        self.model.ji,
+                                        self._index_set('ji'),
                                         self.model.t, 
-                                        rule=line_constraint_ji,
+                                        rule=self._index_rule(line_constraint_ji, self.ji_pos),
                                         doc='Active power limit on line jic'
                                     )
     def _add_power_q_constraint(self, g , b):
@@ -386,66 +456,73 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de potencia reactiva')
+        g_ij, b_ij = [g[ij] for ij in self.ij_list], [b[ij] for ij in self.ij_list]
+        g_ji, b_ji = [g[ji] for ji in self.ji_list], [b[ji] for ji in self.ji_list]
+        terms_ij, terms_ji = self._branch_terms('ij'), self._branch_terms('ji')
+        rtrafo = self._var_table(self.model.V_Rtrafo, self.trafo_list)
+        qij, qji = self._var_table(self.model.V_LineQij, self.ij_list), self._var_table(self.model.V_LineQji, self.ji_list)
         if (self.system_param.get('system_name') in ['ieee39','ieee118']):
-            def line_constraint_ij(model, ij, t):
+            def line_constraint_ij(model, k, t):
+                i, (v2, vv, cos, sin) = self.ij_from[k], terms_ij[k][t]
                 return (
-                            abs(- model.V_Vbus[ij.split('-')[0],t]**2 * (b[ij])
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1)
-                            - model.V_Vbus[ij.split('-')[0],t] * model.V_Vbus[ij.split('-')[1],t]
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1)
-                            * (g[ij] * pyomo.sin(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t])
-                            - b[ij] * pyomo.cos(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t])))
-                        -
-                            abs(model.V_LineQij[ij,t] + model.Adj_line_qij[ij,t])
-                        <= self.error
+                            - v2 * (b_ij[k])
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1)
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1)
+                            * (g_ij[k] * sin
+                            - b_ij[k] * cos),
+                            qij[k][t] + model.Adj_line_qij[self.ij_list[k],t]
                     )
+            self._add_abs_constraint('line_q_limit_ij', 'ij', self.ij_pos, line_constraint_ij, 'Reactive power limit on line ijc')
         else:
-            def line_constraint_ij(model, ij, t):
+            def line_constraint_ij(model, k, t):
+                i, (v2, vv, cos, sin) = self.ij_from[k], terms_ij[k][t]
                 return (
-                            - model.V_Vbus[ij.split('-')[0],t]**2 * (b[ij])
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1)
-                            - model.V_Vbus[ij.split('-')[0],t] * model.V_Vbus[ij.split('-')[1],t]
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1) 
-                            * (g[ij] * pyomo.sin(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t])
-                            - b[ij] * pyomo.cos(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t]))
+                            - v2 * (b_ij[k])
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1)
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1) 
+                            * (g_ij[k] * sin
+                            - b_ij[k] * cos)
                         ==
-                            model.V_LineQij[ij,t] + model.Adj_line_qij[ij,t]
+                            qij[k][t] + model.Adj_line_qij[self.ij_list[k],t]
                     )
-        self.model.line_q_limit_ij = pyomo.Constraint(
-                                        self.model.ij,
-                                        self.model.t, 
-                                        rule=line_constraint_ij,
-                                        doc='Reactive power limit on line ijc'
-                                    )
+            self.model.line_q_limit_ij = pyomo.Constraint(
+                                            self._index_set('ij'),
+                                            self.model.t, 
+                                            rule=self._index_rule(line_constraint_ij, self.ij_pos),
+                                            doc='Reactive power limit on line ijc'
+                                        )
         if (self.system_param.get('system_name') in ['ieee39','ieee118']):
-            def line_constraint_ji(model, ji, t):
+            def line_constraint_ji(model, k, t):
+                i, (v2, vv, cos, sin) = self.ji_to[k], terms_ji[k][t]
                 return (
-                            abs(- model.V_Vbus[ji.split('-')[1],t]**2 * (b[ji])
-                            - model.V_Vbus[ji.split('-')[0],t] * model.V_Vbus[ji.split('-')[1],t]
-                            / (model.V_Rtrafo[ji.split('-')[1],t]**2 if self.system_param.get('bus_trafo').get(ji.split('-')[1]) else 1)
-                            * (g[ji] * pyomo.sin(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t])
-                            - b[ji] * pyomo.cos(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t])))
-                        -
-                            abs(model.V_LineQji[ji,t] + model.Adj_line_qji[ji,t])
-                        <= self.error
+                            - v2 * (b_ji[k])
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ji_trafo[k] else 1)
+                            * (g_ji[k] * sin
+                            - b_ji[k] * cos),
+                            qji[k][t] + model.Adj_line_qji[self.ji_list[k],t]
                     )
+            self._add_abs_constraint('line_q_limit_ji', 'ji', self.ji_pos, line_constraint_ji, 'Reactive power limit on line jic')
         else:
-            def line_constraint_ji(model, ji, t):
+            def line_constraint_ji(model, k, t):
+                i, (v2, vv, cos, sin) = self.ji_to[k], terms_ji[k][t]
                 return (
-                            - model.V_Vbus[ji.split('-')[1],t]**2 * (b[ji])
-                            - model.V_Vbus[ji.split('-')[0],t] * model.V_Vbus[ji.split('-')[1],t]
-                            / (model.V_Rtrafo[ji.split('-')[1],t]**2 if self.system_param.get('bus_trafo').get(ji.split('-')[1]) else 1)
-                            * (g[ji] * pyomo.sin(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t])
-                            - b[ji] * pyomo.cos(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t]))
+                            - v2 * (b_ji[k])
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ji_trafo[k] else 1)
+                            * (g_ji[k] * sin
+                            - b_ji[k] * cos)
                         ==
-                            model.V_LineQji[ji,t] + model.Adj_line_qji[ji,t]
+                            qji[k][t] + model.Adj_line_qji[self.ji_list[k],t]
                     )
-        self.model.line_q_limit_ji = pyomo.Constraint(
-                                        self.model.ji,
-                                        self.model.t, 
-                                        rule=line_constraint_ji,
-                                        doc='Reactive power limit on line jic'
-                                    )
+            self.model.line_q_limit_ji = pyomo.Constraint(
+                                            self._index_set('ji'),
+                                            self.model.t, 
+                                            rule=self._index_rule(line_constraint_ji, self.ji_pos),
+                                            doc='Reactive power limit on line jic'
+                                        )
     def _add_p_balanced_constraint(self, genstatus, demandbidmap):
         '''
             Está función crea la restricción de balance de potencia activa
@@ -456,25 +533,25 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de balance de potencia activa')
-        def balance_eqn_rule(model, bus, t):
+        gen_at, slack_at, demandbid_at = self._adjacent('gen'), self._adjacent('slack'), self._adjacent('demandbid')
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        bus_load, ward_bus = self.system_param.get('bus_load'), self.system_param.get('ward_bus')
+        vbus = self._var_table(self.model.V_Vbus, self.bus_list)
+        pij, pji = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LinePji, self.ji_list)
+        def balance_eqn_rule(model, k, t):
+            bus = self.bus_list[k]
             return (
-                        abs(sum(model.V_Pgen[gen, t] for gen in self.model.gen if self.system_param.get('atBus').get((gen,bus)) and genstatus.get((gen,bus)))
-                        + sum(model.V_Pslack[gen, t] for gen in self.model.slack if self.system_param.get('atBusSlack').get((gen,bus)))
-                        - (model.Pd[bus,t] if self.system_param.get('bus_load').get(bus) else 0)
-                        - sum(model.V_Pd_elastic[demandbid,bus] for demandbid in self.model.demandbid if demandbidmap.get((demandbid,bus)))
-                        #- (model.V_Pward[bus,t] if self.system_param.get('ward_bus').get(bus) else 0)
-                        )
-                    - 
-                        abs(sum(model.V_LinePij[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                        + sum(model.V_LinePji[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                        + model.V_Vbus[bus,t]**2 * model.V_Gs[bus]
-                        + model.Adj_p_balance[bus,t])
-                )<=self.error
-        self.model.c_BalanceP = pyomo.Constraint(
-                                        self.model.bus, 
-                                        self.model.t, 
-                                        rule=balance_eqn_rule,
-                                        doc='Active power balance')
+                        sum(model.V_Pgen[gen, t] for gen in gen_at[k] if genstatus.get((gen,bus)))
+                        + sum(model.V_Pslack[gen, t] for gen in slack_at[k])
+                        - (model.Pd[bus,t] if bus_load.get(bus) else 0)
+                        - sum(model.V_Pd_elastic[demandbid,bus] for demandbid in demandbid_at[k] if demandbidmap.get((demandbid,bus)))
+                        - (model.V_Pward[bus,t] if ward_bus.get(bus) else 0),
+                        sum(pij[c][t] for c in ij_at[k])
+                        + sum(pji[c][t] for c in ji_at[k])
+                        + vbus[k][t]**2 * model.V_Gs[bus]
+                        + model.Adj_p_balance[bus,t]
+                )
+        self._add_abs_constraint('c_BalanceP', 'bus', self.bus_pos, balance_eqn_rule, 'Active power balance')
     def _add_q_balanced_constraint(self, genstatus, demandbidmap):
         '''
             Está función crea la restricción de balance de potencia reactiva
@@ -484,29 +561,101 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de balance de potencia reactiva')
-        def balance_eqn_rule(model, bus, t):
+        gen_at, slack_at, demandbid_at = self._adjacent('gen'), self._adjacent('slack'), self._adjacent('demandbid')
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        bus_load, ward_bus, bus_shunt = self.system_param.get('bus_load'), self.system_param.get('ward_bus'), self.system_param.get('bus_shunt')
+        vbus = self._var_table(self.model.V_Vbus, self.bus_list)
+        qij, qji = self._var_table(self.model.V_LineQij, self.ij_list), self._var_table(self.model.V_LineQji, self.ji_list)
+        def balance_eqn_rule(model, k, t):
+            bus = self.bus_list[k]
             return (
-                        abs(
-                        sum(model.V_Qgen[gen, t] for gen in self.model.gen if self.system_param.get('atBus').get((gen,bus)) and genstatus.get((gen,bus)))
-                        + sum(model.V_Qslack[gen, t] for gen in self.model.slack if self.system_param.get('atBusSlack').get((gen,bus)))
-                        - model.Qd[bus,t] if self.system_param.get('bus_load').get(bus) else 0
-                        - sum(model.V_Qd_elastic[demandbid,bus] for demandbid in self.model.demandbid if demandbidmap.get((demandbid,bus)))
-                        - (model.V_Qward[bus,t] if self.system_param.get('ward_bus').get(bus) else 0)
-                        )
-                    -
-                        abs(sum(model.V_LineQij[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                        + sum(model.V_LineQji[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                        - model.V_Vbus[bus,t]**2
-                        - model.V_Vbus[bus,t]**2*(model.V_Shunt[bus, t]/self.max_shunt if self.system_param.get('bus_shunt').get(bus) else 0)
+                        sum(model.V_Qgen[gen, t] for gen in gen_at[k] if genstatus.get((gen,bus)))
+                        + sum(model.V_Qslack[gen, t] for gen in slack_at[k])
+                        - (model.Qd[bus,t] if bus_load.get(bus) else 0)
+                        - sum(model.V_Qd_elastic[demandbid,bus] for demandbid in demandbid_at[k] if demandbidmap.get((demandbid,bus)))
+                        - (model.V_Qward[bus,t] if ward_bus.get(bus) else 0),
+                        sum(qij[c][t] for c in ij_at[k])
+                        + sum(qji[c][t] for c in ji_at[k])
+                        - vbus[k][t]**2
+                        - vbus[k][t]**2*(model.V_Shunt[bus, t]/self.max_shunt if bus_shunt.get(bus) else 0)
                         + model.Adj_q_balance[bus,t]
-                        )
-                   <=self.error
             )
-        self.model.c_BalanceQ = pyomo.Constraint(
-                                        self.model.bus, 
-                                        self.model.t, 
-                                        rule=balance_eqn_rule,
-                                        doc='Reactive power balance')
+        self._add_abs_constraint('c_BalanceQ', 'bus', self.bus_pos, balance_eqn_rule, 'Reactive power balance')
+    def _border_terms(self):
+        '''
+            Está función entrega las cantidades de frontera de BORDER_TERMS y el ángulo (theta) por barra de frontera
+            y hora, el flujo suma las ramas del área que salen de la barra igual que el balance de potencia
+            input    
+                None
+            return
+                dict: nombre -> {(barra, t): variable o expresión}
+        '''
+        m = self.model
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        terms = dict((name, {}) for name in BORDER_TERMS + ['theta'])
+        for bus in m.border_node:
+            k = self.bus_pos[bus]
+            for t in m.t:
+                terms['vbus'][bus, t] = m.V_Vbus[bus, t]
+                terms['theta'][bus, t] = m.V_Theta[bus, t]
+                terms['pward'][bus, t] = m.V_Pward[bus, t]
+                terms['qward'][bus, t] = m.V_Qward[bus, t]
+                terms['pflow'][bus, t] = (sum(m.V_LinePij[self.ij_list[c], t] for c in ij_at[k])
+                                          + sum(m.V_LinePji[self.ji_list[c], t] for c in ji_at[k]))
+                terms['qflow'][bus, t] = (sum(m.V_LineQij[self.ij_list[c], t] for c in ij_at[k])
+                                          + sum(m.V_LineQji[self.ji_list[c], t] for c in ji_at[k]))
+        return terms
+    def _boundary_index(self, store):
+        '''
+            Está función entrega por campo del BoundaryStore las llaves (barra, hora) del modelo, sus posiciones en el
+            store (índice global compacto de la barra) y los términos de frontera, se arma una sola vez por store
+            input    
+                store: BoundaryStore
+            return
+                dict: campo -> (llaves, filas, columnas, términos)
+        '''
+        key = (tuple(store.buses), tuple(store.hours), tuple(store.fields))
+        if self.boundary_index is None or self.boundary_index[0] != key:
+            bus_index, terms = self.system_param.get('bus_index'), self._border_terms()
+            index = {}
+            for name in store.fields:
+                keys = list(terms[name])
+                rows = np.array([store.bus_pos[bus_index[bus]] for bus, _ in keys], dtype=int)
+                cols = np.array([store.hour_pos[t] for _, t in keys], dtype=int)
+                index[name] = (keys, rows, cols, list(terms[name].values()))
+            self.boundary_index = (key, index)
+        return self.boundary_index[1]
+    def write_boundary(self, store, area, layer='x'):
+        '''
+            Está función escribe en el lugar los valores actuales de frontera del área en una capa del BoundaryStore
+            input    
+                store: BoundaryStore
+                area: área del modelo
+                layer: capa del store
+            return
+                None
+        '''
+        block = store.view(layer, area)
+        for name, (_, rows, cols, terms) in self._boundary_index(store).items():
+            block[rows, cols, store.field_pos[name]] = [pyomo.value(term, exception=False) or 0 for term in terms]
+    def read_boundary(self, store, area, layers=('z', 'u')):
+        '''
+            Está función lee del BoundaryStore los objetivos y duales de frontera del área y los pone en los Params
+            Z_* y U_* de la coordinación de áreas
+            input    
+                store: BoundaryStore
+                area: área del modelo
+                layers: capas de los objetivos y de los duales
+            return
+                None
+        '''
+        for layer, prefix in zip(layers, ['Z', 'U']):
+            block = store.view(layer, area)
+            for name, (keys, rows, cols, _) in self._boundary_index(store).items():
+                if name not in BORDER_TERMS: continue
+                param = getattr(self.model, f'{prefix}_{name}')
+                for key, value in zip(keys, block[rows, cols, store.field_pos[name]].tolist()):
+                    param[key] = value
     def _add_function_obj(self):
         '''
             Está función crea la función objetivo
@@ -516,19 +665,26 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la función objetivo')
+        bus_shunt, pilot_nodes = self.system_param.get('bus_shunt'), self.system_param.get('pilot_nodes')
+        border = {}
+        if self.model.component('Rho') is not None and self.model.component('V_Pward') is not None:
+            border = self._border_terms()
         def obj_rule(model):
             return  (   
                     + (k1) * sum((model.V_Shunt[bus, t] - model.V_Shunt[bus, t-1])**2
-                        for bus in model.bus
+                        for bus in self.bus_list
                         for t in model.t 
-                        if t >= 2 and self.system_param.get('bus_shunt').get(bus))
+                        if t >= 2 and bus_shunt.get(bus))
                     + (k2) * sum((model.V_Vbus[bus, t] - model.Init_bus_v[bus, t])**2
-                        for bus in model.bus
+                        for bus in self.bus_list
                         for t in model.t
-                        if self.system_param.get('pilot_nodes').get(bus))
+                        if pilot_nodes.get(bus))
                     + (k3)*sum(model.V_Qgen[gen, t]**2 
                         for gen in model.gen
                         for t in model.t)
+                    + (model.Rho/2 * sum((expr - getattr(model, f'Z_{name}')[key] + getattr(model, f'U_{name}')[key])**2
+                        for name in BORDER_TERMS
+                        for key, expr in border[name].items()) if border else 0)
                 )
         if (self.system_param.get('system_name')=='ieee9'):
             k1, k2, k3 = 1e-2, 3e+2, 1e+1
@@ -540,89 +696,159 @@ class CreateModel(object):
             k1, k2, k3 = 1e-2, 3e+2, 1e+1
         if self.print_sec: print(f'k1: {k1} - k2: {k2} - k3: {k3}')
         self.model.obj = pyomo.Objective(rule=obj_rule, sense = pyomo.minimize)
-    def _set_variables_model(self, system_values):
+    def _bulk_data(self, component, keys, hours):
+        '''
+            Está función entrega los datos (variables o parámetros) de un componente en el orden fijo de las matrices
+            (horas x elementos) de HourlyValues, se buscan una sola vez por componente y quedan en self.bulk_index
+            input    
+                component: variable o parámetro del modelo indexado por (elemento, hora)
+                keys: lista de elementos, columnas de la matriz
+                hours: lista de horas, filas de la matriz
+            return
+                list: (índice, dato) del componente en el orden de la matriz aplanada
+        '''
+        key = (component.name, tuple(keys), tuple(hours))
+        if key not in self.bulk_index:
+            self.bulk_index[key] = [((label, t), component[label, t]) for t in hours for label in keys]
+        return self.bulk_index[key]
+    def set_bulk_values(self, component, keys, hours, values):
+        '''
+            Está función escribe en una sola pasada los valores de una matriz (horas x elementos) en las variables o
+            parámetros de un componente sin buscar cada índice, los parámetros se escriben con una sola llamada a
+            store_values (sin validar índice y valor), en las variables no se valida dominio y bounds, Var.set_values
+            de Pyomo 6.4.4 busca cada índice con __getitem__ y es más lento que recorrer los datos guardados
+            input    
+                component: variable o parámetro del modelo indexado por (elemento, hora)
+                keys: lista de elementos, columnas de la matriz
+                hours: lista de horas, filas de la matriz
+                values: matriz (horas x elementos)
+            return
+                None
+        '''
+        bulk_data, values = self._bulk_data(component, keys, hours), np.asarray(values, dtype=float).ravel().tolist()
+        if component.ctype is pyomo.Var:
+            for (_, data), value in zip(bulk_data, values): data.set_value(value, skip_validation=True)
+        else:
+            component.store_values(dict(zip((index for index, _ in bulk_data), values)), check=False)
+    def set_bulk_bounds(self, component, keys, hours, low, up):
+        '''
+            Está función escribe en una sola pasada los bounds de dos matrices (horas x elementos) en las variables
+            de un componente, igual que setlb y setub con valores numéricos, Pyomo 6.4.4 guarda los bounds en cada
+            dato de la variable y no tiene una forma de escribirlos por componente
+            input    
+                component: variable del modelo indexada por (elemento, hora)
+                keys: lista de elementos, columnas de las matrices
+                hours: lista de horas, filas de las matrices
+                low, up: matrices (horas x elementos) de límites
+            return
+                None
+        '''
+        for (_, data), lb, ub in zip(self._bulk_data(component, keys, hours), np.asarray(low, dtype=float).ravel().tolist(),
+                                np.asarray(up, dtype=float).ravel().tolist()):
+            data.setlb(lb)
+            data.setub(ub)
+    def _set_values(self, values, updates, bulk=True):
+        '''
+            Está función cambia los bounds y valores de una lista de componentes, con HourlyValues y bulk escribe cada
+            componente con set_bulk_bounds o set_bulk_values, de lo contrario recorre los diccionarios índice a índice
+            input    
+                values: HourlyValues o diccionario de valores
+                updates: lista de (tipo 'bounds' o 'value', componente, nombre del valor)
+                bulk: si es False se usan siempre los diccionarios (setlb, setub y set_value por índice)
+            return
+                None
+        '''
+        bulk = bulk and isinstance(values, HourlyValues)
+        for kind, component, name in updates:
+            if bulk:
+                keys, matrix = values.arrays[name]
+                if kind=='bounds': self.set_bulk_bounds(component, keys, values.hours, *matrix)
+                else: self.set_bulk_values(component, keys, values.hours, matrix)
+            elif kind=='bounds':
+                for var, value in values.get(name).items():
+                    component[var].setlb(value[0])
+                    component[var].setub(value[1])
+            else:
+                for var, value in values.get(name).items():
+                    component[var].set_value(value)
+    def _set_variables_model(self, system_values, bulk=True):
         '''
             Está función cambia cambia los valores de bounds y inicializaciones de todas las variables
             input    
-                none
+                system_values: valores del sistema (HourlyValues o diccionario)
+                bulk: si es True cada componente se escribe en una sola pasada desde las matrices de HourlyValues
             return
                 None
         '''
         #if self.print_sec: print('Se agrega la inicialización y los bounds')
-        def change_bounds(model_var, dict_values):
-            for var,value in dict_values.items():
-                model_var[var].setlb(value[0])
-                model_var[var].setub(value[1])
-        def change_initialize(model_var, dict_values):
-            for var,value in dict_values.items():
-                model_var[var].set_value(value)
-        def initialize_param(model_param, dict_values):
-            for var,value in dict_values.items():
-                model_param[var].set_value(value)
-        # para lineas pij
-        change_bounds(self.model.V_LinePij, system_values.get('bound_line_pij'))
-        change_initialize(self.model.V_LinePij, system_values.get('init_line_pij'))
-        change_bounds(self.model.V_LinePji, system_values.get('bound_line_pji'))
-        change_initialize(self.model.V_LinePji, system_values.get('init_line_pji'))
-        # para lineas qij
-        change_initialize(self.model.V_LineQij, system_values.get('init_line_qij'))
-        change_initialize(self.model.V_LineQji, system_values.get('init_line_qji'))
-        # para buses V
-        change_initialize(self.model.V_Vbus, system_values.get('init_bus_v'))
-        # para buses theta 
-        change_initialize(self.model.V_Theta, system_values.get('init_bus_theta'))
-        # para gen p
-        change_initialize(self.model.V_Pgen, system_values.get('init_gen_p'))
-        change_initialize(self.model.V_Pslack, system_values.get('init_slack_p'))
-        # para gen q
-        change_bounds(self.model.V_Qgen, system_values.get('gen_bound_q'))
-        change_initialize(self.model.V_Qgen, system_values.get('init_gen_q'))
-        change_initialize(self.model.V_Qslack, system_values.get('init_slack_q'))
-        # ward values 
-        initialize_param(self.model.V_Pward, system_values.get('bus_ward_p'))
-        initialize_param(self.model.V_Qward, system_values.get('bus_ward_q'))
-        # para parametros
-        initialize_param(self.model.Pd, system_values.get('Pd'))
-        initialize_param(self.model.Qd, system_values.get('Qd'))
-        initialize_param(self.model.Init_bus_v, system_values.get('init_bus_v'))
-    def _set_adjust_values(self, adjust_values):
+        self._set_values(system_values, [
+            # para lineas pij
+            ('bounds', self.model.V_LinePij, 'bound_line_pij'),
+            ('value', self.model.V_LinePij, 'init_line_pij'),
+            ('bounds', self.model.V_LinePji, 'bound_line_pji'),
+            ('value', self.model.V_LinePji, 'init_line_pji'),
+            # para lineas qij
+            ('value', self.model.V_LineQij, 'init_line_qij'),
+            ('value', self.model.V_LineQji, 'init_line_qji'),
+            # para buses V
+            ('value', self.model.V_Vbus, 'init_bus_v'),
+            # para buses theta 
+            ('value', self.model.V_Theta, 'init_bus_theta'),
+            # para gen p
+            ('value', self.model.V_Pgen, 'init_gen_p'),
+            ('value', self.model.V_Pslack, 'init_slack_p'),
+            # para gen q
+            ('bounds', self.model.V_Qgen, 'gen_bound_q'),
+            ('value', self.model.V_Qgen, 'init_gen_q'),
+            ('value', self.model.V_Qslack, 'init_slack_q'),
+            # ward values 
+            ('value', self.model.V_Pward, 'bus_ward_p'),
+            ('value', self.model.V_Qward, 'bus_ward_q'),
+            # para parametros
+            ('value', self.model.Pd, 'Pd'),
+            ('value', self.model.Qd, 'Qd'),
+            ('value', self.model.Init_bus_v, 'init_bus_v'),
+        ], bulk)
+    def _set_adjust_values(self, adjust_values, bulk=True):
         '''
             Está función cambia cambia los valores de inicializaciones de todas los parametros
             input    
-                none
+                adjust_values: ajustes de las ecuaciones de igualdad (HourlyValues o diccionario)
+                bulk: si es True cada parámetro se escribe en una sola pasada desde las matrices de HourlyValues
             return
                 None
         '''
-        def initialize_param(model_param, dict_values):
-            for var,value in dict_values.items():
-                model_param[var].set_value(value)
-        initialize_param(self.model.Adj_line_pij, adjust_values.get('adj_line_pij'))
-        initialize_param(self.model.Adj_line_pji, adjust_values.get('adj_line_pji'))
-        initialize_param(self.model.Adj_line_qij, adjust_values.get('adj_line_qij'))
-        initialize_param(self.model.Adj_line_qji, adjust_values.get('adj_line_qji'))
-        initialize_param(self.model.Adj_p_balance, adjust_values.get('adj_p_balance'))
-        initialize_param(self.model.Adj_q_balance, adjust_values.get('adj_q_balance'))
-        initialize_param(self.model.Adj_slimit_sij, adjust_values.get('adj_slimit_sij'))
-    def solve_model(self, area):
+        self._set_values(adjust_values, [
+            ('value', self.model.Adj_line_pij, 'adj_line_pij'),
+            ('value', self.model.Adj_line_pji, 'adj_line_pji'),
+            ('value', self.model.Adj_line_qij, 'adj_line_qij'),
+            ('value', self.model.Adj_line_qji, 'adj_line_qji'),
+            ('value', self.model.Adj_p_balance, 'adj_p_balance'),
+            ('value', self.model.Adj_q_balance, 'adj_q_balance'),
+            ('value', self.model.Adj_slimit_sij, 'adj_slimit_sij'),
+        ], bulk)
+    def solve_model(self, area, persistent=False, backend='bonmin_oa', profile='fast_screening', work_dir='.', tee=True):
         '''
-            Está función resuelve el modelo de optimización
+            Está función resuelve el modelo de optimización, el backend y los tiempos quedan en self.solver_info
             input    
-                none
+                persistent: si es True se resuelve con una SolverSession que se conserva entre llamadas, el archivo
+                            NL solo se reescribe en lo que cambió y los tiempos quedan en self.session.timing
+                backend: backend de solver_backends, ej: bonmin_oa, bonmin_bb, bonmin_hyb, ipopt, couenne, scipy, highs
+                         o el nombre de cualquier solver AMPL instalado
+                profile: perfil de opciones del backend, ej: tight_final, fast_screening, tuned (perfil de tune_solver.py)
+                work_dir: carpeta de la SolverSession (archivos .nl, .sol y registros del solver)
+                tee: si es True se muestra la salida del solver de la SolverSession
             return
                 None
         '''
         system_name = self.system_param.get('system_name')
         if self.print_sec: print(f'\n--> Se inicia la solución del modelo {system_name} - area {area} <--\n')
-        solver = pyomo.SolverFactory('solver/bonmin', tee=True)
-        solver.options['output_file'] = "bonmin.log" # Especificar el archivo de registro
-        solver.options['max_iter'] = 1000
-        solver.options['bonmin.integer_tolerance'] = 1e-5
-        solver.options['bonmin.allowable_fraction_gap'] = 1e-5
-        solver.options['bonmin.allowable_gap'] = 1e-5
-        solver.options['bonmin.algorithm'] = 'B-OA'
-        result = solver.solve(self.model)
-        result.write()
-        return True if result.solver.status.value=='ok' else False
+        solver = SolverBackend(backend, profile, system_name=system_name, print_sec=self.print_sec)
+        if self.warm_start_info: solver.options.update(warm_start_options(self.model, solver.family))
+        if persistent and solver.solver not in PYTHON_SOLVERS and (self.session is None or self.session.solver != solver.solver):
+            self.session = SolverSession(self.model, solver.solver, solver.options, work_dir=work_dir, name=f'{system_name}_area_{area}', tee=tee, print_sec=self.print_sec)
+        is_solve, self.solver_info = solver.solve(self.model, self.session if persistent else None)
+        return is_solve
     def save_model_variables(self, area, system_values):
         '''
             Está función guarda los datos del modelo de optimización
@@ -644,4 +870,64 @@ class CreateModel(object):
             }
             df = DataFrame(dict_data)
             df.to_csv(f'ResultadosAreas/{folder}/{names}_area_{area}__init.csv', index=False)
-                
\ No newline at end of file
+        if self.solver_info:
+            df = DataFrame(list(self.solver_info.items()), columns=['Key','Value'])
+            df.to_csv(f'ResultadosAreas/{folder}/Solver_area_{area}__info.csv', index=False)
+        save_warm_start(self.model, f'ResultadosAreas/{folder}', f'_area_{area}')
+    def load_warm_start(self, area, folder=None):
+        '''
+            Está función inicializa las variables, la asignación entera de shunts y taps y los multiplicadores del
+            modelo del área con los resultados que dejó save_model_variables en una corrida anterior
+            input
+                area: número del área
+                folder: carpeta dentro de ResultadosAreas, por defecto el nombre del sistema
+            return
+                dict: cantidad de variables, multiplicadores de restricciones y de bounds cargados
+        '''
+        folder = folder or self.system_param.get('system_name')
+        info = load_warm_start(self.model, f'ResultadosAreas/{folder}', f'_area_{area}')
+        if self.print_sec: print('Arranque en caliente área {area}: {variables} variables - {dual} duales - {bound} bounds'.format(area=area, **info))
+        self.warm_start_info = info if info['variables'] else None
+        return info
+                
+
+def build_area_model(system_name, area, print_sec=False, **kwargs):
+    '''
+        Está función crea el sistema y el modelo de optimización del área (variables, restricciones, wards y función
+        objetivo) en el mismo orden que area_main.py
+        input
+            system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+            area: área de sep_areas del sistema
+            print_sec: para imprimir secuencia de ejecuciones
+            kwargs: argumentos de CreateModel, ej: int_index, sparse_index, formulation
+        return
+            CreateModel, GetVariablesSystem
+    '''
+    system = GetVariablesSystem(system_name, print_sec=print_sec)
+    net_eq = system._get_ward_eq_from_system(area)
+    system_param = system._get_param_from_system(net_eq)
+    genstatus = system._get_genstatus(net_eq)
+    ratio_line = system._get_ratio_line(net_eq)
+    system._get_ratio_trafo(net_eq)
+    g, b = system._get_conductance_susceptance(net_eq)
+    demandbidmap = system._get_demandbidmap(net_eq)
+    model = CreateModel(system_param, print_sec=print_sec, **kwargs)
+    model.init_model()
+    model._add_var_p_line()
+    model._add_var_q_line()
+    model._add_var_v_bus()
+    model._add_var_theta_bus()
+    model._add_var_p_gen()
+    model._add_var_q_gen()
+    model._add_var_Shunt_bus()
+    model._add_var_pd_elastic(demandbidmap)
+    model._add_var_slack_variable()
+    model._add_param_model()
+    model._add_ward_eq_variable()
+    model._add_power_s_constraint(ratio_line)
+    model._add_power_p_constraint(g, b)
+    model._add_power_q_constraint(g, b)
+    model._add_p_balanced_constraint(genstatus, demandbidmap)
+    model._add_q_balanced_constraint(genstatus, demandbidmap)
+    model._add_function_obj()
+    return model, system
@@ -0,0 +1,102 @@
+import os
+import time
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from concurrent.futures import ProcessPoolExecutor
+from _source.area_model import build_area_model
+from _source.area_system import GetVariablesSystem
+
+def _solve_area(system_name, area, backend, profile, work_dir, warm_start, model_kwargs):
+    '''
+        Está función crea, resuelve y guarda en el proceso el modelo de un área, la SolverSession corre en la
+        carpeta propia del área para que los registros del solver no choquen con los de las otras áreas
+        input
+            system_name: nombre del sistema, ej: ieee9
+            area: área de sep_areas del sistema
+            backend: backend de solver_backends
+            profile: perfil de opciones del backend
+            work_dir: carpeta base de los archivos .nl, .sol y registros de las áreas
+            warm_start: si es True el área arranca desde los resultados de la corrida anterior
+            model_kwargs: argumentos de CreateModel
+        return
+            dict: área, estado, objetivo, proceso y tiempos del área
+    '''
+    t0 = time.perf_counter()
+    model, system = build_area_model(system_name, area, **model_kwargs)
+    system_values = system._get_values_from_system(area)
+    model._set_variables_model(system_values)
+    model._set_adjust_values(system._get_adjust_values())
+    if warm_start: model.load_warm_start(area)
+    t1 = time.perf_counter()
+    area_dir = os.path.join(work_dir, system_name, f'area_{area}')
+    os.makedirs(area_dir, exist_ok=True)
+    is_solve = model.solve_model(area, persistent=True, backend=backend, profile=profile, work_dir=area_dir, tee=False)
+    t2 = time.perf_counter()
+    if is_solve: model.save_model_variables(area, system_values)
+    return {
+        'area': area,
+        'solved': is_solve,
+        'objective': pyomo.value(model.model.obj, exception=False),
+        'pid': os.getpid(),
+        'build': t1 - t0,
+        'solve': t2 - t1,
+        'total': time.perf_counter() - t0,
+    }
+
+class AreaRunner(object):
+    '''
+        Class encargada de resolver todas las áreas de sep_areas al mismo tiempo, cada área es un modelo
+        independiente que se crea, resuelve y guarda en su propio proceso, así el tiempo total se acerca al del área
+        más lenta
+    '''
+    def __init__(self, system_name, areas=None, backend='bonmin_oa', profile='fast_screening', processes=None,
+                 work_dir='areas', warm_start=False, model_kwargs=None, print_sec=False):
+        '''
+            Está función instancia la clase AreaRunner
+            input
+                system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+                areas: áreas a resolver, por defecto todas las de sep_areas
+                backend: backend de solver_backends
+                profile: perfil de opciones del backend
+                processes: número de procesos, por defecto os.cpu_count() (máximo uno por área)
+                work_dir: carpeta de los archivos .nl, .sol y registros del solver, una subcarpeta por área
+                warm_start: si es True cada área arranca desde los resultados de la corrida anterior
+                model_kwargs: argumentos de CreateModel, ej: {'formulation': 'square'}
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo AreaRunner
+        '''
+        self.system_name = system_name
+        self.areas = list(areas or GetVariablesSystem(system_name).sep_areas)
+        self.backend = backend
+        self.profile = profile
+        self.processes = max(1, min(processes or os.cpu_count() or 1, len(self.areas)))
+        self.work_dir = work_dir
+        self.warm_start = warm_start
+        self.model_kwargs = dict(model_kwargs or {})
+        self.print_sec = print_sec
+        self.folder = f'ResultadosAreas/{system_name}'
+        self.results = []
+    def run(self):
+        '''
+            Está función resuelve las áreas en el pool de procesos, cada área guarda sus variables en
+            ResultadosAreas/{system} y el resumen de las áreas queda en Areas__res.csv
+            input
+                None
+            return
+                bool: True si todas las áreas se resolvieron
+        '''
+        os.makedirs(self.folder, exist_ok=True)
+        if self.print_sec: print(f'\n--> Se resuelven {len(self.areas)} áreas de {self.system_name} en {self.processes} procesos <--\n')
+        t0 = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            futures = [pool.submit(_solve_area, self.system_name, area, self.backend, self.profile, self.work_dir,
+                                   self.warm_start, self.model_kwargs) for area in self.areas]
+            self.results = [future.result() for future in futures]
+        self.wall_time = time.perf_counter() - t0
+        DataFrame(self.results).to_csv(f'{self.folder}/Areas__res.csv', index=False)
+        if self.print_sec:
+            for info in self.results:
+                print('Área {area}: resuelta {solved} - obj {objective} - solve {solve:.3f}s - total {total:.3f}s'.format(**info))
+            print(f'Tiempo total: {self.wall_time:.3f}s - área más lenta: {max(info["total"] for info in self.results):.3f}s')
+        return all(info['solved'] for info in self.results)
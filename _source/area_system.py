@@ -2,6 +2,39 @@ import pandapower.networks as pp_net
 from pandapower.grid_equivalents import get_equivalent
 import pandapower as pp
 import numpy as np
+import os
+from concurrent.futures import ProcessPoolExecutor
+from _source.extraction import HourlyValues, hourly_bounds, hourly_matrix, flow_bounds, conductance_susceptance
+from _source.adjust_values import get_adjust_values, bus_adjacency
+from _source.create_ward_eq import WardEquivalent, topology_key
+
+# sistema de cada proceso del modo 'pool', se copia una sola vez por proceso
+_area_system = None
+
+def _init_area_worker(system):
+    '''
+        Está función guarda en el proceso una copia del sistema, la topología se conserva entre horas
+        input
+            system: objeto GetVariablesSystem
+        return
+            None
+    '''
+    global _area_system
+    _area_system = system
+
+def _run_area_shard(area, hours, load_init_p, load_init_q, gen_init_p, equivalent='pandapower'):
+    '''
+        Está función calcula en el proceso los valores de un bloque de horas
+        input
+            area: área del sistema
+            hours: horas del bloque
+            load_init_p, load_init_q, gen_init_p: valores base de cargas y generadores
+            equivalent: 'cached' usa el equivalente ward guardado, 'pandapower' lo recalcula con get_equivalent
+        return
+            list: valores del sistema de cada hora
+    '''
+    return [_area_system._get_values_from_hour(area, t, load_init_p, load_init_q, gen_init_p, equivalent) 
+                for t in hours]
 
 class GetVariablesSystem(object):
     '''
@@ -68,7 +101,26 @@ class GetVariablesSystem(object):
         self.id_load_p = list(self.system.load.columns).index('p_mw')
         self.id_load_q = list(self.system.load.columns).index('q_mvar')
         self.id_gen_p = list(self.system.gen.columns).index('p_mw')
+        self.load_init_p = self.system.load['p_mw'].values.copy()
+        self.load_init_q = self.system.load['q_mvar'].values.copy()
+        self.gen_init_p = self.system.gen['p_mw'].values.copy()
+        # equivalentes ward por área y topología, se reducen una sola vez y se reutilizan en todas las horas
+        self.ward_cache = {}
+        # índice global compacto de las barras, las etiquetas del modelo son el índice de pandapower de la barra
+        self.bus_index = dict((str(bus), k) for k, bus in enumerate(self.system.bus.index))
+        # horas absolutas de los valores del sistema, en el modelo y el estado de frontera quedan como 1..len(hours)
+        self.hours = list(range(1,25))
         if self.print_sec: print(f'Se crea el objeto del sistema a trabajar * {system} *')
+    def _set_hours(self, hours):
+        '''
+            Está función cambia las horas absolutas con las que se calculan los valores del sistema, el perfil
+            de carga (scaling) se repite cada 24 horas, ej: range(1,241) son 10 días
+            input
+                hours: lista de horas absolutas, en el modelo quedan numeradas 1..len(hours)
+            return
+                None
+        '''
+        self.hours = list(hours)
     def _get_ward_eq_from_system(self, area):
         '''
             Está función entrega el equivalente ward del sitema
@@ -77,19 +129,50 @@ class GetVariablesSystem(object):
             return
                 net_eq: sistema equivalante
         '''
-        self.border_node = self.sep_areas.get(area).get('border_node')
         net_eq = get_equivalent(self.system, 'ward', 
                                     self.sep_areas.get(area).get('border_node'), 
                                     self.sep_areas.get(area).get('internal_node'),
                                 )
-        self.ward_borders_p, self.ward_borders_q = {},{}
-        for i in range(net_eq.ward.shape[0]):
-            row = net_eq.ward.iloc[i]
-            res_row = net_eq.res_ward.iloc[i]
-            if int(row['bus']) in self.border_node:
-                self.ward_borders_p[(str(row['bus']))] = res_row['p_mw']
-                self.ward_borders_q[(str(row['bus']))] = res_row['q_mvar']
+        self._set_ward_borders(area, net_eq)
         return net_eq
+    def _set_ward_borders(self, area, net_eq):
+        '''
+            Está función guarda las potencias de los wards de las barras de frontera del área
+            input
+                area: área del sistema
+                net_eq: sistema equivalente con el flujo de carga resuelto
+            return
+                None
+        '''
+        self.border_node = self.sep_areas.get(area).get('border_node')
+        self.ward_borders_p, self.ward_borders_q = {},{}
+        for bus, p, q in zip(net_eq.ward['bus'].values, 
+                             net_eq.res_ward['p_mw'].values.tolist(), 
+                             net_eq.res_ward['q_mvar'].values.tolist()):
+            if int(bus) in self.border_node:
+                self.ward_borders_p[(str(bus))] = p
+                self.ward_borders_q[(str(bus))] = q
+    def _get_ward_cache(self, area, hours):
+        '''
+            Está función entrega el equivalente ward del área con las inyecciones de los wards de todas las horas,
+            la reducción de la red externa se hace una sola vez por área y topología
+            input
+                area: área del sistema
+                hours: horas absolutas del cálculo
+            return
+                WardEquivalent: equivalente del área
+        '''
+        key = (area, tuple(self.sep_areas.get(area).get('border_node')),
+               tuple(self.sep_areas.get(area).get('internal_node')), topology_key(self.system))
+        if key not in self.ward_cache:
+            self.ward_cache[key] = WardEquivalent(self.system, self.sep_areas.get(area).get('border_node'),
+                                                  self.sep_areas.get(area).get('internal_node'), self.print_sec)
+        ward_eq = self.ward_cache[key]
+        factor = np.array([self.scaling.get((t-1)%24 + 1)*self.multiplier for t in hours])[:, None]
+        ward_eq.set_injections(factor*self.load_init_p, factor*self.load_init_q, factor*self.gen_init_p)
+        ward_eq.hours = list(hours)
+        self.ward_eq = ward_eq
+        return ward_eq
     def _get_param_from_system(self, system_area):
         '''
             Está función entrega los parámetros del sistema necesarias en el modelo de optimización
@@ -99,23 +182,28 @@ class GetVariablesSystem(object):
                 dict: diccionario que contiene los parámetros del sistema, i, j , c, buses, bounds. 
         '''
         if self.print_sec: print('Se obtienen la variables del sistema')
-        slack_bound_p, slack_bound_q, bounds_bus = {}, {}, {}
-        for t in range(1,25):
-            for i in range(system_area.ext_grid.shape[0]):
-                row = system_area.ext_grid.iloc[i]
-                slack_bound_p[(str(i), t)] = (row['min_p_mw']/self.sn_mva, 
-                                              row['max_p_mw']/self.sn_mva)
-                slack_bound_q[(str(i), t)] = (row['min_q_mvar']/self.sn_mva, 
-                                              row['max_q_mvar']/self.sn_mva)
-            for bus in range(system_area.bus.shape[0]):
-                row = system_area.bus.iloc[bus]
-                bounds_bus[(str(bus), t)] = (row['min_vm_pu'], row['max_vm_pu'])
+        hours = list(range(1,len(self.hours)+1))
+        ext_grid, bus = system_area.ext_grid, system_area.bus
+        slack = [str(i) for i in range(ext_grid.shape[0])]
+        buses = [str(i) for i in range(bus.shape[0])]
+        slack_bound_p = hourly_bounds(slack, hours,
+                                      np.tile(ext_grid['min_p_mw'].values/self.sn_mva, (len(hours),1)),
+                                      np.tile(ext_grid['max_p_mw'].values/self.sn_mva, (len(hours),1)))
+        slack_bound_q = hourly_bounds(slack, hours,
+                                      np.tile(ext_grid['min_q_mvar'].values/self.sn_mva, (len(hours),1)),
+                                      np.tile(ext_grid['max_q_mvar'].values/self.sn_mva, (len(hours),1)))
+        bounds_bus = hourly_bounds(buses, hours,
+                                   np.tile(bus['min_vm_pu'].values, (len(hours),1)),
+                                   np.tile(bus['max_vm_pu'].values, (len(hours),1)))
         atBus = {}
         for gen,bus in enumerate(list(system_area.gen['bus'])):
             atBus[(str(gen),bus)] = True
         atBusSlack = {}
         for gen,bus in enumerate(list(system_area.ext_grid['bus'])):
             atBusSlack[(str(gen),bus)] = True
+        atBusLoad = {}
+        for bus in list(system_area.load['bus']):
+            atBusLoad[(str(bus),str(bus))] = True
         list_i,ij, ji, branchij_bus, branchji_bus = [],[],[],{},{}
         for i, j in list(zip(list(system_area.line['from_bus']),
                             list(system_area.line['to_bus']))):
@@ -150,7 +238,8 @@ class GetVariablesSystem(object):
                 'i': list_i,
                 'branchij_bus': branchij_bus,
                 'branchji_bus': branchji_bus,
-                'bus': [str(bus-1) for bus in list(system_area.bus['name'])],
+                'bus': [str(bus) for bus in system_area.bus.index],
+                'bus_index': dict((str(bus), self.bus_index[str(bus)]) for bus in system_area.bus.index),
                 'bus_trafo': bus_trafo,
                 'bus_load': bus_load,
                 'bounds_bus':bounds_bus,
@@ -166,102 +255,101 @@ class GetVariablesSystem(object):
                 'system_name': self.system_name,
                 'bus_shunt': bus_shunt,
                 'pilot_nodes': dict((str(node), True) for node in self.pilot_nodes),
+                'hours': hours,
             }
+        self.system_param['adjacency'] = bus_adjacency(
+                self.system_param['bus'], self.system_param['gen'], self.system_param['slack'], 
+                self.system_param['demandbid'], atBus, atBusSlack, atBusLoad,
+                ij, ji, branchij_bus, branchji_bus
+            )
         return self.system_param
-    def _get_values_from_system(self, area):
+    def _get_values_from_system(self, area, mode='serial', processes=None, equivalent='cached'):
         '''
             Está función entrega los valores calculados del sistema necesarias en el modelo de optimización
             input
-                None
+                area: área del sistema
+                mode: 'serial' calcula las horas una a una, 'pool' reparte las horas entre un pool de procesos
+                processes: número de procesos del modo 'pool'
+                equivalent: 'cached' reduce la red externa una sola vez y solo actualiza los wards en cada hora,
+                            'pandapower' recalcula el equivalente con get_equivalent en cada hora
             return
                 dict: diccionario que contiene los parámetros del sistema, i, j , c, buses, bounds. 
         '''
         if self.print_sec: print('Se obtienen la valores del sistema')
-        init_bus_v, init_bus_theta = {},{}
-        init_line_pij, init_line_qij, init_line_pji, init_line_qji = {},{},{},{}
-        bound_line_pij, bound_line_pji = {}, {} 
-        init_slack_p, init_slack_q = {},{}
-        init_gen_p, init_gen_q, gen_bound_q = {},{},{}
-        Pd, Qd = {}, {}
-        bus_ward_p, bus_ward_q = {},{}
-        load_init_p = list(self.system.load.iloc[:,self.id_load_p])
-        load_init_q = list(self.system.load.iloc[:,self.id_load_q])
-        gen_init_p = list(self.system.gen.iloc[:,self.id_gen_p])
-        for t in range(1,25):
-            self.system.gen.iloc[:,self.id_gen_p] = list(np.array(gen_init_p)*self.scaling.get(t)*self.multiplier)
-            self.system.load.iloc[:,self.id_load_p] = list(np.array(load_init_p)*self.scaling.get(t)*self.multiplier)
-            self.system.load.iloc[:,self.id_load_q] = list(np.array(load_init_q)*self.scaling.get(t)*self.multiplier)
+        load_init_p, load_init_q, gen_init_p = self.load_init_p, self.load_init_q, self.gen_init_p
+        hours = list(self.hours)
+        if equivalent=='cached': self._get_ward_cache(area, hours)
+        if mode=='pool':
+            processes = processes or os.cpu_count()
+            shards = [list(shard) for shard in np.array_split(hours, processes) if len(shard)]
+            with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_area_worker, initargs=(self,)) as pool:
+                futures = [pool.submit(_run_area_shard, area, shard, load_init_p, load_init_q, gen_init_p, equivalent) 
+                            for shard in shards]
+                hourly_values = [values for future in futures for values in future.result()]
+        else:
+            hourly_values = [self._get_values_from_hour(area, t, load_init_p, load_init_q, gen_init_p, equivalent)
+                                for t in hours]
+        arrays = {}
+        for key, (keys, values) in hourly_values[0].items():
+            if isinstance(values, tuple):
+                arrays[key] = (keys, (np.vstack([hour[key][1][0] for hour in hourly_values]),
+                                      np.vstack([hour[key][1][1] for hour in hourly_values])))
+            else:
+                arrays[key] = (keys, np.vstack([hour[key][1] for hour in hourly_values]))
+        self.system_values = HourlyValues(range(1,len(hours)+1), arrays)
+        return self.system_values
+    def _get_values_from_hour(self, area, t, load_init_p, load_init_q, gen_init_p, equivalent='pandapower'):
+        '''
+            Está función entrega los valores calculados del sistema para la hora t
+            input
+                area: área del sistema
+                t: hora
+                load_init_p, load_init_q, gen_init_p: valores base de cargas y generadores
+                equivalent: 'cached' usa el equivalente de _get_ward_cache, 'pandapower' lo recalcula con get_equivalent
+            return
+                dict: diccionario que contiene los valores del sistema en la hora t
+        '''
+        scaling = self.scaling.get((t-1)%24 + 1)*self.multiplier
+        self.system.gen.iloc[:,self.id_gen_p] = list(np.array(gen_init_p)*scaling)
+        self.system.load.iloc[:,self.id_load_p] = list(np.array(load_init_p)*scaling)
+        self.system.load.iloc[:,self.id_load_q] = list(np.array(load_init_q)*scaling)
+        if equivalent=='cached':
+            system_eq = self.ward_eq.get_hour(self.ward_eq.hours.index(t))
+            self._set_ward_borders(area, system_eq)
+        else:
             system_eq = self._get_ward_eq_from_system(area)
-            for i in range(system_eq.res_load.shape[0]):
-                row = system_eq.load.iloc[i]
-                res_row = system_eq.res_load.iloc[i]
-                Pd[(str(row['bus']),t)] = res_row['p_mw']/self.sn_mva
-                Qd[(str(row['bus']),t)] = res_row['q_mvar']/self.sn_mva
-            for i in range(system_eq.res_bus.shape[0]):
-                res_row = system_eq.res_bus.iloc[i]
-                row = system_eq.bus.iloc[i]
-                init_bus_v[(str(row['name']-1), t)] = res_row['vm_pu']
-                init_bus_theta[(str(row['name']-1), t)] = res_row['va_degree']*np.pi/180
-            c_line = 0
-            for i,j in list(zip(list(system_eq.line['from_bus']), 
-                            list(system_eq.line['to_bus']))):
-                row = system_eq.res_line.iloc[c_line]
-                p_from = row['p_from_mw']/self.sn_mva
-                p_to = row['p_to_mw']/self.sn_mva
-                init_line_pij[(f'{i}-{j}',t)] = p_from
-                init_line_pji[(f'{j}-{i}',t)] = p_to
-                bound_line_pij[(f'{i}-{j}',t)] = (0.9*p_from, 1.1*p_from) if p_from>0 else (1.1*p_from, 0.9*p_from)
-                bound_line_pji[(f'{j}-{i}',t)] = (0.9*p_to, 1.1*p_to) if p_to>0 else (1.1*p_to, 0.9*p_to)
-                init_line_qij[(f'{i}-{j}',t)] = row['q_from_mvar']/self.sn_mva
-                init_line_qji[(f'{j}-{i}',t)] = row['q_to_mvar']/self.sn_mva
-                c_line+=1
-            c_gen = 0
-            gen_bus = list(system_eq.gen['bus'])
-            for p, q in list(zip(list(system_eq.res_gen['p_mw']),
-                            list(system_eq.res_gen['q_mvar']))):
-                init_gen_p[(str(gen_bus[c_gen]), t)] = p/self.sn_mva
-                init_gen_q[(str(gen_bus[c_gen]), t)] = q/self.sn_mva
-                row = self.system.gen.iloc[c_gen]
-                if q>0:
-                    min_q = row['min_q_mvar'] if row['min_q_mvar']<q else q
-                    max_q = row['max_q_mvar'] if row['max_q_mvar']>q else q
-                else:
-                    min_q = row['min_q_mvar'] if row['min_q_mvar']<q else q
-                    max_q = row['max_q_mvar'] if row['max_q_mvar']>q else q
-                gen_bound_q[(str(gen_bus[c_gen]), t)] = (min_q/self.sn_mva, 
-                                            max_q/self.sn_mva)
-                c_gen+=1
-            c_gen=0
-            gen_bus = list(system_eq.ext_grid['bus'])
-            for p, q in list(zip(list(system_eq.res_ext_grid['p_mw']),
-                            list(system_eq.res_ext_grid['q_mvar']))):
-                init_slack_p[(str(gen_bus[c_gen]), t)] = p/self.sn_mva
-                init_slack_q[(str(gen_bus[c_gen]), t)] = q/self.sn_mva
-                c_gen+=1
-            for bus, value in self.ward_borders_p.items():
-                bus_ward_p[(str(bus),t)] = value/self.sn_mva
-            for bus, value in self.ward_borders_q.items():
-                bus_ward_q[(str(bus),t)] = value/self.sn_mva
-        self.system_values = {
-                'Pd': Pd,
-                'Qd': Qd,
-                'init_bus_theta': init_bus_theta,
-                'init_bus_v': init_bus_v,
-                'init_line_pij': init_line_pij,
-                'init_line_qij': init_line_qij,
-                'bound_line_pij': bound_line_pij,
-                'bound_line_pji': bound_line_pji,
-                'init_line_pji': init_line_pji,
-                'init_line_qji': init_line_qji,
-                'init_gen_p': init_gen_p,
-                'init_gen_q': init_gen_q,
-                'gen_bound_q': gen_bound_q,
-                'init_slack_p': init_slack_p,
-                'init_slack_q': init_slack_q,
-                'bus_ward_p': bus_ward_p,
-                'bus_ward_q': bus_ward_q
+        load_bus = [str(bus) for bus in system_eq.load['bus'].values[:system_eq.res_load.shape[0]]]
+        bus = [str(bus) for bus in system_eq.bus.index[:system_eq.res_bus.shape[0]]]
+        from_bus, to_bus = system_eq.line['from_bus'].values, system_eq.line['to_bus'].values
+        ij = [f'{i}-{j}' for i, j in zip(from_bus, to_bus)]
+        ji = [f'{j}-{i}' for i, j in zip(from_bus, to_bus)]
+        gen = [str(bus) for bus in system_eq.gen['bus'].values]
+        slack = [str(bus) for bus in system_eq.ext_grid['bus'].values]
+        p_from = system_eq.res_line['p_from_mw'].values[:len(ij)]/self.sn_mva
+        p_to = system_eq.res_line['p_to_mw'].values[:len(ij)]/self.sn_mva
+        q_gen = system_eq.res_gen['q_mvar'].values
+        min_q = self.system.gen['min_q_mvar'].values[:len(q_gen)]
+        max_q = self.system.gen['max_q_mvar'].values[:len(q_gen)]
+        return {
+                'Pd': (load_bus, system_eq.res_load['p_mw'].values/self.sn_mva),
+                'Qd': (load_bus, system_eq.res_load['q_mvar'].values/self.sn_mva),
+                'init_bus_theta': (bus, system_eq.res_bus['va_degree'].values*np.pi/180),
+                'init_bus_v': (bus, system_eq.res_bus['vm_pu'].values),
+                'init_line_pij': (ij, p_from),
+                'init_line_qij': (ij, system_eq.res_line['q_from_mvar'].values[:len(ij)]/self.sn_mva),
+                'bound_line_pij': (ij, flow_bounds(p_from)),
+                'bound_line_pji': (ji, flow_bounds(p_to)),
+                'init_line_pji': (ji, p_to),
+                'init_line_qji': (ji, system_eq.res_line['q_to_mvar'].values[:len(ij)]/self.sn_mva),
+                'init_gen_p': (gen, system_eq.res_gen['p_mw'].values/self.sn_mva),
+                'init_gen_q': (gen, q_gen/self.sn_mva),
+                'gen_bound_q': (gen, (np.where(min_q<q_gen, min_q, q_gen)/self.sn_mva, 
+                                      np.where(max_q>q_gen, max_q, q_gen)/self.sn_mva)),
+                'init_slack_p': (slack, system_eq.res_ext_grid['p_mw'].values/self.sn_mva),
+                'init_slack_q': (slack, system_eq.res_ext_grid['q_mvar'].values/self.sn_mva),
+                'bus_ward_p': (list(self.ward_borders_p), np.array(list(self.ward_borders_p.values()))/self.sn_mva),
+                'bus_ward_q': (list(self.ward_borders_q), np.array(list(self.ward_borders_q.values()))/self.sn_mva),
             }
-        return self.system_values
     def _get_conductance_susceptance(self, system_area):
         '''
             Está función entrega el calculo de la conductance y la susceptance.
@@ -272,26 +360,11 @@ class GetVariablesSystem(object):
                                 branchstatus(i, j, c)
         '''
         if self.print_sec: print('Se crea las variables de conductance y susceptance')
+        g, b = conductance_susceptance(system_area.line)
         self.g, self.b = {}, {}
-        def calculate_g_b(tipe, d, r, x):
-                return d*(r if tipe=='g' else -x)/(np.power(r,2) + np.power(x,2))
-        for c in range(system_area.line.shape[0]):
-            row = system_area.line.iloc[c]
-            value_g = calculate_g_b(
-                    'g',
-                     row['length_km'],
-                     row['r_ohm_per_km'] if row['r_ohm_per_km']!=0 else system_area.line['r_ohm_per_km'].mean(),
-                     row['x_ohm_per_km'] if row['x_ohm_per_km']!=0 else system_area.line['x_ohm_per_km'].mean()
-                    )
-            i, j = row['from_bus'], row['to_bus']
+        for i, j, value_g, value_b in zip(system_area.line['from_bus'], system_area.line['to_bus'], g.tolist(), b.tolist()):
             self.g[f'{i}-{j}'] = value_g
             self.g[f'{j}-{i}'] = value_g
-            value_b = calculate_g_b(
-                    'b',
-                     row['length_km'],
-                     row['r_ohm_per_km'] if row['r_ohm_per_km']!=0 else system_area.line['r_ohm_per_km'].mean(),
-                     row['x_ohm_per_km'] if row['x_ohm_per_km']!=0 else system_area.line['x_ohm_per_km'].mean()
-                    )
             self.b[f'{i}-{j}'] = value_b
             self.b[f'{j}-{i}'] = value_b
         return self.g, self.b
@@ -304,12 +377,10 @@ class GetVariablesSystem(object):
                 ratio: valores de capacidad máxima de las líneas
         '''
         if self.print_sec: print('Se crea la variable ratio líneas')
-        self.ratio_line = {}
-        for c in range(system_area.line.shape[0]):
-            row = system_area.line.iloc[c]
-            i, j = row['from_bus'], row['to_bus']
-            self.ratio_line[f'{i}-{j}']\
-                = np.sqrt(3)*row['max_i_ka']*self.voltage.get(int(row['from_bus']))/self.sn_mva
+        line = system_area.line
+        ratio = np.sqrt(3)*line['max_i_ka'].values*self.system.bus['vn_kv'].values[line['from_bus'].values]/self.sn_mva
+        self.ratio_line = dict((f'{i}-{j}', value) 
+                               for i, j, value in zip(line['from_bus'], line['to_bus'], ratio.tolist()))
         return self.ratio_line
     def _get_ratio_trafo(self, system_area):
         '''
@@ -321,9 +392,7 @@ class GetVariablesSystem(object):
         '''
         if self.print_sec: print('Se crea la variable ratio trafos')
         self.ratio = {}
-        for c in range(system_area.line.shape[0]):
-            row = system_area.line.iloc[c]
-            i, j = row['from_bus'], row['to_bus']
+        for i, j in zip(system_area.line['from_bus'], system_area.line['to_bus']):
             self.ratio[f'{i}-{j}'] = 1
             self.ratio[f'{j}-{i}'] = 1
         return self.ratio
@@ -353,101 +422,21 @@ class GetVariablesSystem(object):
         return self.demandbidmap
     def _get_adjust_values(self):
         '''
-            Está función entrega las variables de ajuste del modelo
+            Está función entrega las variables de ajuste del modelo, la inyección inicial de los wards de frontera
+            se resta del ajuste de los balances porque en el modelo es la variable V_Pward o V_Qward
             input
                 None
             return
                 dict: diccionario que contiene los ajustes de las ecuaciones de igualdad
         ''' 
-        ## ajuste de la potencia aparente
-        adj_slimit_sij = {}
-        for t in range(1,25):
-            for ij in self.system_param.get('ij'):
-                s_v1 = (self.ratio_line[ij])**2
-                s_v2 = (
-                    self.system_values.get('init_line_pij')[ij, t]**2
-                    + self.system_values.get('init_line_qij')[ij, t]**2      
-                )
-                signo_sij = -1 if (s_v1>0 and s_v2<0 or s_v1<0 and s_v2>0) else 1
-                adj_slimit_sij[(ij,t)] = abs(s_v2/s_v1)*signo_sij
-        ## ajuste de los flujos de potencia      
-        adj_line_pij, adj_line_pji = {},{}
-        adj_line_qij, adj_line_qji = {},{}
-        for t in range(1,25):
-            for ij in self.system_param.get('ij'):
-                # para Pij
-                p_v1 = (
-                    (self.g[ij] * (self.system_values.get('init_bus_v')[ij.split('-')[0],t]**2) / 1**2)
-                    - (self.system_values.get('init_bus_v')[ij.split('-')[0],t] * self.system_values.get('init_bus_v')[ij.split('-')[1],t] / 1)
-                    * (self.g[ij] * np.cos(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t]) 
-                    + self.b[ij] * np.sin(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t]))
-                    )
-                p_v2 = self.system_values.get('init_line_pij').get((ij,t))
-                adj_line_pij[(ij,t)] = p_v1 - p_v2
-                # para Qij
-                q_v1 = (
-                    - self.system_values.get('init_bus_v')[ij.split('-')[0],t]**2 * (self.b[ij]) / 1**2
-                    - self.system_values.get('init_bus_v')[ij.split('-')[0],t] * self.system_values.get('init_bus_v')[ij.split('-')[1],t] /1 
-                    * (self.g[ij] * np.sin(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t])
-                    - self.b[ij] * np.cos(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t]))
-                    )
-                q_v2 = self.system_values.get('init_line_qij').get((ij,t))
-                adj_line_qij[(ij,t)] = q_v1 - q_v2
-            for ji in self.system_param.get('ji'):
-                # para Pji
-                p_v1 = (
-                    (self.g[ji] * (self.system_values.get('init_bus_v')[ji.split('-')[0],t]**2) / 1**2)
-                    - (self.system_values.get('init_bus_v')[ji.split('-')[0],t] * self.system_values.get('init_bus_v')[ji.split('-')[1],t] / 1)
-                    * (self.g[ji] * np.cos(self.system_values.get('init_bus_theta')[ji.split('-')[0],t] - self.system_values.get('init_bus_theta')[ji.split('-')[1],t]) 
-                    + self.b[ji] * np.sin(self.system_values.get('init_bus_theta')[ji.split('-')[0],t] - self.system_values.get('init_bus_theta')[ji.split('-')[1],t]))
-                    )
-                p_v2 = self.system_values.get('init_line_pji').get((ji,t))
-                adj_line_pji[(ji,t)] = p_v1 - p_v2
-                # para Qji
-                q_v1 = (
-                    - self.system_values.get('init_bus_v')[ji.split('-')[1],t]**2 * (self.b[ji])
-                    - self.system_values.get('init_bus_v')[ji.split('-')[0],t] * self.system_values.get('init_bus_v')[ji.split('-')[1],t] / 1
-                    * (self.g[ji] * np.sin(self.system_values.get('init_bus_theta')[ji.split('-')[1],t] - self.system_values.get('init_bus_theta')[ji.split('-')[0],t])
-                    - self.b[ji] * np.cos(self.system_values.get('init_bus_theta')[ji.split('-')[1],t] - self.system_values.get('init_bus_theta')[ji.split('-')[0],t]))
-                    )
-                q_v2 = self.system_values.get('init_line_qji').get((ji,t))
-                adj_line_qji[(ji,t)] = q_v1 - q_v2
-        # para balance de potencia
-        adj_p_balance, adj_q_balance = {}, {}
-        for t in range(1,25):
-            for bus in self.system_param.get('bus'):
-                # para P
-                p_b1 = (
-                    sum(self.system_values.get('init_gen_p')[gen, t] for gen in self.system_param.get('gen') if self.system_param.get('atBus').get((gen,bus)) and self.genstatus.get((gen,bus)))
-                    + sum(self.system_values.get('init_slack_p')[gen, t] for gen in self.system_param.get('slack') if self.system_param.get('atBusSlack').get((gen,bus)))
-                    - (self.system_values.get('Pd').get((bus,t)) if self.system_values.get('Pd').get((bus,t)) else 0)
-                    #- (self.system_values.get('bus_ward_p').get((bus,t)) if self.system_values.get('bus_ward_p').get((bus,t)) else 0)
-                )
-                p_b2 = (
-                    sum(self.system_values.get('init_line_pij')[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                    + sum(self.system_values.get('init_line_pji')[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                    + self.system_values.get('init_bus_v')[bus,t]**2 
-                )
-                adj_p_balance[(bus,t)] = p_b1-p_b2
-                # para Q
-                q_b1 = (
-                    sum(self.system_values.get('init_gen_q')[gen, t] for gen in self.system_param.get('gen') if self.system_param.get('atBus').get((gen,bus)) and self.genstatus.get((gen,bus)))
-                    + sum(self.system_values.get('init_slack_q')[gen, t] for gen in self.system_param.get('slack') if self.system_param.get('atBusSlack').get((gen,bus)))
-                    - (self.system_values.get('Qd').get((bus,t)) if self.system_values.get('Qd').get((bus,t)) else 0)
-                    #- (self.system_values.get('bus_ward_q').get((bus,t)) if self.system_values.get('bus_ward_q').get((bus,t)) else 0)
-                )
-                q_b2 = (
-                    sum(self.system_values.get('init_line_pij')[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                    + sum(self.system_values.get('init_line_pji')[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                    + self.system_values.get('init_bus_v')[bus,t]**2 
+        hours = range(1,len(self.hours)+1)
+        adjust_values = get_adjust_values(
+                    self.system_param, self.system_values, self.genstatus, 
+                    self.g, self.b, self.ratio_line, hours=hours
                 )
-                adj_q_balance[(bus,t)] = q_b1-q_b2
-        return{
-            'adj_line_pij': adj_line_pij,
-            'adj_line_pji': adj_line_pji,
-            'adj_line_qij': adj_line_qij,
-            'adj_line_qji': adj_line_qji,
-            'adj_slimit_sij': adj_slimit_sij,
-            'adj_p_balance': adj_p_balance,
-            'adj_q_balance': adj_q_balance          
-        }
\ No newline at end of file
+        bus, ward_bus = self.system_param.get('bus'), self.system_param.get('ward_bus')
+        border = [label for label in bus if ward_bus.get(label)]
+        columns = [bus.index(label) for label in border]
+        for name, ward in [('adj_p_balance', 'bus_ward_p'), ('adj_q_balance', 'bus_ward_q')]:
+            adjust_values.arrays[name][1][:, columns] -= hourly_matrix(self.system_values, ward, border, hours, fill=0)
+        return adjust_values
@@ -0,0 +1,89 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+# estado de frontera por defecto, voltaje, ángulo y potencias de los wards (términos de CreateModel._border_terms)
+BOUNDARY_FIELDS = ['vbus', 'theta', 'pward', 'qward']
+
+class BoundaryStore(object):
+    '''
+        Class encargada del estado de frontera compartido entre procesos, un solo bloque de
+        multiprocessing.shared_memory con la matriz (capas x áreas x barras de frontera x horas x campos), cada área
+        lee y escribe su parte en el lugar y entre procesos solo viaja spec (dimensiones y nombre del bloque), así el
+        intercambio no depende de la cantidad de horas
+    '''
+    def __init__(self, areas, buses, hours, fields=None, layers=('x',), name=None):
+        '''
+            Está función instancia la clase BoundaryStore, sin name crea el bloque y con name se conecta a uno existente
+            input
+                areas: áreas que comparten el estado
+                buses: índice global compacto de las barras de frontera (system_param['bus_index'])
+                hours: horas del estado
+                fields: términos de frontera de cada barra y hora, por defecto BOUNDARY_FIELDS
+                layers: capas del estado, ej: ('x', 'z', 'u') para los valores, objetivos y duales del ADMM
+                name: nombre del bloque de memoria compartida al que se conecta
+            return
+                Objeto de tipo BoundaryStore
+        '''
+        self.areas, self.buses, self.hours = list(areas), [int(bus) for bus in buses], list(hours)
+        self.fields, self.layers = list(fields or BOUNDARY_FIELDS), list(layers)
+        self.area_pos = dict((area, k) for k, area in enumerate(self.areas))
+        self.bus_pos = dict((bus, k) for k, bus in enumerate(self.buses))
+        self.hour_pos = dict((t, k) for k, t in enumerate(self.hours))
+        self.field_pos = dict((field, k) for k, field in enumerate(self.fields))
+        self.layer_pos = dict((layer, k) for k, layer in enumerate(self.layers))
+        self.owner = name is None
+        shape = (len(self.layers), len(self.areas), len(self.buses), len(self.hours), len(self.fields))
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=max(1, int(np.prod(shape)))*8)
+        self.array = np.ndarray(shape, dtype=float, buffer=self.shm.buf)
+        if self.owner: self.array[:] = 0
+    @property
+    def spec(self):
+        '''
+            Está función entrega lo necesario para conectarse al bloque desde otro proceso
+            input
+                None
+            return
+                tuple: áreas, barras, horas, campos, capas y nombre del bloque
+        '''
+        return (self.areas, self.buses, self.hours, self.fields, self.layers, self.shm.name)
+    @classmethod
+    def attach(cls, spec):
+        '''
+            Está función se conecta desde otro proceso al bloque de spec
+            input
+                spec: valor de BoundaryStore.spec
+            return
+                BoundaryStore conectado al bloque
+        '''
+        areas, buses, hours, fields, layers, name = spec
+        return cls(areas, buses, hours, fields, layers, name=name)
+    def layer(self, layer):
+        '''
+            Está función entrega la vista de una capa (áreas x barras x horas x campos)
+            input
+                layer: nombre de la capa
+            return
+                ndarray: vista sobre la memoria compartida
+        '''
+        return self.array[self.layer_pos[layer]]
+    def view(self, layer, area):
+        '''
+            Está función entrega la vista de un área en una capa (barras x horas x campos)
+            input
+                layer: nombre de la capa
+                area: área
+            return
+                ndarray: vista sobre la memoria compartida
+        '''
+        return self.array[self.layer_pos[layer], self.area_pos[area]]
+    def close(self):
+        '''
+            Está función suelta la vista y el bloque, el proceso que lo creó también lo borra
+            input
+                None
+            return
+                None
+        '''
+        self.array = None
+        self.shm.close()
+        if self.owner: self.shm.unlink()
@@ -0,0 +1,180 @@
+import numpy as np
+import pandapower as pp
+from scipy.sparse.linalg import splu
+from pandapower.toolbox import select_subnet
+from pandapower.grid_equivalents import get_equivalent
+from pandapower.pypower.idx_gen import GEN_BUS, GEN_STATUS, QMIN, QMAX
+from _source.power_flow import BatchPowerFlow
+
+def topology_key(net):
+    '''
+        Está función entrega la clave de la topología del sistema, barras, ramas y fuentes en servicio,
+        el equivalente se conserva mientras la clave no cambie
+        input
+            net: sistema de pandapower
+        return
+            tuple: clave de la topología
+    '''
+    return (
+        tuple(net.bus.index[net.bus['in_service']]),
+        tuple(net.line.loc[net.line['in_service'], ['from_bus', 'to_bus']].itertuples(index=False, name=None)),
+        tuple(net.trafo.loc[net.trafo['in_service'], ['hv_bus', 'lv_bus']].itertuples(index=False, name=None)),
+        tuple(net.gen.loc[net.gen['in_service'], 'bus']),
+        tuple(net.ext_grid.loc[net.ext_grid['in_service'], 'bus']),
+    )
+
+def element_positions(elements, table):
+    '''
+        Está función entrega la posición en la tabla del sistema de cada carga o generador del equivalente, se
+        buscan por barra en el orden de la tabla porque get_equivalent (pandapower 2.10) renumera los índices
+        input
+            elements: tabla de cargas o generadores del equivalente
+            table: tabla de cargas o generadores del sistema
+        return
+            ndarray: posiciones en la tabla del sistema
+    '''
+    at_bus = {}
+    for k, bus in enumerate(table['bus'].values):
+        at_bus.setdefault(bus, []).append(k)
+    return np.array([at_bus[bus].pop(0) for bus in elements['bus'].values], dtype=int)
+
+class WardEquivalent(object):
+    '''
+        Class encargada del equivalente ward de un área con la red externa reducida una sola vez, get_equivalent
+        arma la plantilla (barras internas y de frontera, impedancias y wards) y factoriza el complemento de Schur,
+        para cada hora solo se recalculan las inyecciones ps, qs de los wards, el flujo de carga de la red externa con
+        las fronteras como referencia se resuelve para todas las horas con BatchPowerFlow y las corrientes externas se
+        llevan a la frontera con una sola solución dispersa de la factorización de Y_ee
+    '''
+    def __init__(self, net, border_node, internal_node, print_sec=False):
+        '''
+            Está función instancia la clase WardEquivalent
+            input
+                net: sistema de pandapower con las cargas y generadores de la hora base
+                border_node: barras de frontera del área
+                internal_node: barras internas del área
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo WardEquivalent
+        '''
+        self.print_sec = print_sec
+        self.net_eq = get_equivalent(net, 'ward', border_node, internal_node)
+        # get_equivalent agrega a la frontera las barras de referencia externas, los wards quedan en todas ellas
+        self.boundary = [int(bus) for bus in self.net_eq.ward['bus'].values]
+        self.external = [bus for bus in net.bus.index if bus not in self.net_eq.bus.index]
+        vm, va = self._boundary_voltages(net)
+        net_ext = select_subnet(net, self.boundary + self.external)
+        sources = set(net_ext.ext_grid.loc[net_ext.ext_grid['in_service'], 'bus']) | set(net_ext.gen.loc[net_ext.gen['in_service'] & net_ext.gen['slack'], 'bus'])
+        for bus in self.boundary:
+            if bus not in sources: pp.create_ext_grid(net_ext, bus, vm[bus], va[bus], name='ward_boundary')
+        # fronteras con una fuente propia de la red externa, su ward no lleva la corrección de la parte de impedancia
+        self.is_source = np.array([bus in sources for bus in self.boundary])
+        self.pf = BatchPowerFlow(net_ext)
+        # select_subnet deja la red externa con su propia potencia base, Y_eq y las inyecciones quedan en esa base
+        self.base_mva = self.pf.base_mva
+        lookup = net_ext._pd2ppc_lookups['bus']
+        self.b, self.e = lookup[self.boundary], lookup[self.external]
+        self.V_b = self.pf.V0[self.b]
+        self.q_share = self._q_share(net_ext, lookup)
+        # posiciones de las cargas y generadores de la red externa y del equivalente en las tablas del sistema
+        self.ext_load = net.load.index.get_indexer(net_ext.load.index)
+        self.ext_gen = net.gen.index.get_indexer(net_ext.gen.index)
+        self.eq_load = element_positions(self.net_eq.load, net.load)
+        self.eq_gen = element_positions(self.net_eq.gen, net.gen)
+        self._factorize()
+        if self.print_sec: print(f'Equivalente ward: {len(self.boundary)} barras de frontera - {len(self.external)} barras externas')
+    def __getstate__(self):
+        # la factorización de SuperLU no se puede copiar a otros procesos, se rehace si se necesita
+        state = self.__dict__.copy()
+        state['_lu'] = None
+        return state
+    def _boundary_voltages(self, net):
+        '''
+            Está función entrega el voltaje de referencia de las fronteras con la misma regla de get_equivalent,
+            resultado del último flujo de carga del sistema si existe (1 pu y 0 grados si no), la magnitud del
+            generador si la barra tiene uno
+            input
+                net: sistema de pandapower
+            return
+                dict, dict: magnitud y ángulo por barra de frontera
+        '''
+        vm, va = dict((bus, 1.0) for bus in self.boundary), dict((bus, 0.0) for bus in self.boundary)
+        if 'res_bus' in net and len(net.res_bus):
+            res = net.res_bus[['vm_pu', 'va_degree']].dropna()
+            for bus in self.boundary:
+                if bus in res.index: vm[bus], va[bus] = res.at[bus, 'vm_pu'], res.at[bus, 'va_degree']
+        gen = net.gen[net.gen['in_service']].drop_duplicates('bus')
+        for bus, vm_pu in zip(gen['bus'].values, gen['vm_pu'].values):
+            if bus in vm: vm[bus] = vm_pu
+        return vm, va
+    def _q_share(self, net_ext, lookup):
+        '''
+            Está función entrega la fracción de la potencia reactiva de cada frontera que toma su referencia, pypower
+            reparte la reactiva de una barra entre sus fuentes en proporción al rango de reactiva (o por partes
+            iguales si el rango de la barra es cero) y el ward solo recibe la parte de la referencia
+            input
+                net_ext: red externa con las referencias en las fronteras
+                lookup: posición interna de cada barra
+            return
+                ndarray: fracción por barra de frontera
+        '''
+        gen = net_ext._ppc['gen']
+        on = gen[:, GEN_STATUS] > 0
+        rows = list(net_ext._pd2ppc_lookups['ext_grid'][net_ext.ext_grid.index[net_ext.ext_grid['in_service']]])
+        rows += list(net_ext._pd2ppc_lookups['gen'][net_ext.gen.index[net_ext.gen['in_service'] & net_ext.gen['slack']]])
+        share = np.ones(len(self.boundary))
+        for k, bus in enumerate(lookup[self.boundary]):
+            at_bus = on & (gen[:, GEN_BUS] == bus)
+            source = [row for row in rows if gen[row, GEN_BUS] == bus][0]
+            q_min, q_max = gen[at_bus, QMIN].sum(), gen[at_bus, QMAX].sum()
+            share[k] = (1/at_bus.sum() if q_min == q_max else
+                        (gen[source, QMAX] - gen[source, QMIN])/(q_max - q_min + np.finfo(float).eps))
+        return share
+    def _factorize(self):
+        '''
+            Está función factoriza Y_ee y calcula la Ybus equivalente de la frontera Y_bb - Y_be Y_ee^-1 Y_eb
+            input
+                None
+            return
+                None
+        '''
+        Y = self.pf.Ybus
+        self.Y_e = Y[self.e]
+        self.Y_be = Y[self.b][:, self.e]
+        self._lu = splu(self.Y_e[:, self.e].tocsc())
+        self.Y_eq = Y[self.b][:, self.b].toarray() - self.Y_be @ self._lu.solve(self.Y_e[:, self.b].toarray())
+    def set_injections(self, p_load, q_load, p_gen):
+        '''
+            Está función calcula las inyecciones ps, qs de los wards de todas las horas, el flujo de carga externo
+            de todas las horas a la vez y las corrientes externas llevadas a la frontera con Y_be Y_ee^-1
+            input
+                p_load, q_load: matrices (horas x cargas del sistema) en MW y MVAr
+                p_gen: matriz (horas x generadores del sistema) en MW
+            return
+                None
+        '''
+        if self._lu is None: self._factorize()
+        V = self.pf.run(p_load[:, self.ext_load], q_load[:, self.ext_load], p_gen[:, self.ext_gen])['V'].T
+        X = self._lu.solve(np.asarray(self.Y_e @ V))
+        # la parte de impedancia del ward (pz, qz) se fijó con el voltaje de referencia de la frontera, en las
+        # fronteras con fuente get_equivalent toma ps, qs de la potencia de la fuente y la parte de impedancia ya está
+        shunt = self.base_mva*np.conj(self.Y_eq.sum(axis=1))*(1 - np.abs(self.V_b)**2)*~self.is_source
+        S = self.base_mva*self.V_b[:, None]*np.conj(self.Y_be @ X) - shunt[:, None]
+        self.ps, self.qs = S.real.T, (self.q_share[:, None]*S.imag).T
+        self.p_load, self.q_load, self.p_gen = p_load[:, self.eq_load], q_load[:, self.eq_load], p_gen[:, self.eq_gen]
+    def get_hour(self, k):
+        '''
+            Está función entrega el equivalente de la hora k con su flujo de carga resuelto
+            input
+                k: posición de la hora en las matrices de set_injections
+            return
+                net_eq: sistema equivalente
+        '''
+        net = self.net_eq
+        net.load['p_mw'] = self.p_load[k]
+        net.load['q_mvar'] = self.q_load[k]
+        net.gen['p_mw'] = self.p_gen[k]
+        net.ward['ps_mw'] = self.ps[k]
+        net.ward['qs_mvar'] = self.qs[k]
+        pp.runpp(net, calculate_voltage_angles=True)
+        return net
@@ -0,0 +1,302 @@
+import os
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from _source.model import CreateModel
+from _source.solver_backends import SolverBackend
+
+class CreateDCModel(CreateModel):
+    '''
+        Class encargada de crear el modelo DC (B-theta) de potencia activa sobre los mismos Sets ij, bus, gen y t
+        del modelo AC, es un LP con objetivo L1 (redespacho de generadores y desbalance penalizado) que se resuelve
+        mucho más rápido, sirve para descartar horas infactibles y como punto inicial del modelo AC
+    '''
+    def __init__(self, system_param, system_values, adjust_values=None, penalty=1e3, print_sec=False):
+        '''
+            Está función instancia la clase CreateDCModel
+            input
+               system_param: valores i, j del sistema
+               system_values: valores del sistema
+               adjust_values: valores de ajuste, el modelo DC no los usa
+               penalty: costo por pu del desbalance de potencia activa frente al redespacho de los generadores
+               print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo CreateDCModel
+        '''
+        super().__init__(system_param, system_values, adjust_values or {}, print_sec=print_sec)
+        self.penalty = penalty
+        self.screening = None
+    def _element_at_bus(self, at_bus, status=None):
+        '''
+            Está función entrega los elementos conectados a cada barra desde las llaves (elemento, barra) de atBus o
+            atBusSlack, la barra se compara como texto
+            input
+                at_bus: diccionario {(elemento, barra): True}
+                status: diccionario {(posición del elemento, barra): True} opcional, ej: genstatus
+            return
+                list: elementos conectados por posición de la barra
+        '''
+        elements = [[] for _ in self.bus_list]
+        for (element, bus), value in at_bus.items():
+            if value and str(bus) in self.bus_pos and (status is None or status.get((int(element), bus))):
+                elements[self.bus_pos[str(bus)]].append(element)
+        return elements
+    def _add_var_dc(self, ratio_line):
+        '''
+            Está función crea las variables del modelo DC, V_Theta, V_LinePij y V_LinePji con los límites térmicos,
+            V_TrafoPhv y V_TrafoPlv (flujo que sale del lado de alta y del lado de baja de cada trafo), V_Pgen,
+            V_Pslack y las partes positiva y negativa del redespacho (V_Pgen_dev) y del desbalance (V_Pmis), los
+            generadores, el slack y los trafos no tienen límites porque el modelo AC tampoco los tiene
+            input
+                ratio_line: capacidad máxima de potencia de las líneas del sistema
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega las variables del modelo DC')
+        rate_ij = dict((ij, ratio_line[ij]) for ij in self.ij_list)
+        rate_ji = dict((ji, ratio_line[ij]) for ij, ji in zip(self.ij_list, self.ji_list))
+        self.model.V_Theta = pyomo.Var(
+                self.model.bus,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_bus_theta'),
+                doc='angle in bus b at time t'
+            )
+        self.model.V_LinePij = pyomo.Var(
+                self.model.ij,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_line_pij'),
+                doc='Real power flowing from bus i towards bus j on line c at time t'
+            )
+        self.model.V_LinePji = pyomo.Var(
+                self.model.ji,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_line_pji'),
+                doc='Real power flowing from bus j towards bus i on line c at time t'
+            )
+        self.model.trafo_dc = pyomo.Set(initialize=list(self.system_param.get('trafo_ends', {})), doc='Trafos hv-lv')
+        self.model.V_TrafoPhv = pyomo.Var(
+                self.model.trafo_dc,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_trafo_p_hv'),
+                doc='Real power flowing from the hv bus towards the lv bus on trafo k at time t'
+            )
+        self.model.V_TrafoPlv = pyomo.Var(
+                self.model.trafo_dc,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_trafo_p_lv'),
+                doc='Real power flowing from the lv bus towards the hv bus on trafo k at time t'
+            )
+        self.model.V_Pgen = pyomo.Var(
+                self.model.gen,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_gen_p'),
+                doc='potencia in gen g at time t'
+            )
+        self.model.V_Pslack = pyomo.Var(
+                self.model.slack,
+                self.model.t,
+                within=pyomo.Reals,
+                initialize=self.system_values.get('init_slack_p'),
+                doc='potencia in gen g at time t'
+            )
+        # los bounds se ponen después de inicializar, el flujo de carga puede quedar por fuera de los límites
+        for (ij, t), var in self.model.V_LinePij.items(): var.setlb(-rate_ij[ij]); var.setub(rate_ij[ij])
+        for (ji, t), var in self.model.V_LinePji.items(): var.setlb(-rate_ji[ji]); var.setub(rate_ji[ji])
+        self.model.V_Pgen_dev = pyomo.Var(
+                self.model.gen,
+                self.model.t,
+                ['pos', 'neg'],
+                within=pyomo.NonNegativeReals,
+                initialize=0,
+                doc='Redespacho del gen g at time t'
+            )
+        self.model.V_Pmis = pyomo.Var(
+                self.model.bus,
+                self.model.t,
+                ['pos', 'neg'],
+                within=pyomo.NonNegativeReals,
+                initialize=0,
+                doc='Desbalance de potencia activa en bus b at time t'
+            )
+    def _add_dc_flow_constraint(self, b, b_trafo=None):
+        '''
+            Está función crea la restricción de flujo DC P_ij = -b_ij*(theta_i - theta_j) + offset de las líneas y de
+            los trafos (lado hv y lado lv), el offset se calcula con los valores iniciales del flujo de carga (pérdidas,
+            voltajes distintos de 1 pu), así el punto del flujo de carga cumple las restricciones
+            input
+                b: susceptance
+                b_trafo: susceptance serie de los trafos, ej: _get_trafo_conductance_susceptance
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega la restricción de flujo DC')
+        b_ij, b_ji = [b[ij] for ij in self.ij_list], [b[ji] for ji in self.ji_list]
+        theta = self._var_table(self.model.V_Theta, self.bus_list)
+        pij, pji = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LinePji, self.ji_list)
+        def dc_flow_ij(model, k, t):
+            expr = pij[k][t] + b_ij[k] * (theta[self.ij_from[k]][t] - theta[self.ij_to[k]][t])
+            return expr == pyomo.value(expr)
+        def dc_flow_ji(model, k, t):
+            expr = pji[k][t] + b_ji[k] * (theta[self.ji_from[k]][t] - theta[self.ji_to[k]][t])
+            return expr == pyomo.value(expr)
+        self.model.line_dc_ij = pyomo.Constraint(
+                                    self._index_set('ij'),
+                                    self.model.t,
+                                    rule=self._index_rule(dc_flow_ij, self.ij_pos),
+                                    doc='DC power flow on line ijc'
+                                )
+        self.model.line_dc_ji = pyomo.Constraint(
+                                    self._index_set('ji'),
+                                    self.model.t,
+                                    rule=self._index_rule(dc_flow_ji, self.ji_pos),
+                                    doc='DC power flow on line jic'
+                                )
+        trafo_ends = self.system_param.get('trafo_ends', {})
+        def dc_flow_trafo(var, first, second):
+            def rule(model, k, t):
+                i, j = self.bus_pos[trafo_ends[k][first]], self.bus_pos[trafo_ends[k][second]]
+                expr = var[k, t] + b_trafo[k] * (theta[i][t] - theta[j][t])
+                return expr == pyomo.value(expr)
+            return rule
+        self.model.trafo_dc_hv = pyomo.Constraint(
+                                    self.model.trafo_dc,
+                                    self.model.t,
+                                    rule=dc_flow_trafo(self.model.V_TrafoPhv, 0, 1),
+                                    doc='DC power flow on trafo k from the hv bus'
+                                )
+        self.model.trafo_dc_lv = pyomo.Constraint(
+                                    self.model.trafo_dc,
+                                    self.model.t,
+                                    rule=dc_flow_trafo(self.model.V_TrafoPlv, 1, 0),
+                                    doc='DC power flow on trafo k from the lv bus'
+                                )
+    def _add_dc_balance_constraint(self, genstatus):
+        '''
+            Está función crea la restricción de balance de potencia activa del modelo DC, generación - demanda +
+            desbalance = flujos de líneas y trafos + offset, el offset (shunts y pérdidas que no están en las ramas)
+            se calcula con los valores iniciales del flujo de carga
+            input
+                genstatus: estado de los generadores del sistema
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega la restricción de balance DC')
+        gen_at = self._element_at_bus(self.system_param.get('atBus'), genstatus)
+        slack_at = self._element_at_bus(self.system_param.get('atBusSlack'))
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        Pd = self.system_values.get('Pd')
+        pij, pji = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LinePji, self.ji_list)
+        hv_at, lv_at = [[] for _ in self.bus_list], [[] for _ in self.bus_list]
+        for k, (hv, lv) in self.system_param.get('trafo_ends', {}).items():
+            hv_at[self.bus_pos[hv]].append(k)
+            lv_at[self.bus_pos[lv]].append(k)
+        def balance_dc_rule(model, k, t):
+            bus = self.bus_list[k]
+            expr = (
+                    sum(model.V_Pgen[gen, t] for gen in gen_at[k])
+                    + sum(model.V_Pslack[gen, t] for gen in slack_at[k])
+                    - (Pd[bus,t] if (bus,t) in Pd else 0)
+                    + model.V_Pmis[bus, t, 'pos'] - model.V_Pmis[bus, t, 'neg']
+                    - sum(pij[c][t] for c in ij_at[k])
+                    - sum(pji[c][t] for c in ji_at[k])
+                    - sum(model.V_TrafoPhv[c, t] for c in hv_at[k])
+                    - sum(model.V_TrafoPlv[c, t] for c in lv_at[k])
+                )
+            return expr == pyomo.value(expr)
+        self.model.c_BalanceDC = pyomo.Constraint(
+                                    self._index_set('bus'),
+                                    self.model.t,
+                                    rule=self._index_rule(balance_dc_rule, self.bus_pos),
+                                    doc='DC active power balance'
+                                )
+        init_gen_p = self.system_values.get('init_gen_p')
+        self.model.c_Pgen_dev = pyomo.Constraint(
+                                    self.model.gen,
+                                    self.model.t,
+                                    rule=lambda model, gen, t: (model.V_Pgen[gen, t] - init_gen_p[gen, t]
+                                                                == model.V_Pgen_dev[gen, t, 'pos'] - model.V_Pgen_dev[gen, t, 'neg']),
+                                    doc='Redispatch of gen g'
+                                )
+    def _add_function_obj(self):
+        '''
+            Está función crea la función objetivo L1, redespacho de los generadores más el desbalance penalizado
+            input
+                None
+            return
+                None
+        '''
+        if self.print_sec: print(f'Se agrega la función objetivo DC - penalty: {self.penalty}')
+        def obj_rule(model):
+            return (
+                    sum(model.V_Pgen_dev[gen, t, side] for gen in model.gen for t in model.t for side in ['pos', 'neg'])
+                    + self.penalty * sum(model.V_Pmis[bus, t, side] for bus in model.bus for t in model.t for side in ['pos', 'neg'])
+                )
+        self.model.obj = pyomo.Objective(rule=obj_rule, sense=pyomo.minimize)
+    def solve_model(self, backend='highs', profile='tight_final'):
+        '''
+            Está función resuelve el modelo DC, el backend y los tiempos quedan en self.solver_info
+            input
+                backend: backend lineal de solver_backends (highs) o cualquier solver LP de Pyomo, ej: glpk, cbc
+                profile: perfil de opciones del backend, ej: tight_final, fast_screening
+            return
+                bool: True si el solver terminó bien
+        '''
+        system_name = self.system_param.get('system_name')
+        if self.print_sec: print(f'\n--> Se inicia la solución del modelo DC {system_name} <--\n')
+        solver = SolverBackend(backend, profile, system_name=system_name, print_sec=self.print_sec)
+        is_solve, self.solver_info = solver.solve(self.model)
+        return is_solve
+    def screen_hours(self, tol=1e-6):
+        '''
+            Está función entrega el desbalance y el redespacho de cada hora, una hora con desbalance mayor a tol
+            no tiene solución DC con los límites de las líneas y se puede descartar antes del modelo AC
+            input
+                tol: desbalance máximo en pu para aceptar la hora
+            return
+                DataFrame: columnas t, mismatch, redispatch y feasible
+        '''
+        self.screening = DataFrame([{
+                't': t,
+                'mismatch': sum(pyomo.value(self.model.V_Pmis[bus, t, side]) for bus in self.model.bus for side in ['pos', 'neg']),
+                'redispatch': sum(pyomo.value(self.model.V_Pgen_dev[gen, t, side]) for gen in self.model.gen for side in ['pos', 'neg']),
+            } for t in self.model.t])
+        self.screening['feasible'] = self.screening['mismatch'] <= tol
+        if self.print_sec: print(f'Horas infactibles DC: {list(self.screening.loc[~self.screening["feasible"], "t"])}')
+        return self.screening
+    def warm_start(self, model):
+        '''
+            Está función pasa la solución DC (ángulos, flujos activos y potencia de los generadores) como valores
+            iniciales de un modelo AC creado con CreateModel o CreateAreaModel
+            input
+                model: objeto con el modelo AC en model.model
+            return
+                int: número de variables inicializadas
+        '''
+        count = 0
+        for name in ['V_Theta', 'V_LinePij', 'V_LinePji', 'V_Pgen', 'V_Pslack']:
+            source, target = getattr(self.model, name), getattr(model.model, name, None)
+            if target is None: continue
+            for key, var in source.items():
+                if key in target and var.value is not None:
+                    target[key].set_value(var.value, skip_validation=True)
+                    count += 1
+        if self.print_sec: print(f'Se inicializan {count} variables del modelo AC con la solución DC')
+        return count
+    def save_model_variables(self):
+        '''
+            Está función guarda los datos del modelo DC con el mismo formato de CreateModel en Resultados/{sistema}_dc
+            input
+                None
+            return
+                None
+        '''
+        folder = f'{self.system_param.get("system_name")}_dc'
+        os.makedirs(f'Resultados/{folder}', exist_ok=True)
+        super().save_model_variables(folder)
+        if self.screening is not None:
+            self.screening.to_csv(f'Resultados/{folder}/Screening__res.csv', index=False)
@@ -0,0 +1,125 @@
+from collections.abc import Mapping
+import numpy as np
+
+class HourlyValues(Mapping):
+    '''
+        Class encargada de guardar los valores del sistema como matrices (horas x elementos),
+        los diccionarios {(elemento, hora): valor} solo se arman cuando se piden
+    '''
+    def __init__(self, hours, arrays):
+        '''
+            Está función instancia la clase HourlyValues
+            input
+                hours: lista de horas
+                arrays: diccionario nombre -> (keys, matriz) o (keys, (matriz_min, matriz_max)) para los bounds
+            return
+                Objeto de tipo HourlyValues
+        '''
+        self.hours = list(hours)
+        self.arrays = arrays
+        self._dicts = {}
+    def __getitem__(self, name):
+        if name not in self._dicts:
+            keys, values = self.arrays[name]
+            if isinstance(values, tuple):
+                self._dicts[name] = hourly_bounds(keys, self.hours, *values)
+            else:
+                self._dicts[name] = hourly_dict(keys, self.hours, values)
+        return self._dicts[name]
+    def __iter__(self):
+        return iter(self.arrays)
+    def __len__(self):
+        return len(self.arrays)
+
+def hourly_dict(keys, hours, values):
+    '''
+        Está función arma el diccionario {(elemento, hora): valor} desde una matriz (horas x elementos)
+        input
+            keys: lista de elementos
+            hours: lista de horas
+            values: matriz (horas x elementos)
+        return
+            dict: diccionario de valores
+    '''
+    return dict(((key, t), value)
+                for t, row in zip(hours, np.asarray(values).tolist())
+                for key, value in zip(keys, row))
+
+def hourly_bounds(keys, hours, low, up):
+    '''
+        Está función arma el diccionario {(elemento, hora): (min, max)} desde dos matrices (horas x elementos)
+        input
+            keys: lista de elementos
+            hours: lista de horas
+            low, up: matrices (horas x elementos) de límites
+        return
+            dict: diccionario de bounds
+    '''
+    return dict(((key, t), (l, u))
+                for t, row_l, row_u in zip(hours, np.asarray(low).tolist(), np.asarray(up).tolist())
+                for key, l, u in zip(keys, row_l, row_u))
+
+def flow_bounds(p):
+    '''
+        Está función entrega los bounds +-10% del flujo de las líneas
+        input
+            p: matriz (horas x líneas) de flujos
+        return
+            tuple: (matriz_min, matriz_max)
+    '''
+    return np.where(p>0, 0.9*p, 1.1*p), np.where(p>0, 1.1*p, 0.9*p)
+
+def conductance_susceptance(line):
+    '''
+        Está función calcula la conductance y susceptance de todas las líneas en una sola pasada
+        input
+            line: tabla line de pandapower
+        return
+            g, b: arreglos por línea
+    '''
+    r = line['r_ohm_per_km'].values
+    x = line['x_ohm_per_km'].values
+    r = np.where(r!=0, r, r.mean())
+    x = np.where(x!=0, x, x.mean())
+    d = line['length_km'].values
+    return d*r/(np.power(r,2) + np.power(x,2)), d*(-x)/(np.power(r,2) + np.power(x,2))
+
+def trafo_conductance_susceptance(trafo):
+    '''
+        Está función calcula la conductance y susceptance serie de todos los trafos en una sola pasada, la impedancia
+        de cortocircuito (vk_percent, vkr_percent) se refiere en ohm al lado de alta
+        input
+            trafo: tabla trafo de pandapower
+        return
+            g, b: arreglos por trafo
+    '''
+    z_base = np.power(trafo['vn_hv_kv'].values, 2)/trafo['sn_mva'].values
+    z = trafo['vk_percent'].values/100*z_base
+    r = trafo['vkr_percent'].values/100*z_base
+    x = np.sqrt(np.power(z,2) - np.power(r,2))
+    return r/(np.power(r,2) + np.power(x,2)), -x/(np.power(r,2) + np.power(x,2))
+
+def hourly_matrix(system_values, name, labels, hours, fill=None):
+    '''
+        Está función entrega la matriz (horas x labels) de un valor del sistema, si hay labels repetidos
+        se toma el último valor igual que en el diccionario
+        input
+            system_values: HourlyValues o diccionario de valores del sistema
+            name: nombre del valor, ej: init_bus_v
+            labels: lista de elementos
+            hours: lista de horas
+            fill: valor de los labels que no tienen valor (ej: barras sin carga en Pd), si es None deben estar todos
+        return
+            matriz (horas x labels)
+    '''
+    if isinstance(system_values, HourlyValues) and system_values.hours==list(hours):
+        keys, values = system_values.arrays[name]
+        column = dict((key, c) for c, key in enumerate(keys))
+        if fill is None:
+            return np.asarray(values)[:, [column[label] for label in labels]]
+        values = np.hstack([np.asarray(values, dtype=float), np.full((len(hours), 1), fill, dtype=float)])
+        return values[:, [column.get(label, len(keys)) for label in labels]]
+    dict_values = system_values.get(name)
+    if fill is None:
+        return np.array([[dict_values[label, t] for label in labels] for t in hours], dtype=float).reshape(len(hours), len(labels))
+    return np.array([[dict_values.get((label, t)) or fill for label in labels] for t in hours], dtype=float).reshape(len(hours), len(labels))
@@ -0,0 +1,89 @@
+import time
+import numpy as np
+import scipy.sparse as sp
+import pyomo.environ as pyomo
+from scipy.optimize import milp, Bounds, LinearConstraint
+from pyomo.repn.standard_repn import generate_standard_repn
+
+class LinearSolver(object):
+    '''
+        Class encargada de resolver modelos lineales (LP o MILP) con HiGHS a través de scipy.optimize.milp,
+        las restricciones y el objetivo se leen con standard_repn y deben ser lineales
+    '''
+    def __init__(self, model, options=None, print_sec=False):
+        '''
+            Está función instancia la clase LinearSolver
+            input
+                model: modelo de pyomo (ConcreteModel)
+                options: opciones de scipy.optimize.milp, ej: time_limit, mip_rel_gap, presolve
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo LinearSolver
+        '''
+        self.model = model
+        self.options = dict(options or {})
+        self.print_sec = print_sec
+        self.result = None
+        self.timing = {}
+    def _get_problem(self):
+        '''
+            Está función arma el vector de costos, la matriz dispersa de restricciones, los bounds y la
+            integralidad de las variables, las variables fijas entran como constantes
+            input
+                None
+            return
+                None
+        '''
+        objective = next(self.model.component_data_objects(pyomo.Objective, active=True))
+        self.variables, index = [], {}
+        def linear(expr, name):
+            repn = generate_standard_repn(expr, compute_values=True)
+            if not repn.is_linear():
+                raise ValueError(f'{name} no es lineal, LinearSolver solo resuelve modelos LP o MILP')
+            columns = []
+            for var in repn.linear_vars:
+                if id(var) not in index:
+                    index[id(var)] = len(self.variables)
+                    self.variables.append(var)
+                columns.append(index[id(var)])
+            return repn.constant, columns, repn.linear_coefs
+        self.sign = 1 if objective.sense == pyomo.minimize else -1
+        self.obj_constant, obj_columns, obj_coefs = linear(objective.expr, objective.name)
+        rows, cols, values, con_lb, con_ub = [], [], [], [], []
+        for r, con in enumerate(self.model.component_data_objects(pyomo.Constraint, active=True)):
+            constant, columns, coefs = linear(con.body, con.name)
+            rows += [r]*len(columns)
+            cols += columns
+            values += list(coefs)
+            con_lb.append(-np.inf if con.lb is None else pyomo.value(con.lb) - constant)
+            con_ub.append(np.inf if con.ub is None else pyomo.value(con.ub) - constant)
+        n = len(self.variables)
+        self.c = np.zeros(n)
+        np.add.at(self.c, obj_columns, np.array(obj_coefs, dtype=float)*self.sign)
+        self.A = sp.csr_matrix((values, (rows, cols)), shape=(len(con_lb), n))
+        self.con_lb, self.con_ub = np.array(con_lb, dtype=float), np.array(con_ub, dtype=float)
+        bounds = [var.bounds for var in self.variables]
+        self.lb = np.array([-np.inf if lb is None else lb for lb, _ in bounds], dtype=float)
+        self.ub = np.array([np.inf if ub is None else ub for _, ub in bounds], dtype=float)
+        self.integrality = np.array([0 if var.is_continuous() else 1 for var in self.variables])
+    def solve(self):
+        '''
+            Está función resuelve el modelo lineal y carga la solución en las variables del modelo
+            input
+                None
+            return
+                bool: True si HiGHS encontró el óptimo
+        '''
+        t0 = time.perf_counter()
+        self._get_problem()
+        t1 = time.perf_counter()
+        self.result = milp(self.c, integrality=self.integrality, bounds=Bounds(self.lb, self.ub),
+                           constraints=LinearConstraint(self.A, self.con_lb, self.con_ub) if self.A.shape[0] else None,
+                           options=self.options)
+        t2 = time.perf_counter()
+        if self.result.x is not None:
+            for var, value in zip(self.variables, self.result.x.tolist()):
+                var.set_value(round(value) if not var.is_continuous() else value, skip_validation=True)
+        self.timing = {'write': t1-t0, 'solve': t2-t1, 'load': time.perf_counter()-t2}
+        if self.print_sec: print(f'HiGHS: {self.result.message}')
+        return bool(self.result.success)
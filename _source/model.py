@@ -1,24 +1,66 @@
 import pyomo.environ as pyomo
 from pandas import DataFrame
-class CreateModel(object):
+from _source.solver_session import SolverSession
+from _source.solver_backends import SolverBackend, PYTHON_SOLVERS
+from _source.warm_start import add_warm_start_suffixes, save_warm_start, load_warm_start, warm_start_options
+from _source.system import GetVariablesSystem
+from _source.model_base import ModelBase, FORMULATIONS
+
+# valores de system_param indexados por (label, t), se filtran con las horas del modelo
+HOURLY_PARAM = ['bounds_bus', 'slack_bound_p', 'slack_bound_q']
+
+class CreateModel(ModelBase):
     '''
         Class encargada de crar el modelo de optimización
     '''
-    def __init__(self, system_param, system_values, adjust_values, print_sec=False):
+    def __init__(self, system_param, system_values, adjust_values, int_index=False, sparse_index=False, mutable_param=False, formulation='abs', hours=None, print_sec=False):
         '''
             Está función instancia la clase CreateModel 
             input
                system_param: valores i, j del sistema 
                system_values: valores del sistema
                adjust_values: valores de ajuste para ecuaciones de igualdad
+               int_index: si es True las restricciones se indexan con Sets enteros de ramas y barras
+               sparse_index: si es True las variables se crean solo sobre las tuplas válidas (demandbidmap,
+                             trafos de las ramas y shunts de las barras del modelo)
+               mutable_param: si es True Pd, Qd, init_bus_v y los ajustes entran al modelo como Params mutables,
+                              el modelo se crea una vez y se actualiza con _set_variables_model y _set_adjust_values
+               formulation: forma de las restricciones |A| - |B| <= error (balances y potencia reactiva de ieee39/ieee118),
+                            'abs' o 'square' (A**2 - B**2 <= error**2)
+               hours: horas del modelo, por defecto 1 a 24, los valores indexados por (label, t) se filtran a esas horas
                print_sec: para imprimir secuencia de ejecuciones
             return
                 Objeto de tipo model
         '''
+        self.hours = list(range(1,25)) if hours is None else list(hours)
+        if hours is not None:
+            system_param = self._filter_hours(system_param, HOURLY_PARAM)
+            system_values = self._filter_hours(system_values)
+            adjust_values = self._filter_hours(adjust_values)
+        if formulation not in FORMULATIONS:
+            raise ValueError(f'La formulación {formulation} no existe, formulaciones: {FORMULATIONS}')
         self.print_sec = print_sec
+        self.int_index = int_index
+        self.sparse_index = sparse_index
+        self.mutable_param = mutable_param
+        self.formulation = formulation
         self.system_values = system_values
         self.system_param = system_param
         self.adjust_values = adjust_values
+    def _filter_hours(self, values, names=None):
+        '''
+            Está función deja solo las horas del modelo en los diccionarios indexados por (label, t)
+            input    
+                values: diccionario de valores, ej: system_values
+                names: nombres de los diccionarios indexados por (label, t), por defecto todos los diccionarios
+            return
+                dict: copia de values con los diccionarios filtrados
+        '''
+        hours = set(self.hours)
+        values = dict(values)
+        for name in (names if names is not None else [key for key, value in values.items() if isinstance(value, dict)]):
+            values[name] = dict((key, value) for key, value in values[name].items() if key[-1] in hours)
+        return values
     def init_model(self):
         '''
             Está función crea el modelo de optimización y los Sets del modelo
@@ -29,6 +71,10 @@ class CreateModel(object):
         '''
         if self.print_sec: print('Se crea el objeto del modelo de optimización y los Sets')
         self.model = pyomo.ConcreteModel()
+        self.session = None
+        self.solver_info = None
+        self.warm_start_info = None
+        add_warm_start_suffixes(self.model)
         self.error = 1e-8
         self.min_trafo = 1
         self.m_trafo = 3
@@ -44,7 +90,10 @@ class CreateModel(object):
         self.model.demandbid = pyomo.Set(initialize=[id_ for id_ in self.system_param.get('demandbid')], doc='Demandbid')
         self.model.bus = pyomo.Set(initialize=[bus for bus in self.system_param.get('bus')], doc='Buses')
         self.model.bus_shunt = pyomo.Set(initialize=[sht for sht in self.system_param.get('bus_shunt')], doc='Shunt')
-        self.model.t = pyomo.Set(initialize=[t for t in range(1,25)], doc='Time')
+        self.model.bus_load = pyomo.Set(initialize=[bus for bus in self.system_param.get('bus_load')], doc='Buses Load')
+        self.model.t = pyomo.Set(initialize=[t for t in self.hours], doc='Time')
+        self._set_index_tables()
+        if self.mutable_param: self._add_param_model()
         # init variables  
         self.dict_keys = {
             'init_bus_theta':'Var_V_Theta','init_bus_v':'Var_V_Vbus',
@@ -53,6 +102,88 @@ class CreateModel(object):
             'init_gen_p':'Var_V_Pgen','init_gen_q':'Var_V_Qgen','Pd':'Pd', 'Qd':'Qd',
             'init_slack_p':'Var_V_Pslack','init_slack_q':'Var_V_Qslack'
         }
+    def _add_param_model(self):
+        '''
+            Está función crea los parámetros mutables del modelo de optimización con los valores actuales
+            del sistema y de ajuste
+            input    
+                None
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega los parametros del modelo')
+        self.model.Pd = pyomo.Param(
+            self.model.bus_load,
+            self.model.t,
+            initialize=self.system_values.get('Pd'),
+            mutable=True
+        )
+        self.model.Qd = pyomo.Param(
+            self.model.bus_load,
+            self.model.t,
+            initialize=self.system_values.get('Qd'),
+            mutable=True
+        )
+        self.model.Init_bus_v = pyomo.Param(
+            self.model.bus,
+            self.model.t,
+            initialize=self.system_values.get('init_bus_v'),
+            mutable=True
+        )
+        self.model.Adj_p_balance = pyomo.Param(
+            self.model.bus,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_p_balance'),
+            mutable=True
+        )
+        self.model.Adj_q_balance = pyomo.Param(
+            self.model.bus,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_q_balance'),
+            mutable=True
+        )
+        self.model.Adj_slimit_sij = pyomo.Param(
+            self.model.ij,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_slimit_sij'),
+            mutable=True
+        )
+        self.model.Adj_line_pij = pyomo.Param(
+            self.model.ij,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_line_pij'),
+            mutable=True
+        )
+        self.model.Adj_line_pji = pyomo.Param(
+            self.model.ji,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_line_pji'),
+            mutable=True
+        )
+        self.model.Adj_line_qij = pyomo.Param(
+            self.model.ij,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_line_qij'),
+            mutable=True
+        )
+        self.model.Adj_line_qji = pyomo.Param(
+            self.model.ji,
+            self.model.t,
+            initialize=self.adjust_values.get('adj_line_qji'),
+            mutable=True
+        )
+    def _values(self, name, param):
+        '''
+            Está función entrega de dónde se leen los valores de las restricciones, el Param mutable
+            en modo mutable_param o el diccionario de valores
+            input    
+                name: nombre en system_values o adjust_values, ej: Pd, adj_line_pij
+                param: nombre del Param del modelo, ej: Pd, Adj_line_pij
+            return
+                Param o diccionario indexado por (label, t)
+        '''
+        if self.mutable_param: return getattr(self.model, param)
+        return self.adjust_values.get(name) if name.startswith('adj_') else self.system_values.get(name)
     def _add_var_p_line(self):
         '''
             Está función crea la variable de potencia activa de las líneas P(i,j,c,t)
@@ -194,8 +325,10 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la variable V_Shunt')
+        if self.sparse_index:
+            self.model.shunt = pyomo.Set(initialize=[bus for bus in self.model.bus_shunt if bus in self.bus_pos], doc='Shunt bus')
         self.model.V_Shunt = pyomo.Var(
-                self.model.bus_shunt,
+                self.model.shunt if self.sparse_index else self.model.bus_shunt,
                 self.model.t, 
                 within=pyomo.Integers,
                 bounds=(-self.max_shunt,self.max_shunt),
@@ -216,28 +349,47 @@ class CreateModel(object):
                 bounds=(0,1),
                 within=pyomo.Reals,
             )
+        if self.sparse_index:
+            # solo los trafos que están en el extremo de envío de alguna rama aparecen en las restricciones
+            sending = (set(i for i, trafo in zip(self.ij_from, self.ij_trafo) if trafo) 
+                       | set(i for i, trafo in zip(self.ji_to, self.ji_trafo) if trafo))
+            self.model.trafo_branch = pyomo.Set(initialize=[bus for bus in self.model.trafo if self.bus_pos.get(bus) in sending], 
+                                                doc='Bus trafo branch')
         self.model.V_Rtrafo= pyomo.Var(
-                self.model.trafo,
+                self.model.trafo_branch if self.sparse_index else self.model.trafo,
                 self.model.t,
                 bounds=(self.min_trafo,self.max_trafo),
                 initialize = self.m_trafo,
                 within=pyomo.Integers,
             )
-    def _add_var_pd_elastic(self):
+    def _add_var_pd_elastic(self, demandbidmap=None):
         '''
             Está función crea la variable de demanda elastica V_Pd_elastic(demandbid,t)
             input    
-                None
+                demandbidmap: id de la demanda y bus en el que se conecta, en modo sparse_index las
+                              variables se crean solo para sus tuplas
             return
                 None
         '''
         if self.print_sec: print('Se agrega la variable V_Pd_elastic')
-        self.model.V_Pd_elastic = pyomo.Var(
-                self.model.demandbid,
-                self.model.bus, 
-                within=pyomo.Reals,
-                doc='potencia in gen g at time t'
-            )
+        if self.sparse_index:
+            self.model.demandbid_bus = pyomo.Set(
+                    initialize=[key for key, value in (demandbidmap or {}).items() if value], 
+                    dimen=2, 
+                    doc='Demandbid bus'
+                )
+            self.model.V_Pd_elastic = pyomo.Var(
+                    self.model.demandbid_bus,
+                    within=pyomo.Reals,
+                    doc='potencia in gen g at time t'
+                )
+        else:
+            self.model.V_Pd_elastic = pyomo.Var(
+                    self.model.demandbid,
+                    self.model.bus, 
+                    within=pyomo.Reals,
+                    doc='potencia in gen g at time t'
+                )
     def _add_power_s_constraint(self, ratio_line):
         '''
             Está función crea la restricción de potencia aparente para las líneas (i,j,c)
@@ -247,16 +399,20 @@ class CreateModel(object):
             return
                 None
         '''
-        def c_SLimit(model, ij, t):
+        self.ratio_line = ratio_line
+        adj_slimit_sij = self._values('adj_slimit_sij', 'Adj_slimit_sij')
+        ratio_ij = [ratio_line[ij] for ij in self.ij_list]
+        pij, qij = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LineQij, self.ij_list)
+        def c_SLimit(model, k, t):
                 return (
-                        (model.V_LinePij[ij, t])**2
-                        + (model.V_LineQij[ij, t])**2
-                        <= (ratio_line[ij])**2 * self.adjust_values.get('adj_slimit_sij').get((ij,t))
+                        (pij[k][t])**2
+                        + (qij[k][t])**2
+                        <= (ratio_ij[k])**2 * adj_slimit_sij[self.ij_list[k],t]
                     )
         if self.print_sec: print('Se agrega la restricción de potencia aparente')
-        self.model.line_s_limit = pyomo.Constraint(self.model.ij,
+        self.model.line_s_limit = pyomo.Constraint(self._index_set('ij'),
                                                     self.model.t, 
-                                                    rule=c_SLimit,
+                                                    rule=self._index_rule(c_SLimit, self.ij_pos),
                                                     doc='Apparent power limit on line ijc')
     def _add_power_p_constraint(self, g , b):
         '''
@@ -270,37 +426,47 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de potencia activa')
-        def line_constraint_ij(model, ij, t):
+        self.g, self.b = g, b
+        g_ij, b_ij = [g[ij] for ij in self.ij_list], [b[ij] for ij in self.ij_list]
+        g_ji, b_ji = [g[ji] for ji in self.ji_list], [b[ji] for ji in self.ji_list]
+        terms_ij, terms_ji = self._branch_terms('ij'), self._branch_terms('ji')
+        rtrafo = self._var_table(self.model.V_Rtrafo, self.trafo_list)
+        pij, pji = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LinePji, self.ji_list)
+        adj_line_pij = self._values('adj_line_pij', 'Adj_line_pij')
+        adj_line_pji = self._values('adj_line_pji', 'Adj_line_pji')
+        def line_constraint_ij(model, k, t):
+            i, (v2, vv, cos, sin) = self.ij_from[k], terms_ij[k][t]
             return (
-                    (g[ij] * (model.V_Vbus[ij.split('-')[0],t]**2)
-                    / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1))
-                    - (model.V_Vbus[ij.split('-')[0],t] * model.V_Vbus[ij.split('-')[1],t]
-                    / (model.V_Rtrafo[ij.split('-')[0],t] if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1))
-                    * (g[ij] * pyomo.cos(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t]) 
-                    + b[ij] * pyomo.sin(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t]))
+                    (g_ij[k] * (v2)
+                    / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1))
+                    - (vv
+                    / (rtrafo[i][t] if self.ij_trafo[k] else 1))
+                    * (g_ij[k] * cos 
+                    + b_ij[k] * sin)
                     ==
-                    model.V_LinePij[ij,t] + self.adjust_values.get('adj_line_pij').get((ij,t))
+                    pij[k][t] + adj_line_pij[self.ij_list[k],t]
                 )
         self.model.line_p_limit_ij = pyomo.Constraint(
-                                        self.model.ij,
+                                        self._index_set('ij'),
                                         self.model.t, 
-                                        rule=line_constraint_ij,
+                                        rule=self._index_rule(line_constraint_ij, self.ij_pos),
                                         doc='Active power limit on line ijc'
                                     )
-        def line_constraint_ji(model, ji, t):
+        def line_constraint_ji(model, k, t):
+            i, (v2, vv, cos, sin) = self.ji_to[k], terms_ji[k][t]
             return (
-                    g[ji] * model.V_Vbus[ji.split('-')[1],t]**2
-                    - (model.V_Vbus[ji.split('-')[0],t] * model.V_Vbus[ji.split('-')[1],t]
-                    / (model.V_Rtrafo[ji.split('-')[1],t]**2 if self.system_param.get('bus_trafo').get(ji.split('-')[1]) else 1))
-                    * (g[ji] * pyomo.cos(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t]) 
-                    + b[ji] * pyomo.sin(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t]))
+                    g_ji[k] * v2
+                    - (vv
+                    / (rtrafo[i][t]**2 if self.ji_trafo[k] else 1))
+                    * (g_ji[k] * cos 
+                    + b_ji[k] * sin)
                     ==
-                    model.V_LinePji[ji,t] + self.adjust_values.get('adj_line_pji').get((ji,t))
+                    pji[k][t] + adj_line_pji[self.ji_list[k],t]
                 )
         self.model.line_p_limit_ji = pyomo.Constraint(
-                                        self.model.ji,
+                                        self._index_set('ji'),
                                         self.model.t, 
-                                        rule=line_constraint_ji,
+                                        rule=self._index_rule(line_constraint_ji, self.ji_pos),
                                         doc='Active power limit on line jic'
                                     )
     def _add_power_q_constraint(self, g , b):
@@ -315,66 +481,75 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de potencia reactiva')
+        g_ij, b_ij = [g[ij] for ij in self.ij_list], [b[ij] for ij in self.ij_list]
+        g_ji, b_ji = [g[ji] for ji in self.ji_list], [b[ji] for ji in self.ji_list]
+        terms_ij, terms_ji = self._branch_terms('ij'), self._branch_terms('ji')
+        rtrafo = self._var_table(self.model.V_Rtrafo, self.trafo_list)
+        qij, qji = self._var_table(self.model.V_LineQij, self.ij_list), self._var_table(self.model.V_LineQji, self.ji_list)
+        adj_line_qij = self._values('adj_line_qij', 'Adj_line_qij')
+        adj_line_qji = self._values('adj_line_qji', 'Adj_line_qji')
         if (self.system_param.get('system_name') in ['ieee39','ieee118']):
-            def line_constraint_ij(model, ij, t):
+            def line_constraint_ij(model, k, t):
+                i, (v2, vv, cos, sin) = self.ij_from[k], terms_ij[k][t]
                 return (
-                            abs(- model.V_Vbus[ij.split('-')[0],t]**2 * (b[ij])
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1)
-                            - model.V_Vbus[ij.split('-')[0],t] * model.V_Vbus[ij.split('-')[1],t]
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1)
-                            * (g[ij] * pyomo.sin(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t])
-                            - b[ij] * pyomo.cos(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t])))
-                        -
-                            abs(model.V_LineQij[ij,t] + self.adjust_values.get('adj_line_qij').get((ij,t)))
-                        <= self.error
+                            - v2 * (b_ij[k])
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1)
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1)
+                            * (g_ij[k] * sin
+                            - b_ij[k] * cos),
+                            qij[k][t] + adj_line_qij[self.ij_list[k],t]
                     )
+            self._add_abs_constraint('line_q_limit_ij', 'ij', self.ij_pos, line_constraint_ij, 'Reactive power limit on line ijc')
         else:
-            def line_constraint_ij(model, ij, t):
+            def line_constraint_ij(model, k, t):
+                i, (v2, vv, cos, sin) = self.ij_from[k], terms_ij[k][t]
                 return (
-                            - model.V_Vbus[ij.split('-')[0],t]**2 * (b[ij])
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1)
-                            - model.V_Vbus[ij.split('-')[0],t] * model.V_Vbus[ij.split('-')[1],t]
-                            / (model.V_Rtrafo[ij.split('-')[0],t]**2 if self.system_param.get('bus_trafo').get(ij.split('-')[0]) else 1) 
-                            * (g[ij] * pyomo.sin(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t])
-                            - b[ij] * pyomo.cos(model.V_Theta[ij.split('-')[0],t] - model.V_Theta[ij.split('-')[1],t]))
+                            - v2 * (b_ij[k])
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1)
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ij_trafo[k] else 1) 
+                            * (g_ij[k] * sin
+                            - b_ij[k] * cos)
                         ==
-                            model.V_LineQij[ij,t] + self.adjust_values.get('adj_line_qij').get((ij,t))
+                            qij[k][t] + adj_line_qij[self.ij_list[k],t]
                     )
-        self.model.line_q_limit_ij = pyomo.Constraint(
-                                        self.model.ij,
-                                        self.model.t, 
-                                        rule=line_constraint_ij,
-                                        doc='Reactive power limit on line ijc'
-                                    )
+            self.model.line_q_limit_ij = pyomo.Constraint(
+                                            self._index_set('ij'),
+                                            self.model.t, 
+                                            rule=self._index_rule(line_constraint_ij, self.ij_pos),
+                                            doc='Reactive power limit on line ijc'
+                                        )
         if (self.system_param.get('system_name') in ['ieee39','ieee118']):
-            def line_constraint_ji(model, ji, t):
+            def line_constraint_ji(model, k, t):
+                i, (v2, vv, cos, sin) = self.ji_to[k], terms_ji[k][t]
                 return (
-                            abs(- model.V_Vbus[ji.split('-')[1],t]**2 * (b[ji])
-                            - model.V_Vbus[ji.split('-')[0],t] * model.V_Vbus[ji.split('-')[1],t]
-                            / (model.V_Rtrafo[ji.split('-')[1],t]**2 if self.system_param.get('bus_trafo').get(ji.split('-')[1]) else 1)
-                            * (g[ji] * pyomo.sin(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t])
-                            - b[ji] * pyomo.cos(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t])))
-                        -
-                            abs(model.V_LineQji[ji,t] + self.adjust_values.get('adj_line_qji').get((ji,t)))
-                        <= self.error
+                            - v2 * (b_ji[k])
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ji_trafo[k] else 1)
+                            * (g_ji[k] * sin
+                            - b_ji[k] * cos),
+                            qji[k][t] + adj_line_qji[self.ji_list[k],t]
                     )
+            self._add_abs_constraint('line_q_limit_ji', 'ji', self.ji_pos, line_constraint_ji, 'Reactive power limit on line jic')
         else:
-            def line_constraint_ji(model, ji, t):
+            def line_constraint_ji(model, k, t):
+                i, (v2, vv, cos, sin) = self.ji_to[k], terms_ji[k][t]
                 return (
-                            - model.V_Vbus[ji.split('-')[1],t]**2 * (b[ji])
-                            - model.V_Vbus[ji.split('-')[0],t] * model.V_Vbus[ji.split('-')[1],t]
-                            / (model.V_Rtrafo[ji.split('-')[1],t]**2 if self.system_param.get('bus_trafo').get(ji.split('-')[1]) else 1)
-                            * (g[ji] * pyomo.sin(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t])
-                            - b[ji] * pyomo.cos(model.V_Theta[ji.split('-')[1],t] - model.V_Theta[ji.split('-')[0],t]))
+                            - v2 * (b_ji[k])
+                            - vv
+                            / (rtrafo[i][t]**2 if self.ji_trafo[k] else 1)
+                            * (g_ji[k] * sin
+                            - b_ji[k] * cos)
                         ==
-                            model.V_LineQji[ji,t] + self.adjust_values.get('adj_line_qji').get((ji,t))
+                            qji[k][t] + adj_line_qji[self.ji_list[k],t]
                     )
-        self.model.line_q_limit_ji = pyomo.Constraint(
-                                        self.model.ji,
-                                        self.model.t, 
-                                        rule=line_constraint_ji,
-                                        doc='Reactive power limit on line jic'
-                                    )
+            self.model.line_q_limit_ji = pyomo.Constraint(
+                                            self._index_set('ji'),
+                                            self.model.t, 
+                                            rule=self._index_rule(line_constraint_ji, self.ji_pos),
+                                            doc='Reactive power limit on line jic'
+                                        )
     def _add_p_balanced_constraint(self, genstatus, demandbidmap):
         '''
             Está función crea la restricción de balance de potencia activa
@@ -385,24 +560,25 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de balance de potencia activa')
-        def balance_eqn_rule(model, bus, t):
+        self.genstatus, self.demandbidmap = genstatus, demandbidmap
+        gen_at, slack_at, demandbid_at = self._adjacent('gen'), self._adjacent('slack'), self._adjacent('demandbid')
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        Pd, adj_p_balance = self._values('Pd', 'Pd'), self._values('adj_p_balance', 'Adj_p_balance')
+        vbus = self._var_table(self.model.V_Vbus, self.bus_list)
+        pij, pji = self._var_table(self.model.V_LinePij, self.ij_list), self._var_table(self.model.V_LinePji, self.ji_list)
+        def balance_eqn_rule(model, k, t):
+            bus = self.bus_list[k]
             return (
-                        abs(sum(model.V_Pgen[gen, t] for gen in self.model.gen if self.system_param.get('atBus').get((gen,bus)) and genstatus.get((gen,bus)))
-                        + sum(model.V_Pslack[gen, t] for gen in self.model.slack if self.system_param.get('atBusSlack').get((gen,bus)))
-                        - (self.system_values.get('Pd').get((bus,t)) if self.system_values.get('Pd').get((bus,t)) else 0)
-                        - sum(model.V_Pd_elastic[demandbid,bus] for demandbid in self.model.demandbid if demandbidmap.get((demandbid,bus)))
-                        )
-                    - 
-                        abs(sum(model.V_LinePij[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                        + sum(model.V_LinePji[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                        + model.V_Vbus[bus,t]**2 * model.V_Gs[bus]
-                        + self.adjust_values.get('adj_p_balance').get((bus,t)))
-                )<=self.error
-        self.model.c_BalanceP = pyomo.Constraint(
-                                        self.model.bus, 
-                                        self.model.t, 
-                                        rule=balance_eqn_rule,
-                                        doc='Active power balance')
+                        sum(model.V_Pgen[gen, t] for gen in gen_at[k] if genstatus.get((gen,bus)))
+                        + sum(model.V_Pslack[gen, t] for gen in slack_at[k])
+                        - (Pd[bus,t] if (bus,t) in Pd else 0)
+                        - sum(model.V_Pd_elastic[demandbid,bus] for demandbid in demandbid_at[k] if demandbidmap.get((demandbid,bus))),
+                        sum(pij[c][t] for c in ij_at[k])
+                        + sum(pji[c][t] for c in ji_at[k])
+                        + vbus[k][t]**2 * model.V_Gs[bus]
+                        + adj_p_balance[bus,t]
+                )
+        self._add_abs_constraint('c_BalanceP', 'bus', self.bus_pos, balance_eqn_rule, 'Active power balance')
     def _add_q_balanced_constraint(self, genstatus, demandbidmap):
         '''
             Está función crea la restricción de balance de potencia reactiva
@@ -412,28 +588,25 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la restricción de balance de potencia reactiva')
-        def balance_eqn_rule(model, bus, t):
+        gen_at, slack_at = self._adjacent('gen'), self._adjacent('slack')
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        Qd, adj_q_balance = self._values('Qd', 'Qd'), self._values('adj_q_balance', 'Adj_q_balance')
+        bus_shunt = self.system_param.get('bus_shunt')
+        vbus = self._var_table(self.model.V_Vbus, self.bus_list)
+        qij, qji = self._var_table(self.model.V_LineQij, self.ij_list), self._var_table(self.model.V_LineQji, self.ji_list)
+        def balance_eqn_rule(model, k, t):
+            bus = self.bus_list[k]
             return (
-                        abs(
-                            sum(model.V_Qgen[gen, t] for gen in self.model.gen if self.system_param.get('atBus').get((gen,bus)) and genstatus.get((gen,bus)))
-                            + sum(model.V_Qslack[gen, t] for gen in self.model.slack if self.system_param.get('atBusSlack').get((gen,bus)))
-                            - (self.system_values.get('Qd').get((bus,t)) if self.system_values.get('Qd').get((bus,t)) else 0)
-                        )
-                    -
-                        abs(
-                            sum(model.V_LineQij[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, []))
-                            + sum(model.V_LineQji[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, []))
-                            - model.V_Vbus[bus,t]**2 #* model.V_Bs[bus]
-                            - model.V_Vbus[bus,t]**2 * (model.V_Shunt[bus, t]/self.max_shunt if self.system_param.get('bus_shunt').get(bus) else 0)
-                            + self.adjust_values.get('adj_q_balance').get((bus,t))
-                        )
-                   <= self.error
+                        sum(model.V_Qgen[gen, t] for gen in gen_at[k] if genstatus.get((gen,bus)))
+                        + sum(model.V_Qslack[gen, t] for gen in slack_at[k])
+                        - (Qd[bus,t] if (bus,t) in Qd else 0),
+                        sum(qij[c][t] for c in ij_at[k])
+                        + sum(qji[c][t] for c in ji_at[k])
+                        - vbus[k][t]**2 #* model.V_Bs[bus]
+                        - vbus[k][t]**2 * (model.V_Shunt[bus, t]/self.max_shunt if bus_shunt.get(bus) else 0)
+                        + adj_q_balance[bus,t]
             )
-        self.model.c_BalanceQ = pyomo.Constraint(
-                                        self.model.bus, 
-                                        self.model.t, 
-                                        rule=balance_eqn_rule,
-                                        doc='Reactive power balance')
+        self._add_abs_constraint('c_BalanceQ', 'bus', self.bus_pos, balance_eqn_rule, 'Reactive power balance')
     def _add_function_obj(self):
         '''
             Está función crea la función objetivo
@@ -443,16 +616,18 @@ class CreateModel(object):
                 None
         '''
         if self.print_sec: print('Se agrega la función objetivo')
+        bus_shunt, pilot_nodes = self.system_param.get('bus_shunt'), self.system_param.get('pilot_nodes')
+        init_bus_v = self._values('init_bus_v', 'Init_bus_v')
         def obj_rule(model):
             return  (   
                     + (k1) * sum((model.V_Shunt[bus, t] - model.V_Shunt[bus, t-1])**2
-                        for bus in model.bus
+                        for bus in self.bus_list
                         for t in model.t 
-                        if t >= 2 and self.system_param.get('bus_shunt').get(bus))
-                    + (k2) * sum((model.V_Vbus[bus, t] - self.system_values.get('init_bus_v').get((bus, t)))**2
-                        for bus in model.bus
+                        if t-1 in model.t and bus_shunt.get(bus))
+                    + (k2) * sum((model.V_Vbus[bus, t] - init_bus_v[bus, t])**2
+                        for bus in self.bus_list
                         for t in model.t
-                        if self.system_param.get('pilot_nodes').get(bus))
+                        if pilot_nodes.get(bus))
                     + (k3)*sum(model.V_Qgen[gen, t]**2 
                         for gen in model.gen
                         for t in model.t)
@@ -466,38 +641,102 @@ class CreateModel(object):
         elif (self.system_param.get('system_name')=='ieee118'):
             k1, k2, k3 = 1e-2, 3e+2, 1e+1
         if self.print_sec: print(f'k1: {k1} - k2: {k2} - k3: {k3}')
+        self.obj_weights = (k1, k2, k3)
         self.model.obj = pyomo.Objective(rule=obj_rule, sense = pyomo.minimize)
-    def solve_model(self):
+    def _set_variables_model(self, system_values):
+        '''
+            Está función cambia los valores de bounds e inicializaciones de las variables y los Params
+            Pd, Qd e Init_bus_v de un modelo ya creado con mutable_param
+            input
+                system_values: valores del sistema del nuevo perfil de carga
+            return
+                None
+        '''
+        if self.print_sec: print('Se actualizan los bounds, la inicialización y los parametros del modelo')
+        def change_bounds(model_var, dict_values):
+            for var,value in dict_values.items():
+                model_var[var].setlb(value[0])
+                model_var[var].setub(value[1])
+        def change_initialize(model_var, dict_values):
+            for var,value in dict_values.items():
+                model_var[var].set_value(value)
+        def initialize_param(model_param, dict_values):
+            for var,value in dict_values.items():
+                model_param[var].set_value(value)
+        self.system_values = system_values
+        # para lineas pij
+        change_bounds(self.model.V_LinePij, system_values.get('bound_line_pij'))
+        change_initialize(self.model.V_LinePij, system_values.get('init_line_pij'))
+        change_bounds(self.model.V_LinePji, system_values.get('bound_line_pji'))
+        change_initialize(self.model.V_LinePji, system_values.get('init_line_pji'))
+        # para lineas qij
+        change_initialize(self.model.V_LineQij, system_values.get('init_line_qij'))
+        change_initialize(self.model.V_LineQji, system_values.get('init_line_qji'))
+        # para buses V y theta
+        change_initialize(self.model.V_Vbus, system_values.get('init_bus_v'))
+        change_initialize(self.model.V_Theta, system_values.get('init_bus_theta'))
+        # para gen p
+        change_initialize(self.model.V_Pgen, system_values.get('init_gen_p'))
+        change_initialize(self.model.V_Pslack, system_values.get('init_slack_p'))
+        # para gen q
+        change_bounds(self.model.V_Qgen, system_values.get('gen_bound_q'))
+        change_initialize(self.model.V_Qgen, system_values.get('init_gen_q'))
+        change_initialize(self.model.V_Qslack, system_values.get('init_slack_q'))
+        # para parametros
+        initialize_param(self.model.Pd, system_values.get('Pd'))
+        initialize_param(self.model.Qd, system_values.get('Qd'))
+        initialize_param(self.model.Init_bus_v, system_values.get('init_bus_v'))
+    def _set_adjust_values(self, adjust_values):
+        '''
+            Está función cambia los valores de los Params de ajuste de un modelo ya creado con mutable_param
+            input
+                adjust_values: valores de ajuste del nuevo perfil de carga
+            return
+                None
         '''
-            Está función resuelve el modelo de optimización
+        def initialize_param(model_param, dict_values):
+            for var,value in dict_values.items():
+                model_param[var].set_value(value)
+        self.adjust_values = adjust_values
+        initialize_param(self.model.Adj_line_pij, adjust_values.get('adj_line_pij'))
+        initialize_param(self.model.Adj_line_pji, adjust_values.get('adj_line_pji'))
+        initialize_param(self.model.Adj_line_qij, adjust_values.get('adj_line_qij'))
+        initialize_param(self.model.Adj_line_qji, adjust_values.get('adj_line_qji'))
+        initialize_param(self.model.Adj_p_balance, adjust_values.get('adj_p_balance'))
+        initialize_param(self.model.Adj_q_balance, adjust_values.get('adj_q_balance'))
+        initialize_param(self.model.Adj_slimit_sij, adjust_values.get('adj_slimit_sij'))
+    def solve_model(self, persistent=False, backend='bonmin_oa', profile='tight_final'):
+        '''
+            Está función resuelve el modelo de optimización, el backend y los tiempos quedan en self.solver_info
             input    
-                none
+                persistent: si es True se resuelve con una SolverSession que se conserva entre llamadas, el archivo
+                            NL solo se reescribe en lo que cambió y los tiempos quedan en self.session.timing
+                backend: backend de solver_backends, ej: bonmin_oa, bonmin_bb, bonmin_hyb, ipopt, couenne, scipy, highs,
+                         native (NLPEvaluator vectorizado) o el nombre de cualquier solver AMPL instalado
+                profile: perfil de opciones del backend, ej: tight_final, fast_screening, tuned (perfil de tune_solver.py),
+                         con load_warm_start se agregan las opciones de arranque en caliente de la familia del backend
             return
                 None
         '''
         system_name = self.system_param.get('system_name')
         if self.print_sec: print(f'\n--> Se inicia la solución del modelo {system_name} <--\n')
-        solver = pyomo.SolverFactory('solver/bonmin', tee=True)
-        solver.options['output_file'] = "bonmin.log" # Especificar el archivo de registro
-        solver.options['max_iter'] = 1000
-        solver.options['bonmin.integer_tolerance'] = 1e-8
-        solver.options['bonmin.allowable_fraction_gap'] = 1e-8
-        solver.options['bonmin.allowable_gap'] = 1e-8
-        solver.options['bonmin.algorithm'] = 'B-OA'
-        result = solver.solve(self.model)
-        result.write()
-        return True if result.solver.status.value=='ok' else False
-    def save_model_variables(self):
+        solver = SolverBackend(backend, profile, system_name=system_name, print_sec=self.print_sec)
+        if self.warm_start_info: solver.options.update(warm_start_options(self.model, solver.family))
+        if persistent and solver.solver not in PYTHON_SOLVERS and (self.session is None or self.session.solver != solver.solver):
+            self.session = SolverSession(self.model, solver.solver, solver.options, name=system_name, print_sec=self.print_sec)
+        is_solve, self.solver_info = solver.solve(self.model, self.session if persistent else None, owner=self)
+        return is_solve
+    def save_model_variables(self, folder=None):
         '''
             Está función guarda los datos del modelo de optimización
             input    
-                path: ruta donde se guardan los datos
+                folder: carpeta dentro de Resultados, por defecto el nombre del sistema
             return
                 None
         '''
         variables = list(self.model.component_objects(pyomo.Var, active=True))
         if self.print_sec: print('Se guardan todas las variables...\n')
-        folder = self.system_param.get('system_name')
+        folder = folder or self.system_param.get('system_name')
         for e in variables:
             df = DataFrame(list(e.get_values().items()), columns=['Var','Value'])
             df.to_csv(f'Resultados/{folder}/Var_{e.name}__res.csv', index=False)
@@ -508,4 +747,84 @@ class CreateModel(object):
             }
             df = DataFrame(dict_data)
             df.to_csv(f'Resultados/{folder}/{names}__init.csv', index=False)
-                
\ No newline at end of file
+        if self.solver_info:
+            df = DataFrame(list(self.solver_info.items()), columns=['Key','Value'])
+            df.to_csv(f'Resultados/{folder}/Solver__info.csv', index=False)
+        save_warm_start(self.model, f'Resultados/{folder}')
+    def load_warm_start(self, folder=None):
+        '''
+            Está función inicializa las variables, la asignación entera de shunts y taps y los multiplicadores del
+            modelo con los resultados que dejó save_model_variables en una corrida anterior, el siguiente solve_model
+            arranca en caliente
+            input
+                folder: carpeta dentro de Resultados, por defecto el nombre del sistema
+            return
+                dict: cantidad de variables, multiplicadores de restricciones y de bounds cargados
+        '''
+        folder = folder or self.system_param.get('system_name')
+        info = load_warm_start(self.model, f'Resultados/{folder}')
+        if self.print_sec: print('Arranque en caliente: {variables} variables - {dual} duales - {bound} bounds'.format(**info))
+        self.warm_start_info = info if info['variables'] else None
+        return info
+                
+def load_system_data(system_name, mode='batch', print_sec=False, hours=None):
+    '''
+        Está función lee del sistema todos los valores que necesita el modelo de optimización
+        input
+            system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+            mode: modo de _get_values_from_system
+            print_sec: para imprimir secuencia de ejecuciones
+            hours: horas absolutas de los valores (GetVariablesSystem._set_hours), por defecto 1 a 24
+        return
+            GetVariablesSystem, dict: system_param, system_values, adjust_values, genstatus, ratio_line, g, b y demandbidmap
+    '''
+    system = GetVariablesSystem(system_name, print_sec=print_sec)
+    if hours is not None: system._set_hours(hours)
+    system_param = system._get_param_from_system()
+    system_values = system._get_values_from_system(mode=mode)
+    genstatus = system._get_genstatus()
+    ratio_line = system._get_ratio_line()
+    system._get_ratio_trafo()
+    g, b = system._get_conductance_susceptance()
+    demandbidmap = system._get_demandbidmap()
+    adjust_values = system._get_adjust_values()
+    return system, {
+        'system_param': system_param, 'system_values': system_values, 'adjust_values': adjust_values,
+        'genstatus': genstatus, 'ratio_line': ratio_line, 'g': g, 'b': b, 'demandbidmap': demandbidmap,
+    }
+
+def build_model(system_name, mode='batch', print_sec=False, data=None, **kwargs):
+    '''
+        Está función crea el sistema y el modelo de optimización completo (variables, restricciones y función
+        objetivo) en el mismo orden que main.py
+        input
+            system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+            mode: modo de _get_values_from_system
+            print_sec: para imprimir secuencia de ejecuciones
+            data: valores de load_system_data ya leídos, si se dan no se vuelve a leer el sistema y se entrega None
+                  en lugar del sistema
+            kwargs: argumentos de CreateModel, ej: int_index, sparse_index, mutable_param, formulation, hours
+        return
+            CreateModel, GetVariablesSystem
+    '''
+    system = None
+    if data is None: system, data = load_system_data(system_name, mode=mode, print_sec=print_sec)
+    demandbidmap = data['demandbidmap']
+    model = CreateModel(data['system_param'], data['system_values'], data['adjust_values'], print_sec=print_sec, **kwargs)
+    model.init_model()
+    model._add_var_p_line()
+    model._add_var_q_line()
+    model._add_var_v_bus()
+    model._add_var_theta_bus()
+    model._add_var_p_gen()
+    model._add_var_q_gen()
+    model._add_var_Shunt_bus()
+    model._add_var_pd_elastic(demandbidmap)
+    model._add_var_slack_variable()
+    model._add_power_s_constraint(data['ratio_line'])
+    model._add_power_p_constraint(data['g'], data['b'])
+    model._add_power_q_constraint(data['g'], data['b'])
+    model._add_p_balanced_constraint(data['genstatus'], demandbidmap)
+    model._add_q_balanced_constraint(data['genstatus'], demandbidmap)
+    model._add_function_obj()
+    return model, system
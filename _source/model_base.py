@@ -0,0 +1,143 @@
+import pyomo.environ as pyomo
+
+# formulaciones de las restricciones |A| - |B| <= error
+FORMULATIONS = ['abs', 'square']
+
+class ModelBase(object):
+    '''
+        Class con los métodos comunes de CreateModel del sistema completo (model.py) y de las áreas (area_model.py),
+        tablas de posiciones de ramas, barras y generadores, adyacencia, términos de rama y restricciones |A| - |B|
+    '''
+    def _set_index_tables(self):
+        '''
+            Está función precalcula las posiciones de ramas, barras y generadores y las tablas de
+            extremos de las ramas (posición de la barra i, de la barra j y si es barra de trafo), en modo int_index
+            crea los Sets enteros del modelo
+            input    
+                None
+            return
+                None
+        '''
+        bus_trafo = self.system_param.get('bus_trafo')
+        self.ij_list, self.ji_list = list(self.model.ij), list(self.model.ji)
+        self.bus_list, self.gen_list = list(self.model.bus), list(self.model.gen)
+        self.ij_pos = dict((ij, k) for k, ij in enumerate(self.ij_list))
+        self.ji_pos = dict((ji, k) for k, ji in enumerate(self.ji_list))
+        self.bus_pos = dict((bus, k) for k, bus in enumerate(self.bus_list))
+        self.gen_pos = dict((gen, k) for k, gen in enumerate(self.gen_list))
+        self.trafo_list = [bus if bus_trafo.get(bus) else None for bus in self.bus_list]
+        self.branch_terms = {}
+        self.ij_from = [self.bus_pos[ij.split('-')[0]] for ij in self.ij_list]
+        self.ij_to = [self.bus_pos[ij.split('-')[1]] for ij in self.ij_list]
+        self.ji_from = [self.bus_pos[ji.split('-')[0]] for ji in self.ji_list]
+        self.ji_to = [self.bus_pos[ji.split('-')[1]] for ji in self.ji_list]
+        self.ij_trafo = [self.trafo_list[i] is not None for i in self.ij_from]
+        self.ji_trafo = [self.trafo_list[j] is not None for j in self.ji_to]
+        if self.int_index:
+            self.model.ij_idx = pyomo.Set(initialize=range(len(self.ij_list)), doc='Posición ij')
+            self.model.ji_idx = pyomo.Set(initialize=range(len(self.ji_list)), doc='Posición ji')
+            self.model.bus_idx = pyomo.Set(initialize=range(len(self.bus_list)), doc='Posición bus')
+            self.model.gen_idx = pyomo.Set(initialize=range(len(self.gen_list)), doc='Posición gen')
+    def _index_set(self, name):
+        '''
+            Está función entrega el Set con el que se indexan las restricciones
+            input    
+                name: nombre del Set, ej: ij, ji, bus
+            return
+                Set entero si int_index, de lo contrario el Set de etiquetas
+        '''
+        return getattr(self.model, f'{name}_idx' if self.int_index else name)
+    def _var_table(self, var, labels):
+        '''
+            Está función entrega las variables por posición y hora, tabla[k][t] = var[labels[k], t],
+            así cada variable se busca una sola vez al crear las restricciones
+            input    
+                var: variable del modelo indexada por (label, t)
+                labels: lista de etiquetas, las posiciones en None quedan en None
+            return
+                list: lista de diccionarios {t: variable}
+        '''
+        table = {}
+        for (label, t), value in var.items():
+            table.setdefault(label, {})[t] = value
+        return [table.get(label) for label in labels]
+    def _branch_terms(self, name):
+        '''
+            Está función crea una sola vez los términos V_i**2, V_i*V_j, cos(theta_i - theta_j) y sin(theta_i - theta_j)
+            de cada rama y hora, los comparten las restricciones de potencia activa y reactiva
+            input    
+                name: ij o ji
+            return
+                list: lista de diccionarios {t: (V_i**2, V_i*V_j, cos, sin)} por posición de la rama
+        '''
+        if name not in self.branch_terms:
+            vbus, theta = self._var_table(self.model.V_Vbus, self.bus_list), self._var_table(self.model.V_Theta, self.bus_list)
+            first, second = (self.ij_from, self.ij_to) if name == 'ij' else (self.ji_from, self.ji_to)
+            terms = []
+            for f, s in zip(first, second):
+                # i es la barra de la que sale el flujo, V_i*V_j conserva el orden de la etiqueta de la rama
+                i, j = (f, s) if name == 'ij' else (s, f)
+                terms.append(dict((t, (vbus[i][t]**2, vbus[f][t] * vbus[s][t],
+                                       pyomo.cos(theta[i][t] - theta[j][t]), pyomo.sin(theta[i][t] - theta[j][t])))
+                                  for t in self.model.t))
+            self.branch_terms[name] = terms
+        return self.branch_terms[name]
+    def _adjacent(self, name, pos=None):
+        '''
+            Está función lee el índice CSR de adyacencia del sistema y entrega los elementos conectados
+            a cada barra del modelo
+            input    
+                name: gen, slack, demandbid, ij o ji
+                pos: diccionario etiqueta -> posición, si se da se entregan posiciones con repetidos (como
+                     branchij_bus), de lo contrario etiquetas sin repetir (como en los Sets del modelo)
+            return
+                list: elementos conectados por posición de la barra
+        '''
+        C, elements = self.system_param.get('adjacency').get(name), self.system_param.get(name)
+        at_bus = {}
+        for r, bus in enumerate(self.system_param.get('bus')):
+            labels = [elements[c] for c in C.indices[C.indptr[r]:C.indptr[r+1]]]
+            at_bus[bus] = [pos[label] for label in labels] if pos else list(dict.fromkeys(labels))
+        return [at_bus.get(bus, []) for bus in self.bus_list]
+    def _index_rule(self, rule, pos):
+        '''
+            Está función adapta una regla escrita sobre posiciones enteras al Set de las restricciones
+            input    
+                rule: regla (model, k, t)
+                pos: diccionario etiqueta -> posición
+            return
+                regla para el Set de _index_set
+        '''
+        if self.int_index: return rule
+        return lambda model, label, t: rule(model, pos[label], t)
+    def _abs_tolerance(self):
+        '''
+            Está función entrega la tolerancia de las restricciones |A| - |B| según la formulación, con 'square' es
+            error**2, A**2 - B**2 = (|A| - |B|)*(|A| + |B|) así que deja |A| - |B| <= error**2/(|A| + |B|), el conjunto
+            factible de 'square' está dentro del de 'abs' pero no es el mismo, con |A| y |B| grandes (balances y flujos
+            de varios pu) la holgura de 'square' es mucho menor que error
+            input    
+                None
+            return
+                float: tolerancia de la restricción
+        '''
+        return self.error**2 if self.formulation == 'square' else self.error
+    def _add_abs_constraint(self, name, index, pos, rule, doc):
+        '''
+            Está función crea la restricción |A| - |B| <= error según la formulación del modelo, 'abs' la escribe con abs()
+            y 'square' como A**2 - B**2 <= error**2 (derivable en A = 0 y B = 0)
+            input    
+                name: nombre de la restricción, ej: c_BalanceP
+                index: nombre del Set de la restricción, ej: ij, bus
+                pos: diccionario etiqueta -> posición
+                rule: regla (model, k, t) que entrega la tupla (A, B)
+                doc: descripción de la restricción
+            return
+                None
+        '''
+        tolerance = self._abs_tolerance()
+        def abs_rule(model, k, t):
+            a, b = rule(model, k, t)
+            if self.formulation == 'square': return a**2 - b**2 <= tolerance
+            return abs(a) - abs(b) <= tolerance
+        setattr(self.model, name, pyomo.Constraint(self._index_set(index), self.model.t, rule=self._index_rule(abs_rule, pos), doc=doc))
@@ -0,0 +1,520 @@
+import time
+import numpy as np
+import scipy.sparse as sp
+import pyomo.environ as pyomo
+from scipy.optimize import minimize, Bounds, NonlinearConstraint
+from pyomo.repn.standard_repn import generate_standard_repn
+
+# variables del vector x en el orden en que se numeran las columnas
+NLP_VARIABLES = ['V_LinePij', 'V_LinePji', 'V_LineQij', 'V_LineQji', 'V_Vbus', 'V_Theta', 'V_Pgen', 'V_Qgen',
+                 'V_Pslack', 'V_Qslack', 'V_Shunt', 'V_Gs', 'V_Rtrafo', 'V_Pd_elastic']
+
+# equivalencia de las opciones de ipopt con las de trust-constr cuando cyipopt no está instalado
+TRUST_CONSTR_OPTIONS = {'tol': ['gtol', 'xtol'], 'max_iter': ['maxiter'], 'max_cpu_time': []}
+
+class NLPEvaluator(object):
+    '''
+        Class encargada de evaluar el modelo AC multiperiodo de CreateModel sin pasar por los árboles de expresión
+        de Pyomo, los residuos de flujos y balances, el jacobiano y el hessiano del lagrangiano se calculan con
+        operaciones vectorizadas sobre (rama o barra x t) y la estructura dispersa se arma una sola vez, expone la
+        interfaz de callbacks de cyipopt (objective, gradient, constraints, jacobian, hessian y sus estructuras)
+    '''
+    def __init__(self, create_model, print_sec=False):
+        '''
+            Está función instancia la clase NLPEvaluator
+            input
+                create_model: modelo completo de CreateModel (variables, restricciones y función objetivo), formulation
+                              'abs' o 'square', las variables enteras se relajan
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo NLPEvaluator
+        '''
+        if create_model.formulation not in ['abs', 'square']:
+            raise ValueError(f'La formulación {create_model.formulation} no está soportada, formulaciones: abs, square')
+        self.cm = create_model
+        self.model = create_model.model
+        self.print_sec = print_sec
+        self.T = list(self.model.t)
+        t0 = time.perf_counter()
+        self._set_columns()
+        self._set_values()
+        self._set_blocks()
+        self._set_objective()
+        self._set_structure()
+        if self.print_sec: print(f'NLPEvaluator: {self.n} variables - {self.m} restricciones - nnz jacobiano '
+                                 f'{len(self._jrows)} - nnz hessiano {len(self._hrows)} - {time.perf_counter()-t0:.3f}s')
+    def _set_columns(self):
+        '''
+            Está función numera las variables del modelo, guarda los bounds y el punto inicial, las variables fijas
+            quedan con lb = ub = valor
+            input
+                None
+            return
+                None
+        '''
+        self.variables, self.column = [], {}
+        for name in NLP_VARIABLES:
+            var = getattr(self.model, name, None)
+            if var is None: continue
+            self.column[name] = {}
+            for key, value in var.items():
+                self.column[name][key] = len(self.variables)
+                self.variables.append(value)
+        self.n = len(self.variables)
+        bounds = [var.bounds for var in self.variables]
+        self.lb = np.array([-np.inf if lb is None else lb for lb, _ in bounds], dtype=float)
+        self.ub = np.array([np.inf if ub is None else ub for _, ub in bounds], dtype=float)
+        fixed = np.array([var.fixed for var in self.variables], dtype=bool)
+        x0 = np.array([0 if var.value is None else var.value for var in self.variables], dtype=float)
+        self.lb[fixed], self.ub[fixed] = x0[fixed], x0[fixed]
+        self.x0 = np.clip(x0, self.lb, self.ub)
+    def _table(self, name, labels):
+        '''
+            Está función entrega la tabla de columnas de una variable por posición y hora
+            input
+                name: nombre de la variable, ej: V_Vbus
+                labels: lista de etiquetas, las posiciones en None quedan en -1
+            return
+                ndarray: columnas (len(labels), T), -1 si la variable no existe
+        '''
+        column = self.column.get(name, {})
+        return np.array([[column.get((label, t), -1) if label is not None else -1 for t in self.T] for label in labels],
+                        dtype=int).reshape(len(labels), len(self.T))
+    def _slots(self, columns):
+        '''
+            Está función pasa listas de columnas de largo variable por barra a columnas de ancho fijo
+            input
+                columns: lista por barra de listas de ndarray (T,) con las columnas de cada término
+            return
+                list: ndarray (nbus, T) por término, -1 donde la barra tiene menos términos
+        '''
+        width = max([len(cols) for cols in columns], default=0)
+        slots = [np.full((len(columns), len(self.T)), -1, dtype=int) for _ in range(width)]
+        for k, cols in enumerate(columns):
+            for s, col in enumerate(cols):
+                slots[s][k] = col
+        return slots
+    def _param(self, name, param, labels):
+        '''
+            Está función lee los valores de un diccionario del sistema o de un Param mutable por posición y hora
+            input
+                name: nombre en system_values o adjust_values, ej: Pd, adj_line_pij
+                param: nombre del Param del modelo, ej: Pd, Adj_line_pij
+                labels: lista de etiquetas
+            return
+                ndarray: valores (len(labels), T), 0 donde no hay valor
+        '''
+        values = self.cm._values(name, param)
+        return np.array([[pyomo.value(values[label, t]) if (label, t) in values else 0 for t in self.T] for label in labels],
+                        dtype=float).reshape(len(labels), len(self.T))
+    def _set_values(self):
+        '''
+            Está función lee los parámetros de las restricciones (Pd, Qd, ajustes y capacidad de las líneas), en modo
+            mutable_param se leen los valores actuales de los Params
+            input
+                None
+            return
+                None
+        '''
+        cm = self.cm
+        self.Pd = self._param('Pd', 'Pd', cm.bus_list)
+        self.Qd = self._param('Qd', 'Qd', cm.bus_list)
+        self.adj = dict((name, self._param(name, param, labels)) for name, param, labels in [
+                ('adj_slimit_sij', 'Adj_slimit_sij', cm.ij_list),
+                ('adj_line_pij', 'Adj_line_pij', cm.ij_list),
+                ('adj_line_pji', 'Adj_line_pji', cm.ji_list),
+                ('adj_line_qij', 'Adj_line_qij', cm.ij_list),
+                ('adj_line_qji', 'Adj_line_qji', cm.ji_list),
+                ('adj_p_balance', 'Adj_p_balance', cm.bus_list),
+                ('adj_q_balance', 'Adj_q_balance', cm.bus_list),
+            ])
+        self.rate2 = np.array([cm.ratio_line[ij]**2 for ij in cm.ij_list], dtype=float)[:, None]
+    def _branch_static(self, name, p1, p2, q):
+        '''
+            Está función arma las columnas y coeficientes de las restricciones de flujo de un tipo de rama,
+            F = c1*V_i**2/r**p1 - V_i*V_j/r**p2*(c2*cos(theta_i - theta_j) + c3*sin(theta_i - theta_j)) con r el tap
+            del trafo de la barra i (r = 1 en las ramas sin trafo)
+            input
+                name: ij o ji
+                p1, p2: potencias del tap en los dos términos
+                q: si es True coeficientes de potencia reactiva (c1 = c2 = -b, c3 = g), de lo contrario activa
+                   (c1 = c2 = g, c3 = b)
+            return
+                dict: columnas (n, T) y coeficientes (n, 1) de la rama
+        '''
+        cm = self.cm
+        labels = cm.ij_list if name == 'ij' else cm.ji_list
+        # i es la barra de la que sale el flujo, en las ramas ji es el extremo final de la etiqueta
+        i, j = (cm.ij_from, cm.ij_to) if name == 'ij' else (cm.ji_to, cm.ji_from)
+        trafo = np.array(cm.ij_trafo if name == 'ij' else cm.ji_trafo, dtype=bool)[:, None]
+        g = np.array([cm.g[label] for label in labels], dtype=float)[:, None]
+        b = np.array([cm.b[label] for label in labels], dtype=float)[:, None]
+        vbus, theta = self._table('V_Vbus', cm.bus_list), self._table('V_Theta', cm.bus_list)
+        rtrafo = self._table('V_Rtrafo', cm.trafo_list)
+        return {
+            'vi': vbus[i], 'vj': vbus[j], 'ti': theta[i], 'tj': theta[j],
+            'r': np.where(trafo, rtrafo[i], -1),
+            'c1': -b if q else g, 'c2': -b if q else g, 'c3': g if q else b,
+            'p1': np.where(trafo, p1, 0), 'p2': np.where(trafo, p2, 0),
+        }
+    def _branch(self, x, s):
+        '''
+            Está función evalúa el término de flujo de _branch_static con su gradiente y hessiano locales en
+            (V_i, V_j, theta_i, theta_j, r)
+            input
+                x: valores de las variables
+                s: diccionario de _branch_static
+            return
+                tuple: valor (n, T), lista de (columna, derivada) y lista de (columna, columna, segunda derivada, par)
+        '''
+        vi, vj, ti, tj = x[s['vi']], x[s['vj']], x[s['ti']], x[s['tj']]
+        r = np.where(s['r'] >= 0, x[s['r']], 1)
+        c1, c2, c3, p1, p2 = s['c1'], s['c2'], s['c3'], s['p1'], s['p2']
+        cos, sin = np.cos(ti - tj), np.sin(ti - tj)
+        h, dh = c2*cos + c3*sin, c3*cos - c2*sin
+        ra, rb = r**-p1, r**-p2
+        ra1, rb1 = p1*r**(-p1 - 1), p2*r**(-p2 - 1)
+        ra2, rb2 = p1*(p1 + 1)*r**(-p1 - 2), p2*(p2 + 1)*r**(-p2 - 2)
+        vv = vi*vj
+        value = c1*vi**2*ra - vv*rb*h
+        grads = [
+            (s['vi'], 2*c1*vi*ra - vj*rb*h),
+            (s['vj'], -vi*rb*h),
+            (s['ti'], -vv*rb*dh),
+            (s['tj'], vv*rb*dh),
+            (s['r'], -c1*vi**2*ra1 + vv*rb1*h),
+        ]
+        hess = [
+            (s['vi'], s['vi'], 2*c1*ra, False),
+            (s['vi'], s['vj'], -rb*h, True),
+            (s['vi'], s['ti'], -vj*rb*dh, True),
+            (s['vi'], s['tj'], vj*rb*dh, True),
+            (s['vi'], s['r'], -2*c1*vi*ra1 + vj*rb1*h, True),
+            (s['vj'], s['ti'], -vi*rb*dh, True),
+            (s['vj'], s['tj'], vi*rb*dh, True),
+            (s['vj'], s['r'], vi*rb1*h, True),
+            (s['ti'], s['ti'], vv*rb*h, False),
+            (s['ti'], s['tj'], -vv*rb*h, True),
+            (s['tj'], s['tj'], vv*rb*h, False),
+            (s['ti'], s['r'], vv*rb1*dh, True),
+            (s['tj'], s['r'], -vv*rb1*dh, True),
+            (s['r'], s['r'], c1*vi**2*ra2 - vv*rb2*h, False),
+        ]
+        return value, grads, hess
+    def _linear(self, x, slots, constant):
+        '''
+            Está función evalúa una suma de variables por barra, sum(coef*x[columna]) + constant
+            input
+                x: valores de las variables
+                slots: lista de (columnas (n, T), coef) de _slots
+                constant: término constante (n, T)
+            return
+                tuple: valor, lista de (columna, derivada) y lista vacía de segundas derivadas
+        '''
+        value = constant.copy()
+        for cols, coef in slots:
+            value += coef*np.where(cols >= 0, x[cols], 0)
+        return value, [(cols, coef) for cols, coef in slots], []
+    def _compose(self, kind, a, b):
+        '''
+            Está función arma el residuo de la restricción a partir de los términos A y B, 'eq' y 'le' A - B,
+            'abs' |A| - |B| y 'square' A**2 - B**2, con sus derivadas por la regla de la cadena
+            input
+                kind: eq, le, abs o square
+                a, b: tuplas (valor, gradiente, hessiano) de los términos
+            return
+                tuple: residuo, lista de (columna, derivada) y lista de (columna, columna, segunda derivada, par)
+        '''
+        (va, ga, ha), (vb, gb, hb) = a, b
+        if kind == 'abs':
+            wa, wb = np.sign(va), -np.sign(vb)
+            value = np.abs(va) - np.abs(vb)
+        elif kind == 'square':
+            wa, wb = 2*va, -2*vb
+            value = va**2 - vb**2
+        else:
+            wa, wb = 1, -1
+            value = va - vb
+        grads = [(col, wa*d) for col, d in ga] + [(col, wb*d) for col, d in gb]
+        hess = [(c1, c2, wa*d, pair) for c1, c2, d, pair in ha] + [(c1, c2, wb*d, pair) for c1, c2, d, pair in hb]
+        if kind == 'square':
+            # 2*dA*dA^T - 2*dB*dB^T
+            for sign, g in [(2, ga), (-2, gb)]:
+                for n, (c1, d1) in enumerate(g):
+                    hess += [(c1, c2, sign*d1*d2, n != m) for m, (c2, d2) in enumerate(g) if m >= n]
+        return value, grads, hess
+    def _set_blocks(self):
+        '''
+            Está función arma los bloques de restricciones en el orden del modelo (potencia aparente, potencia activa y
+            reactiva de las líneas y balances de potencia), cada bloque tiene su tipo, filas y la función que entrega
+            los términos A y B
+            input
+                None
+            return
+                None
+        '''
+        cm, formulation, zeros = self.cm, self.cm.formulation, np.zeros((len(self.cm.bus_list), len(self.T)))
+        abs_q = formulation if cm.system_param.get('system_name') in ['ieee39', 'ieee118'] else 'eq'
+        pij, qij = self._table('V_LinePij', cm.ij_list), self._table('V_LineQij', cm.ij_list)
+        pji, qji = self._table('V_LinePji', cm.ji_list), self._table('V_LineQji', cm.ji_list)
+        def s_limit(x):
+            p, q = x[pij], x[qij]
+            return ((p**2 + q**2, [(pij, 2*p), (qij, 2*q)], [(pij, pij, 2, False), (qij, qij, 2, False)]),
+                    (self.rate2*self.adj['adj_slimit_sij'], [], []))
+        def line(static, flow, adj):
+            return lambda x: (self._branch(x, static), (x[flow] + self.adj[adj], [(flow, 1)], []))
+        # términos de los balances por barra, los generadores, slacks y demandas elásticas como en el modelo
+        gen_at, slack_at, demandbid_at = cm._adjacent('gen'), cm._adjacent('slack'), cm._adjacent('demandbid')
+        ij_at, ji_at = cm._adjacent('ij', cm.ij_pos), cm._adjacent('ji', cm.ji_pos)
+        genstatus, demandbidmap = cm.genstatus, cm.demandbidmap
+        def gen_slots(name, at, status=True):
+            table = self._table(name, [label for labels in at for label in labels])
+            columns, n = [], 0
+            for bus, labels in zip(cm.bus_list, at):
+                columns.append([table[n + c] for c, label in enumerate(labels) if not status or genstatus.get((label, bus))])
+                n += len(labels)
+            return self._slots(columns)
+        elastic = self.column.get('V_Pd_elastic', {})
+        elastic_slots = self._slots([[np.full(len(self.T), elastic.get((demandbid, bus), -1))
+                                      for demandbid in demandbids if demandbidmap.get((demandbid, bus))]
+                                     for bus, demandbids in zip(cm.bus_list, demandbid_at)])
+        def flow_slots(*tables):
+            return [(cols, 1) for table, at in tables for cols in self._slots([[table[c] for c in cs] for cs in at])]
+        p_gen = ([(cols, 1) for cols in gen_slots('V_Pgen', gen_at)] + [(cols, 1) for cols in gen_slots('V_Pslack', slack_at, False)]
+                 + [(cols, -1) for cols in elastic_slots])
+        q_gen = [(cols, 1) for cols in gen_slots('V_Qgen', gen_at)] + [(cols, 1) for cols in gen_slots('V_Qslack', slack_at, False)]
+        p_flow, q_flow = flow_slots((pij, ij_at), (pji, ji_at)), flow_slots((qij, ij_at), (qji, ji_at))
+        vbus = self._table('V_Vbus', cm.bus_list)
+        gs = np.repeat(np.array([self.column['V_Gs'][bus] for bus in cm.bus_list], dtype=int)[:, None], len(self.T), axis=1)
+        bus_shunt = cm.system_param.get('bus_shunt')
+        shunt = self._table('V_Shunt', [bus if bus_shunt.get(bus) else None for bus in cm.bus_list])
+        def balance_p(x):
+            v, value, grads, _ = x[vbus], *self._linear(x, p_flow, self.adj['adj_p_balance'])
+            value = value + v**2*x[gs]
+            grads = grads + [(vbus, 2*v*x[gs]), (gs, v**2)]
+            return self._linear(x, p_gen, -self.Pd), (value, grads, [(vbus, vbus, 2*x[gs], False), (vbus, gs, 2*v, True)])
+        def balance_q(x):
+            v, value, grads, _ = x[vbus], *self._linear(x, q_flow, self.adj['adj_q_balance'])
+            sh = np.where(shunt >= 0, x[shunt], 0)/cm.max_shunt
+            value = value - v**2 - v**2*sh
+            grads = grads + [(vbus, -2*v - 2*v*sh), (shunt, -v**2/cm.max_shunt)]
+            return (self._linear(x, q_gen, -self.Qd),
+                    (value, grads, [(vbus, vbus, -2 - 2*sh, False), (vbus, shunt, -2*v/cm.max_shunt, True)]))
+        blocks = [
+            ('line_s_limit', 'le', len(cm.ij_list), s_limit),
+            ('line_p_limit_ij', 'eq', len(cm.ij_list), line(self._branch_static('ij', 2, 1, False), pij, 'adj_line_pij')),
+            ('line_p_limit_ji', 'eq', len(cm.ji_list), line(self._branch_static('ji', 0, 2, False), pji, 'adj_line_pji')),
+            ('line_q_limit_ij', abs_q, len(cm.ij_list), line(self._branch_static('ij', 2, 2, True), qij, 'adj_line_qij')),
+            ('line_q_limit_ji', abs_q, len(cm.ji_list), line(self._branch_static('ji', 0, 2, True), qji, 'adj_line_qji')),
+            ('c_BalanceP', formulation, len(cm.bus_list), balance_p),
+            ('c_BalanceQ', formulation, len(cm.bus_list), balance_q),
+        ]
+        self.blocks, offset, cl, cu = [], 0, [], []
+        for name, kind, n, rule in blocks:
+            rows = offset + np.arange(n*len(self.T)).reshape(n, len(self.T))
+            self.blocks.append({'name': name, 'kind': kind, 'rows': rows, 'rule': rule})
+            cl.append(np.full(rows.size, 0 if kind == 'eq' else -np.inf))
+            cu.append(np.full(rows.size, cm._abs_tolerance() if kind in ['abs', 'square'] else 0))
+            offset += rows.size
+        self.m, self.cl, self.cu = offset, np.concatenate(cl), np.concatenate(cu)
+    def _set_objective(self):
+        '''
+            Está función lee el objetivo activo del modelo con standard_repn y lo guarda como cuadrática,
+            f = 0.5*x^T*Q*x + c^T*x + c0, así se respetan los términos que se agreguen al objetivo de CreateModel
+            input
+                None
+            return
+                None
+        '''
+        objective = next(self.model.component_data_objects(pyomo.Objective, active=True))
+        repn = generate_standard_repn(objective.expr, compute_values=True, quadratic=True)
+        if repn.nonlinear_expr is not None:
+            raise ValueError(f'El objetivo {objective.name} no es cuadrático, NLPEvaluator solo evalúa objetivos cuadráticos')
+        position = dict((id(var), k) for k, var in enumerate(self.variables))
+        def columns(variables):
+            if any(id(var) not in position for var in variables):
+                raise ValueError(f'El objetivo {objective.name} tiene variables fuera de NLP_VARIABLES')
+            return np.array([position[id(var)] for var in variables], dtype=int)
+        sign = 1 if objective.sense == pyomo.minimize else -1
+        a = columns([v1 for v1, _ in repn.quadratic_vars])
+        b = columns([v2 for _, v2 in repn.quadratic_vars])
+        coefs = sign*np.array(repn.quadratic_coefs, dtype=float)
+        # coef*x_a*x_b aporta coef en (a, b) y (b, a), coef*x_a**2 aporta 2*coef en (a, a)
+        self.Q = sp.csr_matrix((np.r_[coefs, coefs], (np.r_[a, b], np.r_[b, a])), shape=(self.n, self.n))
+        self.c = np.zeros(self.n)
+        np.add.at(self.c, columns(repn.linear_vars), sign*np.array(repn.linear_coefs, dtype=float))
+        self.c0 = sign*repn.constant
+    def _set_structure(self):
+        '''
+            Está función evalúa una vez los bloques para fijar la estructura dispersa del jacobiano y del triángulo
+            inferior del hessiano, las entradas repetidas se suman con bincount en cada evaluación
+            input
+                None
+            return
+                None
+        '''
+        jrows, jcols, hrows, hcols, pairs = [], [], [], [], []
+        for block in self.blocks:
+            rows = block['rows']
+            _, grads, hess = self._compose(block['kind'], *block['rule'](self.x0))
+            jrows += [rows.ravel() for _ in grads]
+            jcols += [np.broadcast_to(col, rows.shape).ravel() for col, _ in grads]
+            hrows += [np.broadcast_to(c1, rows.shape).ravel() for c1, _, _, _ in hess]
+            hcols += [np.broadcast_to(c2, rows.shape).ravel() for _, c2, _, _ in hess]
+            pairs += [np.full(rows.size, pair) for _, _, _, pair in hess]
+        jrows, jcols = np.concatenate(jrows), np.concatenate(jcols)
+        self._jmask = jcols >= 0
+        key, self._jmap = np.unique(jrows[self._jmask]*self.n + jcols[self._jmask], return_inverse=True)
+        self._jrows, self._jcols = key // self.n, key % self.n
+        # el objetivo entra al final con sus entradas del triángulo inferior
+        Q = sp.tril(self.Q).tocoo()
+        hrows, hcols = np.concatenate(hrows + [Q.row]), np.concatenate(hcols + [Q.col])
+        pairs = np.concatenate(pairs + [np.zeros(Q.nnz, dtype=bool)])
+        self._hmask = (hrows >= 0) & (hcols >= 0)
+        hrows, hcols, pairs = hrows[self._hmask], hcols[self._hmask], pairs[self._hmask]
+        # un par (i, j) con la misma columna es una entrada de la diagonal que aparece dos veces en el hessiano
+        self._hfactor = np.where(pairs & (hrows == hcols), 2.0, 1.0)
+        lower, upper = np.maximum(hrows, hcols), np.minimum(hrows, hcols)
+        key, self._hmap = np.unique(lower*self.n + upper, return_inverse=True)
+        self._hrows, self._hcols = key // self.n, key % self.n
+        self._qdata = Q.data
+    def _evaluate(self, x, lagrange=None):
+        '''
+            Está función evalúa todos los bloques de restricciones
+            input
+                x: valores de las variables
+                lagrange: multiplicadores de las restricciones, si se dan se calculan los valores del hessiano
+            return
+                tuple: restricciones (m,), valores del jacobiano sin sumar y del hessiano sin sumar (o None)
+        '''
+        g, jvals, hvals = np.empty(self.m), [], []
+        for block in self.blocks:
+            rows = block['rows']
+            value, grads, hess = self._compose(block['kind'], *block['rule'](x))
+            g[rows.ravel()] = np.broadcast_to(value, rows.shape).ravel()
+            jvals += [np.broadcast_to(d, rows.shape).ravel() for _, d in grads]
+            if lagrange is not None:
+                weight = lagrange[rows]
+                hvals += [(weight*d).ravel() for _, _, d, _ in hess]
+        return g, jvals, hvals if lagrange is not None else None
+    def objective(self, x):
+        return 0.5*x @ (self.Q @ x) + self.c @ x + self.c0
+    def gradient(self, x):
+        return self.Q @ x + self.c
+    def constraints(self, x):
+        return self._evaluate(x)[0]
+    def jacobianstructure(self):
+        return self._jrows, self._jcols
+    def jacobian(self, x):
+        values = np.concatenate(self._evaluate(x)[1])[self._jmask]
+        return np.bincount(self._jmap, weights=values, minlength=len(self._jrows))
+    def hessianstructure(self):
+        return self._hrows, self._hcols
+    def hessian(self, x, lagrange, obj_factor):
+        hvals = self._evaluate(x, np.asarray(lagrange, dtype=float))[2]
+        values = np.concatenate(hvals + [obj_factor*self._qdata])[self._hmask]*self._hfactor
+        return np.bincount(self._hmap, weights=values, minlength=len(self._hrows))
+    def jacobian_matrix(self, x):
+        '''
+            Está función entrega el jacobiano de las restricciones como matriz dispersa
+            input
+                x: valores de las variables
+            return
+                csr_matrix: jacobiano (m, n)
+        '''
+        return sp.csr_matrix((self.jacobian(x), (self._jrows, self._jcols)), shape=(self.m, self.n))
+    def hessian_matrix(self, x, lagrange, obj_factor=1):
+        '''
+            Está función entrega el hessiano del lagrangiano completo (simétrico) como matriz dispersa
+            input
+                x: valores de las variables
+                lagrange: multiplicadores de las restricciones
+                obj_factor: factor del hessiano del objetivo
+            return
+                csr_matrix: hessiano (n, n)
+        '''
+        lower = sp.csr_matrix((self.hessian(x, lagrange, obj_factor), (self._hrows, self._hcols)), shape=(self.n, self.n))
+        return (lower + sp.triu(lower.T, k=1)).tocsr()
+    def set_x(self, x):
+        '''
+            Está función pasa el vector x a las variables del modelo
+            input
+                x: valores de las variables
+            return
+                None
+        '''
+        for var, value in zip(self.variables, x.tolist()):
+            var.set_value(value, skip_validation=True)
+
+class NativeSolver(object):
+    '''
+        Class encargada de resolver la relajación continua del modelo AC con NLPEvaluator, usa ipopt a través de
+        cyipopt si está instalado y de lo contrario scipy trust-constr con el jacobiano y el hessiano analíticos
+    '''
+    def __init__(self, model, options=None, print_sec=False):
+        '''
+            Está función instancia la clase NativeSolver
+            input
+                model: modelo completo de CreateModel, no el ConcreteModel
+                options: opciones de ipopt (tol, max_iter, mu_strategy...), method ('ipopt' o 'trust-constr') fuerza
+                         el método, con trust-constr solo se usan las de TRUST_CONSTR_OPTIONS
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo NativeSolver
+        '''
+        self.model = model
+        self.options = dict(options or {})
+        self.method = self.options.pop('method', None)
+        self.print_sec = print_sec
+        self.result = None
+        self.timing = {}
+    def _solve_ipopt(self, evaluator):
+        import cyipopt
+        # ipopt entrega las iteraciones en la llamada intermediate de cada iteración
+        iterations = []
+        evaluator.intermediate = lambda alg_mod, iter_count, *args: iterations.append(iter_count) is None
+        problem = cyipopt.Problem(n=evaluator.n, m=evaluator.m, problem_obj=evaluator, lb=evaluator.lb, ub=evaluator.ub,
+                                  cl=evaluator.cl, cu=evaluator.cu)
+        problem.add_option('print_level', 5 if self.print_sec else 0)
+        for key, value in self.options.items():
+            problem.add_option(key, value)
+        x, info = problem.solve(evaluator.x0)
+        self.result = info
+        return x, info['status'] in (0, 1), info['status_msg'], iterations[-1] if iterations else None
+    def _solve_trust_constr(self, evaluator):
+        options = {'verbose': 1 if self.print_sec else 0}
+        for key, value in self.options.items():
+            if key not in TRUST_CONSTR_OPTIONS:
+                if self.print_sec: print(f'La opción {key} no existe en trust-constr, se ignora')
+                continue
+            options.update((name, value) for name in TRUST_CONSTR_OPTIONS[key])
+        constraints = NonlinearConstraint(evaluator.constraints, evaluator.cl, evaluator.cu, jac=evaluator.jacobian_matrix,
+                                          hess=lambda x, v: evaluator.hessian_matrix(x, v, 0))
+        self.result = minimize(evaluator.objective, evaluator.x0, jac=evaluator.gradient, hess=lambda x: evaluator.Q,
+                               method='trust-constr', bounds=Bounds(evaluator.lb, evaluator.ub), constraints=constraints,
+                               options=options)
+        return self.result.x, bool(self.result.success), self.result.message, self.result.nit
+    def solve(self):
+        '''
+            Está función resuelve la relajación continua y carga la solución en las variables del modelo
+            input
+                None
+            return
+                bool: True si el solver terminó bien
+        '''
+        t0 = time.perf_counter()
+        evaluator = NLPEvaluator(self.model, print_sec=self.print_sec)
+        method = self.method
+        if method is None:
+            try:
+                import cyipopt
+                method = 'ipopt'
+            except ImportError:
+                method = 'trust-constr'
+        t1 = time.perf_counter()
+        x, is_solve, message, iterations = (self._solve_ipopt if method == 'ipopt' else self._solve_trust_constr)(evaluator)
+        t2 = time.perf_counter()
+        evaluator.set_x(x)
+        self.timing = {'write': t1-t0, 'solve': t2-t1, 'load': time.perf_counter()-t2, 'iterations': iterations, 'method': method}
+        if self.print_sec: print(f'native {method}: {message}')
+        return is_solve
@@ -0,0 +1,235 @@
+import os
+import pandapower as pp
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import spsolve
+from concurrent.futures import ProcessPoolExecutor
+from pandapower.pypower.idx_bus import PD, QD
+from pandapower.pypower.idx_brch import F_BUS, T_BUS
+from _source.dsbus_dv import dSbus_dV
+
+class BatchPowerFlow(object):
+    '''
+        Class encargada de resolver el flujo de carga de todos los periodos a la vez
+    '''
+    def __init__(self, net, tol=1e-8, max_iteration=10):
+        '''
+            Está función instancia la clase BatchPowerFlow, corre un flujo de carga base para obtener
+            la Ybus, Yf, Yt y los tipos de barra internos de pandapower (_ppc)
+            input
+                net: sistema de pandapower
+                tol: tolerancia del desbalance de potencia en pu
+                max_iteration: número máximo de iteraciones de Newton-Raphson
+            return
+                Objeto de tipo BatchPowerFlow
+        '''
+        self.tol = tol
+        self.max_iteration = max_iteration
+        pp.runpp(net)
+        ppci = net._ppc['internal']
+        self.Ybus = sp.csr_matrix(ppci['Ybus'])
+        self.Yf = sp.csr_matrix(ppci['Yf'])
+        self.Yt = sp.csr_matrix(ppci['Yt'])
+        self.base_mva = ppci['baseMVA']
+        self.ref, self.pv, self.pq = ppci['ref'], ppci['pv'], ppci['pq']
+        self.n_bus = self.Ybus.shape[0]
+        self.V0 = ppci['V'].copy()
+        # índices internos de pandapower para cada elemento
+        bus_lookup = net._pd2ppc_lookups['bus']
+        self.bus_idx = bus_lookup[net.bus.index.values]
+        self.load_bus = bus_lookup[net.load['bus'].values]
+        self.gen_bus = bus_lookup[net.gen['bus'].values]
+        self.ext_grid_bus = bus_lookup[net.ext_grid['bus'].values]
+        self.load_factor = (net.load['scaling']*net.load['in_service']).values.astype(float)
+        self.gen_factor = (net.gen['scaling']*net.gen['in_service']).values.astype(float)
+        self.C_load = self._incidence(self.load_bus)
+        self.C_gen = self._incidence(self.gen_bus)
+        # líneas en la matriz interna de ramas (ppci elimina las ramas fuera de servicio)
+        start, end = net._pd2ppc_lookups['branch']['line']
+        branch_pos = np.cumsum(ppci['branch_is']) - 1
+        self.line_is = ppci['branch_is'][start:end]
+        self.line_branch = branch_pos[start:end]
+        # trafos, en la matriz interna el extremo from es hv y el to es lv
+        start, end = net._pd2ppc_lookups['branch'].get('trafo', (0, 0))
+        self.trafo_is = ppci['branch_is'][start:end]
+        self.trafo_branch = branch_pos[start:end]
+        self.f_bus = ppci['branch'][:, F_BUS].real.astype(int)
+        self.t_bus = ppci['branch'][:, T_BUS].real.astype(int)
+        # demanda que no cambia con las horas (sgen, ward, etc.)
+        self.other_pd = ppci['bus'][:, PD] - self._sum_at_bus(self.C_load, net.load['p_mw'].values*self.load_factor)[0]
+        self.other_qd = ppci['bus'][:, QD] - self._sum_at_bus(self.C_load, net.load['q_mvar'].values*self.load_factor)[0]
+    def _incidence(self, elem_bus):
+        '''
+            Está función crea la matriz dispersa de conexión elemento -> barra
+            input
+                elem_bus: barra interna de cada elemento
+            return
+                matriz dispersa (elementos x barras)
+        '''
+        return sp.csr_matrix(
+                    (np.ones(len(elem_bus)), (np.arange(len(elem_bus)), elem_bus)),
+                    shape=(len(elem_bus), self.n_bus)
+                )
+    def _sum_at_bus(self, C, values):
+        '''
+            Está función acumula los valores de los elementos en la barra a la que se conectan
+            input
+                C: matriz de conexión elemento -> barra
+                values: matriz (periodos x elementos)
+            return
+                matriz (periodos x barras)
+        '''
+        return np.asarray((C.T*np.atleast_2d(values).T).T)
+    def _make_sbus(self, p_load, q_load, p_gen):
+        '''
+            Está función arma la matriz de inyecciones (periodos x barras) en pu
+            input
+                p_load, q_load: matrices (periodos x cargas) en MW y MVAr
+                p_gen: matriz (periodos x generadores) en MW
+            return
+                Sbus: matriz compleja (periodos x barras)
+        '''
+        pd = self.other_pd + self._sum_at_bus(self.C_load, p_load*self.load_factor)
+        qd = self.other_qd + self._sum_at_bus(self.C_load, q_load*self.load_factor)
+        pg = self._sum_at_bus(self.C_gen, p_gen*self.gen_factor)
+        return (pg - pd - 1j*qd)/self.base_mva, pd, qd
+    def _solve(self, Sbus, V0=None):
+        '''
+            Está función resuelve Newton-Raphson para todos los periodos sobre una Ybus compartida,
+            los periodos se apilan en un sistema diagonal por bloques
+            input
+                Sbus: matriz compleja de inyecciones (periodos x barras) en pu
+                V0: matriz de voltajes iniciales (periodos x barras)
+            return
+                V: matriz compleja de voltajes (periodos x barras)
+        '''
+        n_t, nb = Sbus.shape
+        V0 = np.tile(self.V0, (n_t, 1)) if V0 is None else V0
+        offset = (nb*np.arange(n_t))[:, None]
+        pv = (self.pv + offset).ravel()
+        pq = (self.pq + offset).ravel()
+        pvpq = np.r_[pv, pq]
+        Ybus = sp.csr_matrix(sp.kron(sp.identity(n_t), self.Ybus))
+        S = Sbus.ravel()
+        V = V0.ravel().astype(complex)
+        Vm, Va = np.abs(V), np.angle(V)
+        def mismatch(V):
+            mis = V*np.conj(Ybus*V) - S
+            return np.r_[mis[pvpq].real, mis[pq].imag]
+        F = mismatch(V)
+        iteration = 0
+        while np.max(np.abs(F)) > self.tol and iteration < self.max_iteration:
+            dS_dVm, dS_dVa = dSbus_dV(Ybus, V)
+            J = sp.vstack([
+                    sp.hstack([dS_dVa[pvpq][:, pvpq].real, dS_dVm[pvpq][:, pq].real]),
+                    sp.hstack([dS_dVa[pq][:, pvpq].imag, dS_dVm[pq][:, pq].imag])
+                ], format='csc')
+            dx = -spsolve(J, F)
+            Va[pvpq] += dx[:len(pvpq)]
+            Vm[pq] += dx[len(pvpq):]
+            V = Vm*np.exp(1j*Va)
+            F = mismatch(V)
+            iteration += 1
+        if np.max(np.abs(F)) > self.tol:
+            raise RuntimeError(f'El flujo de carga por lotes no converge en {self.max_iteration} iteraciones')
+        return V.reshape(n_t, nb)
+    def run(self, p_load, q_load, p_gen, V0=None):
+        '''
+            Está función corre el flujo de carga de todos los periodos y entrega los resultados
+            en las mismas unidades de las tablas res_* de pandapower
+            input
+                p_load, q_load: matrices (periodos x cargas) con los valores de p_mw y q_mvar de las cargas
+                p_gen: matriz (periodos x generadores) con los valores de p_mw de los generadores
+                V0: matriz de voltajes iniciales (periodos x barras internas)
+            return
+                dict: matrices (periodos x elementos) de resultados
+        '''
+        Sbus, pd, qd = self._make_sbus(p_load, q_load, p_gen)
+        V = self._solve(Sbus, V0)
+        S_inj = V*np.conj((self.Ybus*V.T).T)*self.base_mva
+        # flujos de líneas
+        V_f, V_t = V[:, self.f_bus], V[:, self.t_bus]
+        S_f = V_f*np.conj((self.Yf*V.T).T)*self.base_mva
+        S_t = V_t*np.conj((self.Yt*V.T).T)*self.base_mva
+        S_from = np.where(self.line_is, S_f[:, self.line_branch], 0)
+        S_to = np.where(self.line_is, S_t[:, self.line_branch], 0)
+        S_hv = np.where(self.trafo_is, S_f[:, self.trafo_branch], 0)
+        S_lv = np.where(self.trafo_is, S_t[:, self.trafo_branch], 0)
+        # generadores, la potencia reactiva de la barra se reparte entre las fuentes de la barra
+        p_gen = p_gen*self.gen_factor
+        n_source = (
+                np.bincount(self.gen_bus, weights=self.gen_factor>0, minlength=self.n_bus)
+                + np.bincount(self.ext_grid_bus, minlength=self.n_bus)
+            )
+        q_bus = (S_inj.imag + qd)/np.maximum(n_source, 1)
+        q_gen = np.where(self.gen_factor>0, q_bus[:, self.gen_bus], 0)
+        p_gen_bus = self._sum_at_bus(self.C_gen, p_gen)
+        p_ext_grid = (
+                S_inj.real[:, self.ext_grid_bus] + pd[:, self.ext_grid_bus] 
+                - p_gen_bus[:, self.ext_grid_bus]
+            )/np.bincount(self.ext_grid_bus, minlength=self.n_bus)[self.ext_grid_bus]
+        q_ext_grid = q_bus[:, self.ext_grid_bus]
+        return {
+            'V': V,
+            'vm_pu': np.abs(V[:, self.bus_idx]),
+            'va_degree': np.angle(V[:, self.bus_idx], deg=True),
+            'p_from_mw': S_from.real,
+            'q_from_mvar': S_from.imag,
+            'p_to_mw': S_to.real,
+            'q_to_mvar': S_to.imag,
+            'p_hv_mw': S_hv.real,
+            'p_lv_mw': S_lv.real,
+            'p_gen_mw': p_gen,
+            'q_gen_mvar': q_gen,
+            'p_ext_grid_mw': p_ext_grid,
+            'q_ext_grid_mvar': q_ext_grid,
+            'p_load_mw': p_load*self.load_factor,
+            'q_load_mvar': q_load*self.load_factor,
+        }
+
+# flujo de carga de cada proceso del sweep, se crea una sola vez por proceso
+_sweep_pf = None
+
+def _init_sweep_worker(net):
+    '''
+        Está función crea el BatchPowerFlow del proceso, la topología y la Ybus se conservan entre llamadas
+        input
+            net: sistema de pandapower
+        return
+            None
+    '''
+    global _sweep_pf
+    _sweep_pf = BatchPowerFlow(net)
+
+def _run_sweep_shard(p_load, q_load, p_gen):
+    '''
+        Está función resuelve hora a hora un bloque de periodos, cada hora arranca desde la solución de la anterior
+        input
+            p_load, q_load, p_gen: matrices (periodos x elementos) del bloque
+        return
+            list: resultados de BatchPowerFlow.run para cada periodo
+    '''
+    V, results = None, []
+    for k in range(p_load.shape[0]):
+        res = _sweep_pf.run(p_load[k:k+1], q_load[k:k+1], p_gen[k:k+1], V0=V)
+        V = res['V']
+        results.append(res)
+    return results
+
+def sweep_power_flow(net, p_load, q_load, p_gen, processes=None):
+    '''
+        Está función reparte los periodos (horas y escenarios) en bloques contiguos entre un pool de procesos
+        input
+            net: sistema de pandapower
+            p_load, q_load: matrices (periodos x cargas) con los valores de p_mw y q_mvar de las cargas
+            p_gen: matriz (periodos x generadores) con los valores de p_mw de los generadores
+            processes: número de procesos, por defecto os.cpu_count()
+        return
+            dict: matrices (periodos x elementos) de resultados, igual que BatchPowerFlow.run
+    '''
+    processes = processes or os.cpu_count()
+    shards = [shard for shard in np.array_split(np.arange(p_load.shape[0]), processes) if len(shard)]
+    with ProcessPoolExecutor(max_workers=len(shards), initializer=_init_sweep_worker, initargs=(net,)) as pool:
+        futures = [pool.submit(_run_sweep_shard, p_load[shard], q_load[shard], p_gen[shard]) for shard in shards]
+        results = [res for future in futures for res in future.result()]
+    return dict((key, np.vstack([res[key] for res in results])) for key in results[0])
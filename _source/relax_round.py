@@ -0,0 +1,282 @@
+import os
+import time
+import numpy as np
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from scipy.sparse.linalg import lsqr
+from concurrent.futures import ProcessPoolExecutor
+from _source.model import build_model, load_system_data
+from _source.nlp_evaluator import NLPEvaluator
+from _source.solver_session import SolverSession
+from _source.solver_backends import SolverBackend, PYTHON_SOLVERS
+from _source.warm_start import INTEGER_VARIABLES
+
+# modelo, sesión y configuración de cada proceso del relax-and-round, cada proceso evalúa candidatos completos
+_round_model = None
+_round_session = None
+_round_config = None
+
+def _integer_data(model):
+    '''
+        Está función entrega las variables enteras del modelo (V_Shunt y V_Rtrafo) en un orden fijo
+        input
+            model: modelo de pyomo (ConcreteModel)
+        return
+            list: variables enteras
+    '''
+    return [var for name in INTEGER_VARIABLES for var in getattr(model, name).values()]
+
+def _reduced_costs(model, tol=1e-6):
+    '''
+        Está función estima la sensibilidad del objetivo a las variables enteras fijas, los multiplicadores de las
+        restricciones activas salen de mínimos cuadrados sobre las variables continuas libres (gradiente del
+        lagrangiano nulo) y el costo reducido de cada entera es g_i + J_i^T lambda, la curvatura es la del objetivo
+        input
+            model: modelo de CreateModel resuelto con las enteras fijas
+            tol: tolerancia para considerar activas las restricciones y los bounds
+        return
+            ndarray, ndarray: costo reducido y curvatura del objetivo de las variables enteras
+    '''
+    # las enteras se liberan mientras se arma el evaluador, fijas quedarían como constantes en el objetivo
+    integers = _integer_data(model.model)
+    for var in integers:
+        var.unfix()
+    try:
+        evaluator = NLPEvaluator(model)
+    finally:
+        for var in integers:
+            var.fix()
+    x = evaluator.x0
+    columns = np.array([evaluator.column[name][key] for name in INTEGER_VARIABLES
+                        for key in getattr(model.model, name)], dtype=int)
+    g, c = evaluator.gradient(x), evaluator.constraints(x)
+    J = evaluator.jacobian_matrix(x)[(np.abs(c - evaluator.cl) <= tol) | (np.abs(c - evaluator.cu) <= tol)].tocsc()
+    free = (x - evaluator.lb > tol) & (evaluator.ub - x > tol)
+    free[columns] = False
+    lagrange = lsqr(J[:, free].T, -g[free])[0]
+    return g[columns] + J[:, columns].T @ lagrange, evaluator.Q.diagonal()[columns]
+
+def _init_round_worker(system_name, data, backend, profile, work_dir, model_kwargs):
+    '''
+        Está función crea en el proceso el modelo completo que evalúa los candidatos
+        input
+            system_name: nombre del sistema, ej: ieee9
+            data: valores de load_system_data
+            backend: nombre del backend del registro
+            profile: perfil de opciones del backend
+            work_dir: carpeta base de los archivos .nl y .sol
+            model_kwargs: argumentos de CreateModel
+        return
+            None
+    '''
+    global _round_model, _round_config
+    _round_config = {'system_name': system_name, 'backend': backend, 'profile': profile,
+                     'work_dir': os.path.join(work_dir, system_name, f'worker_{os.getpid()}')}
+    _round_model, _ = build_model(system_name, data=data, **model_kwargs)
+
+def _solve_candidate(values):
+    '''
+        Está función fija las variables enteras con los valores del candidato y resuelve solo el NLP, parte de la
+        solución del candidato anterior del proceso
+        input
+            values: valores de V_Shunt y V_Rtrafo en el orden de _integer_data
+        return
+            dict: candidato, estado, objetivo, tiempo, valores de todas las variables, costo reducido y curvatura
+    '''
+    global _round_session
+    m = _round_model.model
+    for var, value in zip(_integer_data(m), values.tolist()):
+        var.fix(value)
+    solver = SolverBackend(_round_config['backend'], _round_config['profile'], system_name=_round_config['system_name'])
+    if solver.solver not in PYTHON_SOLVERS:
+        work_dir = _round_config['work_dir']
+        if _round_session is None:
+            os.makedirs(work_dir, exist_ok=True)
+            _round_session = SolverSession(m, solver.solver, name=_round_config['system_name'], work_dir=work_dir, tee=False)
+        if 'output_file' in solver.options:
+            solver.options['output_file'] = os.path.abspath(os.path.join(work_dir, os.path.basename(solver.options['output_file'])))
+    is_solve, info = solver.solve(m, _round_session, owner=_round_model)
+    reduced, curvature = None, None
+    if is_solve:
+        reduced, curvature = _reduced_costs(_round_model)
+    return {
+        'values': values,
+        'solved': is_solve,
+        'objective': pyomo.value(m.obj, exception=False) if is_solve else None,
+        'time': info['total'],
+        'x': np.array([np.nan if var.value is None else var.value for var in m.component_data_objects(pyomo.Var)], dtype=float),
+        'reduced': reduced,
+        'curvature': curvature,
+    }
+
+class RelaxAndRound(object):
+    '''
+        Class encargada de la heurística relax-and-round para los shunts y taps enteros, resuelve la relajación
+        continua, redondea (el redondeo más cercano y los que cambian las variables más fraccionarias) y evalúa los
+        candidatos en paralelo como NLP con las enteras fijas, luego busca en la vecindad de la mejor asignación
+        moviendo ±1 las enteras que según el costo reducido mejoran el objetivo, la brecha se mide contra la relajación
+    '''
+    def __init__(self, system_name, backend='ipopt', profile='tight_final', candidates=4, max_rounds=5, tol=1e-6,
+                 processes=None, work_dir='relax_round', model_kwargs=None, print_sec=False):
+        '''
+            Está función instancia la clase RelaxAndRound
+            input
+                system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+                backend: backend de solver_backends de la relajación y de los NLP con las enteras fijas, ej: ipopt, native
+                profile: perfil de opciones del backend
+                candidates: número de candidatos que se evalúan en cada ronda
+                max_rounds: número máximo de rondas de búsqueda en la vecindad
+                tol: mejora mínima del objetivo para seguir buscando
+                processes: número de procesos, por defecto os.cpu_count() (máximo candidates)
+                work_dir: carpeta de los archivos .nl, .sol y registros de los procesos
+                model_kwargs: argumentos de CreateModel, ej: {'formulation': 'square'}
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo RelaxAndRound
+        '''
+        self.system_name = system_name
+        self.backend = backend
+        self.profile = profile
+        self.candidates = candidates
+        self.max_rounds = max_rounds
+        self.tol = tol
+        self.processes = processes or os.cpu_count()
+        self.work_dir = work_dir
+        self.model_kwargs = dict(model_kwargs or {})
+        self.print_sec = print_sec
+        self.history = []
+        self.gap = None
+    def _round_candidates(self, relaxed):
+        '''
+            Está función arma los candidatos de la relajación, el redondeo más cercano y los que cambian el sentido
+            del redondeo de las variables más fraccionarias (parte fraccionaria más cerca de 0.5)
+            input
+                relaxed: valores de las enteras en la relajación
+            return
+                list: candidatos
+        '''
+        base = np.clip(np.round(relaxed), self.lb, self.ub)
+        frac = relaxed - np.floor(relaxed)
+        order = [i for i in np.argsort(np.abs(frac - 0.5)) if self.tol < frac[i] < 1 - self.tol]
+        candidates = [base]
+        for i in order[:self.candidates - 1]:
+            candidate = base.copy()
+            candidate[i] = np.floor(relaxed[i]) if base[i] > relaxed[i] else np.ceil(relaxed[i])
+            candidates.append(np.clip(candidate, self.lb, self.ub))
+        return candidates
+    def _neighbors(self, best):
+        '''
+            Está función arma los candidatos de la vecindad de la mejor asignación, cada uno mueve ±1 una entera con
+            cambio estimado reduced*delta + curvature/2 negativo (los de mayor mejora) y el último aplica todos los movimientos
+            input
+                best: resultado de _solve_candidate de la mejor asignación
+            return
+                list: candidatos
+        '''
+        if best['reduced'] is None: return []
+        values, moves = best['values'], {}
+        for delta in [-1, 1]:
+            change = best['reduced']*delta + best['curvature']/2
+            feasible = (values + delta >= self.lb) & (values + delta <= self.ub) & (change < -self.tol)
+            for i in np.flatnonzero(feasible):
+                if i not in moves or change[i] < moves[i][0]: moves[i] = (change[i], delta)
+        selected = sorted(moves.items(), key=lambda item: item[1][0])[:self.candidates]
+        candidates = []
+        for i, (_, delta) in selected:
+            candidate = values.copy()
+            candidate[i] += delta
+            candidates.append(candidate)
+        if len(selected) > 1:
+            candidate = values.copy()
+            for i, (_, delta) in selected:
+                candidate[i] += delta
+            candidates.append(candidate)
+        return candidates
+    def run(self):
+        '''
+            Está función resuelve la relajación, evalúa los candidatos y la vecindad y deja la mejor solución en self.model
+            input
+                None
+            return
+                bool: True si algún candidato se resolvió
+        '''
+        t0 = time.perf_counter()
+        _, data = load_system_data(self.system_name, print_sec=self.print_sec)
+        self.model, _ = build_model(self.system_name, data=data, **self.model_kwargs)
+        m = self.model.model
+        integers = _integer_data(m)
+        self.lb = np.array([var.lb for var in integers], dtype=float)
+        self.ub = np.array([var.ub for var in integers], dtype=float)
+        #** relajación continua
+        for name in INTEGER_VARIABLES:
+            getattr(m, name).domain = pyomo.Reals
+        if not self.model.solve_model(backend=self.backend, profile=self.profile):
+            raise RuntimeError(f'La relajación continua de {self.system_name} no se resolvió')
+        self.relaxation = pyomo.value(m.obj)
+        relaxed = np.array([var.value for var in integers], dtype=float)
+        relax_time = time.perf_counter() - t0
+        if self.print_sec: print(f'Relajación continua: obj {self.relaxation:.6g} - {relax_time:.3f}s')
+        #** candidatos en paralelo y búsqueda en la vecindad
+        processes = max(1, min(self.processes, self.candidates + 1))
+        visited, best = set(), None
+        candidates = self._round_candidates(relaxed)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_round_worker,
+                                 initargs=(self.system_name, data, self.backend, self.profile, self.work_dir, self.model_kwargs)) as pool:
+            for k in range(self.max_rounds + 1):
+                candidates = [c for c in candidates if tuple(c.tolist()) not in visited]
+                if not candidates: break
+                visited.update(tuple(c.tolist()) for c in candidates)
+                t1 = time.perf_counter()
+                results = [result for result in pool.map(_solve_candidate, candidates) if result['solved']]
+                improved = [result for result in results
+                            if best is None or result['objective'] < best['objective'] - self.tol*max(1.0, abs(best['objective']))]
+                if improved: best = min(improved, key=lambda result: result['objective'])
+                self.history.append({'round': k, 'candidates': len(candidates), 'solved': len(results),
+                                     'objective': None if best is None else best['objective'],
+                                     'improved': bool(improved), 'time': time.perf_counter() - t1})
+                if self.print_sec: print('Ronda {round}: {candidates} candidatos - {solved} resueltos - obj {objective}'.format(**self.history[-1]))
+                if best is None or (k > 0 and not improved): break
+                candidates = self._neighbors(best)
+        for name in INTEGER_VARIABLES:
+            getattr(m, name).domain = pyomo.Integers
+        if best is not None:
+            for var, value in zip(m.component_data_objects(pyomo.Var), best['x'].tolist()):
+                if not np.isnan(value): var.set_value(value, skip_validation=True)
+            for var, value in zip(integers, best['values'].tolist()):
+                var.set_value(value)
+        upper_bound = None if best is None else best['objective']
+        self.gap = {
+            'system': self.system_name,
+            'relaxation': self.relaxation,
+            'objective': upper_bound,
+            'gap': None if best is None else upper_bound - self.relaxation,
+            'relative_gap': None if best is None else (upper_bound - self.relaxation)/max(abs(upper_bound), 1e-10),
+        }
+        self.model.solver_info = {
+            'backend': self.backend,
+            'profile': self.profile,
+            'heuristic': 'relax_round',
+            'status': best is not None,
+            'rounds': len(self.history),
+            'evaluated': len(visited),
+            'relaxation': self.relaxation,
+            'objective': upper_bound,
+            'relative_gap': self.gap['relative_gap'],
+            'relax': relax_time,
+            'total': time.perf_counter() - t0,
+        }
+        if self.print_sec and best is not None:
+            print('Relax-and-round: obj {objective:.6g} - relajación {relaxation:.6g} - brecha {relative_gap:.3%}'.format(**self.gap))
+        return best is not None
+    def save_model_variables(self):
+        '''
+            Está función guarda las variables del modelo como model.save_model_variables, la brecha en
+            Resultados/{system}/Gap__res.csv y las rondas en RelaxRound__res.csv
+            input
+                None
+            return
+                None
+        '''
+        self.model.save_model_variables()
+        DataFrame(list(self.gap.items()), columns=['Key','Value']).to_csv(f'Resultados/{self.system_name}/Gap__res.csv', index=False)
+        DataFrame(self.history).to_csv(f'Resultados/{self.system_name}/RelaxRound__res.csv', index=False)
@@ -0,0 +1,131 @@
+import os
+import time
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from _source.model import build_model, load_system_data
+
+class RollingHorizon(object):
+    '''
+        Class encargada del despacho con horizonte rodante, resuelve ventanas de window horas cada step horas sobre
+        total_hours con un solo modelo de Params mutables, la primera hora de cada ventana es la última hora ya
+        comprometida (shunts y taps fijos, así se cobra el cambio de shunts entre ventanas) y cada ventana parte de la
+        solución de la anterior desplazada step horas, las horas comprometidas se escriben a disco al final de cada
+        ventana para que la memoria no crezca con el horizonte
+    '''
+    def __init__(self, system_name, total_hours=168, window=24, step=6, mode='batch', backend='bonmin_oa',
+                 profile='tight_final', persistent=True, model_kwargs=None, print_sec=False):
+        '''
+            Está función instancia la clase RollingHorizon
+            input
+                system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+                total_hours: horas del horizonte total, ej: 168 (una semana) o 720 (un mes)
+                window: horas de cada ventana
+                step: horas que se comprometen en cada ventana (desplazamiento entre ventanas), step <= window
+                mode: modo de _get_values_from_system
+                backend: backend de solver_backends
+                profile: perfil de opciones del backend
+                persistent: si es True se conserva la SolverSession entre ventanas
+                model_kwargs: argumentos de CreateModel, ej: {'formulation': 'square'}
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo RollingHorizon
+        '''
+        if not 0 < step <= window:
+            raise ValueError(f'step debe estar entre 1 y window ({window}), step: {step}')
+        self.system_name = system_name
+        self.total_hours = total_hours
+        self.window = window
+        self.step = step
+        self.mode = mode
+        self.backend = backend
+        self.profile = profile
+        self.persistent = persistent
+        self.model_kwargs = dict(model_kwargs or {})
+        self.print_sec = print_sec
+        self.folder = f'Resultados/{system_name}_rolling'
+    def _window_hours(self, start):
+        '''
+            Está función entrega las horas absolutas de la ventana que compromete desde start, la hora start-1 (ya
+            comprometida) queda como hora 1 del modelo
+            input
+                start: primera hora absoluta que compromete la ventana
+            return
+                list: horas absolutas de la ventana
+        '''
+        return list(range(start - 1, start + self.window))
+    def _shift(self, snapshot):
+        '''
+            Está función inicializa las variables de la ventana con la solución anterior desplazada step horas,
+            las horas nuevas quedan con el flujo de carga de la ventana
+            input
+                snapshot: diccionario variable -> {(label, t): valor} de la ventana anterior
+            return
+                None
+        '''
+        for var, values in snapshot.items():
+            for key, var_data in var.items():
+                value = values.get(key[:-1] + (key[-1] + self.step,))
+                if value is not None: var_data.set_value(value, skip_validation=True)
+    def _commit(self, start, first):
+        '''
+            Está función agrega a los archivos de resultados las horas que compromete la ventana, con la hora absoluta
+            input
+                start: primera hora absoluta que compromete la ventana
+                first: si es True se crean los archivos, de lo contrario se agregan las filas
+            return
+                None
+        '''
+        last = min(start + self.step - 1, self.total_hours)
+        for var in self.timed:
+            rows = [(key[:-1] + (key[-1] + start - 2,), value) for key, value in var.get_values().items()
+                    if start <= key[-1] + start - 2 <= last]
+            DataFrame(rows, columns=['Var', 'Value']).to_csv(f'{self.folder}/Var_{var.name}__res.csv', index=False,
+                                                              mode='w' if first else 'a', header=first)
+    def run(self):
+        '''
+            Está función resuelve todas las ventanas del horizonte y guarda las horas comprometidas en
+            Resultados/{system}_rolling y el resumen de las ventanas en Rolling__res.csv
+            input
+                None
+            return
+                bool: True si todas las ventanas se resolvieron
+        '''
+        os.makedirs(self.folder, exist_ok=True)
+        system, data = load_system_data(self.system_name, mode=self.mode, print_sec=self.print_sec,
+                                        hours=self._window_hours(1))
+        self.model, _ = build_model(self.system_name, data=data, mutable_param=True,
+                                    hours=range(1, self.window + 2), **self.model_kwargs)
+        m = self.model.model
+        # solo las variables indexadas por hora se desplazan y se comprometen
+        self.timed = [var for var in m.component_objects(pyomo.Var, active=True)
+                      if any(subset is m.t for subset in var.index_set().subsets())]
+        all_solved, starts = True, list(range(1, self.total_hours + 1, self.step))
+        for k, start in enumerate(starts):
+            t0 = time.perf_counter()
+            if k > 0:
+                snapshot = dict((var, var.get_values()) for var in self.timed)
+                system._set_hours(self._window_hours(start))
+                self.model._set_variables_model(system._get_values_from_system(mode=self.mode))
+                self.model._set_adjust_values(system._get_adjust_values())
+                self._shift(snapshot)
+                del snapshot
+                # la hora 1 es la última hora comprometida, sus shunts y taps quedan fijos
+                for var in [m.V_Shunt, m.V_Rtrafo]:
+                    for key, var_data in var.items():
+                        if key[-1] == 1: var_data.fix()
+            t1 = time.perf_counter()
+            is_solve = self.model.solve_model(persistent=self.persistent, backend=self.backend, profile=self.profile)
+            all_solved = all_solved and is_solve
+            self._commit(start, k == 0)
+            info = {
+                'window': k,
+                'start': start,
+                'end': min(start + self.step - 1, self.total_hours),
+                'solved': is_solve,
+                'objective': pyomo.value(m.obj, exception=False),
+                'update': t1 - t0,
+                'solve': time.perf_counter() - t1,
+            }
+            DataFrame([info]).to_csv(f'{self.folder}/Rolling__res.csv', index=False, mode='w' if k == 0 else 'a', header=k == 0)
+            if self.print_sec: print('Ventana {window} (horas {start}-{end}): resuelta {solved} - obj {objective} - solve {solve:.3f}s'.format(**info))
+        return all_solved
@@ -0,0 +1,159 @@
+import time
+import numpy as np
+import scipy.sparse as sp
+import pyomo.environ as pyomo
+from scipy.optimize import minimize, Bounds, NonlinearConstraint, BFGS
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.core.expr.calculus.derivatives import differentiate
+
+class ScipySolver(object):
+    '''
+        Class encargada de resolver la relajación continua del modelo con scipy.optimize.minimize, las derivadas
+        se calculan con la diferenciación reverse de Pyomo restricción por restricción, pensado para sistemas pequeños,
+        las enteras fraccionarias de la relajación se redondean y se fijan antes de resolver de nuevo
+    '''
+    def __init__(self, model, options=None, print_sec=False):
+        '''
+            Está función instancia la clase ScipySolver
+            input
+                model: modelo de pyomo (ConcreteModel)
+                options: opciones, method (trust-constr o SLSQP) y las opciones de scipy.optimize.minimize
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo ScipySolver
+        '''
+        self.model = model
+        self.options = dict(options or {})
+        self.method = self.options.pop('method', 'trust-constr')
+        self.print_sec = print_sec
+        self.result = None
+        self.timing = {}
+    def _get_problem(self):
+        '''
+            Está función arma las variables, bounds, restricciones y la estructura del jacobiano,
+            las variables enteras se relajan
+            input
+                None
+            return
+                None
+        '''
+        self.objective = next(self.model.component_data_objects(pyomo.Objective, active=True))
+        self.constraints = list(self.model.component_data_objects(pyomo.Constraint, active=True))
+        self.variables, index = [], {}
+        def var_index(expr):
+            columns = []
+            for var in identify_variables(expr, include_fixed=False):
+                if id(var) not in index:
+                    index[id(var)] = len(self.variables)
+                    self.variables.append(var)
+                columns.append(index[id(var)])
+            return columns
+        self.obj_columns = var_index(self.objective.expr)
+        self.con_columns = [var_index(con.body) for con in self.constraints]
+        self.obj_vars = [self.variables[c] for c in self.obj_columns]
+        self.con_vars = [[self.variables[c] for c in columns] for columns in self.con_columns]
+        self.rows = np.repeat(np.arange(len(self.constraints)), [len(columns) for columns in self.con_columns])
+        self.cols = np.array([c for columns in self.con_columns for c in columns], dtype=int)
+        bounds = [var.bounds for var in self.variables]
+        self.lb = np.array([-np.inf if lb is None else lb for lb, _ in bounds], dtype=float)
+        self.ub = np.array([np.inf if ub is None else ub for _, ub in bounds], dtype=float)
+        self.con_lb = np.array([-np.inf if con.lb is None else pyomo.value(con.lb) for con in self.constraints], dtype=float)
+        self.con_ub = np.array([np.inf if con.ub is None else pyomo.value(con.ub) for con in self.constraints], dtype=float)
+        self.sign = 1 if self.objective.sense == pyomo.minimize else -1
+        x0 = np.array([0 if var.value is None else var.value for var in self.variables], dtype=float)
+        self.x0 = np.clip(x0, self.lb, self.ub)
+    def _set_x(self, x):
+        '''
+            Está función pasa el vector x a las variables del modelo
+            input
+                x: valores de las variables
+            return
+                None
+        '''
+        for var, value in zip(self.variables, x.tolist()):
+            var.set_value(value, skip_validation=True)
+    def _objective(self, x):
+        self._set_x(x)
+        return self.sign*pyomo.value(self.objective.expr)
+    def _gradient(self, x):
+        self._set_x(x)
+        grad = np.zeros(len(self.variables))
+        if self.obj_vars:
+            grad[self.obj_columns] = differentiate(self.objective.expr, wrt_list=self.obj_vars, mode=differentiate.Modes.reverse_numeric)
+        return self.sign*grad
+    def _constraint_values(self, x):
+        self._set_x(x)
+        return np.array([pyomo.value(con.body) for con in self.constraints], dtype=float)
+    def _jacobian(self, x):
+        self._set_x(x)
+        values = [value
+                  for con, variables in zip(self.constraints, self.con_vars) if variables
+                  for value in differentiate(con.body, wrt_list=variables, mode=differentiate.Modes.reverse_numeric)]
+        return sp.csr_matrix((values, (self.rows, self.cols)), shape=(len(self.constraints), len(self.variables)))
+    def _scipy_constraints(self):
+        '''
+            Está función entrega las restricciones en el formato del método de scipy
+            input
+                None
+            return
+                restricciones de scipy.optimize.minimize
+        '''
+        if self.method == 'trust-constr':
+            return NonlinearConstraint(self._constraint_values, self.con_lb, self.con_ub, jac=self._jacobian, hess=BFGS())
+        # SLSQP: cada límite finito es una restricción g(x) >= 0 o h(x) = 0
+        eq = np.where(self.con_lb == self.con_ub)[0]
+        low = np.where((self.con_lb != self.con_ub) & np.isfinite(self.con_lb))[0]
+        up = np.where((self.con_lb != self.con_ub) & np.isfinite(self.con_ub))[0]
+        return [
+            {'type': 'eq', 'fun': lambda x: self._constraint_values(x)[eq] - self.con_lb[eq],
+             'jac': lambda x: self._jacobian(x)[eq].toarray()},
+            {'type': 'ineq', 'fun': lambda x: np.r_[self._constraint_values(x)[low] - self.con_lb[low],
+                                                    self.con_ub[up] - self._constraint_values(x)[up]],
+             'jac': lambda x: sp.vstack([self._jacobian(x)[low], -self._jacobian(x)[up]]).toarray()},
+        ]
+    def _minimize(self):
+        '''
+            Está función arma el problema con las variables libres del modelo, lo resuelve con scipy y carga la
+            solución, los tiempos se suman en self.timing
+            input
+                None
+            return
+                None
+        '''
+        t0 = time.perf_counter()
+        self._get_problem()
+        t1 = time.perf_counter()
+        self.result = minimize(
+                self._objective, self.x0, jac=self._gradient,
+                hess=BFGS() if self.method == 'trust-constr' else None,
+                method=self.method, bounds=Bounds(self.lb, self.ub),
+                constraints=self._scipy_constraints(), options=self.options
+            )
+        t2 = time.perf_counter()
+        self._set_x(self.result.x)
+        for key, value in [('write', t1-t0), ('solve', t2-t1), ('load', time.perf_counter()-t2), ('iterations', self.result.nit)]:
+            self.timing[key] = self.timing.get(key, 0) + value
+    def solve(self, int_tol=1e-6):
+        '''
+            Está función resuelve la relajación continua y carga la solución en las variables del modelo, si alguna
+            variable entera (V_Shunt, V_Rtrafo) queda fraccionaria se redondean todas las enteras, se fijan y se
+            resuelve de nuevo el NLP de las continuas, así el modelo nunca queda con enteras fraccionarias
+            input
+                int_tol: distancia máxima al entero para aceptar el valor de la relajación
+            return
+                bool: True si scipy terminó bien, con enteras redondeadas es el estado del NLP con las enteras fijas
+        '''
+        self.timing = {}
+        self._minimize()
+        integers = [var for var in self.variables if not var.is_continuous()]
+        self.timing['rounded'] = 0
+        if any(abs(var.value - round(var.value)) > int_tol for var in integers):
+            self.timing['rounded'] = len(integers)
+            for var in integers:
+                var.fix(min(max(round(var.value), var.lb), var.ub), skip_validation=True)
+            try:
+                self._minimize()
+            finally:
+                for var in integers: var.unfix()
+        if self.print_sec: print(f'scipy {self.method}: {self.result.message} - enteras redondeadas: {self.timing["rounded"]}')
+        return bool(self.result.success)
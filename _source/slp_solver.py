@@ -0,0 +1,142 @@
+import time
+import numpy as np
+import scipy.sparse as sp
+from scipy.optimize import milp, Bounds, LinearConstraint
+from _source.scipy_solver import ScipySolver
+
+# opciones por defecto de la programación lineal secuencial
+SLP_OPTIONS = {
+    'max_iter': 50,
+    'radius': 0.1,
+    'min_radius': 1e-6,
+    'max_radius': 10,
+    'int_radius': 1,
+    'penalty': 1e3,
+    'tol': 1e-6,
+    'feas_tol': 1e-6,
+    'eta': 0.1,
+    'time_limit': None,
+    'mip_rel_gap': None,
+}
+
+class SLPSolver(object):
+    '''
+        Class encargada de resolver el modelo con programación lineal secuencial (SLP), en cada iteración se linealizan
+        las restricciones y el objetivo alrededor del punto actual, se resuelve el MILP (shunts y taps enteros) con
+        holguras elásticas penalizadas y región de confianza, y el paso se acepta con la función de mérito L1
+    '''
+    def __init__(self, model, options=None, print_sec=False):
+        '''
+            Está función instancia la clase SLPSolver
+            input
+                model: modelo de pyomo (ConcreteModel), parte desde los valores actuales de las variables
+                options: opciones de SLP_OPTIONS
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo SLPSolver
+        '''
+        self.model = model
+        self.options = dict(SLP_OPTIONS, **(options or {}))
+        self.print_sec = print_sec
+        self.evaluator = ScipySolver(model)
+        self.history = []
+        self.timing = {}
+    def _violation(self, g):
+        '''
+            Está función calcula la violación L1 de las restricciones
+            input
+                g: valores de las restricciones
+            return
+                float: suma de las violaciones
+        '''
+        ev = self.evaluator
+        return float(np.sum(np.maximum(ev.con_lb - g, 0)) + np.sum(np.maximum(g - ev.con_ub, 0)))
+    def _merit(self, x):
+        '''
+            Está función evalúa el objetivo, las restricciones y la función de mérito f + penalty*violación
+            input
+                x: valores de las variables
+            return
+                float, ndarray, float, float: objetivo, restricciones, violación y mérito
+        '''
+        f = self.evaluator._objective(x)
+        g = self.evaluator._constraint_values(x)
+        violation = self._violation(g)
+        return f, g, violation, f + self.options['penalty']*violation
+    def _subproblem(self, x, g, J, grad, radius):
+        '''
+            Está función resuelve el MILP linealizado, l <= g + J*(y - x) + s_pos - s_neg <= u, con la región de
+            confianza |y - x| <= radius en las continuas e int_radius en las enteras
+            input
+                x: punto actual
+                g, J, grad: restricciones, jacobiano disperso y gradiente del objetivo en x
+                radius: radio de la región de confianza
+            return
+                ndarray o None: nuevo punto, float: reducción predicha del mérito
+        '''
+        ev, opt = self.evaluator, self.options
+        n, m = len(x), len(g)
+        offset = J @ x - g
+        A = sp.hstack([J, sp.identity(m, format='csr'), -sp.identity(m, format='csr')], format='csr')
+        step = np.where(self.integer, opt['int_radius'], radius)
+        lb = np.r_[np.maximum(ev.lb, x - step), np.zeros(2*m)]
+        ub = np.r_[np.minimum(ev.ub, x + step), np.full(2*m, np.inf)]
+        c = np.r_[grad, np.full(2*m, opt['penalty'])]
+        options = dict((key, opt[key]) for key in ['time_limit', 'mip_rel_gap'] if opt[key] is not None)
+        result = milp(c, integrality=np.r_[self.integer, np.zeros(2*m)], bounds=Bounds(lb, ub),
+                      constraints=LinearConstraint(A, ev.con_lb + offset, ev.con_ub + offset), options=options)
+        if result.x is None: return None, 0
+        y = result.x[:n]
+        y[self.integer == 1] = np.round(y[self.integer == 1])
+        predicted = -grad @ (y - x) + opt['penalty']*(self._violation(g) - result.x[n:].sum())
+        return y, predicted
+    def solve(self):
+        '''
+            Está función itera la SLP hasta que la reducción predicha sea menor a tol o el radio menor a min_radius
+            y carga la solución en las variables del modelo, solo la reducción predicha menor a tol es convergencia
+            input
+                None
+            return
+                bool: True si convergió con violación menor a feas_tol
+        '''
+        opt = self.options
+        t0 = time.perf_counter()
+        ev = self.evaluator
+        ev._get_problem()
+        self.integer = np.array([0 if var.is_continuous() else 1 for var in ev.variables])
+        x = np.where(self.integer == 1, np.round(ev.x0), ev.x0)
+        f, g, violation, merit = self._merit(x)
+        J, grad = ev._jacobian(x), ev._gradient(x)
+        radius, converged = opt['radius'], False
+        t1 = time.perf_counter()
+        for k in range(opt['max_iter']):
+            y, predicted = self._subproblem(x, g, J, grad, radius)
+            if y is None:
+                radius /= 2
+                if radius < opt['min_radius']: break
+                continue
+            if predicted <= opt['tol']*(1 + abs(merit)):
+                converged = True
+                break
+            f_y, g_y, violation_y, merit_y = self._merit(y)
+            ratio = (merit - merit_y)/predicted
+            self.history.append({'iteration': k, 'objective': f_y, 'violation': violation_y, 'merit': merit_y,
+                                 'radius': radius, 'ratio': ratio})
+            if self.print_sec: print('SLP {iteration}: obj {objective:.6g} - viol {violation:.3g} - radius {radius:.3g} - ratio {ratio:.3f}'.format(**self.history[-1]))
+            if ratio >= opt['eta']:
+                # paso aceptado, se linealiza de nuevo en el punto nuevo
+                hit = np.max(np.abs(y - x)[self.integer == 0], initial=0) >= 0.99*radius
+                x, f, g, violation, merit = y, f_y, g_y, violation_y, merit_y
+                J, grad = ev._jacobian(x), ev._gradient(x)
+                if ratio > 0.75 and hit: radius = min(2*radius, opt['max_radius'])
+                elif ratio < 0.25: radius /= 2
+            else:
+                radius /= 4
+            if radius < opt['min_radius']:
+                # el radio colapsó sin cumplir la reducción predicha, la SLP se estancó
+                break
+        ev._set_x(x)
+        t2 = time.perf_counter()
+        self.timing = {'write': t1-t0, 'solve': t2-t1, 'load': 0, 'iterations': len(self.history)}
+        if self.print_sec: print(f'SLP: objetivo {f:.6g} - violación {violation:.3g} - iteraciones {len(self.history)}')
+        return converged and violation <= opt['feas_tol']
@@ -0,0 +1,476 @@
+import os
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from pyomo.contrib.fbbt.fbbt import compute_bounds_on_expr
+from _source.model import CreateModel
+
+class CreateSOCPModel(CreateModel):
+    '''
+        Class encargada de crear la relajación convexa (SOCP) del modelo AC, los productos de voltajes se reemplazan
+        por las variables W (W_i = V_i**2, WR = V_i*V_j*cos, WI = V_i*V_j*sin) con el cono WR**2 + WI**2 <= W_i*W_j,
+        los taps por rho1 = 1/r y rho2 = 1/r**2 con envolventes de McCormick y los shunts y taps son continuos.
+        Las restricciones |A| - |B| <= error (balances y potencia reactiva de ieee39/ieee118) no son convexas, se
+        relajan a |A| <= secante(B) + error con la secante de |B| sobre las cotas de B, su objetivo es una cota
+        inferior del modelo AC
+    '''
+    def __init__(self, system_param, system_values, adjust_values, print_sec=False, **kwargs):
+        '''
+            Está función instancia la clase CreateSOCPModel
+            input
+               system_param: valores i, j del sistema
+               system_values: valores del sistema
+               adjust_values: valores de ajuste para ecuaciones de igualdad
+               print_sec: para imprimir secuencia de ejecuciones
+               kwargs: argumentos de CreateModel, ej: hours, int_index, sparse_index (los mismos del modelo AC)
+            return
+                Objeto de tipo CreateSOCPModel
+        '''
+        super().__init__(system_param, system_values, adjust_values, print_sec=print_sec, **kwargs)
+        self.lower_bound = None
+        self.gap = None
+    def _add_var_socp(self, demandbidmap=None):
+        '''
+            Está función crea las variables del modelo AC que se conservan (flujos, voltajes, generadores, shunts
+            continuos, V_Gs y demanda elástica) y las variables de la relajación V_W, V_WR, V_WI, V_Rho (taps
+            continuos), V_Z (productos de W, WR y WI con rho1 y rho2 en las ramas con trafo) y V_Y (productos de W
+            con V_Gs y V_Shunt de los balances)
+            input
+                demandbidmap: id de la demanda y bus en el que se conecta
+            return
+                None
+        '''
+        self._add_var_p_line()
+        self._add_var_q_line()
+        self._add_var_v_bus()
+        self._add_var_p_gen()
+        self._add_var_q_gen()
+        self._add_var_Shunt_bus()
+        self._add_var_pd_elastic(demandbidmap)
+        if self.print_sec: print('Se agrega las variables de la relajación SOCP')
+        self.model.V_Shunt.domain = pyomo.Reals
+        self.model.V_Gs = pyomo.Var(
+                self.model.bus,
+                bounds=(0,1),
+                initialize=0,
+                within=pyomo.Reals,
+            )
+        bounds_bus = self.system_param.get('bounds_bus')
+        def v_max(k, t): return bounds_bus[self.bus_list[k], t][1]
+        self.model.V_W = pyomo.Var(
+                self.model.bus,
+                self.model.t,
+                within=pyomo.NonNegativeReals,
+                bounds=lambda model, bus, t: (bounds_bus[bus, t][0]**2, bounds_bus[bus, t][1]**2),
+                doc='V_i**2 in bus b at time t'
+            )
+        wr_bound = dict(((ij, t), v_max(self.ij_from[k], t)*v_max(self.ij_to[k], t))
+                        for k, ij in enumerate(self.ij_list) for t in self.model.t)
+        self.model.V_WR = pyomo.Var(
+                self.model.ij,
+                self.model.t,
+                within=pyomo.Reals,
+                bounds=lambda model, ij, t: (-wr_bound[ij, t], wr_bound[ij, t]),
+                doc='V_i*V_j*cos(theta_i - theta_j) on line ijc at time t'
+            )
+        self.model.V_WI = pyomo.Var(
+                self.model.ij,
+                self.model.t,
+                within=pyomo.Reals,
+                bounds=lambda model, ij, t: (-wr_bound[ij, t], wr_bound[ij, t]),
+                doc='V_i*V_j*sin(theta_i - theta_j) on line ijc at time t'
+            )
+        self.model.V_Rho = pyomo.Var(
+                self.model.trafo,
+                self.model.t,
+                ['rho1', 'rho2'],
+                within=pyomo.Reals,
+                bounds=lambda model, bus, t, rho: (1/self.max_trafo**(1 if rho == 'rho1' else 2), 1/self.min_trafo),
+                initialize=lambda model, bus, t, rho: 1/self.m_trafo**(1 if rho == 'rho1' else 2),
+                doc='1/r y 1/r**2 del trafo de la barra b at time t'
+            )
+        self.model.ij_trafo = pyomo.Set(initialize=[ij for ij, trafo in zip(self.ij_list, self.ij_trafo) if trafo], doc='Terminal ij trafo')
+        self.model.V_Z = pyomo.Var(
+                self.model.ij_trafo,
+                self.model.t,
+                ['w2', 'r1', 'i1', 'r2', 'i2'],
+                within=pyomo.Reals,
+                bounds=lambda model, ij, t, name: self._product_bounds(*self._z_terms(ij, t, name)),
+                doc='Productos W*rho2, WR*rho1, WI*rho1, WR*rho2 y WI*rho2 on line ijc at time t'
+            )
+        bus_shunt = self.system_param.get('bus_shunt')
+        self.model.bus_product = pyomo.Set(initialize=[(bus, 'gs') for bus in self.bus_list]
+                                           + [(bus, 'sh') for bus in self.bus_list if bus_shunt.get(bus)],
+                                           dimen=2, doc='Productos W*Gs y W*Shunt de la barra')
+        self.model.V_Y = pyomo.Var(
+                self.model.bus_product,
+                self.model.t,
+                within=pyomo.Reals,
+                bounds=lambda model, bus, name, t: self._product_bounds(*self._y_terms(bus, name, t)),
+                doc='Productos W*Gs y W*Shunt in bus b at time t'
+            )
+    def _product_bounds(self, x, y):
+        '''
+            Está función entrega las cotas del producto de dos variables con cotas
+            input
+                x, y: variables
+            return
+                tuple: cota inferior y superior de x*y
+        '''
+        corners = [xb*yb for xb in x.bounds for yb in y.bounds]
+        return min(corners), max(corners)
+    def _y_terms(self, bus, name, t):
+        '''
+            Está función entrega las dos variables del producto V_Y[bus, name, t]
+            input
+                bus: barra
+                name: gs o sh
+                t: hora
+            return
+                Var, Var: W_i y V_Gs o V_Shunt
+        '''
+        return self.model.V_W[bus, t], self.model.V_Gs[bus] if name == 'gs' else self.model.V_Shunt[bus, t]
+    def _mccormick(self, z, x, y, n):
+        '''
+            Está función entrega la envolvente de McCormick n (0 a 3) del producto z = x*y
+            input
+                z: variable del producto
+                x, y: variables con cotas
+                n: número de la envolvente
+            return
+                restricción de la envolvente
+        '''
+        (xl, xu), (yl, yu) = x.bounds, y.bounds
+        return [z >= xl*y + x*yl - xl*yl, z >= xu*y + x*yu - xu*yu,
+                z <= xu*y + x*yl - xu*yl, z <= xl*y + x*yu - xl*yu][n]
+    def _secant(self, expr):
+        '''
+            Está función entrega la secante de |expr| sobre las cotas de expr, cóncava y mayor o igual a |expr|,
+            si expr no cambia de signo es el mismo |expr|
+            input
+                expr: expresión lineal de la relajación
+            return
+                expresión de la secante o None si expr no tiene cotas finitas
+        '''
+        lb, ub = compute_bounds_on_expr(expr)
+        if lb is not None and lb >= 0: return expr
+        if ub is not None and ub <= 0: return -expr
+        if lb is None or ub is None: return None
+        return -lb + (ub + lb)/(ub - lb)*(expr - lb)
+    def _add_abs_constraint(self, name, index, pos, rule, doc):
+        '''
+            Está función crea la relajación convexa de |A| - |B| <= error, A <= secante(B) + error y
+            -A <= secante(B) + error, las restricciones con B sin cotas finitas no restringen nada y no se agregan
+            input
+                name: nombre de la restricción, ej: c_BalanceP
+                index: nombre del Set de la restricción, ej: ij, bus
+                pos: diccionario etiqueta -> posición
+                rule: regla (model, k, t) que entrega la tupla (A, B)
+                doc: descripción de la restricción
+            return
+                None
+        '''
+        terms = {}
+        def get_terms(label, t):
+            if (label, t) not in terms:
+                a, b = rule(self.model, label if self.int_index else pos[label], t)
+                terms[label, t] = a, self._secant(b)
+            return terms[label, t]
+        def secant_rule(model, label, t, sign):
+            a, secant = get_terms(label, t)
+            if secant is None: return pyomo.Constraint.Skip
+            return sign*a <= secant + self.error
+        setattr(self.model, name, pyomo.Constraint(self._index_set(index), self.model.t, [1, -1], rule=secant_rule, doc=doc))
+        if self.print_sec: print(f'{name}: {sum(secant is not None for _, secant in terms.values())} de {len(terms)} restricciones con B acotado')
+        terms.clear()
+    def _product(self, k, t, name):
+        '''
+            Está función entrega el término de la rama k, W_i, WR o WI dividido por r o r**2 (V_Z) si la barra de
+            envío tiene trafo y sin dividir si no lo tiene
+            input
+                k: posición de la rama en ij
+                t: hora
+                name: w2, r1, i1, r2 o i2
+            return
+                expresión del término
+        '''
+        ij = self.ij_list[k]
+        if self.ij_trafo[k]: return self.model.V_Z[ij, t, name]
+        if name == 'w2': return self.model.V_W[self.bus_list[self.ij_from[k]], t]
+        return self.model.V_WR[ij, t] if name[0] == 'r' else self.model.V_WI[ij, t]
+    def _z_terms(self, ij, t, name):
+        '''
+            Está función entrega las dos variables del producto V_Z[ij, t, name]
+            input
+                ij: rama con trafo en la barra de envío
+                t: hora
+                name: w2, r1, i1, r2 o i2
+            return
+                Var, Var: W_i, WR o WI y rho1 o rho2
+        '''
+        bus = self.bus_list[self.ij_from[self.ij_pos[ij]]]
+        rho = self.model.V_Rho[bus, t, 'rho1' if name[1] == '1' else 'rho2']
+        return {'w': self.model.V_W[bus, t], 'r': self.model.V_WR[ij, t], 'i': self.model.V_WI[ij, t]}[name[0]], rho
+    def _add_relaxation_constraint(self):
+        '''
+            Está función crea las restricciones de la relajación, W_i >= V_i**2 y su secante, el cono rotado de cada
+            rama, rho2 >= rho1**2 y su secante y las envolventes de McCormick de V_Z
+            input
+                None
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega las restricciones de la relajación SOCP')
+        model, bounds_bus = self.model, self.system_param.get('bounds_bus')
+        def w_lower(model, bus, t):
+            return model.V_W[bus, t] >= model.V_Vbus[bus, t]**2
+        def w_upper(model, bus, t):
+            vl, vu = bounds_bus[bus, t]
+            return model.V_W[bus, t] <= (vl + vu)*model.V_Vbus[bus, t] - vl*vu
+        model.c_W_lower = pyomo.Constraint(model.bus, model.t, rule=w_lower, doc='W_i >= V_i**2')
+        model.c_W_upper = pyomo.Constraint(model.bus, model.t, rule=w_upper, doc='Secante de W_i = V_i**2')
+        def soc(model, k, t):
+            ij = self.ij_list[k]
+            return (model.V_WR[ij, t]**2 + model.V_WI[ij, t]**2
+                    <= model.V_W[self.bus_list[self.ij_from[k]], t] * model.V_W[self.bus_list[self.ij_to[k]], t])
+        model.c_SOC = pyomo.Constraint(self._index_set('ij'), model.t, rule=self._index_rule(soc, self.ij_pos),
+                                       doc='Cono rotado de la rama ijc')
+        rl, ru = 1/self.max_trafo, 1/self.min_trafo
+        model.c_Rho_lower = pyomo.Constraint(model.trafo, model.t,
+                rule=lambda model, bus, t: model.V_Rho[bus, t, 'rho2'] >= model.V_Rho[bus, t, 'rho1']**2)
+        model.c_Rho_upper = pyomo.Constraint(model.trafo, model.t,
+                rule=lambda model, bus, t: model.V_Rho[bus, t, 'rho2'] <= (rl + ru)*model.V_Rho[bus, t, 'rho1'] - rl*ru)
+        model.c_McCormick = pyomo.Constraint(model.ij_trafo, model.t, ['w2', 'r1', 'i1', 'r2', 'i2'], range(4),
+                rule=lambda model, ij, t, name, n: self._mccormick(model.V_Z[ij, t, name], *self._z_terms(ij, t, name), n),
+                doc='Envolventes de McCormick de V_Z')
+        model.c_McCormick_Y = pyomo.Constraint(model.bus_product, model.t, range(4),
+                rule=lambda model, bus, name, t, n: self._mccormick(model.V_Y[bus, name, t], *self._y_terms(bus, name, t), n),
+                doc='Envolventes de McCormick de V_Y')
+    def _add_power_p_constraint(self, g, b):
+        '''
+            Está función crea la restricción de potencia activa de las líneas con las variables W
+            input
+                g: conductance
+                b: susceptance
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega la restricción de potencia activa SOCP')
+        g_ij, b_ij = [g[ij] for ij in self.ij_list], [b[ij] for ij in self.ij_list]
+        g_ji, b_ji = [g[ji] for ji in self.ji_list], [b[ji] for ji in self.ji_list]
+        adj_line_pij, adj_line_pji = self.adjust_values.get('adj_line_pij'), self.adjust_values.get('adj_line_pji')
+        def line_constraint_ij(model, k, t):
+            return (
+                    g_ij[k] * self._product(k, t, 'w2')
+                    - (g_ij[k] * self._product(k, t, 'r1') + b_ij[k] * self._product(k, t, 'i1'))
+                    ==
+                    model.V_LinePij[self.ij_list[k], t] + adj_line_pij[self.ij_list[k], t]
+                )
+        def line_constraint_ji(model, k, t):
+            return (
+                    g_ji[k] * model.V_W[self.bus_list[self.ji_to[k]], t]
+                    - (g_ji[k] * self._product(k, t, 'r2') + b_ji[k] * self._product(k, t, 'i2'))
+                    ==
+                    model.V_LinePji[self.ji_list[k], t] + adj_line_pji[self.ji_list[k], t]
+                )
+        self.model.line_p_limit_ij = pyomo.Constraint(self._index_set('ij'), self.model.t,
+                                                      rule=self._index_rule(line_constraint_ij, self.ij_pos),
+                                                      doc='Active power limit on line ijc')
+        self.model.line_p_limit_ji = pyomo.Constraint(self._index_set('ji'), self.model.t,
+                                                      rule=self._index_rule(line_constraint_ji, self.ji_pos),
+                                                      doc='Active power limit on line jic')
+    def _add_power_q_constraint(self, g, b):
+        '''
+            Está función crea la restricción de potencia reactiva de las líneas con las variables W, en ieee39 e
+            ieee118 es |A| - |B| <= error y se relaja con _add_abs_constraint, en los demás es igualdad y las cotas
+            de V_LineQij y V_LineQji se toman de las cotas de la expresión de W para acotar los balances
+            input
+                g: conductance
+                b: susceptance
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega la restricción de potencia reactiva SOCP')
+        g_ij, b_ij = [g[ij] for ij in self.ij_list], [b[ij] for ij in self.ij_list]
+        g_ji, b_ji = [g[ji] for ji in self.ji_list], [b[ji] for ji in self.ji_list]
+        adj_line_qij, adj_line_qji = self.adjust_values.get('adj_line_qij'), self.adjust_values.get('adj_line_qji')
+        def flow_ij(k, t):
+            return (- b_ij[k] * self._product(k, t, 'w2')
+                    - (g_ij[k] * self._product(k, t, 'i2') - b_ij[k] * self._product(k, t, 'r2')))
+        def flow_ji(k, t):
+            return (- b_ji[k] * self.model.V_W[self.bus_list[self.ji_to[k]], t]
+                    - (g_ji[k] * self._product(k, t, 'i2') - b_ji[k] * self._product(k, t, 'r2')))
+        for name, labels, flow, var, adj, pos in [
+                ('line_q_limit_ij', self.ij_list, flow_ij, self.model.V_LineQij, adj_line_qij, self.ij_pos),
+                ('line_q_limit_ji', self.ji_list, flow_ji, self.model.V_LineQji, adj_line_qji, self.ji_pos)]:
+            doc = f'Reactive power limit on line {name[-2:]}c'
+            if self.system_param.get('system_name') in ['ieee39','ieee118']:
+                def abs_rule(model, k, t, labels=labels, flow=flow, var=var, adj=adj):
+                    return flow(k, t), var[labels[k], t] + adj[labels[k], t]
+                self._add_abs_constraint(name, name[-2:], pos, abs_rule, doc)
+                continue
+            for k, label in enumerate(labels):
+                for t in self.model.t:
+                    lb, ub = compute_bounds_on_expr(flow(k, t))
+                    var[label, t].setlb(None if lb is None else lb - adj[label, t])
+                    var[label, t].setub(None if ub is None else ub - adj[label, t])
+            def line_constraint(model, k, t, labels=labels, flow=flow, var=var, adj=adj):
+                return flow(k, t) == var[labels[k], t] + adj[labels[k], t]
+            setattr(self.model, name, pyomo.Constraint(self._index_set(name[-2:]), self.model.t,
+                                                       rule=self._index_rule(line_constraint, pos), doc=doc))
+    def _add_p_balanced_constraint(self, genstatus, demandbidmap):
+        '''
+            Está función crea la relajación del balance de potencia activa, V**2 * V_Gs se cambia por V_Y[bus, 'gs']
+            input
+                genstatus: estado de los generadores del sistema
+                demandbidmap: id de la demanda y bus en el que se conecta
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega la restricción de balance de potencia activa SOCP')
+        self.genstatus, self.demandbidmap = genstatus, demandbidmap
+        gen_at, slack_at, demandbid_at = self._adjacent('gen'), self._adjacent('slack'), self._adjacent('demandbid')
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        Pd, adj_p_balance = self.system_values.get('Pd'), self.adjust_values.get('adj_p_balance')
+        def balance_eqn_rule(model, k, t):
+            bus = self.bus_list[k]
+            return (
+                        sum(model.V_Pgen[gen, t] for gen in gen_at[k] if genstatus.get((gen,bus)))
+                        + sum(model.V_Pslack[gen, t] for gen in slack_at[k])
+                        - (Pd[bus,t] if (bus,t) in Pd else 0)
+                        - sum(model.V_Pd_elastic[demandbid,bus] for demandbid in demandbid_at[k] if demandbidmap.get((demandbid,bus))),
+                        sum(model.V_LinePij[self.ij_list[c], t] for c in ij_at[k])
+                        + sum(model.V_LinePji[self.ji_list[c], t] for c in ji_at[k])
+                        + model.V_Y[bus, 'gs', t]
+                        + adj_p_balance[bus,t]
+                )
+        self._add_abs_constraint('c_BalanceP', 'bus', self.bus_pos, balance_eqn_rule, 'Active power balance')
+    def _add_q_balanced_constraint(self, genstatus, demandbidmap):
+        '''
+            Está función crea la relajación del balance de potencia reactiva, V**2 se cambia por V_W y
+            V**2 * V_Shunt por V_Y[bus, 'sh']
+            input
+                genstatus: estado de los generadores del sistema
+            return
+                None
+        '''
+        if self.print_sec: print('Se agrega la restricción de balance de potencia reactiva SOCP')
+        gen_at, slack_at = self._adjacent('gen'), self._adjacent('slack')
+        ij_at, ji_at = self._adjacent('ij', self.ij_pos), self._adjacent('ji', self.ji_pos)
+        Qd, adj_q_balance = self.system_values.get('Qd'), self.adjust_values.get('adj_q_balance')
+        bus_shunt = self.system_param.get('bus_shunt')
+        def balance_eqn_rule(model, k, t):
+            bus = self.bus_list[k]
+            return (
+                        sum(model.V_Qgen[gen, t] for gen in gen_at[k] if genstatus.get((gen,bus)))
+                        + sum(model.V_Qslack[gen, t] for gen in slack_at[k])
+                        - (Qd[bus,t] if (bus,t) in Qd else 0),
+                        sum(model.V_LineQij[self.ij_list[c], t] for c in ij_at[k])
+                        + sum(model.V_LineQji[self.ji_list[c], t] for c in ji_at[k])
+                        - model.V_W[bus, t]
+                        - (model.V_Y[bus, 'sh', t]/self.max_shunt if bus_shunt.get(bus) else 0)
+                        + adj_q_balance[bus,t]
+            )
+        self._add_abs_constraint('c_BalanceQ', 'bus', self.bus_pos, balance_eqn_rule, 'Reactive power balance')
+    def _lift_from(self, model):
+        '''
+            Está función inicializa la relajación desde un punto del modelo AC (W = V**2, WR = V_i*V_j*cos, rho = 1/r),
+            si el punto es factible en el modelo AC también lo es en la relajación
+            input
+                model: objeto con el modelo AC en model.model
+            return
+                None
+        '''
+        ac = model.model
+        for name in ['V_LinePij', 'V_LinePji', 'V_LineQij', 'V_LineQji', 'V_Vbus', 'V_Pgen', 'V_Qgen',
+                     'V_Pslack', 'V_Qslack', 'V_Shunt', 'V_Gs', 'V_Pd_elastic']:
+            for key, var in getattr(self.model, name).items():
+                if key in getattr(ac, name) and getattr(ac, name)[key].value is not None:
+                    var.set_value(getattr(ac, name)[key].value, skip_validation=True)
+        for (bus, t), var in self.model.V_W.items():
+            var.set_value(ac.V_Vbus[bus, t].value**2, skip_validation=True)
+        for k, ij in enumerate(self.ij_list):
+            i, j = self.bus_list[self.ij_from[k]], self.bus_list[self.ij_to[k]]
+            for t in self.model.t:
+                vv = ac.V_Vbus[i, t].value * ac.V_Vbus[j, t].value
+                angle = ac.V_Theta[i, t].value - ac.V_Theta[j, t].value
+                self.model.V_WR[ij, t].set_value(vv*pyomo.value(pyomo.cos(angle)), skip_validation=True)
+                self.model.V_WI[ij, t].set_value(vv*pyomo.value(pyomo.sin(angle)), skip_validation=True)
+        for (bus, t, rho), var in self.model.V_Rho.items():
+            r = ac.V_Rtrafo[bus, t].value if (bus, t) in ac.V_Rtrafo else self.m_trafo
+            var.set_value(1/r**(1 if rho == 'rho1' else 2), skip_validation=True)
+        for (ij, t, name), var in self.model.V_Z.items():
+            x, y = self._z_terms(ij, t, name)
+            var.set_value(x.value*y.value, skip_validation=True)
+        for (bus, name, t), var in self.model.V_Y.items():
+            x, y = self._y_terms(bus, name, t)
+            var.set_value(x.value*y.value, skip_validation=True)
+    def solve_model(self, persistent=False, backend='ipopt', profile='tight_final'):
+        '''
+            Está función resuelve la relajación, es continua y convexa, cualquier solver NLP local entrega el óptimo global
+            input
+                persistent: si es True se resuelve con una SolverSession
+                backend: backend de solver_backends, ej: ipopt, bonmin_oa, scipy
+                profile: perfil de opciones del backend
+            return
+                bool: True si el solver terminó bien
+        '''
+        is_solve = super().solve_model(persistent, backend, profile)
+        self.lower_bound = pyomo.value(self.model.obj) if is_solve else None
+        return is_solve
+    def warm_start(self, model, bound=False):
+        '''
+            Está función pasa la solución de la relajación como punto inicial del modelo AC, voltajes, flujos,
+            generadores, shunts y taps redondeados (r = 1/rho1), con bound agrega la cota inferior obj >= lower_bound
+            input
+                model: objeto con el modelo AC en model.model
+                bound: si es True se agrega la restricción c_obj_bound al modelo AC
+            return
+                None
+        '''
+        ac = model.model
+        for name in ['V_LinePij', 'V_LinePji', 'V_LineQij', 'V_LineQji', 'V_Vbus', 'V_Pgen', 'V_Qgen', 'V_Pslack', 'V_Qslack',
+                     'V_Gs', 'V_Pd_elastic']:
+            for key, var in getattr(self.model, name).items():
+                if key in getattr(ac, name) and var.value is not None:
+                    getattr(ac, name)[key].set_value(var.value, skip_validation=True)
+        for key, var in self.model.V_Shunt.items():
+            if key in ac.V_Shunt: ac.V_Shunt[key].set_value(min(max(round(var.value), -self.max_shunt), self.max_shunt))
+        for (bus, t), var in ac.V_Rtrafo.items():
+            r = 1/self.model.V_Rho[bus, t, 'rho1'].value
+            var.set_value(min(max(round(r), self.min_trafo), self.max_trafo))
+        if bound and self.lower_bound is not None:
+            if hasattr(ac, 'c_obj_bound'): ac.del_component(ac.c_obj_bound)
+            ac.c_obj_bound = pyomo.Constraint(expr=ac.obj.expr >= self.lower_bound, doc='Cota inferior de la relajación SOCP')
+        if self.print_sec: print(f'Se inicializa el modelo AC con la relajación SOCP - cota inferior {self.lower_bound}')
+    def gap_report(self, model):
+        '''
+            Está función calcula la brecha de optimalidad entre el objetivo del modelo AC resuelto (cota superior)
+            y el de la relajación (cota inferior)
+            input
+                model: objeto con el modelo AC resuelto en model.model
+            return
+                dict: lower_bound, upper_bound, gap y relative_gap
+        '''
+        upper_bound = pyomo.value(model.model.obj)
+        self.gap = {
+            'system': self.system_param.get('system_name'),
+            'lower_bound': self.lower_bound,
+            'upper_bound': upper_bound,
+            'gap': upper_bound - self.lower_bound,
+            'relative_gap': (upper_bound - self.lower_bound)/max(abs(upper_bound), 1e-10),
+        }
+        if self.print_sec: print('Brecha de optimalidad: {gap:.6g} ({relative_gap:.3%})'.format(**self.gap))
+        return self.gap
+    def save_model_variables(self):
+        '''
+            Está función guarda los datos de la relajación con el mismo formato de CreateModel en Resultados/{sistema}_socp
+            input
+                None
+            return
+                None
+        '''
+        folder = f'{self.system_param.get("system_name")}_socp'
+        os.makedirs(f'Resultados/{folder}', exist_ok=True)
+        super().save_model_variables(folder)
+        if self.gap is not None:
+            DataFrame(list(self.gap.items()), columns=['Key','Value']).to_csv(f'Resultados/{folder}/Gap__res.csv', index=False)
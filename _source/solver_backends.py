@@ -0,0 +1,207 @@
+import os
+import json
+import importlib
+import time
+import shutil
+import pyomo.environ as pyomo
+
+# backends disponibles, family elige los perfiles de opciones
+SOLVER_BACKENDS = {
+    'bonmin_oa': {'solver': 'bonmin', 'family': 'bonmin', 'options': {'output_file': 'bonmin.log', 'bonmin.algorithm': 'B-OA'}},
+    'bonmin_bb': {'solver': 'bonmin', 'family': 'bonmin', 'options': {'output_file': 'bonmin.log', 'bonmin.algorithm': 'B-BB'}},
+    'bonmin_hyb': {'solver': 'bonmin', 'family': 'bonmin', 'options': {'output_file': 'bonmin.log', 'bonmin.algorithm': 'B-Hyb'}},
+    'ipopt': {'solver': 'ipopt', 'family': 'ipopt', 'options': {'output_file': 'ipopt.log'}},
+    'couenne': {'solver': 'couenne', 'family': 'couenne', 'options': {}},
+    'scipy': {'solver': 'scipy', 'family': 'scipy', 'options': {}},
+    'highs': {'solver': 'highs', 'family': 'highs', 'options': {}},
+    'slp': {'solver': 'slp', 'family': 'slp', 'options': {}},
+    'native': {'solver': 'native', 'family': 'native', 'options': {}},
+}
+
+# solvers que corren dentro de python (módulo, clase), no usan archivo NL ni SolverSession
+PYTHON_SOLVERS = {
+    'scipy': ('_source.scipy_solver', 'ScipySolver'),
+    'highs': ('_source.linear_solver', 'LinearSolver'),
+    'slp': ('_source.slp_solver', 'SLPSolver'),
+    'native': ('_source.nlp_evaluator', 'NativeSolver'),
+}
+
+# solvers de PYTHON_SOLVERS que reciben el modelo de CreateModel en lugar del ConcreteModel
+OWNER_SOLVERS = ['native']
+
+# perfiles de opciones por familia, tight_final para la solución final y fast_screening para descartar casos rápido
+SOLVER_PROFILES = {
+    'bonmin': {
+        'tight_final': {'max_iter': 1000, 'bonmin.integer_tolerance': 1e-8,
+                        'bonmin.allowable_fraction_gap': 1e-8, 'bonmin.allowable_gap': 1e-8},
+        'fast_screening': {'max_iter': 1000, 'bonmin.integer_tolerance': 1e-5,
+                           'bonmin.allowable_fraction_gap': 1e-5, 'bonmin.allowable_gap': 1e-5},
+    },
+    'ipopt': {
+        'tight_final': {'max_iter': 1000, 'tol': 1e-8},
+        'fast_screening': {'max_iter': 200, 'tol': 1e-5, 'acceptable_tol': 1e-3},
+    },
+    'couenne': {
+        'tight_final': {'allowable_gap': 1e-8, 'allowable_fraction_gap': 1e-8},
+        'fast_screening': {'allowable_gap': 1e-5, 'allowable_fraction_gap': 1e-5},
+    },
+    'scipy': {
+        'tight_final': {'method': 'trust-constr', 'maxiter': 1000, 'gtol': 1e-8, 'xtol': 1e-8},
+        'fast_screening': {'method': 'trust-constr', 'maxiter': 200, 'gtol': 1e-5, 'xtol': 1e-5},
+    },
+    'highs': {
+        'tight_final': {'mip_rel_gap': 1e-8},
+        'fast_screening': {'mip_rel_gap': 1e-4, 'time_limit': 60},
+    },
+    'slp': {
+        'tight_final': {'max_iter': 100, 'tol': 1e-8, 'feas_tol': 1e-6},
+        'fast_screening': {'max_iter': 20, 'tol': 1e-5, 'feas_tol': 1e-4, 'mip_rel_gap': 1e-4},
+    },
+    'native': {
+        'tight_final': {'max_iter': 1000, 'tol': 1e-8},
+        'fast_screening': {'max_iter': 200, 'tol': 1e-5},
+    },
+}
+
+# carpeta de los perfiles ajustados por SolverTuner, uno por sistema y backend
+PROFILE_DIR = 'profiles'
+
+def tuned_profile_path(system_name, backend):
+    return os.path.join(PROFILE_DIR, f'{system_name}_{backend}.json')
+
+def save_tuned_profile(system_name, backend, options, info=None):
+    '''
+        Está función guarda las opciones ganadoras del ajuste del solver para un sistema y backend
+        input
+            system_name: nombre del sistema, ej: ieee9
+            backend: nombre del backend del registro
+            options: opciones ganadoras
+            info: datos del ajuste (tiempo, objetivo, búsqueda)
+        return
+            str: ruta del archivo
+    '''
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = tuned_profile_path(system_name, backend)
+    with open(path, 'w') as f:
+        json.dump({'system': system_name, 'backend': backend, 'options': options, 'info': info or {}}, f, indent=2, default=str)
+    return path
+
+def load_tuned_profile(system_name, backend):
+    '''
+        Está función carga las opciones ajustadas de un sistema y backend
+        input
+            system_name: nombre del sistema, ej: ieee9
+            backend: nombre del backend del registro
+        return
+            dict: opciones del perfil ajustado
+    '''
+    path = tuned_profile_path(system_name, backend)
+    if not os.path.exists(path):
+        raise ValueError(f'No existe el perfil ajustado {path}, se debe correr tune_solver.py')
+    with open(path) as f:
+        return json.load(f)['options']
+
+def register_backend(name, solver, family=None, options=None, profiles=None):
+    '''
+        Está función agrega un backend al registro, sirve para cualquier solver AMPL instalado localmente
+        input
+            name: nombre del backend
+            solver: ejecutable del solver, se busca en solver/ y en el PATH
+            family: familia de perfiles, por defecto el nombre del backend
+            options: opciones fijas del backend
+            profiles: diccionario perfil -> opciones de la familia
+        return
+            None
+    '''
+    family = family or name
+    SOLVER_BACKENDS[name] = {'solver': solver, 'family': family, 'options': dict(options or {})}
+    if profiles: SOLVER_PROFILES.setdefault(family, {}).update(profiles)
+
+def find_executable(solver):
+    '''
+        Está función busca el ejecutable del solver, primero en la carpeta solver/ del repositorio y luego en el PATH
+        input
+            solver: nombre o ruta del solver
+        return
+            str: ruta del ejecutable
+    '''
+    local = os.path.join('solver', os.path.basename(solver))
+    if os.path.exists(local): return local
+    return shutil.which(solver) or local
+
+class SolverBackend(object):
+    '''
+        Class encargada de resolver el modelo con el backend y el perfil de opciones elegidos y de guardar
+        el backend y los tiempos con los resultados
+    '''
+    def __init__(self, name='bonmin_oa', profile='tight_final', options=None, system_name=None, print_sec=False):
+        '''
+            Está función instancia la clase SolverBackend
+            input
+                name: nombre del backend del registro, si no está registrado se usa como ejecutable AMPL
+                profile: perfil de opciones, ej: tight_final, fast_screening, tuned (perfil de SolverTuner)
+                options: opciones que reemplazan las del perfil
+                system_name: nombre del sistema, necesario para el perfil tuned
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo SolverBackend
+        '''
+        backend = SOLVER_BACKENDS.get(name, {'solver': name, 'family': name, 'options': {}})
+        profiles = SOLVER_PROFILES.get(backend['family'], {})
+        if profile == 'tuned':
+            profiles = {profile: load_tuned_profile(system_name, name)}
+        if profiles and profile not in profiles:
+            raise ValueError(f'El perfil {profile} no existe para {name}, perfiles: {list(profiles)}')
+        self.name = name
+        self.family = backend['family']
+        self.profile = profile
+        self.print_sec = print_sec
+        self.solver = backend['solver'] if backend['solver'] in PYTHON_SOLVERS else find_executable(backend['solver'])
+        self.options = dict(backend['options'])
+        self.options.update(profiles.get(profile, {}))
+        self.options.update(options or {})
+    def solve(self, model, session=None, owner=None):
+        '''
+            Está función resuelve el modelo, con session usa la SolverSession (archivo NL persistente)
+            input
+                model: modelo de pyomo (ConcreteModel)
+                session: SolverSession del modelo o None
+                owner: modelo de CreateModel dueño del ConcreteModel, necesario para los OWNER_SOLVERS
+            return
+                bool: True si el solver terminó bien
+                dict: backend, perfil, solver, opciones, tiempos de la solución, enteras redondeadas (scipy) y método (native)
+        '''
+        if self.print_sec: print(f'Se resuelve con el backend {self.name} - perfil {self.profile}')
+        t0 = time.perf_counter()
+        if self.solver in PYTHON_SOLVERS:
+            module, name = PYTHON_SOLVERS[self.solver]
+            if self.solver in OWNER_SOLVERS:
+                if owner is None: raise ValueError(f'El backend {self.name} necesita el modelo de CreateModel (owner)')
+                model = owner
+            solver = getattr(importlib.import_module(module), name)(model, self.options, print_sec=self.print_sec)
+            is_solve, timing = solver.solve(), solver.timing
+        elif session is not None:
+            session.options = self.options
+            is_solve, timing = session.solve(), session.timing
+        else:
+            solver = pyomo.SolverFactory(self.solver, tee=True)
+            for key, value in self.options.items():
+                solver.options[key] = value
+            result = solver.solve(model)
+            result.write()
+            is_solve, timing = result.solver.status.value=='ok', {}
+        info = {
+            'backend': self.name,
+            'profile': self.profile,
+            'solver': self.solver,
+            'options': self.options,
+            'status': is_solve,
+            'write': timing.get('write'),
+            'solve': timing.get('solve'),
+            'load': timing.get('load'),
+            'iterations': timing.get('iterations'),
+            'rounded': timing.get('rounded'),
+            'method': timing.get('method'),
+            'total': time.perf_counter() - t0,
+        }
+        return is_solve, info
@@ -0,0 +1,363 @@
+import os
+import re
+import time
+import shutil
+import subprocess
+import pyomo.environ as pyomo
+from pyomo.opt import ReaderFactory, ResultsFormat, WriterFactory
+from pyomo.common import Executable
+from pyomo.common.collections import ComponentMap
+from pyomo.common.timing import HierarchicalTimer
+from pyomo.core.expr.visitor import replace_expressions, identify_mutable_parameters
+
+class SolverSession(object):
+    '''
+        Class encargada de resolver varias veces el mismo modelo sin volver a compilarlo, el backend 'nl' escribe el
+        archivo NL una sola vez y entre soluciones reescribe solo los segmentos de bounds (b) e inicialización (x),
+        los Params mutables y las variables fijas se escriben como columnas con lb = ub = valor, así sus cambios
+        también van en esos segmentos. El archivo se vuelve a escribir completo solo si cambian las restricciones
+        u objetivos activos o los Suffix que se exportan. El backend 'appsi' usa el writer persistente de Pyomo
+        (solo ipopt, modelos continuos)
+    '''
+    def __init__(self, model, solver='solver/bonmin', options=None, backend='auto', work_dir='.', name='session', tee=True, timeout=None, print_sec=False):
+        '''
+            Está función instancia la clase SolverSession
+            input
+                model: modelo de pyomo (ConcreteModel)
+                solver: ejecutable del solver AMPL, ej: solver/bonmin, ipopt
+                options: diccionario de opciones del solver
+                backend: 'nl', 'appsi' o 'auto' (appsi si el solver es ipopt, el modelo es continuo y appsi está disponible)
+                work_dir: carpeta donde se guardan los archivos .nl y .sol, el solver corre en ella y sus registros
+                          (output_file, OsiDefaultName_*) no chocan con los de otras sesiones
+                name: nombre de los archivos de la sesión
+                tee: si es True se muestra la salida del solver
+                timeout: tiempo máximo en segundos del proceso del solver, None sin límite
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo SolverSession
+        '''
+        self.model = model
+        self.solver = solver
+        self.options = dict(options or {})
+        self.tee = tee
+        self.timeout = timeout
+        self.print_sec = print_sec
+        self.executable = os.path.abspath(shutil.which(solver) or solver)
+        self.work_dir = work_dir
+        self.nl_file = os.path.join(work_dir, f'{name}.nl')
+        self.sol_file = os.path.join(work_dir, f'{name}.sol')
+        self.smap_id = None
+        self.image = None
+        self.state = None
+        self.results = None
+        self.timing = {}
+        self.history = []
+        self.backend = self._get_backend(backend)
+    def _get_backend(self, backend):
+        '''
+            Está función elige el backend de la sesión, appsi solo resuelve modelos continuos con ipopt
+            input
+                backend: 'nl', 'appsi' o 'auto'
+            return
+                str: 'nl' o 'appsi'
+        '''
+        if backend == 'nl': return 'nl'
+        continuous = all(var.is_continuous() for var in self.model.component_data_objects(pyomo.Var))
+        if os.path.basename(self.solver) == 'ipopt' and continuous:
+            from pyomo.contrib.appsi.solvers import Ipopt
+            self.appsi = Ipopt()
+            self.appsi.config.executable = Executable(self.executable)
+            self.appsi.config.filename = os.path.splitext(self.nl_file)[0]
+            self.appsi.config.load_solution = False
+            self.appsi.config.stream_solver = self.tee
+            if self.appsi.available(): return 'appsi'
+        if backend == 'appsi':
+            raise RuntimeError(f'El backend appsi no está disponible para {self.solver} con este modelo')
+        return 'nl'
+    def _state(self):
+        '''
+            Está función entrega lo que obliga a reescribir el archivo NL completo, las restricciones y objetivos
+            activos, los Suffix que se exportan (multiplicadores del arranque en caliente, van en la cabecera del
+            archivo) y el dominio entero o continuo de las variables (cambia la cabecera y el orden de las columnas),
+            los Params mutables y las variables fijas son columnas y no cambian el archivo completo
+            input
+                None
+            return
+                tuple: estado del modelo
+        '''
+        return (
+            tuple(con.active for con in self.model.component_data_objects(pyomo.Constraint)),
+            tuple(obj.active for obj in self.model.component_data_objects(pyomo.Objective)),
+            tuple(var.is_continuous() for var in self.model.component_data_objects(pyomo.Var)),
+            tuple((suffix.name, tuple(suffix.values()))
+                  for suffix in self.model.component_objects(pyomo.Suffix) if suffix.export_enabled()),
+        )
+    def _build_image(self):
+        '''
+            Está función arma el modelo que se escribe en el archivo NL, si las restricciones u objetivos activos
+            tienen Params mutables es un modelo con las mismas restricciones y objetivos en el que cada Param es
+            una columna de V_Param, si no los tiene es el mismo modelo. Los Suffix que se importan o exportan se
+            copian en el modelo escrito
+            input
+                None
+            return
+                None
+        '''
+        constraints = list(self.model.component_data_objects(pyomo.Constraint, active=True))
+        objectives = list(self.model.component_data_objects(pyomo.Objective, active=True))
+        params = ComponentMap()
+        for component in constraints + objectives:
+            for param in identify_mutable_parameters(component.expr): params[param] = None
+        self.params = list(params)
+        self.to_model = ComponentMap()
+        if not self.params:
+            self.image = self.model
+            return
+        image = pyomo.ConcreteModel(name=self.model.name)
+        image.V_Param = pyomo.Var(range(len(self.params)), doc='Params mutables del modelo')
+        substitute = dict((id(param), image.V_Param[k]) for k, param in enumerate(self.params))
+        image.c = pyomo.Constraint(range(len(constraints)),
+                                   rule=lambda image, k: replace_expressions(constraints[k].expr, substitute))
+        image.obj = pyomo.Objective(range(len(objectives)),
+                                    rule=lambda image, k: replace_expressions(objectives[k].expr, substitute),
+                                    sense=lambda image, k: objectives[k].sense)
+        for k, con in enumerate(constraints): self.to_model[image.c[k]] = con
+        for k, obj in enumerate(objectives): self.to_model[image.obj[k]] = obj
+        for var in image.V_Param.values(): self.to_model[var] = None
+        to_image = ComponentMap((component, key) for key, component in self.to_model.items() if component is not None)
+        for suffix in self.model.component_objects(pyomo.Suffix):
+            if not (suffix.import_enabled() or suffix.export_enabled()): continue
+            copy = pyomo.Suffix(direction=suffix.direction, datatype=suffix.datatype)
+            image.add_component(suffix.local_name, copy)
+            for key, value in suffix.items():
+                copy[to_image.get(key, key)] = value
+        self.image = image
+    def _sync_params(self):
+        '''
+            Está función deja cada columna de V_Param con lb = ub = valor del Param mutable
+            input
+                None
+            return
+                None
+        '''
+        if self.image is self.model: return
+        for var, param in zip(self.image.V_Param.values(), self.params):
+            value = param.value
+            var.setlb(value)
+            var.setub(value)
+            var.set_value(value, skip_validation=True)
+    def _x_segment(self):
+        '''
+            Está función arma el segmento x (inicialización de las variables) del archivo NL
+            input
+                None
+            return
+                str: segmento x
+        '''
+        init = [(k, var.value if var.value.__class__ in (int, float) else float(var.value))
+                for k, var in enumerate(self.columns) if var.value is not None]
+        return f'x{len(init)}\n' + ''.join(f'{k} {value!s}\n' for k, value in init)
+    def _b_segment(self):
+        '''
+            Está función arma el segmento b (bounds de las variables) del archivo NL
+            input
+                None
+            return
+                str: segmento b
+        '''
+        lines = ['b\n']
+        for var in self.columns:
+            lb, ub = (var.value, var.value) if var.fixed else var.bounds
+            if lb == ub:
+                lines.append('3\n' if lb is None else f'4 {lb!s}\n')
+            elif lb is None:
+                lines.append(f'1 {ub!s}\n')
+            elif ub is None:
+                lines.append(f'2 {lb!s}\n')
+            else:
+                lines.append(f'0 {lb!s} {ub!s}\n')
+        return ''.join(lines)
+    def _io_options(self):
+        '''
+            Está función entrega las opciones del writer NL v2, desde Pyomo 6.6 hace presolve lineal y con él el
+            orden de las columnas depende de los bounds, por eso se apaga, en Pyomo 6.4.4 (requirements.txt) el
+            writer no tiene presolve y no acepta la opción
+            input
+                None
+            return
+                dict: io_options del writer NL
+        '''
+        io_options = {'symbolic_solver_labels': False}
+        if 'linear_presolve' in WriterFactory.get_class('nl_v2').CONFIG: io_options['linear_presolve'] = False
+        return io_options
+    def _write_full(self):
+        '''
+            Está función escribe el archivo NL completo y guarda sus segmentos, las columnas se toman del
+            symbol map (v0, v1, ...) en el orden del archivo. Las variables fijas se sueltan mientras se escribe
+            para que queden como columnas, su valor va en el segmento b
+            input
+                None
+            return
+                None
+        '''
+        if self.smap_id is not None: self.image.solutions.delete_symbol_map(self.smap_id)
+        self._build_image()
+        self._sync_params()
+        fixed = [var for var in self.model.component_data_objects(pyomo.Var) if var.fixed]
+        for var in fixed: var.unfix()
+        try:
+            # el writer v2 se llama directo, image.write() avisa que la extensión .nl no es del formato nl_v2
+            _, symbol_map = WriterFactory('nl_v2')(self.image, self.nl_file, lambda x: True, self._io_options())
+            self.image.solutions.add_symbol_map(symbol_map)
+            self.smap_id = id(symbol_map)
+        finally:
+            for var in fixed: var.fix()
+        self.columns = [symbol_map.getObject(f'v{k}') for k in range(sum(1 for symbol in symbol_map.bySymbol if symbol[0] == 'v'))]
+        with open(self.nl_file) as f:
+            text = f.read()
+        x = re.compile(r'^x\d+\n', re.M).search(text).start()
+        r = text.index('\nr\n', x) + 1
+        b = text.index('\nb\n', r) + 1
+        k = re.compile(r'^k\d+\n', re.M).search(text, b).start()
+        self.head_size = len(text[:x].encode())
+        self.segments = {'x': text[x:r], 'r': text[r:b], 'b': text[b:k], 'tail': text[k:]}
+    def _write_segments(self):
+        '''
+            Está función reescribe en el archivo NL solo los segmentos x y b si cambiaron, el resto del
+            archivo (restricciones y objetivo) no se toca
+            input
+                None
+            return
+                str: segmentos reescritos, ej: 'x+b' o 'none'
+        '''
+        changed = []
+        for name, segment in [('x', self._x_segment()), ('b', self._b_segment())]:
+            if segment != self.segments[name]:
+                self.segments[name] = segment
+                changed.append(name)
+        if changed:
+            with open(self.nl_file, 'r+b') as f:
+                f.seek(self.head_size)
+                f.write(''.join(self.segments[name] for name in ['x', 'r', 'b', 'tail']).encode())
+                f.truncate()
+        return '+'.join(changed) or 'none'
+    def _run_solver(self):
+        '''
+            Está función corre el solver AMPL sobre el archivo NL de la sesión
+            input
+                None
+            return
+                None
+        '''
+        if os.path.exists(self.sol_file): os.remove(self.sol_file)
+        options = [f'{key}={value}' for key, value in self.options.items()]
+        env = dict(os.environ)
+        env[f'{os.path.basename(self.solver)}_options'] = ' '.join(options)
+        try:
+            subprocess.run([self.executable, os.path.abspath(self.nl_file), '-AMPL'] + options, env=env, timeout=self.timeout, cwd=self.work_dir,
+                           stdout=None if self.tee else subprocess.DEVNULL,
+                           stderr=None if self.tee else subprocess.STDOUT)
+        except subprocess.TimeoutExpired:
+            # sin archivo .sol la solución se reporta como no resuelta
+            if os.path.exists(self.sol_file): os.remove(self.sol_file)
+    def _load_solution(self):
+        '''
+            Está función lee el archivo .sol y carga la solución en las variables del modelo
+            input
+                None
+            return
+                bool: True si el solver terminó bien
+        '''
+        if not os.path.exists(self.sol_file): return False
+        suffixes = [suffix.local_name for suffix in self.image.component_objects(pyomo.Suffix) if suffix.import_enabled()]
+        with ReaderFactory(ResultsFormat.sol) as reader:
+            self.results = reader(self.sol_file, suffixes=suffixes)
+        self.results._smap_id = self.smap_id
+        self.image.solutions.load_from(self.results, delete_symbol_map=False)
+        if self.image is not self.model:
+            # los Suffix importados (multiplicadores) se pasan a las restricciones y variables del modelo
+            for suffix in self.image.component_objects(pyomo.Suffix):
+                if not suffix.import_enabled(): continue
+                target = self.model.component(suffix.local_name)
+                for key, value in suffix.items():
+                    key = self.to_model.get(key, key)
+                    if key is not None: target[key] = value
+        return self.results.solver.status.value == 'ok'
+    def _solve_appsi(self):
+        '''
+            Está función resuelve con el writer persistente de appsi, solo se actualizan los Params y bounds que cambian
+            input
+                None
+            return
+                bool: True si el solver encontró el óptimo
+        '''
+        from pyomo.contrib.appsi.base import TerminationCondition
+        # las opciones se cambian en la sesión entre soluciones (solver_backends), se pasan en cada solución
+        self.appsi.ipopt_options = dict(self.options)
+        self.appsi.config.time_limit = self.timeout
+        timer = HierarchicalTimer()
+        self.results = self.appsi.solve(self.model, timer=timer)
+        t0 = time.perf_counter()
+        is_solve = self.results.termination_condition == TerminationCondition.optimal
+        if is_solve: self.results.solution_loader.load_vars()
+        def total(name): return timer.get_total_time(name) if name in timer.timers else 0.0
+        self.timing = {
+            'write': total('write nl file'),
+            'solve': total('subprocess'),
+            'load': total('parse solution') + time.perf_counter() - t0,
+            'rewrite': 'appsi',
+        }
+        return is_solve
+    def _write(self):
+        '''
+            Está función deja el archivo NL al día con el modelo, lo escribe completo si cambió el estado y si no
+            reescribe solo los segmentos x y b
+            input
+                None
+            return
+                str: 'full' o los segmentos reescritos, ej: 'x+b' o 'none'
+        '''
+        state = self._state()
+        if state != self.state:
+            self._write_full()
+            self.state = state
+            # las variables fijas y los Params quedan fijados en el segmento b
+            self._write_segments()
+            return 'full'
+        self._sync_params()
+        return self._write_segments()
+    def prepare(self):
+        '''
+            Está función deja escrito el archivo NL del modelo antes de la primera solución, así el tiempo de
+            escritura completa no entra en la primera solución
+            input
+                None
+            return
+                str: 'full' o los segmentos reescritos, ej: 'x+b' o 'none', 'appsi' si el backend es appsi
+        '''
+        if self.backend == 'appsi': return 'appsi'
+        return self._write()
+    def solve(self):
+        '''
+            Está función resuelve el modelo y guarda los tiempos de escritura, solución y carga en self.timing
+            y en self.history
+            input
+                None
+            return
+                bool: True si el solver terminó bien
+        '''
+        if self.backend == 'appsi':
+            is_solve = self._solve_appsi()
+        else:
+            t0 = time.perf_counter()
+            rewrite = self._write()
+            t1 = time.perf_counter()
+            self._run_solver()
+            t2 = time.perf_counter()
+            is_solve = self._load_solution()
+            t3 = time.perf_counter()
+            self.timing = {'write': t1-t0, 'solve': t2-t1, 'load': t3-t2, 'rewrite': rewrite}
+        self.history.append(self.timing)
+        if self.print_sec:
+            print('Tiempos de la sesión: write {write:.3f}s - solve {solve:.3f}s - load {load:.3f}s ({rewrite})'.format(**self.timing))
+        return is_solve
@@ -0,0 +1,218 @@
+import os
+import random
+import itertools
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from concurrent.futures import ProcessPoolExecutor
+from _source.model import build_model
+from _source.solver_session import SolverSession
+from _source.solver_backends import SOLVER_BACKENDS, SOLVER_PROFILES, PYTHON_SOLVERS, SolverBackend, find_executable, save_tuned_profile
+
+# espacio de búsqueda por familia, cada opción con los valores a probar
+SEARCH_SPACE = {
+    'bonmin': {
+        'bonmin.algorithm': ['B-OA', 'B-BB', 'B-Hyb'],
+        'bonmin.integer_tolerance': [1e-8, 1e-6, 1e-5],
+        'bonmin.allowable_fraction_gap': [1e-8, 1e-5, 1e-3],
+        'mu_strategy': ['monotone', 'adaptive'],
+        'max_iter': [500, 1000, 3000],
+    },
+    'ipopt': {
+        'tol': [1e-8, 1e-6, 1e-5],
+        'mu_strategy': ['monotone', 'adaptive'],
+        'nlp_scaling_method': ['gradient-based', 'none'],
+        'max_iter': [500, 1000, 3000],
+    },
+    'couenne': {
+        'allowable_fraction_gap': [1e-8, 1e-5, 1e-3],
+        'max_iter': [500, 1000, 3000],
+    },
+    'scipy': {
+        'method': ['trust-constr', 'SLSQP'],
+        'maxiter': [200, 1000],
+    },
+    'native': {
+        'tol': [1e-8, 1e-6, 1e-5],
+        'max_iter': [200, 1000, 3000],
+    },
+    'slp': {
+        'radius': [0.01, 0.1, 1],
+        'penalty': [1e2, 1e3, 1e4],
+        'int_radius': [1, 2],
+    },
+}
+
+# modelo y sesión de cada proceso del ajuste, se crean una sola vez por proceso
+_tuner_model = None
+_tuner_session = None
+_tuner_init = None
+_tuner_dir = None
+
+def _init_tuner_worker(system_name, backend, work_dir, timeout, model_kwargs):
+    '''
+        Está función crea en el proceso el modelo del sistema y una SolverSession en una carpeta propia,
+        el archivo NL se escribe una vez y los candidatos solo reescriben la inicialización
+        input
+            system_name: nombre del sistema, ej: ieee9
+            backend: nombre del backend del registro
+            work_dir: carpeta base de los archivos del ajuste
+            timeout: tiempo máximo en segundos de cada candidato
+            model_kwargs: argumentos de build_model
+        return
+            None
+    '''
+    global _tuner_model, _tuner_session, _tuner_init, _tuner_dir
+    _tuner_model, _ = build_model(system_name, **model_kwargs)
+    _tuner_dir = os.path.join(work_dir, system_name, str(os.getpid()))
+    os.makedirs(_tuner_dir, exist_ok=True)
+    solver = SOLVER_BACKENDS.get(backend, {'solver': backend})['solver']
+    if solver not in PYTHON_SOLVERS:
+        _tuner_session = SolverSession(_tuner_model.model, find_executable(solver), backend='nl', work_dir=_tuner_dir,
+                                       name=system_name, tee=False, timeout=timeout)
+        # el archivo NL completo se escribe aquí para que todos los candidatos midan lo mismo
+        _tuner_session.prepare()
+    _tuner_init = [(var, var.value) for var in _tuner_model.model.component_data_objects(pyomo.Var)]
+
+def _run_tuner_candidate(backend, name, options):
+    '''
+        Está función resuelve el modelo del proceso con un conjunto de opciones, siempre desde la misma inicialización
+        input
+            backend: nombre del backend del registro
+            name: nombre del candidato
+            options: opciones del candidato
+        return
+            dict: opciones, estado, objetivo y tiempos del candidato
+    '''
+    for var, value in _tuner_init:
+        var.set_value(value, skip_validation=True)
+    solver = SolverBackend(backend, 'tight_final', options=options)
+    tuned = dict((key, value) for key, value in solver.options.items() if key != 'output_file')
+    if 'output_file' in solver.options:
+        solver.options['output_file'] = os.path.abspath(os.path.join(_tuner_dir, os.path.basename(solver.options['output_file'])))
+    is_solve, info = solver.solve(_tuner_model.model, _tuner_session, owner=_tuner_model)
+    objective = next(_tuner_model.model.component_data_objects(pyomo.Objective, active=True))
+    return {
+        'candidate': name,
+        'options': tuned,
+        'solved': is_solve,
+        'objective': pyomo.value(objective, exception=False) if is_solve else None,
+        'time': info['total'],
+        'write': info['write'],
+        'solve': info['solve'],
+        'load': info['load'],
+    }
+
+class SolverTuner(object):
+    '''
+        Class encargada de ajustar las opciones del solver, resuelve cada sistema con los perfiles del registro y
+        con los conjuntos de opciones de una búsqueda grid o aleatoria en un pool de procesos, ordena los candidatos
+        por calidad del objetivo y tiempo y guarda el ganador como perfil 'tuned' del sistema
+    '''
+    def __init__(self, systems, backend='bonmin_oa', method='grid', n_samples=20, seed=0, space=None, gap_tol=1e-4,
+                 timeout=600, processes=None, work_dir='tuning', model_kwargs=None, print_sec=False):
+        '''
+            Está función instancia la clase SolverTuner
+            input
+                systems: lista de sistemas, ej: ['ieee9', 'ieee39', 'ieee57', 'ieee118']
+                backend: nombre del backend del registro
+                method: 'grid' (todas las combinaciones) o 'random' (n_samples combinaciones)
+                n_samples: número de candidatos de la búsqueda aleatoria
+                seed: semilla de la búsqueda aleatoria
+                space: espacio de búsqueda, por defecto SEARCH_SPACE de la familia del backend
+                gap_tol: diferencia relativa máxima con el mejor objetivo para aceptar un candidato
+                timeout: tiempo máximo en segundos de cada candidato
+                processes: número de procesos, por defecto os.cpu_count()
+                work_dir: carpeta de los archivos .nl, .sol y registros del solver
+                model_kwargs: argumentos de build_model, ej: {'formulation': 'square'}
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo SolverTuner
+        '''
+        if method not in ('grid', 'random'):
+            raise ValueError(f'El método {method} no existe, métodos: grid, random')
+        self.systems = systems
+        self.backend = backend
+        self.family = SOLVER_BACKENDS.get(backend, {'family': backend})['family']
+        self.method = method
+        self.n_samples = n_samples
+        self.seed = seed
+        self.space = space or SEARCH_SPACE.get(self.family, {})
+        self.gap_tol = gap_tol
+        self.timeout = timeout
+        self.processes = processes or os.cpu_count()
+        self.work_dir = work_dir
+        self.model_kwargs = dict(model_kwargs or {})
+        self.print_sec = print_sec
+        self.results = {}
+    def _get_candidates(self):
+        '''
+            Está función arma los candidatos, primero los perfiles del registro y luego los de la búsqueda
+            input
+                None
+            return
+                list: tuplas (nombre, opciones)
+        '''
+        candidates = list(SOLVER_PROFILES.get(self.family, {}).items())
+        keys = list(self.space)
+        grid = list(itertools.product(*[self.space[key] for key in keys]))
+        if self.method == 'random' and self.n_samples < len(grid):
+            grid = random.Random(self.seed).sample(grid, self.n_samples)
+        candidates += [(f'{self.method}_{k}', dict(zip(keys, values))) for k, values in enumerate(grid)]
+        return candidates
+    def _rank(self, results):
+        '''
+            Está función ordena los candidatos, primero los que quedan a menos de gap_tol del mejor objetivo
+            y entre ellos por tiempo
+            input
+                results: lista de resultados de _run_tuner_candidate
+            return
+                DataFrame: candidatos ordenados con las columnas gap, within_tol y rank
+        '''
+        df = DataFrame(results)
+        solved = df['solved'] & df['objective'].notna()
+        best = df.loc[solved, 'objective'].min() if solved.any() else None
+        df['gap'] = (df['objective'] - best).abs()/max(1, abs(best)) if best is not None else None
+        df['within_tol'] = solved & (df['gap'] <= self.gap_tol)
+        df = df.sort_values(['within_tol', 'time'], ascending=[False, True]).reset_index(drop=True)
+        df['rank'] = range(1, len(df) + 1)
+        return df
+    def _tune_case(self, system_name):
+        '''
+            Está función resuelve todos los candidatos de un sistema en el pool de procesos
+            input
+                system_name: nombre del sistema, ej: ieee9
+            return
+                DataFrame: candidatos ordenados
+        '''
+        candidates = self._get_candidates()
+        if self.print_sec: print(f'\n--> Ajuste de {self.backend} en {system_name}: {len(candidates)} candidatos <--\n')
+        processes = min(self.processes, len(candidates))
+        initargs = (system_name, self.backend, self.work_dir, self.timeout, self.model_kwargs)
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_tuner_worker, initargs=initargs) as pool:
+            futures = [pool.submit(_run_tuner_candidate, self.backend, name, options) for name, options in candidates]
+            results = [future.result() for future in futures]
+        return self._rank(results)
+    def run(self):
+        '''
+            Está función ajusta todos los sistemas, guarda la tabla de candidatos en Resultados/tuning y el
+            ganador en la carpeta de perfiles para usarlo con solve_model(profile='tuned')
+            input
+                None
+            return
+                dict: sistema -> DataFrame con los candidatos ordenados
+        '''
+        os.makedirs('Resultados/tuning', exist_ok=True)
+        for system_name in self.systems:
+            df = self._tune_case(system_name)
+            self.results[system_name] = df
+            df.to_csv(f'Resultados/tuning/{system_name}_{self.backend}.csv', index=False)
+            if not df['within_tol'].any():
+                if self.print_sec: print(f'Ningún candidato resolvió {system_name}, no se guarda el perfil')
+                continue
+            winner = df.iloc[0]
+            path = save_tuned_profile(system_name, self.backend, winner['options'], info={
+                    'candidate': winner['candidate'], 'objective': winner['objective'], 'time': winner['time'],
+                    'method': self.method, 'candidates': len(df),
+                })
+            if self.print_sec: print(f'Perfil ganador de {system_name}: {winner["candidate"]} ({winner["time"]:.3f}s) -> {path}')
+        return self.results
@@ -1,6 +1,9 @@
 import pandapower.networks as pp_net
 import pandapower as pp
 import numpy as np
+from _source.power_flow import BatchPowerFlow, sweep_power_flow
+from _source.extraction import HourlyValues, hourly_bounds, flow_bounds, conductance_susceptance, trafo_conductance_susceptance
+from _source.adjust_values import get_adjust_values, bus_adjacency
 
 class GetVariablesSystem(object):
     '''
@@ -46,13 +49,28 @@ class GetVariablesSystem(object):
                         9:.95, 10:.99, 11:1, 12:.99, 13:.93, 14:.92, 15:.9,16:.88, 
                         17:.9, 18:.9, 19:.96, 20:.98, 21:.96, 22:.9, 23:.8, 24:.7 }
         self.multiplier = 1.2
+        # horas absolutas de los valores del sistema, en el modelo quedan como 1..len(hours)
+        self.hours = list(range(1,25))
         self.sn_mva = self.system.sn_mva
         self.system.bus.iloc[:, list(self.system.bus.columns).index('max_vm_pu')] = 1.1
         self.system.bus.iloc[:, list(self.system.bus.columns).index('min_vm_pu')] = 0.9
         self.id_load_p = list(self.system.load.columns).index('p_mw')
         self.id_load_q = list(self.system.load.columns).index('q_mvar')
         self.id_gen_p = list(self.system.gen.columns).index('p_mw')
+        self.load_init_p = self.system.load['p_mw'].values.copy()
+        self.load_init_q = self.system.load['q_mvar'].values.copy()
+        self.gen_init_p = self.system.gen['p_mw'].values.copy()
         if self.print_sec: print(f'Se crea el objeto del sistema a trabajar * {system} *')
+    def _set_hours(self, hours):
+        '''
+            Está función cambia las horas absolutas con las que se calculan los valores del sistema, el perfil
+            de carga (scaling) se repite cada 24 horas, ej: range(7,31) es la ventana de 24 horas desde la hora 7
+            input
+                hours: lista de horas absolutas, en el modelo quedan numeradas 1..len(hours)
+            return
+                None
+        '''
+        self.hours = list(hours)
     def _get_param_from_system(self):
         '''
             Está función entrega los parámetros del sistema necesarias en el modelo de optimización
@@ -62,23 +80,28 @@ class GetVariablesSystem(object):
                 dict: diccionario que contiene los parámetros del sistema, i, j , c, buses, bounds. 
         '''
         if self.print_sec: print('Se obtienen la variables del sistema')
-        slack_bound_p, slack_bound_q, bounds_bus = {}, {}, {}
-        for t in range(1,25):
-            for i in range(self.system.ext_grid.shape[0]):
-                row = self.system.ext_grid.iloc[i]
-                slack_bound_p[(str(i), t)] = (row['min_p_mw']/self.sn_mva, 
-                                              row['max_p_mw']/self.sn_mva)
-                slack_bound_q[(str(i), t)] = (row['min_q_mvar']/self.sn_mva, 
-                                              row['max_q_mvar']/self.sn_mva)
-            for bus in range(self.system.bus.shape[0]):
-                row = self.system.bus.iloc[bus]
-                bounds_bus[(str(bus), t)] = (row['min_vm_pu'], row['max_vm_pu'])
+        hours = list(range(1,len(self.hours)+1))
+        ext_grid, bus = self.system.ext_grid, self.system.bus
+        slack = [str(i) for i in range(ext_grid.shape[0])]
+        buses = [str(i) for i in range(bus.shape[0])]
+        slack_bound_p = hourly_bounds(slack, hours,
+                                      np.tile(ext_grid['min_p_mw'].values/self.sn_mva, (len(hours),1)),
+                                      np.tile(ext_grid['max_p_mw'].values/self.sn_mva, (len(hours),1)))
+        slack_bound_q = hourly_bounds(slack, hours,
+                                      np.tile(ext_grid['min_q_mvar'].values/self.sn_mva, (len(hours),1)),
+                                      np.tile(ext_grid['max_q_mvar'].values/self.sn_mva, (len(hours),1)))
+        bounds_bus = hourly_bounds(buses, hours,
+                                   np.tile(bus['min_vm_pu'].values, (len(hours),1)),
+                                   np.tile(bus['max_vm_pu'].values, (len(hours),1)))
         atBus = {}
         for gen,bus in enumerate(list(self.system.gen['bus'])):
             atBus[(str(gen),bus)] = True
         atBusSlack = {}
         for gen,bus in enumerate(list(self.system.ext_grid['bus'])):
             atBusSlack[(str(gen),bus)] = True
+        atBusLoad = {}
+        for load_id,bus in zip(list(self.system.load.index.values), list(self.system.load['bus'])):
+            atBusLoad[(str(load_id),str(bus))] = True
         list_i,ij, ji, branchij_bus, branchji_bus = [],[],[],{},{}
         for i, j in list(zip(list(self.system.line['from_bus']),
                             list(self.system.line['to_bus']))):
@@ -97,6 +120,8 @@ class GetVariablesSystem(object):
         bus_trafo = {}
         for bus in list(self.system.trafo['hv_bus']):
             bus_trafo[str(bus)] = True
+        trafo_ends = dict((str(k), (str(hv), str(lv)))
+                          for k, (hv, lv) in enumerate(zip(self.system.trafo['hv_bus'], self.system.trafo['lv_bus'])))
         self.system_param = {
                 'ij':ij,
                 'ji':ji,
@@ -106,6 +131,8 @@ class GetVariablesSystem(object):
                 'branchji_bus': branchji_bus,
                 'bus': [str(bus) for bus in list(self.system.bus.index.values)],
                 'bus_trafo': bus_trafo,
+                'trafo_ends': trafo_ends,
+                'bus_load': dict((str(bus), True) for bus in self.system.load['bus']),
                 'bounds_bus':bounds_bus,
                 'atBus': atBus,
                 'atBusSlack': atBusSlack,
@@ -119,96 +146,121 @@ class GetVariablesSystem(object):
                 'bus_shunt': dict((str(bus), True) for bus in self.bus_shunt),
                 'pilot_nodes': dict((str(node), True) for node in self.pilot_nodes),
             }
+        self.system_param['adjacency'] = bus_adjacency(
+                self.system_param['bus'], self.system_param['gen'], self.system_param['slack'], 
+                self.system_param['demandbid'], atBus, atBusSlack, atBusLoad,
+                ij, ji, branchij_bus, branchji_bus
+            )
         return self.system_param
-    def _get_values_from_system(self):
+    def _get_values_from_system(self, mode='serial', processes=None):
         '''
             Está función entrega los valores calculados del sistema necesarias en el modelo de optimización
             input
-                None
+                mode: 'serial' corre pp.runpp hora a hora, 'batch' resuelve todas las horas a la vez con BatchPowerFlow,
+                      'pool' reparte las horas entre un pool de procesos
+                processes: número de procesos del modo 'pool'
             return
                 dict: diccionario que contiene los parámetros del sistema, i, j , c, buses, bounds. 
         '''
         if self.print_sec: print('Se obtienen la valores del sistema')
-        init_bus_v, init_bus_theta = {},{}
-        buses_line = list(
-                        zip(
-                            list(self.system.line['from_bus']), 
-                            list(self.system.line['to_bus'])
-                            )
-                        )
-        init_line_pij, init_line_qij, init_line_pji, init_line_qji = {},{},{},{}
-        bound_line_pij, bound_line_pji = {}, {} 
-        init_slack_p, init_slack_q = {},{}
-        init_gen_p, init_gen_q, gen_bound_q = {},{},{}
-        Pd, Qd = {}, {}
-        load_init_p = list(self.system.load.iloc[:,self.id_load_p])
-        load_init_q = list(self.system.load.iloc[:,self.id_load_q])
-        gen_init_q = list(self.system.gen.iloc[:,self.id_gen_p])
-        for t in range(1,25):
-            self.system.gen.iloc[:,self.id_gen_p] = list(np.array(gen_init_q)*self.scaling.get(t)*self.multiplier)
-            self.system.load.iloc[:,self.id_load_p] = list(np.array(load_init_p)*self.scaling.get(t)*self.multiplier)
-            self.system.load.iloc[:,self.id_load_q] = list(np.array(load_init_q)*self.scaling.get(t)*self.multiplier)
+        if mode=='batch': 
+            self.system_values = self._get_values_from_results(
+                                    BatchPowerFlow(self.system).run(*self._get_injections([self.multiplier]))
+                                )
+            return self.system_values
+        if mode=='pool':
+            self.system_values = self._get_values_sweep([self.multiplier], processes).get(self.multiplier)
+            return self.system_values
+        p_load, q_load, p_gen = self._get_injections([self.multiplier])
+        res = dict((key, []) for key in ['vm_pu', 'va_degree', 'p_from_mw', 'q_from_mvar', 'p_to_mw', 'q_to_mvar',
+                                         'p_hv_mw', 'p_lv_mw', 'p_gen_mw', 'q_gen_mvar', 'p_ext_grid_mw', 'q_ext_grid_mvar', 
+                                         'p_load_mw', 'q_load_mvar'])
+        for k in range(p_load.shape[0]):
+            self.system.gen.iloc[:,self.id_gen_p] = p_gen[k]
+            self.system.load.iloc[:,self.id_load_p] = p_load[k]
+            self.system.load.iloc[:,self.id_load_q] = q_load[k]
             pp.runpp(self.system)
-            for i in range(self.system.res_load.shape[0]):
-                row = self.system.load.iloc[i]
-                res_row = self.system.res_load.iloc[i]
-                Pd[(str(row['bus']),t)] = res_row['p_mw']/self.sn_mva
-                Qd[(str(row['bus']),t)] = res_row['q_mvar']/self.sn_mva
-            for i in range(self.system.res_bus.shape[0]):
-                row = self.system.res_bus.iloc[i]
-                init_bus_v[(str(i), t)] = row['vm_pu']
-                init_bus_theta[(str(i), t)] = row['va_degree']*np.pi/180
-            c_line = 0
-            for i,j in buses_line:
-                row = self.system.res_line.iloc[c_line]
-                p_from = row['p_from_mw']/self.sn_mva
-                p_to = row['p_to_mw']/self.sn_mva
-                init_line_pij[(f'{i}-{j}',t)] = p_from
-                init_line_pji[(f'{j}-{i}',t)] = p_to
-                bound_line_pij[(f'{i}-{j}',t)] = (0.9*p_from, 1.1*p_from) if p_from>0 else (1.1*p_from, 0.9*p_from)
-                bound_line_pji[(f'{j}-{i}',t)] = (0.9*p_to, 1.1*p_to) if p_to>0 else (1.1*p_to, 0.9*p_to)
-                init_line_qij[(f'{i}-{j}',t)] = row['q_from_mvar']/self.sn_mva
-                init_line_qji[(f'{j}-{i}',t)] = row['q_to_mvar']/self.sn_mva
-                c_line+=1
-            c_gen = 0
-            for p, q in list(zip(list(self.system.res_gen['p_mw']),
-                            list(self.system.res_gen['q_mvar']))):
-                init_gen_p[(str(c_gen), t)] = p/self.sn_mva
-                init_gen_q[(str(c_gen), t)] = q/self.sn_mva
-                row = self.system.gen.iloc[c_gen]
-                if q>0:
-                    min_q = row['min_q_mvar'] if row['min_q_mvar']<q else q
-                    max_q = row['max_q_mvar'] if row['max_q_mvar']>q else q
-                else:
-                    min_q = row['min_q_mvar'] if row['min_q_mvar']<q else q
-                    max_q = row['max_q_mvar'] if row['max_q_mvar']>q else q
-                gen_bound_q[(str(c_gen), t)] = (min_q/self.sn_mva, 
-                                            max_q/self.sn_mva)
-                c_gen+=1
-            c_gen=0
-            for p, q in list(zip(list(self.system.res_ext_grid['p_mw']),
-                            list(self.system.res_ext_grid['q_mvar']))):
-                init_slack_p[(str(c_gen), t)] = p/self.sn_mva
-                init_slack_q[(str(c_gen), t)] = q/self.sn_mva
-                c_gen+=1
-        self.system_values = {
-                'Pd': Pd,
-                'Qd': Qd,
-                'init_bus_theta': init_bus_theta,
-                'init_bus_v': init_bus_v,
-                'init_line_pij': init_line_pij,
-                'init_line_qij': init_line_qij,
-                'bound_line_pij': bound_line_pij,
-                'bound_line_pji': bound_line_pji,
-                'init_line_pji': init_line_pji,
-                'init_line_qji': init_line_qji,
-                'init_gen_p': init_gen_p,
-                'init_gen_q': init_gen_q,
-                'gen_bound_q': gen_bound_q,
-                'init_slack_p': init_slack_p,
-                'init_slack_q': init_slack_q,
-            }
+            for key, table, column in [('vm_pu', 'res_bus', 'vm_pu'), ('va_degree', 'res_bus', 'va_degree'),
+                                       ('p_from_mw', 'res_line', 'p_from_mw'), ('q_from_mvar', 'res_line', 'q_from_mvar'),
+                                       ('p_to_mw', 'res_line', 'p_to_mw'), ('q_to_mvar', 'res_line', 'q_to_mvar'),
+                                       ('p_hv_mw', 'res_trafo', 'p_hv_mw'), ('p_lv_mw', 'res_trafo', 'p_lv_mw'),
+                                       ('p_gen_mw', 'res_gen', 'p_mw'), ('q_gen_mvar', 'res_gen', 'q_mvar'),
+                                       ('p_ext_grid_mw', 'res_ext_grid', 'p_mw'), ('q_ext_grid_mvar', 'res_ext_grid', 'q_mvar'),
+                                       ('p_load_mw', 'res_load', 'p_mw'), ('q_load_mvar', 'res_load', 'q_mvar')]:
+                res[key].append(self.system[table][column].values)
+        self.system_values = self._get_values_from_results(
+                                dict((key, np.vstack(value)) for key, value in res.items())
+                            )
         return self.system_values
+    def _get_injections(self, multipliers):
+        '''
+            Está función arma las matrices de p_mw y q_mvar de cargas y generadores para cada escenario y hora
+            input
+                multipliers: lista de multiplicadores de carga (escenarios)
+            return
+                p_load, q_load, p_gen: matrices ((escenarios*horas) x elementos)
+        '''
+        def scale(values):
+            return np.vstack([values*self.scaling.get((t-1)%24 + 1)*multiplier 
+                              for multiplier in multipliers 
+                              for t in self.hours])
+        return scale(self.load_init_p), scale(self.load_init_q), scale(self.gen_init_p)
+    def _get_values_sweep(self, multipliers, processes=None):
+        '''
+            Está función corre el flujo de carga de todas las horas y multiplicadores de carga en un pool de procesos,
+            cada proceso conserva la topología y la Ybus y arranca cada hora desde la solución de la anterior
+            input
+                multipliers: lista de multiplicadores de carga (escenarios)
+                processes: número de procesos, por defecto os.cpu_count()
+            return
+                dict: diccionario multiplicador -> system_values
+        '''
+        res, n = sweep_power_flow(self.system, *self._get_injections(multipliers), processes=processes), len(self.hours)
+        return dict(
+                (multiplier, self._get_values_from_results(
+                                dict((key, value[n*k:n*(k+1)]) for key, value in res.items())
+                            ))
+                for k, multiplier in enumerate(multipliers)
+            )
+    def _get_values_from_results(self, res):
+        '''
+            Está función arma el diccionario system_values a partir de las matrices (horas x elementos)
+            entregadas por BatchPowerFlow
+            input
+                res: resultados de BatchPowerFlow.run para las horas de self.hours
+            return
+                dict: diccionario que contiene los valores del sistema
+        '''
+        load_bus = [str(bus) for bus in self.system.load['bus']]
+        ij = [f'{i}-{j}' for i, j in zip(self.system.line['from_bus'], self.system.line['to_bus'])]
+        ji = [f'{j}-{i}' for i, j in zip(self.system.line['from_bus'], self.system.line['to_bus'])]
+        bus = [str(i) for i in range(self.system.bus.shape[0])]
+        gen = [str(i) for i in range(self.system.gen.shape[0])]
+        slack = [str(i) for i in range(self.system.ext_grid.shape[0])]
+        trafo = [str(i) for i in range(self.system.trafo.shape[0])]
+        p_from, p_to = res['p_from_mw']/self.sn_mva, res['p_to_mw']/self.sn_mva
+        min_q = self.system.gen['min_q_mvar'].values/self.sn_mva
+        max_q = self.system.gen['max_q_mvar'].values/self.sn_mva
+        q_gen = res['q_gen_mvar']/self.sn_mva
+        return HourlyValues(range(1,len(self.hours)+1), {
+                'Pd': (load_bus, res['p_load_mw']/self.sn_mva),
+                'Qd': (load_bus, res['q_load_mvar']/self.sn_mva),
+                'init_bus_theta': (bus, res['va_degree']*np.pi/180),
+                'init_bus_v': (bus, res['vm_pu']),
+                'init_line_pij': (ij, p_from),
+                'init_line_qij': (ij, res['q_from_mvar']/self.sn_mva),
+                'bound_line_pij': (ij, flow_bounds(p_from)),
+                'bound_line_pji': (ji, flow_bounds(p_to)),
+                'init_line_pji': (ji, p_to),
+                'init_line_qji': (ji, res['q_to_mvar']/self.sn_mva),
+                'init_trafo_p_hv': (trafo, res['p_hv_mw']/self.sn_mva),
+                'init_trafo_p_lv': (trafo, res['p_lv_mw']/self.sn_mva),
+                'init_gen_p': (gen, res['p_gen_mw']/self.sn_mva),
+                'init_gen_q': (gen, q_gen),
+                'gen_bound_q': (gen, (np.where(min_q<q_gen, min_q, q_gen), np.where(max_q>q_gen, max_q, q_gen))),
+                'init_slack_p': (slack, res['p_ext_grid_mw']/self.sn_mva),
+                'init_slack_q': (slack, res['q_ext_grid_mvar']/self.sn_mva),
+            })
     def _get_conductance_susceptance(self):
         '''
             Está función entrega el calculo de la conductance y la susceptance.
@@ -219,29 +271,27 @@ class GetVariablesSystem(object):
                                 branchstatus(i, j, c)
         '''
         if self.print_sec: print('Se crea las variables de conductance y susceptance')
+        g, b = conductance_susceptance(self.system.line)
         self.g, self.b = {}, {}
-        def calculate_g_b(tipe, d, r, x):
-                return d*(r if tipe=='g' else -x)/(np.power(r,2) + np.power(x,2))
-        for c in range(self.system.line.shape[0]):
-            row = self.system.line.iloc[c]
-            value_g = calculate_g_b(
-                    'g',
-                     row['length_km'],
-                     row['r_ohm_per_km'] if row['r_ohm_per_km']!=0 else self.system.line['r_ohm_per_km'].mean(),
-                     row['x_ohm_per_km'] if row['x_ohm_per_km']!=0 else self.system.line['x_ohm_per_km'].mean()
-                    )
-            i, j = row['from_bus'], row['to_bus']
+        for i, j, value_g, value_b in zip(self.system.line['from_bus'], self.system.line['to_bus'], g.tolist(), b.tolist()):
             self.g[f'{i}-{j}'] = value_g
             self.g[f'{j}-{i}'] = value_g
-            value_b = calculate_g_b(
-                    'b',
-                     row['length_km'],
-                     row['r_ohm_per_km'] if row['r_ohm_per_km']!=0 else self.system.line['r_ohm_per_km'].mean(),
-                     row['x_ohm_per_km'] if row['x_ohm_per_km']!=0 else self.system.line['x_ohm_per_km'].mean()
-                    )
             self.b[f'{i}-{j}'] = value_b
             self.b[f'{j}-{i}'] = value_b
         return self.g, self.b
+    def _get_trafo_conductance_susceptance(self):
+        '''
+            Está función entrega la conductance y la susceptance serie de los trafos, referidas al lado de alta
+            input
+                None
+            return
+                g, b: diccionarios trafo -> valor, el trafo es su posición en la tabla trafo
+        '''
+        if self.print_sec: print('Se crea las variables de conductance y susceptance de los trafos')
+        g, b = trafo_conductance_susceptance(self.system.trafo)
+        self.g_trafo = dict((str(k), value) for k, value in enumerate(g.tolist()))
+        self.b_trafo = dict((str(k), value) for k, value in enumerate(b.tolist()))
+        return self.g_trafo, self.b_trafo
     def _get_ratio_line(self):
         '''
             Está función entrega los mva de la líneas 
@@ -251,12 +301,10 @@ class GetVariablesSystem(object):
                 ratio: valores de capacidad máxima de las líneas
         '''
         if self.print_sec: print('Se crea la variable ratio líneas')
-        self.ratio_line = {}
-        for c in range(self.system.line.shape[0]):
-            row = self.system.line.iloc[c]
-            i, j = row['from_bus'], row['to_bus']
-            self.ratio_line[f'{i}-{j}']\
-                = np.sqrt(3)*row['max_i_ka']*self.voltage.get(int(row['from_bus']))/self.sn_mva
+        line = self.system.line
+        ratio = np.sqrt(3)*line['max_i_ka'].values*self.system.bus['vn_kv'].values[line['from_bus'].values]/self.sn_mva
+        self.ratio_line = dict((f'{i}-{j}', value) 
+                               for i, j, value in zip(line['from_bus'], line['to_bus'], ratio.tolist()))
         return self.ratio_line
     def _get_ratio_trafo(self):
         '''
@@ -268,9 +316,7 @@ class GetVariablesSystem(object):
         '''
         if self.print_sec: print('Se crea la variable ratio trafos')
         self.ratio = {}
-        for c in range(self.system.line.shape[0]):
-            row = self.system.line.iloc[c]
-            i, j = row['from_bus'], row['to_bus']
+        for i, j in zip(self.system.line['from_bus'], self.system.line['to_bus']):
             self.ratio[f'{i}-{j}'] = 1
             self.ratio[f'{j}-{i}'] = 1
         return self.ratio
@@ -306,93 +352,7 @@ class GetVariablesSystem(object):
             return
                 dict: diccionario que contiene los ajustes de las ecuaciones de igualdad
         ''' 
-        ## ajuste de la potencia aparente
-        adj_slimit_sij = {}
-        for t in range(1,25):
-            for ij in self.system_param.get('ij'):
-                s_v1 = (self.ratio_line[ij])**2
-                s_v2 = (
-                    self.system_values.get('init_line_pij')[ij, t]**2
-                    + self.system_values.get('init_line_qij')[ij, t]**2      
-                )
-                signo_sij = -1 if (s_v1>0 and s_v2<0 or s_v1<0 and s_v2>0) else 1
-                adj_slimit_sij[(ij,t)] = abs(s_v2/s_v1)*signo_sij
-        ## ajuste de los flujos de potencia      
-        adj_line_pij, adj_line_pji = {},{}
-        adj_line_qij, adj_line_qji = {},{}
-        for t in range(1,25):
-            for ij in self.system_param.get('ij'):
-                # para Pij
-                p_v1 = (
-                    (self.g[ij] * (self.system_values.get('init_bus_v')[ij.split('-')[0],t]**2) / 1**2)
-                    - (self.system_values.get('init_bus_v')[ij.split('-')[0],t] * self.system_values.get('init_bus_v')[ij.split('-')[1],t] / 1)
-                    * (self.g[ij] * np.cos(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t]) 
-                    + self.b[ij] * np.sin(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t]))
-                    )
-                p_v2 = self.system_values.get('init_line_pij').get((ij,t))
-                adj_line_pij[(ij,t)] = p_v1 - p_v2
-                # para Qij
-                q_v1 = (
-                    -self.system_values.get('init_bus_v')[ij.split('-')[0],t]**2 * (self.b[ij]) / 1**2
-                    - self.system_values.get('init_bus_v')[ij.split('-')[0],t] * self.system_values.get('init_bus_v')[ij.split('-')[1],t] /1 
-                    * (self.g[ij] * np.sin(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t])
-                    - self.b[ij] * np.cos(self.system_values.get('init_bus_theta')[ij.split('-')[0],t] - self.system_values.get('init_bus_theta')[ij.split('-')[1],t]))
-                    )
-                q_v2 = self.system_values.get('init_line_qij').get((ij,t))
-                adj_line_qij[(ij,t)] = q_v1 - q_v2
-            for ji in self.system_param.get('ji'):
-                # para Pji
-                p_v1 = (
-                    (self.g[ji] * (self.system_values.get('init_bus_v')[ji.split('-')[0],t]**2) / 1**2)
-                    - (self.system_values.get('init_bus_v')[ji.split('-')[0],t] * self.system_values.get('init_bus_v')[ji.split('-')[1],t] / 1)
-                    * (self.g[ji] * np.cos(self.system_values.get('init_bus_theta')[ji.split('-')[0],t] - self.system_values.get('init_bus_theta')[ji.split('-')[1],t]) 
-                    + self.b[ji] * np.sin(self.system_values.get('init_bus_theta')[ji.split('-')[0],t] - self.system_values.get('init_bus_theta')[ji.split('-')[1],t]))
-                    )
-                p_v2 = self.system_values.get('init_line_pji').get((ji,t))
-                adj_line_pji[(ji,t)] = p_v1 - p_v2
-                # para Qji
-                q_v1 = (
-                    -self.system_values.get('init_bus_v')[ji.split('-')[1],t]**2 * (self.b[ji])
-                    - self.system_values.get('init_bus_v')[ji.split('-')[0],t] * self.system_values.get('init_bus_v')[ji.split('-')[1],t] / 1
-                    * (self.g[ji] * np.sin(self.system_values.get('init_bus_theta')[ji.split('-')[1],t] - self.system_values.get('init_bus_theta')[ji.split('-')[0],t])
-                    - self.b[ji] * np.cos(self.system_values.get('init_bus_theta')[ji.split('-')[1],t] - self.system_values.get('init_bus_theta')[ji.split('-')[0],t]))
-                    )
-                q_v2 = self.system_values.get('init_line_qji').get((ji,t))
-                adj_line_qji[(ji,t)] = q_v1 - q_v2
-        # para balance de potencia
-        adj_p_balance, adj_q_balance = {}, {}
-        for t in range(1,25):
-            for bus in self.system_param.get('bus'):
-                # para P
-                p_b1 = (
-                    sum(self.system_values.get('init_gen_p')[gen, t] for gen in self.system_param.get('gen') if self.system_param.get('atBus').get((gen,bus)) and self.genstatus.get((gen,bus)))
-                    + sum(self.system_values.get('init_slack_p')[gen, t] for gen in self.system_param.get('slack') if self.system_param.get('atBusSlack').get((gen,bus)))
-                    - (self.system_values.get('Pd').get((bus,t)) if self.system_values.get('Pd').get((bus,t)) else 0)
-                )
-                p_b2 = (
-                    sum(self.system_values.get('init_line_pij')[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                    + sum(self.system_values.get('init_line_pji')[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                    + self.system_values.get('init_bus_v')[bus,t]**2 
-                )
-                adj_p_balance[(bus,t)] = p_b1-p_b2
-                # para Q
-                q_b1 = (
-                    sum(self.system_values.get('init_gen_q')[gen, t] for gen in self.system_param.get('gen') if self.system_param.get('atBus').get((gen,bus)) and self.genstatus.get((gen,bus)))
-                    + sum(self.system_values.get('init_slack_q')[gen, t] for gen in self.system_param.get('slack') if self.system_param.get('atBusSlack').get((gen,bus)))
-                    - (self.system_values.get('Qd').get((bus,t)) if self.system_values.get('Qd').get((bus,t)) else 0)
-                )
-                q_b2 = (
-                    sum(self.system_values.get('init_line_pij')[ij,t] for ij in self.system_param.get('branchij_bus').get(bus, {}))
-                    + sum(self.system_values.get('init_line_pji')[ji,t] for ji in self.system_param.get('branchji_bus').get(bus, {}))
-                    + self.system_values.get('init_bus_v')[bus,t]**2 
+        return get_adjust_values(
+                    self.system_param, self.system_values, self.genstatus, 
+                    self.g, self.b, self.ratio_line, hours=range(1,len(self.hours)+1)
                 )
-                adj_q_balance[(bus,t)] = q_b1-q_b2
-        return{
-            'adj_line_pij': adj_line_pij,
-            'adj_line_pji': adj_line_pji,
-            'adj_line_qij': adj_line_qij,
-            'adj_line_qji': adj_line_qji,
-            'adj_slimit_sij': adj_slimit_sij,
-            'adj_p_balance': adj_p_balance,
-            'adj_q_balance': adj_q_balance          
-        }
\ No newline at end of file
@@ -0,0 +1,259 @@
+import os
+import time
+import numpy as np
+import pyomo.environ as pyomo
+from pandas import DataFrame
+from concurrent.futures import ProcessPoolExecutor
+from _source.model import build_model, load_system_data
+from _source.solver_session import SolverSession
+from _source.solver_backends import SolverBackend, PYTHON_SOLVERS
+
+# modelos y sesiones por hora de cada proceso del ADMM, cada proceso tiene sus horas fijas
+_admm_models = {}
+_admm_sessions = {}
+_admm_config = None
+
+def _add_admm_terms(model):
+    '''
+        Está función agrega al modelo de una hora los Params del ADMM y el objetivo aumentado,
+        obj + rho/2*sum((V_Shunt - Z_shunt + U_shunt)**2) + rho/2*sum((V_Gs - Z_gs + U_gs)**2)
+        input
+            model: modelo de CreateModel de una hora
+        return
+            None
+    '''
+    m = model.model
+    m.Rho = pyomo.Param(initialize=1.0, mutable=True, doc='Penalización del ADMM')
+    m.Z_shunt = pyomo.Param(m.V_Shunt.index_set(), initialize=0, mutable=True, doc='Consenso de V_Shunt')
+    m.U_shunt = pyomo.Param(m.V_Shunt.index_set(), initialize=0, mutable=True, doc='Dual escalado de V_Shunt')
+    m.Z_gs = pyomo.Param(m.bus, initialize=0, mutable=True, doc='Consenso de V_Gs')
+    m.U_gs = pyomo.Param(m.bus, initialize=0, mutable=True, doc='Dual escalado de V_Gs')
+    m.obj.deactivate()
+    m.obj_admm = pyomo.Objective(
+            expr=m.obj.expr
+                 + m.Rho/2 * sum((m.V_Shunt[key] - m.Z_shunt[key] + m.U_shunt[key])**2 for key in m.V_Shunt)
+                 + m.Rho/2 * sum((m.V_Gs[bus] - m.Z_gs[bus] + m.U_gs[bus])**2 for bus in m.bus),
+            sense=pyomo.minimize
+        )
+
+def _init_admm_worker(system_name, hours, data, backend, profile, work_dir, model_kwargs):
+    '''
+        Está función crea en el proceso los modelos de sus horas con los términos del ADMM
+        input
+            system_name: nombre del sistema, ej: ieee9
+            hours: horas que resuelve el proceso
+            data: valores de load_system_data
+            backend: nombre del backend del registro
+            profile: perfil de opciones del backend
+            work_dir: carpeta base de los archivos .nl y .sol
+            model_kwargs: argumentos de CreateModel
+        return
+            None
+    '''
+    global _admm_config
+    _admm_config = {'system_name': system_name, 'backend': backend, 'profile': profile, 'work_dir': work_dir}
+    for hour in hours:
+        model, _ = build_model(system_name, data=data, hours=[hour], **model_kwargs)
+        _add_admm_terms(model)
+        _admm_models[hour] = model
+
+def _solve_admm_hours(rho, targets):
+    '''
+        Está función resuelve los subproblemas de las horas del proceso con los consensos y duales dados,
+        cada hora parte de su solución anterior y conserva su SolverSession
+        input
+            rho: penalización del ADMM
+            targets: diccionario hora -> (Z_shunt, U_shunt, Z_gs, U_gs) en el orden de V_Shunt y de las barras
+        return
+            list: diccionarios con la hora, estado, objetivo sin penalización, tiempo, V_Shunt y V_Gs
+    '''
+    system_name, work_dir = _admm_config['system_name'], _admm_config['work_dir']
+    results = []
+    for hour, values in targets.items():
+        model = _admm_models[hour]
+        m = model.model
+        m.Rho = rho
+        for param, array in zip([m.Z_shunt, m.U_shunt, m.Z_gs, m.U_gs], values):
+            for key, value in zip(list(param.keys()), array.tolist()):
+                param[key] = value
+        solver = SolverBackend(_admm_config['backend'], _admm_config['profile'], system_name=system_name)
+        session = None
+        if solver.solver not in PYTHON_SOLVERS:
+            hour_dir = os.path.join(work_dir, system_name, f'hour_{hour}')
+            if hour not in _admm_sessions:
+                os.makedirs(hour_dir, exist_ok=True)
+                _admm_sessions[hour] = SolverSession(m, solver.solver, name=f'{system_name}_{hour}', work_dir=hour_dir, tee=False)
+            if 'output_file' in solver.options:
+                solver.options['output_file'] = os.path.abspath(os.path.join(hour_dir, os.path.basename(solver.options['output_file'])))
+            session = _admm_sessions[hour]
+        is_solve, info = solver.solve(m, session, owner=model)
+        results.append({
+            'hour': hour,
+            'solved': is_solve,
+            'objective': pyomo.value(m.obj, exception=False),
+            'time': info['total'],
+            'shunt': np.array([0 if var.value is None else var.value for var in m.V_Shunt.values()], dtype=float),
+            'gs': np.array([0 if var.value is None else var.value for var in m.V_Gs.values()], dtype=float),
+        })
+    return results
+
+def _get_admm_values():
+    '''
+        Está función entrega los valores de las variables indexadas por hora de los modelos del proceso
+        input
+            None
+        return
+            dict: hora -> {nombre de la variable: {índice: valor}}
+    '''
+    values = {}
+    for hour, model in _admm_models.items():
+        values[hour] = dict((var.name, dict((key, value) for key, value in var.get_values().items()
+                                            if isinstance(key, tuple) and key[-1] == hour))
+                            for var in model.model.component_objects(pyomo.Var, active=True))
+    return values
+
+class TemporalADMM(object):
+    '''
+        Class encargada de resolver el modelo de 24 horas por descomposición temporal con ADMM, las horas solo se
+        acoplan por el término k1*(V_Shunt[t] - V_Shunt[t-1])**2 del objetivo y por V_Gs (sin índice de hora), cada hora
+        se resuelve por separado en un pool de procesos con la penalización de consenso y los consensos se actualizan
+        en forma cerrada hasta que los residuos primal y dual sean menores a tol
+    '''
+    def __init__(self, system_name, backend='bonmin_oa', profile='tight_final', rho=1.0, max_iter=50, tol=1e-3,
+                 adaptive=True, processes=None, work_dir='admm', model_kwargs=None, print_sec=False):
+        '''
+            Está función instancia la clase TemporalADMM
+            input
+                system_name: nombre del sistema, ej: ieee9, ieee39, ieee57, ieee118
+                backend: backend de solver_backends de los subproblemas
+                profile: perfil de opciones del backend
+                rho: penalización inicial del ADMM
+                max_iter: número máximo de iteraciones
+                tol: tolerancia de los residuos primal y dual
+                adaptive: si es True rho se ajusta para balancear los residuos primal y dual
+                processes: número de procesos, por defecto os.cpu_count() (máximo 24)
+                work_dir: carpeta de los archivos .nl, .sol y registros de los subproblemas
+                model_kwargs: argumentos de CreateModel, ej: {'formulation': 'square'}
+                print_sec: para imprimir secuencia de ejecuciones
+            return
+                Objeto de tipo TemporalADMM
+        '''
+        self.system_name = system_name
+        self.backend = backend
+        self.profile = profile
+        self.rho = rho
+        self.max_iter = max_iter
+        self.tol = tol
+        self.adaptive = adaptive
+        self.processes = processes or os.cpu_count()
+        self.work_dir = work_dir
+        self.model_kwargs = dict(model_kwargs or {})
+        self.print_sec = print_sec
+        self.history = []
+    def _z_update(self, shunt, u_shunt, gs, u_gs, k1):
+        '''
+            Está función calcula los consensos, para V_Shunt resuelve por barra
+            min k1*sum((z_t - z_t-1)**2) + rho/2*sum((z_t - shunt_t - u_t)**2), para V_Gs el promedio de las horas
+            input
+                shunt, u_shunt: V_Shunt y duales (barras shunt x horas)
+                gs, u_gs: V_Gs y duales (barras x horas)
+                k1: peso del cambio de shunts en el objetivo
+            return
+                ndarray, ndarray: consensos de V_Shunt (barras shunt x horas) y de V_Gs (barras)
+        '''
+        T = shunt.shape[1]
+        D = np.diff(np.identity(T), axis=0)
+        M = 2*k1*D.T @ D + self.rho*np.identity(T)
+        z_shunt = np.linalg.solve(M, self.rho*(shunt + u_shunt).T).T
+        return z_shunt, (gs + u_gs).mean(axis=1)
+    def run(self):
+        '''
+            Está función itera el ADMM y arma la solución de 24 horas en self.model
+            input
+                None
+            return
+                bool: True si el ADMM convergió y todas las horas se resolvieron en la última iteración
+        '''
+        t0 = time.perf_counter()
+        _, data = load_system_data(self.system_name, print_sec=self.print_sec)
+        self.model, _ = build_model(self.system_name, data=data, **self.model_kwargs)
+        m, hours = self.model.model, list(self.model.model.t)
+        k1 = self.model.obj_weights[0]
+        shunt_bus = list(dict.fromkeys(key[0] for key in m.V_Shunt))
+        z_shunt = np.array([[m.V_Shunt[bus, t].value or 0 for t in hours] for bus in shunt_bus], dtype=float).reshape(len(shunt_bus), len(hours))
+        z_gs = np.array([m.V_Gs[bus].value or 0 for bus in m.bus], dtype=float)
+        u_shunt, u_gs = np.zeros_like(z_shunt), np.zeros((len(z_gs), len(hours)))
+        processes = max(1, min(self.processes, len(hours)))
+        chunks = [hours[i::processes] for i in range(processes)]
+        if self.print_sec: print(f'\n--> ADMM temporal de {self.system_name}: {len(hours)} horas en {processes} procesos <--\n')
+        executors = [ProcessPoolExecutor(max_workers=1, initializer=_init_admm_worker,
+                                         initargs=(self.system_name, chunk, data, self.backend, self.profile, self.work_dir, self.model_kwargs))
+                     for chunk in chunks]
+        self.converged, solved = False, False
+        try:
+            for k in range(self.max_iter):
+                futures = [executor.submit(_solve_admm_hours, self.rho,
+                                           dict((t, (z_shunt[:, hours.index(t)], u_shunt[:, hours.index(t)], z_gs, u_gs[:, hours.index(t)]))
+                                                for t in chunk))
+                           for executor, chunk in zip(executors, chunks)]
+                results = sorted([result for future in futures for result in future.result()], key=lambda result: result['hour'])
+                shunt = np.array([result['shunt'] for result in results]).T.reshape(z_shunt.shape)
+                gs = np.array([result['gs'] for result in results]).T
+                solved = all(result['solved'] for result in results)
+                z_prev, zg_prev = z_shunt, z_gs
+                z_shunt, z_gs = self._z_update(shunt, u_shunt, gs, u_gs, k1)
+                u_shunt += shunt - z_shunt
+                u_gs += gs - z_gs[:, None]
+                primal = np.sqrt(np.sum((shunt - z_shunt)**2) + np.sum((gs - z_gs[:, None])**2))
+                dual = self.rho*np.sqrt(np.sum((z_shunt - z_prev)**2) + len(hours)*np.sum((z_gs - zg_prev)**2))
+                objective = (sum(result['objective'] or 0 for result in results) + k1*np.sum(np.diff(shunt, axis=1)**2))
+                self.history.append({'iteration': k, 'rho': self.rho, 'primal': primal, 'dual': dual, 'objective': objective,
+                                     'solved': solved, 'time': max(result['time'] for result in results)})
+                if self.print_sec: print('ADMM {iteration}: obj {objective:.6g} - primal {primal:.3g} - dual {dual:.3g} - rho {rho:.3g}'.format(**self.history[-1]))
+                if primal <= self.tol and dual <= self.tol:
+                    self.converged = True
+                    break
+                if self.adaptive and primal > 10*dual:
+                    self.rho, u_shunt, u_gs = 2*self.rho, u_shunt/2, u_gs/2
+                elif self.adaptive and dual > 10*primal:
+                    self.rho, u_shunt, u_gs = self.rho/2, 2*u_shunt, 2*u_gs
+            values = {}
+            for future in [executor.submit(_get_admm_values) for executor in executors]:
+                values.update(future.result())
+        finally:
+            for executor in executors:
+                executor.shutdown()
+        # solución de 24 horas, V_Gs toma el consenso de las horas
+        for hour_values in values.values():
+            for name, var_values in hour_values.items():
+                var = getattr(m, name)
+                for key, value in var_values.items():
+                    var[key].set_value(value, skip_validation=True)
+        for bus, value in zip(m.bus, z_gs.tolist()):
+            m.V_Gs[bus].set_value(value, skip_validation=True)
+        self.model.solver_info = {
+            'backend': self.backend,
+            'profile': self.profile,
+            'decomposition': 'admm',
+            'iterations': len(self.history),
+            'converged': self.converged,
+            'status': solved,
+            'primal': self.history[-1]['primal'] if self.history else None,
+            'dual': self.history[-1]['dual'] if self.history else None,
+            'rho': self.rho,
+            'objective': pyomo.value(m.obj, exception=False),
+            'total': time.perf_counter() - t0,
+        }
+        if self.print_sec: print(f'ADMM: convergió {self.converged} - objetivo {self.model.solver_info["objective"]} - {self.model.solver_info["total"]:.3f}s')
+        return self.converged and solved
+    def save_model_variables(self):
+        '''
+            Está función guarda las variables del modelo de 24 horas como model.save_model_variables y la historia
+            del ADMM en Resultados/{system}/Admm__res.csv
+            input
+                None
+            return
+                None
+        '''
+        self.model.save_model_variables()
+        DataFrame(self.history).to_csv(f'Resultados/{self.system_name}/Admm__res.csv', index=False)
@@ -0,0 +1,174 @@
+import os
+import ast
+import pyomo.environ as pyomo
+from pandas import DataFrame, read_csv
+
+# variables enteras del modelo, se redondean al cargarlas y forman la asignación incumbente
+INTEGER_VARIABLES = ['V_Shunt', 'V_Rtrafo']
+
+# opciones de arranque en caliente por familia, ipopt y bonmin (ipopt resuelve los NLP de bonmin) arrancan desde
+# x y los multiplicadores exportados sin empujar el punto al interior
+WARM_START_OPTIONS = {
+    'ipopt': {'warm_start_init_point': 'yes', 'warm_start_bound_push': 1e-9, 'warm_start_slack_bound_push': 1e-9,
+              'warm_start_mult_bound_push': 1e-9, 'mu_init': 1e-6},
+    'bonmin': {'warm_start_init_point': 'yes', 'warm_start_bound_push': 1e-9, 'warm_start_slack_bound_push': 1e-9,
+               'warm_start_mult_bound_push': 1e-9, 'mu_init': 1e-6},
+}
+
+def add_warm_start_suffixes(model, export=False):
+    '''
+        Está función declara los Suffix de los multiplicadores, dual para las restricciones e ipopt_zL/ipopt_zU
+        para los bounds de las variables, sin export solo se importan del archivo .sol
+        input
+            model: modelo de pyomo (ConcreteModel)
+            export: si es True los multiplicadores también se escriben en el archivo NL (arranque en caliente)
+        return
+            None
+    '''
+    if model.component('dual') is None:
+        model.dual = pyomo.Suffix(direction=pyomo.Suffix.IMPORT)
+    for name in ['ipopt_zL_out', 'ipopt_zU_out']:
+        if model.component(name) is None:
+            model.add_component(name, pyomo.Suffix(direction=pyomo.Suffix.IMPORT))
+    if export:
+        model.dual.direction = pyomo.Suffix.IMPORT_EXPORT
+        for name in ['ipopt_zL_in', 'ipopt_zU_in']:
+            if model.component(name) is None:
+                model.add_component(name, pyomo.Suffix(direction=pyomo.Suffix.EXPORT))
+
+def _parse_key(key, component):
+    '''
+        Está función convierte el índice guardado con str(key) en el índice de pyomo, los índices de texto como
+        '0' se guardan sin comillas y se buscan tal cual si el índice convertido no existe en el componente
+        input
+            key: texto del índice, ej: "('1', 3)", "5", "None"
+            component: Var o Constraint donde se busca el índice
+        return
+            índice del componente o None si no existe
+    '''
+    try:
+        index = ast.literal_eval(key)
+    except (ValueError, SyntaxError):
+        index = key
+    if index in component: return index
+    if key in component: return key
+    return None
+
+def _read_file(path):
+    '''
+        Está función lee un archivo de resultados y descarta los valores vacíos
+        input
+            path: ruta del archivo csv
+        return
+            DataFrame o None si el archivo no existe
+    '''
+    if not os.path.exists(path): return None
+    return read_csv(path, dtype={'Var': str, 'Con': str, 'Index': str}).dropna()
+
+def save_warm_start(model, path, suffix=''):
+    '''
+        Está función guarda los multiplicadores de las restricciones (Dual) y de los bounds de las variables
+        (Bound) que el solver dejó en los Suffix, solo si el solver los entregó
+        input
+            model: modelo de pyomo (ConcreteModel)
+            path: carpeta de los resultados
+            suffix: sufijo del nombre de los archivos, ej: _area_1
+        return
+            None
+    '''
+    dual = model.component('dual')
+    if dual is not None and len(dual):
+        rows = [(con.parent_component().name, str(con.index()), value) for con, value in dual.items()
+                if con.ctype is pyomo.Constraint]
+        DataFrame(rows, columns=['Con', 'Index', 'Value']).to_csv(f'{path}/Dual{suffix}__res.csv', index=False)
+    lower, upper = model.component('ipopt_zL_out'), model.component('ipopt_zU_out')
+    if lower is not None and (len(lower) or len(upper)):
+        variables = list(lower.keys()) + [var for var in upper.keys() if var not in lower]
+        rows = [(var.parent_component().name, str(var.index()), lower.get(var, 0.0), upper.get(var, 0.0))
+                for var in variables]
+        DataFrame(rows, columns=['Var', 'Index', 'zL', 'zU']).to_csv(f'{path}/Bound{suffix}__res.csv', index=False)
+
+def load_warm_start(model, path, suffix=''):
+    '''
+        Está función inicializa todas las variables del modelo con los archivos Var_*__res.csv de una corrida anterior,
+        redondea la asignación entera de INTEGER_VARIABLES y carga los multiplicadores (Dual y Bound) en los Suffix
+        de exportación para que el solver arranque en caliente, las llaves que no existen en el modelo se ignoran
+        input
+            model: modelo de pyomo (ConcreteModel)
+            path: carpeta de los resultados de la corrida anterior
+            suffix: sufijo del nombre de los archivos, ej: _area_1
+        return
+            dict: cantidad de variables, multiplicadores de restricciones y de bounds cargados
+    '''
+    info = {'variables': 0, 'dual': 0, 'bound': 0}
+    for var in model.component_objects(pyomo.Var, active=True):
+        df = _read_file(f'{path}/Var_{var.name}{suffix}__res.csv')
+        if df is None: continue
+        is_integer = var.name in INTEGER_VARIABLES
+        for key, value in zip(df['Var'], df['Value']):
+            key = _parse_key(key, var)
+            if key is None: continue
+            if is_integer:
+                value = round(value)
+                if var[key].lb is not None: value = max(value, var[key].lb)
+                if var[key].ub is not None: value = min(value, var[key].ub)
+            var[key].set_value(value, skip_validation=True)
+            info['variables'] += 1
+    add_warm_start_suffixes(model, export=True)
+    df = _read_file(f'{path}/Dual{suffix}__res.csv')
+    if df is not None:
+        for name, key, value in zip(df['Con'], df['Index'], df['Value']):
+            con = model.component(name)
+            key = None if con is None else _parse_key(key, con)
+            if key is None: continue
+            model.dual[con[key]] = value
+            info['dual'] += 1
+    df = _read_file(f'{path}/Bound{suffix}__res.csv')
+    if df is not None:
+        for name, key, lower, upper in zip(df['Var'], df['Index'], df['zL'], df['zU']):
+            var = model.component(name)
+            key = None if var is None else _parse_key(key, var)
+            if key is None: continue
+            model.ipopt_zL_in[var[key]] = lower
+            model.ipopt_zU_in[var[key]] = upper
+            info['bound'] += 1
+    return info
+
+def max_violation(model):
+    '''
+        Está función calcula la máxima violación de las restricciones activas y de los bounds en el punto actual
+        input
+            model: modelo de pyomo (ConcreteModel)
+        return
+            float: máxima violación, inf si alguna variable no tiene valor
+    '''
+    violation = 0.0
+    for var in model.component_data_objects(pyomo.Var, active=True):
+        if var.value is None: return float('inf')
+        if var.lb is not None: violation = max(violation, var.lb - var.value)
+        if var.ub is not None: violation = max(violation, var.value - var.ub)
+    for con in model.component_data_objects(pyomo.Constraint, active=True):
+        body = pyomo.value(con.body, exception=False)
+        if body is None: return float('inf')
+        if con.has_lb(): violation = max(violation, pyomo.value(con.lower) - body)
+        if con.has_ub(): violation = max(violation, body - pyomo.value(con.upper))
+    return violation
+
+def warm_start_options(model, family, feas_tol=1e-6):
+    '''
+        Está función arma las opciones de arranque en caliente de la familia del backend, para bonmin si el punto
+        cargado (con su asignación entera) es factible en el modelo actual su objetivo se pasa como incumbente
+        (bonmin.cutoff) y se podan los nodos que no lo mejoran
+        input
+            model: modelo de pyomo (ConcreteModel) con el punto de arranque cargado
+            family: familia del backend, ej: ipopt, bonmin
+            feas_tol: violación máxima para aceptar el punto como incumbente
+        return
+            dict: opciones del solver
+    '''
+    options = dict(WARM_START_OPTIONS.get(family, {}))
+    if family == 'bonmin' and max_violation(model) <= feas_tol:
+        obj = next(model.component_data_objects(pyomo.Objective, active=True))
+        value = pyomo.value(obj)
+        options['bonmin.cutoff'] = value + feas_tol * max(1.0, abs(value))
+    return options
@@ -0,0 +1,11 @@
+from _source.temporal_admm import TemporalADMM
+print('\n***Inicia la descomposición temporal ADMM***\n')
+
+system_name = ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0]
+
+#** ------- Resolvemos las 24 horas en paralelo con ADMM ----------#
+admm = TemporalADMM(system_name, backend='bonmin_oa', rho=1.0, max_iter=50, tol=1e-3, print_sec=True)
+is_solve = admm.run()
+
+#** ----------------- Exportando las variables -------------------#
+if is_solve: admm.save_model_variables()
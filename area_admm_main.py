@@ -0,0 +1,12 @@
+from _source.area_admm import AreaADMM
+print('\n***Inicia la coordinación de áreas ADMM***\n')
+
+system_name = ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0]
+
+#** ---- Coordinamos las áreas por sus fronteras con ADMM ---------#
+# cada iteración resuelve las áreas en paralelo e intercambia voltaje y potencia de frontera
+admm = AreaADMM(system_name, backend='bonmin_oa', rho=1.0, max_iter=50, tol=1e-3, print_sec=True)
+
+#** ----------------- Exportando las variables -------------------#
+# las variables de cada área quedan en ResultadosAreas/{system} y la historia en AreaAdmm__res.csv
+is_solve = admm.run()
@@ -0,0 +1,53 @@
+import os
+import time
+from pandas import DataFrame
+from _source.area_model import build_area_model
+print('\n***Inicia el benchmark de actualización de valores de las áreas***\n')
+
+# get_equivalent de pandapower 2.10.1 (requirements.txt) no reduce las áreas 1 y 2 de ieee39
+systems = {'ieee9': [1, 2], 'ieee39': [3]}
+repeats = 20
+
+def get_time(update, repeats):
+    '''
+        Está función entrega el tiempo promedio de una actualización, la primera llamada arma los diccionarios o
+        las tablas de datos y no se cuenta
+        input
+            update: función sin argumentos
+            repeats: número de repeticiones
+        return
+            float: tiempo promedio en segundos
+    '''
+    update()
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        update()
+    return (time.perf_counter() - t0)/repeats
+
+results = []
+for system_name, areas in systems.items():
+    for area in areas:
+        #** ---------- Creamos el modelo y los valores del área ----------#
+        model, system = build_area_model(system_name, area)
+        system_values = system._get_values_from_system(area)
+        adjust_values = system._get_adjust_values()
+        #** ------ Actualizamos con los ciclos por índice y en bloque ------#
+        for bulk in [False, True]:
+            results.append({
+                'system': system_name,
+                'area': area,
+                'bulk': bulk,
+                'variables': model.model.nvariables(),
+                'variables_s': get_time(lambda: model._set_variables_model(system_values, bulk=bulk), repeats),
+                'adjust_s': get_time(lambda: model._set_adjust_values(adjust_values, bulk=bulk), repeats),
+            })
+            print(results[-1])
+
+#** ----------------- Exportando los resultados -------------------#
+os.makedirs('Resultados', exist_ok=True)
+df = DataFrame(results)
+df['total_s'] = df['variables_s'] + df['adjust_s']
+# speedup respecto a los ciclos por índice (bulk False) del mismo área
+df['speedup'] = df.groupby(['system', 'area'])['total_s'].transform('first')/df['total_s']
+df.to_csv('Resultados/benchmark_bulk_update.csv', index=False)
+print(df.to_string(index=False))
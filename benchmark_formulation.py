@@ -0,0 +1,102 @@
+import os
+import re
+import time
+from pandas import DataFrame
+from _source.model import CreateModel
+from _source.system import GetVariablesSystem
+from _source.solver_backends import SOLVER_BACKENDS, PYTHON_SOLVERS, find_executable
+print('\n***Inicia el benchmark de formulaciones***\n')
+
+systems = ['ieee9', 'ieee39', 'ieee57', 'ieee118']
+formulations = ['abs', 'square']
+# backends de solver_backends, los solvers AMPL cuentan las iteraciones del registro y los de python las entregan,
+# native (python) corre aunque no estén los ejecutables AMPL, resuelve la relajación continua con ipopt si cyipopt
+# está instalado y de lo contrario con trust-constr (columna method)
+# 'square' no tiene el mismo conjunto factible que 'abs': A**2 - B**2 <= error**2 deja |A| - |B| <= error**2/(|A| + |B|)
+backends, profile = ['bonmin_oa', 'native'], 'tight_final'
+
+def is_available(backend):
+    '''
+        Está función revisa si el solver del backend se puede correr, los solvers AMPL necesitan su ejecutable
+        input
+            backend: nombre del backend del registro
+        return
+            bool: True si el backend está disponible
+    '''
+    solver = SOLVER_BACKENDS[backend]['solver']
+    return solver in PYTHON_SOLVERS or os.path.exists(find_executable(solver))
+
+for backend in [backend for backend in backends if not is_available(backend)]:
+    print(f'No se encontró el ejecutable de {backend}, no se incluye en el benchmark')
+backends = [backend for backend in backends if is_available(backend)]
+
+def get_iterations(log_file):
+    '''
+        Está función suma las iteraciones de todos los NLP que resolvió bonmin (salida de ipopt en output_file)
+        input
+            log_file: archivo de registro del solver
+        return
+            int: número total de iteraciones
+    '''
+    if not os.path.exists(log_file): return None
+    with open(log_file) as f:
+        return sum(int(n) for n in re.findall(r'Number of Iterations\.*:\s*(\d+)', f.read()))
+
+results = []
+for system_name in systems:
+    #** ------------ Creamos las variables del sistema ---------------#
+    system = GetVariablesSystem(system_name, print_sec=False)
+    system_param = system._get_param_from_system()
+    system_values = system._get_values_from_system(mode='batch')
+    genstatus = system._get_genstatus()
+    ratio_line = system._get_ratio_line()
+    ratio_trafo = system._get_ratio_trafo()
+    g, b = system._get_conductance_susceptance()
+    demandbidmap = system._get_demandbidmap()
+    adjust_values = system._get_adjust_values()
+    for backend, formulation in [(backend, formulation) for backend in backends for formulation in formulations]:
+        #** ---------- Creamos el modelo con cada formulación ------------#
+        t0 = time.perf_counter()
+        model = CreateModel(system_param, system_values, adjust_values, formulation=formulation)
+        model.init_model()
+        model._add_var_p_line()
+        model._add_var_q_line()
+        model._add_var_v_bus()
+        model._add_var_theta_bus()
+        model._add_var_p_gen()
+        model._add_var_q_gen()
+        model._add_var_Shunt_bus()
+        model._add_var_pd_elastic(demandbidmap)
+        model._add_var_slack_variable()
+        model._add_power_s_constraint(ratio_line)
+        model._add_power_p_constraint(g, b)
+        model._add_power_q_constraint(g, b)
+        model._add_p_balanced_constraint(genstatus, demandbidmap)
+        model._add_q_balanced_constraint(genstatus, demandbidmap)
+        model._add_function_obj()
+        build = time.perf_counter() - t0
+        #** ------------------- Resolver el modelo -----------------------#
+        if os.path.exists('bonmin.log'): os.remove('bonmin.log')
+        is_solve = model.solve_model(persistent=True, backend=backend, profile=profile)
+        info = model.solver_info
+        results.append({
+            'system': system_name,
+            'formulation': formulation,
+            'backend': backend,
+            'method': info.get('method'),
+            'variables': model.model.nvariables(),
+            'constraints': model.model.nconstraints(),
+            'solved': is_solve,
+            'iterations': info.get('iterations') or get_iterations(info['options'].get('output_file', 'bonmin.log')),
+            'objective': model.model.obj() if is_solve else None,
+            'build_s': build,
+            'write_s': info.get('write'),
+            'solve_s': info.get('solve'),
+            'load_s': info.get('load'),
+        })
+        print(results[-1])
+
+#** ----------------- Exportando los resultados -------------------#
+os.makedirs('Resultados', exist_ok=True)
+DataFrame(results).to_csv('Resultados/benchmark_formulation.csv', index=False)
+print(DataFrame(results).to_string(index=False))
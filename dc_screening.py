@@ -0,0 +1,37 @@
+from _source.dc_model import CreateDCModel
+from _source.model import build_model
+from _source.system import GetVariablesSystem
+print('\n***Inicia el screening DC***\n')
+
+system_name = ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0]
+
+#** ------------ Creamos las variables del sistema ---------------#
+system = GetVariablesSystem(system_name, print_sec=False)
+system_param = system._get_param_from_system()
+system_values = system._get_values_from_system(mode='batch')
+genstatus = system._get_genstatus()
+ratio_line = system._get_ratio_line()
+g, b = system._get_conductance_susceptance()
+g_trafo, b_trafo = system._get_trafo_conductance_susceptance()
+
+#** ------------------ Creamos el modelo DC -----------------------#
+dc_model = CreateDCModel(system_param, system_values, print_sec=True)
+dc_model.init_model()
+dc_model._add_var_dc(ratio_line)
+dc_model._add_dc_flow_constraint(b, b_trafo)
+dc_model._add_dc_balance_constraint(genstatus)
+dc_model._add_function_obj()
+
+#** --------------- Resolver y revisar las horas ------------------#
+is_solve = dc_model.solve_model(backend='highs')
+if is_solve:
+    screening = dc_model.screen_hours()
+    print(screening.to_string(index=False))
+    dc_model.save_model_variables()
+
+#** -------- Modelo AC con la solución DC como punto inicial -------#
+if is_solve and screening['feasible'].all():
+    model, _ = build_model(system_name, print_sec=True)
+    dc_model.warm_start(model)
+    is_solve = model.solve_model()
+    if is_solve: model.save_model_variables()
@@ -2,6 +2,9 @@ from _source.model import CreateModel
 from _source.system import GetVariablesSystem
 print('\n***Inicia el script***\n')
 
+# si es True el modelo arranca desde los resultados de la corrida anterior en Resultados/{system}
+warm_start = False
+
 #** istanciamos la clase para obtener las variables del sistema
 system = GetVariablesSystem(
     ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0], 
@@ -10,7 +13,7 @@ system = GetVariablesSystem(
 
 #** ------------ Creamos las variables del sistema ---------------#
 system_param = system._get_param_from_system()
-system_values = system._get_values_from_system()
+system_values = system._get_values_from_system(mode='batch')
 genstatus = system._get_genstatus()
 ratio_line = system._get_ratio_line()
 ratio_trafo = system._get_ratio_trafo()
@@ -30,7 +33,7 @@ model._add_var_theta_bus()
 model._add_var_p_gen()
 model._add_var_q_gen()
 model._add_var_Shunt_bus()
-model._add_var_pd_elastic()
+model._add_var_pd_elastic(demandbidmap)
 model._add_var_slack_variable()
 
 #** ---------- Agregamos las restricciones del modelo ------------#
@@ -43,6 +46,9 @@ model._add_q_balanced_constraint(genstatus, demandbidmap)
 #** ------------- Agregamos la función objetivo ------------------#
 model._add_function_obj()
 
+#** ---- Arranque en caliente con los resultados anteriores ------#
+if warm_start: model.load_warm_start()
+
 #** ------------------- Resolver el modelo -----------------------#
 is_solve = model.solve_model()
 
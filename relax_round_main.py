@@ -0,0 +1,11 @@
+from _source.relax_round import RelaxAndRound
+print('\n***Inicia el relax-and-round de shunts y taps***\n')
+
+system_name = ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0]
+
+#** ---- Relajación, redondeo y búsqueda en la vecindad en paralelo ----#
+heuristic = RelaxAndRound(system_name, backend='ipopt', candidates=4, max_rounds=5, print_sec=True)
+is_solve = heuristic.run()
+
+#** ----------------- Exportando las variables -------------------#
+if is_solve: heuristic.save_model_variables()
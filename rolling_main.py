@@ -0,0 +1,9 @@
+from _source.rolling_horizon import RollingHorizon
+print('\n***Inicia el despacho con horizonte rodante***\n')
+
+system_name = ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0]
+
+#** ---- Ventanas de 24 horas cada 6 horas durante una semana ----#
+rolling = RollingHorizon(system_name, total_hours=168, window=24, step=6, backend='bonmin_oa', print_sec=True)
+is_solve = rolling.run()
+print(f'\nTodas las ventanas resueltas: {is_solve}')
@@ -0,0 +1,37 @@
+from _source.model import build_model
+from _source.socp_model import CreateSOCPModel
+print('\n***Inicia la relajación SOCP***\n')
+
+system_name = ['ieee9', 'ieee39', 'ieee57', 'ieee118'][0]
+
+#** ----------- Creamos el sistema y el modelo AC -----------------#
+model, system = build_model(system_name, print_sec=False)
+ratio_line = system._get_ratio_line()
+g, b = system._get_conductance_susceptance()
+genstatus, demandbidmap = system._get_genstatus(), system._get_demandbidmap()
+
+#** --------------- Creamos la relajación SOCP --------------------#
+relaxation = CreateSOCPModel(model.system_param, model.system_values, model.adjust_values, print_sec=True,
+                             hours=model.hours, int_index=model.int_index, sparse_index=model.sparse_index)
+relaxation.init_model()
+relaxation._add_var_socp(demandbidmap)
+relaxation._add_relaxation_constraint()
+relaxation._add_power_s_constraint(ratio_line)
+relaxation._add_power_p_constraint(g, b)
+relaxation._add_power_q_constraint(g, b)
+relaxation._add_p_balanced_constraint(genstatus, demandbidmap)
+relaxation._add_q_balanced_constraint(genstatus, demandbidmap)
+relaxation._add_function_obj()
+relaxation._lift_from(model)
+
+#** ---- Resolver la relajación y pasar la cota y el punto al AC ---#
+is_solve = relaxation.solve_model(backend='ipopt')
+if is_solve:
+    relaxation.warm_start(model, bound=True)
+    is_solve = model.solve_model()
+
+#** --------- Brecha de optimalidad y exportar resultados ----------#
+if is_solve:
+    relaxation.gap_report(model)
+    relaxation.save_model_variables()
+    model.save_model_variables()
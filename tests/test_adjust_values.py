@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+from _source import system as full_system
+from _source import area_system
+from _source.adjust_values import get_adjust_values
+
+def reference_adjust_values(system_param, system_values, genstatus, g, b, ratio_line, hours, ward_bus=None):
+    '''
+        Está función es el _get_adjust_values anterior (ciclos por rama, barra y hora), es la referencia de
+        get_adjust_values
+        input
+            system_param, system_values, genstatus, g, b, ratio_line: valores del sistema o del área
+            hours: lista de horas
+            ward_bus: barras de frontera del área, su ward inicial se resta del balance
+        return
+            dict: ajustes de las ecuaciones de igualdad
+    '''
+    values = dict((name, system_values[name]) for name in system_values)
+    v, theta = values['init_bus_v'], values['init_bus_theta']
+    adj_slimit_sij, adj_line_pij, adj_line_qij, adj_line_pji, adj_line_qji = {}, {}, {}, {}, {}
+    for t in hours:
+        for ij in system_param.get('ij'):
+            i, j = ij.split('-')
+            s_v1 = ratio_line[ij]**2
+            s_v2 = values['init_line_pij'][ij, t]**2 + values['init_line_qij'][ij, t]**2
+            signo_sij = -1 if (s_v1>0 and s_v2<0 or s_v1<0 and s_v2>0) else 1
+            adj_slimit_sij[(ij, t)] = abs(s_v2/s_v1)*signo_sij
+            adj_line_pij[(ij, t)] = (g[ij]*v[i, t]**2 - v[i, t]*v[j, t]*(g[ij]*np.cos(theta[i, t] - theta[j, t])
+                                     + b[ij]*np.sin(theta[i, t] - theta[j, t])) - values['init_line_pij'][ij, t])
+            adj_line_qij[(ij, t)] = (-v[i, t]**2*b[ij] - v[i, t]*v[j, t]*(g[ij]*np.sin(theta[i, t] - theta[j, t])
+                                     - b[ij]*np.cos(theta[i, t] - theta[j, t])) - values['init_line_qij'][ij, t])
+        for ji in system_param.get('ji'):
+            j, i = ji.split('-')
+            adj_line_pji[(ji, t)] = (g[ji]*v[j, t]**2 - v[j, t]*v[i, t]*(g[ji]*np.cos(theta[j, t] - theta[i, t])
+                                     + b[ji]*np.sin(theta[j, t] - theta[i, t])) - values['init_line_pji'][ji, t])
+            adj_line_qji[(ji, t)] = (-v[i, t]**2*b[ji] - v[j, t]*v[i, t]*(g[ji]*np.sin(theta[i, t] - theta[j, t])
+                                     - b[ji]*np.cos(theta[i, t] - theta[j, t])) - values['init_line_qji'][ji, t])
+    adj_p_balance, adj_q_balance = {}, {}
+    for t in hours:
+        for bus in system_param.get('bus'):
+            flows = (sum(values['init_line_pij'][ij, t] for ij in system_param.get('branchij_bus').get(bus, {}))
+                     + sum(values['init_line_pji'][ji, t] for ji in system_param.get('branchji_bus').get(bus, {}))
+                     + v[bus, t]**2)
+            for adj, gen_name, slack_name, demand, ward in [(adj_p_balance, 'init_gen_p', 'init_slack_p', 'Pd', 'bus_ward_p'),
+                                                            (adj_q_balance, 'init_gen_q', 'init_slack_q', 'Qd', 'bus_ward_q')]:
+                adj[(bus, t)] = (
+                    sum(values[gen_name][gen, t] for gen in system_param.get('gen')
+                        if system_param.get('atBus').get((gen, bus)) and genstatus.get((gen, bus)))
+                    + sum(values[slack_name][gen, t] for gen in system_param.get('slack')
+                          if system_param.get('atBusSlack').get((gen, bus)))
+                    - (values[demand].get((bus, t)) if values[demand].get((bus, t)) else 0)
+                    - (values[ward].get((bus, t), 0) if ward_bus and ward_bus.get(bus) else 0)
+                    - flows
+                )
+    return {
+        'adj_line_pij': adj_line_pij,
+        'adj_line_pji': adj_line_pji,
+        'adj_line_qij': adj_line_qij,
+        'adj_line_qji': adj_line_qji,
+        'adj_slimit_sij': adj_slimit_sij,
+        'adj_p_balance': adj_p_balance,
+        'adj_q_balance': adj_q_balance,
+    }
+
+def get_system(name):
+    system = full_system.GetVariablesSystem(name)
+    system._get_param_from_system()
+    system._get_values_from_system(mode='batch')
+    system._get_genstatus()
+    system._get_ratio_line()
+    system._get_conductance_susceptance()
+    return system, list(range(1, len(system.hours)+1))
+
+def get_area(name, area, horizon=None):
+    system = area_system.GetVariablesSystem(name)
+    if horizon: system._set_hours(horizon)
+    net_eq = system._get_ward_eq_from_system(area)
+    system._get_param_from_system(net_eq)
+    system._get_genstatus(net_eq)
+    system._get_ratio_line(net_eq)
+    system._get_conductance_susceptance(net_eq)
+    system._get_values_from_system(area)
+    return system, list(range(1, len(system.hours)+1))
+
+def assert_same(new, reference):
+    assert sorted(new) == sorted(reference)
+    for name, values in reference.items():
+        assert set(new[name]) == set(values), name
+        keys = list(values)
+        np.testing.assert_allclose([new[name][key] for key in keys], [values[key] for key in keys],
+                                   rtol=1e-12, atol=1e-12, err_msg=name)
+
+@pytest.mark.parametrize('name', ['ieee9', 'ieee39'])
+def test_system_adjust_values(name):
+    system, hours = get_system(name)
+    reference = reference_adjust_values(system.system_param, system.system_values, system.genstatus,
+                                        system.g, system.b, system.ratio_line, hours)
+    assert_same(system._get_adjust_values(), reference)
+
+# get_equivalent de pandapower 2.10.1 (requirements.txt) no reduce el área 1 de ieee39, ni en el sistema base
+@pytest.mark.parametrize('name, area', [('ieee9', 1), ('ieee9', 2), ('ieee39', 3),
+                                        pytest.param('ieee39', 1, marks=pytest.mark.xfail(raises=UserWarning))])
+def test_area_adjust_values(name, area):
+    system, hours = get_area(name, area)
+    reference = reference_adjust_values(system.system_param, system.system_values, system.genstatus,
+                                        system.g, system.b, system.ratio_line, hours, system.system_param['ward_bus'])
+    assert_same(system._get_adjust_values(), reference)
+
+def test_area_long_horizon():
+    system, hours = get_area('ieee9', 1, horizon=range(1, 31))
+    assert hours == list(range(1, 31))
+    assert system.system_param['hours'] == hours
+    reference = reference_adjust_values(system.system_param, system.system_values, system.genstatus,
+                                        system.g, system.b, system.ratio_line, hours, system.system_param['ward_bus'])
+    assert_same(system._get_adjust_values(), reference)
+    # el perfil de carga se repite cada 24 horas
+    pd = system.system_values['Pd']
+    assert all(pd[bus, t + 24] == pd[bus, t] for bus, t in pd if t <= 6)
+
+def test_dict_values():
+    system, hours = get_system('ieee9')
+    values = dict((name, system.system_values[name]) for name in system.system_values)
+    reference = reference_adjust_values(system.system_param, values, system.genstatus,
+                                        system.g, system.b, system.ratio_line, hours)
+    assert_same(get_adjust_values(system.system_param, values, system.genstatus, system.g, system.b,
+                                  system.ratio_line, hours), reference)
@@ -0,0 +1,12 @@
+import numpy as np
+from _source.area_admm import AreaADMM
+
+def test_area_admm_primal_decreases(tmp_path, monkeypatch):
+    # AreaAdmm__res.csv se escribe en ResultadosAreas/ de la carpeta actual
+    monkeypatch.chdir(tmp_path)
+    admm = AreaADMM('ieee9', backend='slp', max_iter=3, processes=1, work_dir=str(tmp_path))
+    admm.run()
+    primal = [info['primal'] for info in admm.history]
+    assert len(primal) == 3
+    assert np.all(np.diff(primal) < 0), primal
+    assert (tmp_path / 'ResultadosAreas' / 'ieee9' / 'AreaAdmm__res.csv').exists()
@@ -0,0 +1,21 @@
+import pyomo.environ as pyomo
+from _source.area_model import build_area_model
+
+def model_state(model):
+    '''
+        Valores y bounds de todas las variables y valores de todos los parámetros del modelo
+    '''
+    state = dict((var.name, (var.value, var.lb, var.ub)) for var in model.component_data_objects(pyomo.Var))
+    state.update((param.name, param.value) for param in model.component_data_objects(pyomo.Param))
+    return state
+
+def test_bulk_same_as_loops():
+    states = []
+    for bulk in [False, True]:
+        model, system = build_area_model('ieee9', 1)
+        system_values = system._get_values_from_system(1)
+        adjust_values = system._get_adjust_values()
+        model._set_variables_model(system_values, bulk=bulk)
+        model._set_adjust_values(adjust_values, bulk=bulk)
+        states.append(model_state(model.model))
+    assert states[0] == states[1]
@@ -0,0 +1,24 @@
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from _source.boundary_store import BoundaryStore
+from _source import area_admm
+
+def write_area(spec, area, value):
+    '''
+        Se conecta al store desde el proceso igual que _init_area_admm_worker y escribe la capa x del área
+    '''
+    area_admm._area_store = BoundaryStore.attach(spec)
+    area_admm._area_store.view('x', area)[:] = value
+    area_admm._close_area_store()
+    return area_admm._area_store is None
+
+def test_worker_writes_parent_reads():
+    store = BoundaryStore([1, 2], [0, 3, 5], [1, 2], layers=('x', 'z', 'u'))
+    try:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(write_area, store.spec, 2, 1.5).result()
+        assert np.all(store.view('x', 2) == 1.5)
+        assert np.all(store.view('x', 1) == 0)
+        assert np.all(store.layer('z') == 0) and np.all(store.layer('u') == 0)
+    finally:
+        store.close()
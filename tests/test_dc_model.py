@@ -0,0 +1,31 @@
+import pyomo.environ as pyomo
+from _source.dc_model import CreateDCModel
+from _source.model import build_model, load_system_data
+
+def ac_accepted_hours(model):
+    '''
+        Horas en las que el punto del flujo de carga cumple el balance de potencia activa y el límite de potencia
+        aparente del modelo AC, V_Gs = 1 es el valor con el que se calculan los ajustes del balance
+    '''
+    for var in model.model.V_Gs.values(): var.set_value(1)
+    rejected = set()
+    for name in ['c_BalanceP', 'line_s_limit']:
+        for index, constraint in getattr(model.model, name).items():
+            if pyomo.value(constraint.body) > pyomo.value(constraint.upper) + 1e-6: rejected.add(index[-1])
+    return [t for t in model.model.t if t not in rejected]
+
+def test_screening_keeps_ac_hours():
+    system, data = load_system_data('ieee39')
+    model, _ = build_model('ieee39', data=data)
+    accepted = ac_accepted_hours(model)
+    assert accepted
+    _, b_trafo = system._get_trafo_conductance_susceptance()
+    dc_model = CreateDCModel(data['system_param'], data['system_values'])
+    dc_model.init_model()
+    dc_model._add_var_dc(data['ratio_line'])
+    dc_model._add_dc_flow_constraint(data['b'], b_trafo)
+    dc_model._add_dc_balance_constraint(data['genstatus'])
+    dc_model._add_function_obj()
+    assert dc_model.solve_model(backend='highs')
+    screening = dc_model.screen_hours().set_index('t')
+    assert screening.loc[accepted, 'feasible'].all(), screening.loc[accepted]
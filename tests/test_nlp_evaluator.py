@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+import pyomo.environ as pyomo
+from pyomo.core.expr.calculus.derivatives import differentiate
+from _source.model import build_model
+from _source.nlp_evaluator import NLPEvaluator
+
+def get_evaluator(formulation):
+    '''
+        Está función crea el evaluador de ieee9 en un punto perturbado, lejos de los ceros de abs()
+        input
+            formulation: 'abs' o 'square'
+        return
+            NLPEvaluator, ndarray: evaluador y punto
+    '''
+    model, _ = build_model('ieee9', formulation=formulation, hours=[1, 2])
+    evaluator = NLPEvaluator(model)
+    rng = np.random.default_rng(0)
+    x = evaluator.x0 + 0.05*rng.standard_normal(evaluator.n)
+    evaluator.set_x(x)
+    return evaluator, x
+
+def pyomo_rows(evaluator):
+    '''
+        Está función entrega las restricciones de Pyomo en el orden de las filas del evaluador
+        input
+            evaluator: NLPEvaluator
+        return
+            list: restricciones de Pyomo por fila
+    '''
+    cm, model = evaluator.cm, evaluator.model
+    labels = {'ij': cm.ij_list, 'ji': cm.ji_list}
+    rows = []
+    for block in evaluator.blocks:
+        name = block['name']
+        keys = labels.get(name[-2:], cm.bus_list) if name != 'line_s_limit' else cm.ij_list
+        component = getattr(model, name)
+        rows += [component[label, t] for label in keys for t in evaluator.T]
+    return rows
+
+@pytest.mark.parametrize('formulation', ['abs', 'square'])
+def test_residuals_and_jacobian(formulation):
+    evaluator, x = get_evaluator(formulation)
+    rows = pyomo_rows(evaluator)
+    assert len(rows) == evaluator.m
+    # misma holgura respecto al límite superior de cada restricción
+    g = evaluator.constraints(x) - evaluator.cu
+    reference = np.array([pyomo.value(con.body) - pyomo.value(con.upper) for con in rows])
+    np.testing.assert_allclose(g, reference, rtol=1e-10, atol=1e-10)
+    J = evaluator.jacobian_matrix(x).toarray()
+    reference = np.zeros_like(J)
+    for k, con in enumerate(rows):
+        reference[k] = differentiate(con.body, wrt_list=evaluator.variables)
+    np.testing.assert_allclose(J, reference, rtol=1e-10, atol=1e-10)
+
+@pytest.mark.parametrize('formulation', ['abs', 'square'])
+def test_hessian_finite_differences(formulation):
+    evaluator, x = get_evaluator(formulation)
+    rng = np.random.default_rng(1)
+    lagrange, d, eps = rng.standard_normal(evaluator.m), rng.standard_normal(evaluator.n), 1e-6
+    def gradient(x):
+        return 0.5*evaluator.gradient(x) + evaluator.jacobian_matrix(x).T @ lagrange
+    H = evaluator.hessian_matrix(x, lagrange, obj_factor=0.5)
+    reference = (gradient(x + eps*d) - gradient(x - eps*d))/(2*eps)
+    np.testing.assert_allclose(H @ d, reference, rtol=1e-6, atol=1e-6)
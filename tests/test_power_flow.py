@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from _source.system import GetVariablesSystem
+
+NAMES = ['init_bus_v', 'init_bus_theta', 'init_line_pij', 'init_line_qij', 'init_line_pji', 'init_line_qji',
+         'init_gen_p', 'init_gen_q', 'init_slack_p', 'init_slack_q', 'Pd', 'Qd']
+
+def get_values(name, mode):
+    system = GetVariablesSystem(name)
+    system._get_param_from_system()
+    return system._get_values_from_system(mode=mode, processes=2)
+
+@pytest.fixture(scope='module')
+def serial():
+    return get_values('ieee9', 'serial')
+
+@pytest.mark.parametrize('mode', ['batch', 'pool'])
+def test_same_values_as_serial(serial, mode):
+    values = get_values('ieee9', mode)
+    for name in NAMES:
+        reference = serial[name]
+        assert set(values[name]) == set(reference), name
+        keys = list(reference)
+        np.testing.assert_allclose([values[name][key] for key in keys], [reference[key] for key in keys],
+                                   rtol=1e-8, atol=1e-8, err_msg=name)
@@ -0,0 +1,25 @@
+import pyomo.environ as pyomo
+from _source.scipy_solver import ScipySolver
+
+def test_fractional_integers_are_rounded():
+    model = pyomo.ConcreteModel()
+    model.x = pyomo.Var(within=pyomo.Integers, bounds=(0, 3), initialize=0)
+    model.y = pyomo.Var(bounds=(0, 3), initialize=0)
+    model.c = pyomo.Constraint(expr=model.y >= 0.2)
+    model.obj = pyomo.Objective(expr=(model.x - 1.4)**2 + (model.y - model.x)**2)
+    solver = ScipySolver(model)
+    assert solver.solve()
+    # la relajación deja x = 1.4, se redondea a 1, se fija y se resuelve y
+    assert solver.timing['rounded'] == 1
+    assert model.x.value == 1 and not model.x.fixed
+    assert abs(model.y.value - 1) < 1e-4
+
+def test_continuous_model_is_not_rounded():
+    model = pyomo.ConcreteModel()
+    model.y = pyomo.Var(bounds=(0, 3), initialize=0)
+    model.c = pyomo.Constraint(expr=model.y >= 0.2)
+    model.obj = pyomo.Objective(expr=(model.y - 1.4)**2)
+    solver = ScipySolver(model)
+    assert solver.solve()
+    assert solver.timing['rounded'] == 0
+    assert abs(model.y.value - 1.4) < 1e-4
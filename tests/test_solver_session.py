@@ -0,0 +1,126 @@
+import shutil
+import pytest
+import pyomo.environ as pyomo
+from _source.model import build_model
+from _source.solver_session import SolverSession
+
+def small_model():
+    m = pyomo.ConcreteModel()
+    m.x = pyomo.Var(range(3), bounds=(0, 5), initialize=1)
+    m.p = pyomo.Param(range(3), mutable=True, initialize=2)
+    m.c = pyomo.Constraint(range(3), rule=lambda m, i: m.x[i]*m.p[i] >= m.p[i]**2)
+    m.obj = pyomo.Objective(expr=sum((m.x[i] - m.p[i])**2 for i in range(3)))
+    return m
+
+def session(model, tmp_path, name):
+    return SolverSession(model, 'solver/bonmin', backend='nl', work_dir=str(tmp_path), name=name, tee=False)
+
+def assert_fresh(model, current, tmp_path):
+    '''
+        Está función compara el archivo NL de la sesión con el de una sesión nueva sobre el mismo modelo
+        input
+            model: modelo de pyomo
+            current: SolverSession ya usada
+            tmp_path: carpeta de la prueba
+        return
+            None
+    '''
+    fresh = session(model, tmp_path, 'fresh')
+    assert fresh._write() == 'full'
+    with open(current.nl_file) as f, open(fresh.nl_file) as g:
+        assert f.read() == g.read()
+
+def test_param_change_rewrites_segments(tmp_path):
+    m = small_model()
+    s = session(m, tmp_path, 'session')
+    assert s._write() == 'full'
+    m.p[1] = 3
+    assert s._write() == 'x+b'
+    assert s._write() == 'none'
+    assert_fresh(m, s, tmp_path)
+
+def test_fixed_variable_is_pinned_column(tmp_path):
+    m = small_model()
+    s = session(m, tmp_path, 'session')
+    s._write()
+    m.x[0].fix(4)
+    assert s._write() != 'full'
+    assert m.x[0].fixed and m.x[0] in s.columns
+    assert_fresh(m, s, tmp_path)
+    m.x[0].unfix()
+    assert s._write() == 'b'
+    assert_fresh(m, s, tmp_path)
+
+def test_active_change_rewrites_full(tmp_path):
+    m = small_model()
+    s = session(m, tmp_path, 'session')
+    s._write()
+    m.c[2].deactivate()
+    assert s._write() == 'full'
+    assert_fresh(m, s, tmp_path)
+
+def test_prepare_writes_before_solve(tmp_path):
+    m = small_model()
+    s = session(m, tmp_path, 'session')
+    assert s.prepare() == 'full'
+    assert s._write() == 'none'
+    assert_fresh(m, s, tmp_path)
+
+def test_domain_change_rewrites_full(tmp_path):
+    m = small_model()
+    s = session(m, tmp_path, 'session')
+    s._write()
+    m.x[1].domain = pyomo.Integers
+    assert s._write() == 'full'
+    assert_fresh(m, s, tmp_path)
+    m.x[1].domain = pyomo.Reals
+    assert s._write() == 'full'
+    assert_fresh(m, s, tmp_path)
+
+def test_load_solution_to_model(tmp_path):
+    m = small_model()
+    m.dual = pyomo.Suffix(direction=pyomo.Suffix.IMPORT)
+    s = session(m, tmp_path, 'session')
+    s._write()
+    duals = [0.5, 1.5, 2.5]
+    primals = [3.0 if var.parent_component() is m.x else var.value for var in s.columns]
+    # archivo .sol con el formato de los solvers AMPL (duales y luego primales en el orden del archivo NL)
+    with open(s.sol_file, 'w') as f:
+        f.write('\nOptions\n3\n1\n1\n0\n')
+        f.write(f'{len(duals)}\n{len(duals)}\n{len(primals)}\n{len(primals)}\n')
+        f.write(''.join(f'{value}\n' for value in duals + primals))
+        f.write('objno 0 0\n')
+    assert s._load_solution()
+    assert [m.x[i].value for i in range(3)] == [3.0, 3.0, 3.0]
+    assert sorted(m.dual[m.c[i]] for i in range(3)) == duals
+
+def test_model_param_update(tmp_path):
+    model, _ = build_model('ieee9', mutable_param=True, hours=[1])
+    m = model.model
+    s = session(m, tmp_path, 'session')
+    assert s._write() == 'full'
+    for key in m.Pd:
+        m.Pd[key] = 1.1*m.Pd[key].value
+    next(iter(m.V_Shunt.values())).fix(1)
+    assert s._write() != 'full'
+    assert_fresh(m, s, tmp_path)
+
+@pytest.mark.skipif(shutil.which('ipopt') is not None, reason='ipopt está instalado')
+def test_appsi_without_ipopt(tmp_path):
+    m = small_model()
+    with pytest.raises(RuntimeError):
+        SolverSession(m, 'ipopt', backend='appsi', work_dir=str(tmp_path), tee=False)
+    assert SolverSession(m, 'ipopt', backend='auto', work_dir=str(tmp_path), tee=False).backend == 'nl'
+
+@pytest.mark.skipif(shutil.which('ipopt') is None, reason='ipopt no está instalado')
+def test_appsi_param_update(tmp_path):
+    m = small_model()
+    s = SolverSession(m, 'ipopt', backend='appsi', work_dir=str(tmp_path), tee=False)
+    assert s.backend == 'appsi'
+    assert s.solve()
+    assert m.x[1].value == pytest.approx(2, abs=1e-6)
+    m.p[1] = 3
+    s.options = {'tol': 1e-10}
+    assert s.solve()
+    assert m.x[1].value == pytest.approx(3, abs=1e-6)
+    assert s.timing['rewrite'] == 'appsi'
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+from _source.area_system import GetVariablesSystem
+
+def get_values(name, area, equivalent):
+    system = GetVariablesSystem(name)
+    net_eq = system._get_ward_eq_from_system(area)
+    system._get_param_from_system(net_eq)
+    return system._get_values_from_system(area, equivalent=equivalent)
+
+@pytest.mark.parametrize('name, area', [('ieee9', 1), ('ieee9', 2), ('ieee39', 3)])
+def test_cached_equivalent(name, area):
+    reference = get_values(name, area, 'pandapower')
+    values = get_values(name, area, 'cached')
+    assert sorted(values) == sorted(reference)
+    for key in reference:
+        assert set(values[key]) == set(reference[key]), key
+        keys = list(reference[key])
+        np.testing.assert_allclose(np.array([values[key][k] for k in keys], dtype=float),
+                                   np.array([reference[key][k] for k in keys], dtype=float),
+                                   rtol=1e-6, atol=1e-6, err_msg=key)
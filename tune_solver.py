@@ -0,0 +1,14 @@
+from _source.solver_tuner import SolverTuner
+print('\n***Inicia el ajuste de opciones del solver***\n')
+
+systems = ['ieee9', 'ieee39', 'ieee57', 'ieee118']
+
+#** --------- Búsqueda aleatoria de opciones por sistema ----------#
+tuner = SolverTuner(systems, backend='bonmin_oa', method='random', n_samples=20, seed=0, timeout=600, print_sec=True)
+results = tuner.run()
+
+#** ----------------- Mostrando los resultados --------------------#
+for system_name, df in results.items():
+    print(f'\n{system_name}')
+    print(df[['rank', 'candidate', 'solved', 'objective', 'gap', 'time']].head(5).to_string(index=False))
+print('\nLos perfiles ganadores se usan con solve_model(profile="tuned")')